@@ -1,8 +1,167 @@
 import numpy as np
 import logging
+from math import factorial
+from scipy.linalg import solve_discrete_are
+from scipy.signal import lfilter, lfilter_zi, ss2tf
+
+from . import kernels
 
 logger = logging.getLogger(__name__)
 
+def _shift_time_origin(theta, P, shift):
+    """
+    Re-expresses a linear trend y = a*t + b and its covariance for the time origin moved
+    to t = shift, i.e. y = a*(t - shift) + (b + a*shift).
+    """
+    a, b = theta
+    p00, p01, p11 = P[0, 0], 0.5 * (P[0, 1] + P[1, 0]), P[1, 1]
+    p01_shifted = p01 + shift * p00
+    return (np.array([a, b + a * shift]),
+            np.array([[p00, p01_shifted],
+                      [p01_shifted, p11 + 2 * shift * p01 + shift * shift * p00]]))
+
+def _is_fixed_time_base(time_vector):
+    """
+    Whether derived quantities of time_vector can be cached by identity: the array owns its
+    data and is read-only (e.g. KinematicProcessor.time_vector_buffer).
+    """
+    return (isinstance(time_vector, np.ndarray) and time_vector.base is None
+            and not time_vector.flags.writeable)
+
+class RLSBlockWeights:
+    """
+    Forgetting-factor weights of rls_linear_fit() for one time base, which can be reused
+    for every block sampled on the same times.
+    """
+    __slots__ = ('n', 'filter_q', 't_ref', 'weights', 'w_tau', 'moments', 'prior_weight')
+
+    def __init__(self, time_vector, filter_q):
+        self.n = len(time_vector)
+        self.filter_q = filter_q
+        self.t_ref = float(time_vector[-1])
+        tau = np.asarray(time_vector, dtype=float) - self.t_ref
+        self.weights = filter_q ** np.arange(self.n - 1, -1, -1, dtype=float)
+        self.w_tau = self.weights * tau
+        w_tau_sum = self.w_tau.sum()
+        self.moments = np.array([[np.dot(self.w_tau, tau), w_tau_sum],
+                                 [w_tau_sum, self.weights.sum()]])
+        self.prior_weight = filter_q ** self.n
+
+def rls_linear_fit(data, time_vector, theta, P, filter_q, block_weights=None):
+    """
+    Exponentially-weighted least-squares fit of y = a*t + b over a whole block.
+
+    Gives the same theta and P as running the recursive least squares update
+    k = P*phi / (q + phi^T*P*phi), theta += k*e, P = (P - k*phi^T*P) / q with phi = [t, 1]
+    over every sample, but in closed form: after n samples the information matrix is
+    q^n * P0^-1 + sum_i q^(n-1-i) * phi_i*phi_i^T. The sums are evaluated with times relative
+    to the last sample to keep the 2x2 system well conditioned.
+
+    Args:
+        data (np.ndarray): Samples y_i
+        time_vector (np.ndarray): Sample times t_i
+        theta (np.ndarray): Parameters [a, b] before the block
+        P (np.ndarray): 2x2 covariance before the block
+        filter_q (float): Forgetting factor (0 < q <= 1)
+        block_weights (RLSBlockWeights): Optional precomputed weights for time_vector and filter_q
+
+    Returns:
+        tuple: (theta, P) after the block
+    """
+    data = np.asarray(data, dtype=float)
+    n = len(data)
+    if n == 0:
+        return np.array(theta, dtype=float), np.array(P, dtype=float)
+    if block_weights is None:
+        block_weights = RLSBlockWeights(time_vector, filter_q)
+
+    t_ref = block_weights.t_ref
+    theta_ref, P_ref = _shift_time_origin(theta, P, t_ref)
+    prior_info = np.linalg.inv(P_ref) * block_weights.prior_weight
+
+    info = prior_info + block_weights.moments
+    rhs = prior_info @ theta_ref + np.array([np.dot(block_weights.w_tau, data),
+                                             np.dot(block_weights.weights, data)])
+
+    P_new = np.linalg.inv(info)
+    theta_new = P_new @ rhs
+    return _shift_time_origin(theta_new, P_new, -t_ref)
+
+def rls_linear_detrend(data, time_vector, theta, P, filter_q, block_weights=None, out=None, trend_out=None,
+                       origin_shift=0.0):
+    """
+    Fits the block with rls_linear_fit() and removes the trend given by the updated parameters.
+
+    out and trend_out optionally receive the detrended data and the trend instead of new arrays.
+    With origin_shift, the returned theta and P are re-expressed for the time origin moved to
+    t = origin_shift (e.g. the start of the next block).
+
+    Returns:
+        tuple: (detrended_data, trend, theta, P)
+    """
+    if kernels.rls_detrend_block is not None and np.ndim(data) == 1 and len(data):
+        data = np.asarray(data, dtype=float)
+        if block_weights is None:
+            block_weights = RLSBlockWeights(time_vector, filter_q)
+        detrended = np.empty(len(data)) if out is None else out
+        trend_values = np.empty(len(data)) if trend_out is None else trend_out
+        theta, P = kernels.rls_detrend_block(
+            data, np.asarray(time_vector, dtype=float), block_weights.w_tau, block_weights.weights,
+            block_weights.moments, block_weights.prior_weight, block_weights.t_ref,
+            np.asarray(theta, dtype=float), np.asarray(P, dtype=float), detrended, trend_values,
+            float(origin_shift))
+        return detrended, trend_values, theta, P
+    theta, P = rls_linear_fit(data, time_vector, theta, P, filter_q, block_weights)
+    trend_values = np.multiply(np.asarray(time_vector, dtype=float), theta[0], out=trend_out)
+    trend_values += theta[1]
+    if origin_shift:
+        theta, P = _shift_time_origin(theta, P, origin_shift)
+    return np.subtract(data, trend_values, out=out), trend_values, theta, P
+
+def kalman_trend_filter(dt, cutoff_hz, order):
+    """
+    Designs the steady-state Kalman filter that estimates a polynomial trend.
+
+    The trend is modelled as a state [level, slope, ...] of order + 1 derivatives whose
+    highest derivative is driven by white noise (order 1: constant-velocity drift, order 2:
+    constant-acceleration drift). The measurement is the signal itself, i.e. the
+    pseudo-measurement that the detrended signal is zero-mean (zero velocity or zero mean
+    displacement). The noise ratio is chosen so the filter's natural frequency is
+    2 * pi * cutoff_hz. Once the covariance has converged the filter is linear and
+    time-invariant, so it is returned as an IIR transfer function from signal to trend.
+
+    Args:
+        dt (float): Sample interval (seconds).
+        cutoff_hz (float): Frequency below which content is treated as trend.
+        order (int): Trend order (1 or 2).
+
+    Returns:
+        tuple: (b, a) filter coefficients for scipy.signal.lfilter.
+    """
+    if cutoff_hz <= 0:
+        raise ValueError(f"Kalman detrend cutoff must be positive, got {cutoff_hz}.")
+    if order not in (1, 2):
+        raise ValueError(f"Kalman detrend order must be 1 or 2, got {order}.")
+    n = order + 1
+    transition = np.array([[dt ** (j - i) / factorial(j - i) if j >= i else 0.0
+                            for j in range(n)] for i in range(n)])
+    # Process noise of a white-noise highest derivative, integrated over one step
+    process_noise = np.array([[dt ** (2 * n - 1 - i - j)
+                               / ((2 * n - 1 - i - j) * factorial(n - 1 - i) * factorial(n - 1 - j))
+                               for j in range(n)] for i in range(n)])
+    measurement = np.zeros((1, n))
+    measurement[0, 0] = 1.0
+    measurement_noise = np.array([[1.0]])
+    # Continuous-time equivalent: natural frequency = (q / (r * dt)) ** (1 / (2 * n))
+    process_noise *= (2 * np.pi * cutoff_hz) ** (2 * n) * dt
+
+    prior_covariance = solve_discrete_are(transition.T, measurement.T, process_noise, measurement_noise)
+    gain = prior_covariance @ measurement.T / (measurement @ prior_covariance @ measurement.T + measurement_noise)
+    # Posterior state: x_k = (I - K H) F x_{k-1} + K y_k, trend_k = H x_k
+    update = (np.eye(n) - gain @ measurement) @ transition
+    b, a = ss2tf(update, gain, measurement @ update, measurement @ gain)
+    return b[0], a
+
 class Detrender:
     """Base class for all detrenders."""
     def __init__(self, params=None):
@@ -14,19 +173,78 @@ class Detrender:
         """
         self.params = params or {}
 
-    def detrend(self, data, time_vector):
+    def detrend(self, data, time_vector, out=None):
         """
         Remove trend from the data.
         
         Args:
             data (np.ndarray): Input data series
             time_vector (np.ndarray): Corresponding time vector
+            out (np.ndarray): Optional preallocated output for the detrended data. When given,
+                              the returned trend is an internal work array that is overwritten
+                              by the next call.
             
         Returns:
             tuple: (detrended_data, trend)
         """
         raise NotImplementedError("Subclasses must implement detrend()")
 
+    def get_state(self):
+        """
+        Returns the state carried between calls as a dict of plain values and arrays, e.g. to
+        checkpoint it. Stateless detrenders return an empty dict.
+        """
+        return {}
+
+    def set_state(self, state):
+        """Restores a state returned by get_state() of a detrender with the same parameters."""
+
+    def _trend_work(self, shape):
+        """Returns the reusable trend array used when detrending into out."""
+        work = getattr(self, '_trend_buffer', None)
+        if work is None or work.shape != shape:
+            work = self._trend_buffer = np.empty(shape)
+        return work
+
+    def supports_incremental(self):
+        """Whether detrend_incremental() is available."""
+        return False
+
+    def detrend_incremental(self, data, dt, out=None):
+        """
+        Remove trend from a segment that directly follows the previously processed one.
+
+        Only the new samples are used to update the detrender state. Times are measured
+        from the start of the segment; the internal time origin then moves to the start of
+        the next segment.
+
+        Args:
+            data (np.ndarray): New samples
+            dt (float): Time step between samples
+            out (np.ndarray): Optional preallocated output for the detrended data (see detrend())
+
+        Returns:
+            tuple: (detrended_data, trend)
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental detrending")
+
+    def detrend_segments(self, data, dt, segment_size):
+        """
+        Apply detrend_incremental() to consecutive segments of segment_size samples (the last
+        one may be shorter), as a stream of frames would. Subclasses may override this with a
+        vectorized equivalent.
+
+        Returns:
+            tuple: (detrended_data, trend)
+        """
+        data = np.asarray(data, dtype=float)
+        detrended_data = np.empty(len(data))
+        trend_values = np.empty(len(data))
+        for start in range(0, len(data), segment_size):
+            segment = slice(start, start + segment_size)
+            detrended_data[segment], trend_values[segment] = self.detrend_incremental(data[segment], dt)
+        return detrended_data, trend_values
+
 class RLSDetrender(Detrender):
     """Recursive Least Squares detrending implementation."""
     def __init__(self, params=None):
@@ -34,6 +252,8 @@ class RLSDetrender(Detrender):
         self.filter_q = params.get('filter_q', 0.9825)
         self.P = np.eye(2) * 1000  # Initial covariance matrix
         self.theta = np.zeros(2)   # Initial parameter vector
+        self._block_weights = None # Weights cached for the last fixed time base
+        self._segment_times = None # Segment time vector of detrend_incremental()
 
     def reset(self):
         """Reset the filter state."""
@@ -41,55 +261,422 @@ class RLSDetrender(Detrender):
         self.theta = np.zeros(2)
         logger.info("RLSDetrender reset.")
 
-    def detrend(self, data, time_vector):
+    def get_state(self):
+        return {'theta': self.theta.copy(), 'P': self.P.copy()}
+
+    def set_state(self, state):
+        theta = np.array(state['theta'], dtype=float)
+        P = np.array(state['P'], dtype=float)
+        if theta.shape != (2,) or P.shape != (2, 2):
+            raise ValueError(f"Invalid RLS state shapes {theta.shape}, {P.shape}.")
+        self.theta, self.P = theta, P
+
+    def _weights_for(self, time_vector):
+        """Returns block weights, cached while the same fixed time base is passed in."""
+        cached = self._block_weights
+        if cached is not None and cached[0] is time_vector and cached[1].filter_q == self.filter_q:
+            return cached[1]
+        block_weights = RLSBlockWeights(time_vector, self.filter_q)
+        if _is_fixed_time_base(time_vector):
+            self._block_weights = (time_vector, block_weights)
+        return block_weights
+
+    def detrend(self, data, time_vector, out=None):
         if len(data) != len(time_vector):
             raise ValueError("Data and time_vector must have the same length.")
-            
+        if len(data) == 0:
+            return np.array([]), np.array([])
+
+        trend_out = None if out is None else self._trend_work(np.shape(data))
+        detrended_data, trend_values, self.theta, self.P = rls_linear_detrend(
+            data, time_vector, self.theta, self.P, self.filter_q,
+            block_weights=self._weights_for(time_vector), out=out, trend_out=trend_out)
+        return detrended_data, trend_values
+
+    def supports_incremental(self):
+        return True
+
+    def detrend_incremental(self, data, dt, out=None):
         n = len(data)
-        trend_values = np.zeros_like(data)
-        
-        for i in range(n):
-            phi = np.array([time_vector[i], 1.0])  # Regressor vector for y = a*t + b
-            
-            y_pred = np.dot(self.theta, phi)  # Predict using current parameters
-            e = data[i] - y_pred  # Prediction error
-            
-            # Update gain vector k
-            P_phi = np.dot(self.P, phi)
-            denom = self.filter_q + np.dot(phi, P_phi)
-            k = P_phi / denom if denom != 0 else np.zeros_like(phi)
-            
-            # Update parameters theta
-            self.theta = self.theta + k * e
-            
-            # Update covariance matrix P
-            self.P = (self.P - np.outer(k, np.dot(phi, self.P))) / self.filter_q
-        
-        # Calculate the trend based on the final (updated) theta for this batch
-        for i in range(n):
-            trend_values[i] = np.dot(self.theta, np.array([time_vector[i], 1.0]))
-            
-        detrended_data = data - trend_values
+        if n == 0:
+            return np.array([]), np.array([])
+        time_vector = self._segment_times
+        if time_vector is None or len(time_vector) != n or time_vector[-1] != (n - 1) * dt:
+            time_vector = self._segment_times = np.arange(n) * dt
+            time_vector.flags.writeable = False
+
+        trend_out = None if out is None else self._trend_work(np.shape(data))
+        # The time origin moves to the start of the next segment so the regressor stays bounded
+        detrended_data, trend_values, self.theta, self.P = rls_linear_detrend(
+            data, time_vector, self.theta, self.P, self.filter_q,
+            block_weights=self._weights_for(time_vector), out=out, trend_out=trend_out,
+            origin_shift=n * dt)
         return detrended_data, trend_values
 
+    # Relative change of P between segments below which it is treated as converged
+    COVARIANCE_CONVERGENCE_RTOL = 1e-13
+
+    def detrend_segments(self, data, dt, segment_size):
+        """
+        Vectorized equivalent of detrend_incremental() over consecutive segments.
+
+        The covariance update does not depend on the data, and for filter_q < 1 it converges to
+        a fixed point after a few segments. From then on, each segment's parameters are a fixed
+        linear map of the previous parameters and of two weighted sums of the segment, so only
+        a 2x2 recurrence remains per segment. Results match segment-wise detrend_incremental()
+        up to floating-point rounding.
+        """
+        if self.filter_q >= 1:
+            # Without forgetting, P keeps shrinking and never reaches a fixed point
+            return super().detrend_segments(data, dt, segment_size)
+        data = np.asarray(data, dtype=float)
+        n, F = len(data), segment_size
+        num_segments = n // F
+        detrended_data = np.empty(n)
+        trend_values = np.empty(n)
+
+        k = 0
+        while k < num_segments:
+            P_before = self.P
+            segment = slice(k * F, (k + 1) * F)
+            detrended_data[segment], trend_values[segment] = self.detrend_incremental(data[segment], dt)
+            k += 1
+            if np.abs(self.P - P_before).max() <= self.COVARIANCE_CONVERGENCE_RTOL * np.abs(self.P).max():
+                break
+        if k < num_segments:
+            block = slice(k * F, num_segments * F)
+            trend_values[block] = self._converged_segment_trends(data[block].reshape(-1, F), dt).ravel()
+            np.subtract(data[block], trend_values[block], out=detrended_data[block])
+        if num_segments * F < n:
+            rest = slice(num_segments * F, n)
+            detrended_data[rest], trend_values[rest] = self.detrend_incremental(data[rest], dt)
+        return detrended_data, trend_values
+
+    def _converged_segment_trends(self, segments, dt):
+        """Trends of (m, F) consecutive segments with P at its fixed point."""
+        F = segments.shape[1]
+        time_vector = np.arange(F) * dt
+        block_weights = RLSBlockWeights(time_vector, self.filter_q)
+        shift = lambda c: np.array([[1.0, 0.0], [c, 1.0]])
+        to_ref, from_ref, to_next = shift(block_weights.t_ref), shift(-block_weights.t_ref), shift(F * dt)
+
+        prior_info = np.linalg.inv(to_ref @ self.P @ to_ref.T) * block_weights.prior_weight
+        P_new = np.linalg.inv(prior_info + block_weights.moments)
+        # Segment parameters: theta_seg = C @ theta_before + D @ sums; next state: to_next @ theta_seg
+        C = from_ref @ P_new @ prior_info @ to_ref
+        D = from_ref @ P_new
+        G, H = to_next @ C, to_next @ D
+
+        sums = np.stack((segments @ block_weights.w_tau, segments @ block_weights.weights), axis=1)
+        inputs = sums @ H.T
+        if kernels.linear_recurrence is not None:
+            state = self.theta.astype(float)
+            states = np.empty((len(inputs), 2))
+            kernels.linear_recurrence(G[:1, :1].ravel(), G[:1, 1:].ravel(), G[1:, :1].ravel(), G[1:, 1:].ravel(),
+                                      inputs[:, :1], inputs[:, 1:], state[:1], state[1:],
+                                      states[:, :1], states[:, 1:])
+            self.theta = state
+        else:
+            (g00, g01), (g10, g11) = G.tolist()
+            a, b = self.theta.tolist()
+            states = []
+            for u0, u1 in inputs.tolist():
+                states.append((a, b))
+                a, b = g00 * a + g01 * b + u0, g10 * a + g11 * b + u1
+            self.theta = np.array([a, b])
+
+        theta_seg = np.array(states) @ C.T + sums @ D.T
+        return theta_seg[:, :1] * time_vector + theta_seg[:, 1:]
+
+class RLSDetrenderBank:
+    """
+    A bank of RLS detrenders, one per row of a (rows, n) block, each with its own forgetting
+    factor (e.g. for a parameter sweep over filter_q).
+
+    detrend_segments() gives, for every row, the result of RLSDetrender.detrend_segments()
+    with that row's filter_q (up to floating-point rounding), but each segment step updates
+    all rows at once with closed-form 2x2 algebra on (rows,) vectors: the covariance update
+    runs until every row has reached its fixed point, after which only each row's linear
+    parameter recurrence remains. State is carried between calls, so long recordings can be
+    processed in chunks of whole segments.
+    """
+    COVARIANCE_CONVERGENCE_RTOL = RLSDetrender.COVARIANCE_CONVERGENCE_RTOL
+
+    def __init__(self, filter_q):
+        self.filter_q = np.atleast_1d(np.asarray(filter_q, dtype=float))
+        self._segment = None # (segment_size, dt) the weights below belong to
+        self.reset()
+
+    def reset(self):
+        """Reset the filter state of all rows."""
+        rows = len(self.filter_q)
+        self.P = np.tile(np.eye(2) * 1000, (rows, 1, 1))
+        self.theta = np.zeros((rows, 2))
+        self._converged = None # Fixed-point recurrence coefficients once all rows converged
+
+    def _prepare(self, segment_size, dt):
+        if self._segment == (segment_size, dt):
+            return
+        self._segment = (segment_size, dt)
+        self._converged = None # The fixed point depends on the segment
+        time_vector = np.arange(segment_size) * dt
+        self._t_ref = float(time_vector[-1])
+        self._tau = time_vector - self._t_ref
+        self._weights = self.filter_q[:, None] ** np.arange(segment_size - 1, -1, -1, dtype=float)
+        self._w_tau = self._weights * self._tau
+        # Information added by one segment: [[sum w*tau^2, sum w*tau], [sum w*tau, sum w]]
+        self._moments = (self._w_tau @ self._tau, self._w_tau.sum(axis=1), self._weights.sum(axis=1))
+        self._prior_weight = self.filter_q ** segment_size
+
+    @staticmethod
+    def _inverse(p00, p01, p11):
+        det = p00 * p11 - p01 * p01
+        return p11 / det, -p01 / det, p00 / det
+
+    def _segment_update(self, p00, p01, p11):
+        """
+        Covariance update of one segment for the covariance (p00, p01, p11) at the segment start.
+
+        Returns:
+            tuple: Prior information (in segment reference time) and the new covariance.
+        """
+        c = self._t_ref
+        # Covariance with the time origin moved to the segment's last sample, then inverted
+        i00, i01, i11 = self._inverse(p00, p01 + c * p00, p11 + 2 * c * p01 + c * c * p00)
+        pw = self._prior_weight
+        prior = (i00 * pw, i01 * pw, i11 * pw)
+        m00, m01, m11 = self._moments
+        return prior, self._inverse(prior[0] + m00, prior[1] + m01, prior[2] + m11)
+
+    def _step(self, s0, s1):
+        """One segment for all rows with the general covariance update; returns its parameters."""
+        p00, p01, p11 = self.P[:, 0, 0], 0.5 * (self.P[:, 0, 1] + self.P[:, 1, 0]), self.P[:, 1, 1]
+        (r00, r01, r11), (n00, n01, n11) = self._segment_update(p00, p01, p11)
+        a, b = self.theta[:, 0], self.theta[:, 1] + self.theta[:, 0] * self._t_ref
+        rhs0, rhs1 = r00 * a + r01 * b + s0, r01 * a + r11 * b + s1
+        a_seg, b_seg = n00 * rhs0 + n01 * rhs1, n01 * rhs0 + n11 * rhs1
+
+        # Next origin: start of the next segment, i.e. dt after the reference time
+        dt = self._segment[1]
+        P_next = np.empty_like(self.P)
+        P_next[:, 0, 0] = n00
+        P_next[:, 0, 1] = P_next[:, 1, 0] = n01 + dt * n00
+        P_next[:, 1, 1] = n11 + 2 * dt * n01 + dt * dt * n00
+        converged = (np.abs(P_next - self.P).max(axis=(1, 2))
+                     <= self.COVARIANCE_CONVERGENCE_RTOL * np.abs(P_next).max(axis=(1, 2)))
+        self.P = P_next
+        self.theta = np.stack((a_seg, b_seg + a_seg * dt), axis=1)
+        if converged.all():
+            self._converged = self._fixed_point_recurrence()
+        return a_seg, b_seg
+
+    def _fixed_point_recurrence(self):
+        """
+        With P at its fixed point, a segment's parameters are A @ theta + B @ sums (A, B per
+        row) and the next state is S(dt) of them; returns the entries of A, B as (rows,) arrays.
+        """
+        p00, p01, p11 = self.P[:, 0, 0], self.P[:, 0, 1], self.P[:, 1, 1]
+        (r00, r01, r11), (b00, b01, b11) = self._segment_update(p00, p01, p11)
+        c = self._t_ref
+        # A = B @ prior @ S(t_ref), S(c) = [[1, 0], [c, 1]]
+        m00, m01 = b00 * r00 + b01 * r01, b00 * r01 + b01 * r11
+        m10, m11 = b01 * r00 + b11 * r01, b01 * r01 + b11 * r11
+        return (m00 + c * m01, m01, m10 + c * m11, m11), (b00, b01, b11)
+
+    def detrend_segments(self, data, dt, segment_size):
+        """
+        Detrends consecutive segments of every row.
+
+        Args:
+            data (np.ndarray): Block of shape (rows, n); n must be a multiple of segment_size.
+            dt (float): Time step between samples.
+            segment_size (int): Samples per segment (the processing frame size).
+
+        Returns:
+            tuple: (detrended_data, trend), each of shape (rows, n).
+        """
+        data = np.asarray(data, dtype=float)
+        rows, n = data.shape
+        if rows != len(self.filter_q):
+            raise ValueError(f"Data has {rows} rows, the bank has {len(self.filter_q)}.")
+        if n % segment_size:
+            raise ValueError(f"Length ({n}) must be a multiple of segment_size ({segment_size}).")
+        self._prepare(segment_size, dt)
+        num_segments = n // segment_size
+        segments = data.reshape(rows, num_segments, segment_size)
+        # Weighted sums of each segment (times relative to the segment's last sample), (m, rows)
+        s0 = np.einsum('rmf,rf->mr', segments, self._w_tau)
+        s1 = np.einsum('rmf,rf->mr', segments, self._weights)
+        a_seg, b_seg = np.empty((num_segments, rows)), np.empty((num_segments, rows))
+
+        k = 0
+        while k < num_segments and self._converged is None:
+            a_seg[k], b_seg[k] = self._step(s0[k], s1[k])
+            k += 1
+        if k < num_segments:
+            (a00, a01, a10, a11), (b00, b01, b11) = self._converged
+            # Segment parameters: A @ state + B @ sums; next state: S(dt) @ parameters
+            u0, u1 = b00 * s0[k:] + b01 * s1[k:], b01 * s0[k:] + b11 * s1[k:]
+            a, b = self.theta[:, 0].copy(), self.theta[:, 1].copy()
+            if kernels.linear_recurrence is not None:
+                # Recurrence of the states; a segment's parameters are its next state shifted back by dt
+                states_a, states_b = np.empty_like(u0), np.empty_like(u0)
+                kernels.linear_recurrence(a00, a01, a10 + dt * a00, a11 + dt * a01, u0, u1 + dt * u0,
+                                          a, b, states_a, states_b)
+                a_seg[k:] = a00 * states_a + a01 * states_b + u0
+                b_seg[k:] = a10 * states_a + a11 * states_b + u1
+            else:
+                for j in range(num_segments - k):
+                    a_new = a00 * a + a01 * b + u0[j]
+                    b_new = a10 * a + a11 * b + u1[j]
+                    a_seg[k + j], b_seg[k + j] = a_new, b_new
+                    a, b = a_new, b_new + a_new * dt
+            self.theta = np.stack((a, b), axis=1)
+        trend_values = (a_seg.T[:, :, None] * self._tau + b_seg.T[:, :, None]).reshape(rows, n)
+        return data - trend_values, trend_values
+
 class PolynomialDetrender(Detrender):
-    """Polynomial fitting detrending implementation."""
-    def detrend(self, data, time_vector):
-        if len(data) != len(time_vector):
+    """
+    Polynomial fitting detrending implementation.
+
+    The least-squares fit only depends on the time base and the order, so the orthonormal
+    basis Q of the (scaled) Vandermonde matrix is computed once per time base and cached.
+    The trend is then the projection Q @ (Q^T @ y), which also works for a (channels, n)
+    block in one matrix product.
+    """
+
+    # Number of distinct time bases kept in the projection cache
+    MAX_CACHED_BASES = 8
+
+    def __init__(self, params=None):
+        super().__init__(params)
+        self._projections = {}
+        self._last_projection = None # (time_vector, order, basis) of the last fixed time base
+
+    def _projection_basis(self, time_vector, poly_order):
+        """Returns the cached (n, order + 1) orthonormal basis for this time base and order."""
+        last = self._last_projection
+        if last is not None and last[0] is time_vector and last[1] == poly_order:
+            return last[2]
+        fixed = _is_fixed_time_base(time_vector)
+        time_vector = np.asarray(time_vector, dtype=float)
+        key = (poly_order, time_vector.tobytes())
+        basis = self._projections.get(key)
+        if basis is None:
+            # Centering and scaling the time base keeps the Vandermonde matrix well conditioned
+            span = np.ptp(time_vector) if len(time_vector) > 1 else 0.0
+            scaled = (time_vector - time_vector.mean()) / (span if span > 0 else 1.0)
+            vandermonde = np.vander(scaled, poly_order + 1)
+            basis, _ = np.linalg.qr(vandermonde)
+            if len(self._projections) >= self.MAX_CACHED_BASES:
+                self._projections.clear()
+            self._projections[key] = basis
+        if fixed:
+            self._last_projection = (time_vector, poly_order, basis)
+        return basis
+
+    def detrend(self, data, time_vector, out=None):
+        """
+        Remove a polynomial trend.
+
+        Args:
+            data (np.ndarray): Input data of shape (n,) or (channels, n)
+            time_vector (np.ndarray): Corresponding time vector of shape (n,)
+            out (np.ndarray): Optional preallocated output for the detrended data (see Detrender.detrend)
+
+        Returns:
+            tuple: (detrended_data, trend), same shape as data
+        """
+        data = np.asarray(data, dtype=float)
+        if data.shape[-1] != len(time_vector):
             raise ValueError("Data and time_vector must have the same length.")
-            
+
         poly_order = self.params.get('poly_order', 2)
-        coeffs = np.polyfit(time_vector, data, poly_order)
-        trend_values = np.polyval(coeffs, time_vector)
-        detrended_data = data - trend_values
+        basis = self._projection_basis(time_vector, poly_order)
+        if out is None:
+            trend_values = (data @ basis) @ basis.T
+            return data - trend_values, trend_values
+        trend_values = np.dot(data @ basis, basis.T, out=self._trend_work(data.shape))
+        return np.subtract(data, trend_values, out=out), trend_values
+
+class KalmanDetrender(Detrender):
+    """
+    Steady-state Kalman trend estimator (see kalman_trend_filter).
+
+    Each sample updates the trend state in constant time and no history is kept, so only
+    detrend_incremental() is meant for streaming; detrend() filters a series from its first
+    sample without touching the streaming state. Data may be (n,) or (channels, n), e.g. all
+    axes of several sensors: every channel has its own state and the whole block is filtered
+    in one call. The filter is time-invariant, so segment boundaries do not change the result.
+
+    Params: 'kalman_cutoff_hz' (default 0.3) and 'kalman_order' (1 or 2, default 2).
+    """
+    def __init__(self, params=None):
+        super().__init__(params)
+        self.cutoff_hz = self.params.get('kalman_cutoff_hz', 0.3)
+        self.order = self.params.get('kalman_order', 2)
+        kalman_trend_filter(1.0, self.cutoff_hz, self.order) # Validate the parameters
+        self._design = None # (dt, b, a, zi for a unit step)
+        self.state = None # lfilter state per channel, created from the first samples
+
+    def reset(self):
+        """Reset the filter state."""
+        self.state = None
+        logger.info("KalmanDetrender reset.")
+
+    def get_state(self):
+        return {'state': None if self.state is None else self.state.copy()}
+
+    def set_state(self, state):
+        filter_state = state.get('state')
+        if filter_state is not None:
+            filter_state = np.array(filter_state, dtype=float)
+            if filter_state.shape[-1] != self.order + 1:
+                raise ValueError(f"Kalman state has {filter_state.shape[-1]} delays, expected {self.order + 1}.")
+        self.state = filter_state
+
+    def _filter_for(self, dt):
+        if self._design is None or self._design[0] != dt:
+            b, a = kalman_trend_filter(dt, self.cutoff_hz, self.order)
+            self._design = (dt, b, a, lfilter_zi(b, a))
+        return self._design[1:]
+
+    def _filter(self, data, dt, state, out):
+        b, a, unit_state = self._filter_for(dt)
+        if state is None:
+            # Start as if the first value had been the trend forever
+            state = data[..., :1] * unit_state
+        trend_values, state = lfilter(b, a, data, axis=-1, zi=state)
+        return np.subtract(data, trend_values, out=out), trend_values, state
+
+    def detrend(self, data, time_vector, out=None):
+        data = np.asarray(data, dtype=float)
+        if data.shape[-1] != len(time_vector):
+            raise ValueError("Data and time_vector must have the same length.")
+        if data.shape[-1] < 2:
+            return np.zeros_like(data), data.copy()
+        detrended_data, trend_values, _ = self._filter(data, time_vector[1] - time_vector[0], None, out)
         return detrended_data, trend_values
 
+    def supports_incremental(self):
+        return True
+
+    def detrend_incremental(self, data, dt, out=None):
+        data = np.asarray(data, dtype=float)
+        if data.shape[-1] == 0:
+            return np.array([]), np.array([])
+        detrended_data, trend_values, self.state = self._filter(data, dt, self.state, out)
+        return detrended_data, trend_values
+
+    def detrend_segments(self, data, dt, segment_size):
+        return self.detrend_incremental(data, dt)
+
 def create_detrender(method, params=None):
     """
     Factory function to create a detrender instance.
     
     Args:
-        method (str): Detrending method ("RLS", "Polynomial", or "None")
+        method (str): Detrending method ("RLS", "Polynomial", "Kalman", or "None")
         params (dict): Parameters specific to the detrending method
         
     Returns:
@@ -99,6 +686,8 @@ def create_detrender(method, params=None):
         return RLSDetrender(params)
     elif method == "Polynomial":
         return PolynomialDetrender(params)
+    elif method == "Kalman":
+        return KalmanDetrender(params)
     elif method == "None":
         return None
     else:
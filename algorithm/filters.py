@@ -1,69 +1,190 @@
 import numpy as np
-from scipy.signal import butter, sosfilt, sosfreqz
+from functools import lru_cache
+from scipy.signal import butter, iirnotch, tf2sos, sosfilt, sosfilt_zi, sosfiltfilt, sosfreqz
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_NOTCH_Q = 30.0
+
+@lru_cache(maxsize=64)
+def design_sos(btype, normal_cutoff, order=2, notch_q=DEFAULT_NOTCH_Q):
+    """
+    Designs (and caches) the second-order sections of a filter.
+
+    Filters with the same parameters share one design, so creating filters per sensor or
+    per axis costs no design time after the first one.
+
+    Args:
+        btype (str): 'low', 'high', 'bandpass', 'bandstop' (Butterworth) or 'notch' (iirnotch).
+        normal_cutoff (float or tuple): Cutoff(s) normalized to the Nyquist frequency;
+            (low, high) for band filters.
+        order (int): Butterworth order (unused for 'notch').
+        notch_q (float): Quality factor of the notch filter.
+
+    Returns:
+        np.ndarray: SOS array of shape (n_sections, 6), shared by all callers (do not modify).
+    """
+    if btype == 'notch':
+        return tf2sos(*iirnotch(normal_cutoff, notch_q))
+    return butter(order, normal_cutoff, btype=btype, analog=False, output='sos')
+
 class Filter:
-    """Base class for all filters."""
-    def __init__(self, cutoff_freq, fs, order=2):
+    """
+    Base class for all filters.
+
+    The SOS coefficients are designed once in the constructor (see design_sos()). In the
+    default streaming form, apply() keeps the filter state between calls, so consecutive
+    blocks are filtered as one continuous signal without edge transients; the state is
+    initialized to the steady state of the first sample. Blocks of shape (N,) or (C, N)
+    are filtered along the last axis, with one state per channel.
+
+    With zero_phase=True the filter runs forward and backward (sosfiltfilt) on each block
+    independently; this is meant for offline use on complete recordings.
+    """
+    btype = None
+
+    def __init__(self, cutoff_freq, fs, order=2, zero_phase=False):
         """
         Initialize the filter.
-        
+
         Args:
-            cutoff_freq (float): Cutoff frequency in Hz
+            cutoff_freq (float or tuple): Cutoff frequency in Hz; (low, high) for band filters
             fs (float): Sampling frequency in Hz
             order (int): Filter order
+            zero_phase (bool): Filter forward and backward, statelessly (offline use)
         """
         self.cutoff_freq = cutoff_freq
         self.fs = fs
         self.order = order
+        self.zero_phase = zero_phase
         self.nyq = 0.5 * fs
-        self.normal_cutoff = cutoff_freq / self.nyq
-        
-        if self.normal_cutoff >= 1.0:
+        if np.ndim(cutoff_freq) == 0:
+            self.normal_cutoff = cutoff_freq / self.nyq
+        else:
+            self.normal_cutoff = tuple(float(f) / self.nyq for f in cutoff_freq)
+        self._zi = None
+
+        normal = np.atleast_1d(self.normal_cutoff)
+        self.bypassed = False
+        if np.any(normal >= 1.0):
             logger.warning(f"Cutoff frequency {cutoff_freq}Hz is >= Nyquist frequency {self.nyq}Hz. Filter will be bypassed.")
-        if self.normal_cutoff <= 0.0:
+            self.bypassed = True
+        if np.any(normal <= 0.0):
             logger.warning(f"Cutoff frequency {cutoff_freq}Hz is <= 0Hz. Filter will be bypassed.")
+            self.bypassed = True
+        if np.any(np.diff(normal) <= 0.0):
+            logger.warning(f"Cutoff frequencies {cutoff_freq}Hz are not increasing. Filter will be bypassed.")
+            self.bypassed = True
+        self.sos = None if self.bypassed else self._design()
+
+    def _design(self):
+        return design_sos(self.btype, self.normal_cutoff, self.order)
+
+    def reset(self):
+        """Forgets the filter state; the next apply() starts a new signal."""
+        self._zi = None
+
+    def get_state(self):
+        """Returns the streaming state ({'zi': array or None}), e.g. to checkpoint it."""
+        return {'zi': None if self._zi is None else self._zi.copy()}
+
+    def set_state(self, state):
+        """Restores a state returned by get_state() of a filter with the same design."""
+        zi = state.get('zi')
+        if zi is not None:
+            zi = np.array(zi, dtype=float)
+            if self.sos is None or zi.shape[0] != len(self.sos) or zi.shape[-1] != 2:
+                raise ValueError(f"Filter state of shape {zi.shape} does not match the filter design.")
+        self._zi = zi
 
     def apply(self, data):
-        """Apply the filter to the input data."""
-        raise NotImplementedError("Subclasses must implement apply()")
+        """
+        Apply the filter to the input data.
+
+        Args:
+            data (np.ndarray): Samples of shape (N,) or (C, N).
+
+        Returns:
+            np.ndarray: Filtered samples (the input itself if the filter is bypassed).
+        """
+        if self.bypassed:
+            return data
+        data = np.asarray(data, dtype=float)
+        if data.shape[-1] == 0:
+            return data.copy()
+        if self.zero_phase:
+            # sosfiltfilt pads by up to 3 * (2 * n_sections) samples; shorten it for short blocks
+            padlen = min(3 * (2 * len(self.sos) + 1), data.shape[-1] - 1)
+            return sosfiltfilt(self.sos, data, axis=-1, padlen=padlen)
+
+        if self._zi is None or self._zi.shape[1:-1] != data.shape[:-1]:
+            zi = sosfilt_zi(self.sos).reshape((len(self.sos),) + (1,) * (data.ndim - 1) + (2,))
+            self._zi = zi * data[..., 0][np.newaxis, ..., np.newaxis]
+        filtered, self._zi = sosfilt(self.sos, data, axis=-1, zi=self._zi)
+        return filtered
+
+    def frequency_response(self, worN=512):
+        """Returns (frequencies in Hz, complex response) of the designed filter."""
+        if self.bypassed:
+            freqs = np.linspace(0, self.nyq, worN, endpoint=False)
+            return freqs, np.ones(worN, dtype=complex)
+        return sosfreqz(self.sos, worN=worN, fs=self.fs)
 
 class HighPassFilter(Filter):
     """High-pass filter implementation using Butterworth filter."""
-    def apply(self, data):
-        if self.normal_cutoff >= 1.0 or self.normal_cutoff <= 0.0:
-            return data
-            
-        sos = butter(self.order, self.normal_cutoff, btype='high', analog=False, output='sos')
-        return sosfilt(sos, data)
+    btype = 'high'
 
 class LowPassFilter(Filter):
     """Low-pass filter implementation using Butterworth filter."""
-    def apply(self, data):
-        if self.normal_cutoff >= 1.0 or self.normal_cutoff <= 0.0:
-            return data
-            
-        sos = butter(self.order, self.normal_cutoff, btype='low', analog=False, output='sos')
-        return sosfilt(sos, data)
+    btype = 'low'
+
+class BandPassFilter(Filter):
+    """Band-pass Butterworth filter; cutoff_freq is (low, high) in Hz."""
+    btype = 'bandpass'
+
+class BandStopFilter(Filter):
+    """Band-stop Butterworth filter; cutoff_freq is (low, high) in Hz."""
+    btype = 'bandstop'
+
+class NotchFilter(Filter):
+    """Second-order notch (iirnotch) at cutoff_freq with quality factor `quality`."""
+    btype = 'notch'
 
-def create_filter(filter_type, cutoff_freq, fs, order=2):
+    def __init__(self, cutoff_freq, fs, quality=DEFAULT_NOTCH_Q, zero_phase=False):
+        self.quality = quality
+        super().__init__(cutoff_freq, fs, order=2, zero_phase=zero_phase)
+
+    def _design(self):
+        return design_sos(self.btype, self.normal_cutoff, notch_q=self.quality)
+
+def create_filter(filter_type, cutoff_freq, fs, order=2, zero_phase=False, high_cutoff_freq=None,
+                  quality=DEFAULT_NOTCH_Q):
     """
     Factory function to create a filter instance.
-    
+
     Args:
-        filter_type (str): Type of filter ("High-pass" or "Low-pass")
-        cutoff_freq (float): Cutoff frequency in Hz
+        filter_type (str): Type of filter ("High-pass", "Low-pass", "Band-pass", "Band-stop" or "Notch")
+        cutoff_freq (float): Cutoff frequency in Hz (lower cutoff for band filters, center for "Notch")
         fs (float): Sampling frequency in Hz
         order (int): Filter order
-        
+        zero_phase (bool): Zero-phase forward-backward filtering for offline use
+        high_cutoff_freq (float): Upper cutoff frequency in Hz ("Band-pass"/"Band-stop" only)
+        quality (float): Quality factor ("Notch" only)
+
     Returns:
         Filter: An instance of the specified filter type
     """
     if filter_type == "High-pass":
-        return HighPassFilter(cutoff_freq, fs, order)
+        return HighPassFilter(cutoff_freq, fs, order, zero_phase)
     elif filter_type == "Low-pass":
-        return LowPassFilter(cutoff_freq, fs, order)
+        return LowPassFilter(cutoff_freq, fs, order, zero_phase)
+    elif filter_type in ("Band-pass", "Band-stop"):
+        if high_cutoff_freq is None:
+            raise ValueError(f"{filter_type} filter needs high_cutoff_freq.")
+        filter_class = BandPassFilter if filter_type == "Band-pass" else BandStopFilter
+        return filter_class((cutoff_freq, high_cutoff_freq), fs, order, zero_phase)
+    elif filter_type == "Notch":
+        return NotchFilter(cutoff_freq, fs, quality, zero_phase)
     else:
-        raise ValueError(f"Unknown filter type: {filter_type}") 
\ No newline at end of file
+        raise ValueError(f"Unknown filter type: {filter_type}")
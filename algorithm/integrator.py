@@ -1,10 +1,55 @@
 import numpy as np
 import logging
 
+from . import kernels
+
 logger = logging.getLogger(__name__)
 
+class IntegratorState:
+    """
+    State carried between blocks of a streaming integration.
+
+    Attributes:
+        count (int): Number of samples integrated so far
+        last_sample (float): Last input sample
+        prev_sample (float): Input sample before last_sample
+        running_sum (float): Integral value at the last sample
+        grid_sum (float): Integral value at the last even sample index (Simpson pairs)
+    """
+    __slots__ = ('count', 'last_sample', 'prev_sample', 'running_sum', 'grid_sum')
+
+    def __init__(self, initial_value=0.0):
+        self.count = 0
+        self.last_sample = 0.0
+        self.prev_sample = 0.0
+        self.running_sum = initial_value
+        self.grid_sum = initial_value
+
+    def get_state(self):
+        """Returns the state as a dict of plain values (see set_state())."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def set_state(self, state):
+        """Restores a state returned by get_state()."""
+        self.count = int(state['count'])
+        for name in ('last_sample', 'prev_sample', 'running_sum', 'grid_sum'):
+            setattr(self, name, float(state[name]))
+
+    def _advance(self, block, integrated, grid_sum=None):
+        if len(block) > 1:
+            self.prev_sample = block[-2]
+        else:
+            self.prev_sample = self.last_sample
+        self.last_sample = block[-1]
+        self.count += len(block)
+        self.running_sum = integrated[-1]
+        self.grid_sum = self.running_sum if grid_sum is None else grid_sum
+
 class Integrator:
     """Base class for all integrators."""
+
+    # Samples by which integrate_block() output lags its input (0 for the time-domain rules)
+    latency = 0
     def __init__(self, dt):
         """
         Initialize the integrator.
@@ -16,87 +61,333 @@ class Integrator:
             raise ValueError("Time step dt must be positive.")
         self.dt = dt
 
-    def integrate(self, data_series):
+    def integrate(self, data_series, out=None):
         """
         Integrate the input data series.
         
         Args:
             data_series (np.ndarray): Input data series to integrate
+            out (np.ndarray): Optional preallocated output of the same length (must not
+                              overlap data_series)
             
         Returns:
             np.ndarray: Integrated data series
         """
-        raise NotImplementedError("Subclasses must implement integrate()")
-
-class TrapezoidalIntegrator(Integrator):
-    """Trapezoidal rule integration implementation."""
-    def integrate(self, data_series):
         if not isinstance(data_series, np.ndarray) or data_series.ndim != 1:
             raise ValueError("Input data_series must be a 1D numpy array.")
         if len(data_series) == 0:
             return np.array([])
-            
-        integrated_series = np.zeros_like(data_series, dtype=float)
-        for i in range(1, len(data_series)):
-            integrated_series[i] = integrated_series[i-1] + \
-                                   (data_series[i-1] + data_series[i]) * self.dt / 2
+        integrated_series, _ = self.integrate_block(data_series, IntegratorState(), out=out)
         return integrated_series
 
-class SimpsonIntegrator(Integrator):
-    """Simpson's rule integration implementation."""
-    def integrate(self, data_series):
-        if not isinstance(data_series, np.ndarray) or data_series.ndim != 1:
-            raise ValueError("Input data_series must be a 1D numpy array.")
-        if len(data_series) == 0:
-            return np.array([])
-            
-        integrated_series = np.zeros_like(data_series, dtype=float)
-        
-        # Use trapezoidal for the last point if odd number of points
-        if len(data_series) % 2 != 0:
-            logger.warning("Simpson's rule requires even number of points. Using trapezoidal rule for last point.")
-            for i in range(1, len(data_series)-1, 2):
-                integrated_series[i+1] = integrated_series[i-1] + \
-                    (data_series[i-1] + 4*data_series[i] + data_series[i+1]) * self.dt / 3
-            if len(data_series) % 2 != 0:
-                integrated_series[-1] = integrated_series[-2] + \
-                    (data_series[-2] + data_series[-1]) * self.dt / 2
+    def integrate_block(self, block, state=None, out=None):
+        """
+        Integrate one block of a stream, continuing from the carried state.
+
+        Integrating a series block by block gives the same result as integrate() on the
+        whole series (up to floating-point rounding).
+
+        Args:
+            block (np.ndarray): New samples
+            state (IntegratorState): State after the previous block (None to start a new stream)
+            out (np.ndarray): Optional preallocated output of the same length as block (must
+                              not overlap block). Trapezoidal and Rectangular then do not allocate.
+
+        Returns:
+            tuple: (integrated values for the block, updated state)
+        """
+        raise NotImplementedError("Subclasses must implement integrate_block()")
+
+    def create_state(self, initial_value=0.0):
+        """Returns a new streaming state for integrate_block()."""
+        return IntegratorState(initial_value)
+
+    @staticmethod
+    def _output_array(n, out):
+        if out is None:
+            return np.empty(n)
+        if len(out) != n:
+            raise ValueError(f"Output array length {len(out)} does not match the input length {n}.")
+        return out
+
+class TrapezoidalIntegrator(Integrator):
+    """Trapezoidal rule integration implementation."""
+    def integrate_block(self, block, state=None, out=None):
+        state = state if state is not None else IntegratorState()
+        block = np.asarray(block, dtype=float)
+        if len(block) == 0:
+            return np.array([]), state
+
+        # Steps are built in the output array and summed in place
+        integrated = self._output_array(len(block), out)
+        if kernels.trapezoidal is not None:
+            kernels.trapezoidal(block, self.dt, state.count == 0, state.last_sample, state.running_sum, integrated)
+            state._advance(block, integrated)
+            return integrated, state
+        if state.count == 0:
+            # First sample of the stream sits at the initial value
+            integrated[0] = state.running_sum
+            steps = integrated[1:]
         else:
-            for i in range(1, len(data_series), 2):
-                integrated_series[i+1] = integrated_series[i-1] + \
-                    (data_series[i-1] + 4*data_series[i] + data_series[i+1]) * self.dt / 3
-        return integrated_series
+            integrated[0] = state.last_sample + block[0]
+            steps = integrated
+        np.add(block[:-1], block[1:], out=integrated[1:])
+        steps *= self.dt
+        steps /= 2
+        np.cumsum(steps, out=steps)
+        steps += state.running_sum
+        state._advance(block, integrated)
+        return integrated, state
+
+class SimpsonIntegrator(Integrator):
+    """
+    Cumulative Simpson's rule integration implementation.
+
+    Values at even sample indices are composite Simpson sums over pairs of intervals. The
+    value at an odd index i adds the integral over [i-1, i] of the parabola through samples
+    i-2, i-1, i (the trapezoidal rule for i = 1). Every value only depends on samples up to
+    its own index, so streaming blocks of any length gives the same result.
+    """
+    def integrate_block(self, block, state=None, out=None):
+        state = state if state is not None else IntegratorState()
+        block = np.asarray(block, dtype=float)
+        n = len(block)
+        if n == 0:
+            return np.array([]), state
+        if kernels.simpson is not None:
+            integrated = self._output_array(n, out)
+            grid_sum = kernels.simpson(block, self.dt, state.count, state.prev_sample, state.last_sample,
+                                       state.grid_sum, integrated)
+            state._advance(block, integrated, grid_sum=grid_sum)
+            return integrated, state
+
+        # Prepend up to two carried samples so pairs and parabolas can span block boundaries
+        offset = min(state.count, 2)
+        carried = (state.prev_sample, state.last_sample)[2 - offset:]
+        y = np.concatenate((carried, block))
+        first_index = state.count - offset # Global sample index of y[0]
+        num = len(y)
+        integrated = np.empty(num)
+
+        # Even global indices: the first one holds grid_sum, the rest add one Simpson pair each
+        even = np.arange(first_index % 2, num, 2)
+        pairs = (y[even[1:] - 2] + 4 * y[even[1:] - 1] + y[even[1:]]) * self.dt / 3
+        integrated[even[0]] = state.grid_sum
+        integrated[even[1:]] = state.grid_sum + np.cumsum(pairs)
+
+        # Odd global indices: previous even value plus half a parabola
+        odd = np.arange(1 - first_index % 2, num, 2)
+        odd = odd[odd >= offset]
+        if odd.size:
+            if first_index + odd[0] == 1:
+                integrated[odd[0]] = integrated[odd[0] - 1] + (y[odd[0] - 1] + y[odd[0]]) * self.dt / 2
+                odd = odd[1:]
+            integrated[odd] = integrated[odd - 1] + \
+                (-y[odd - 2] + 8 * y[odd - 1] + 5 * y[odd]) * self.dt / 12
+
+        last_even_value = integrated[even[-1]]
+        integrated = integrated[offset:]
+        if out is not None:
+            out = self._output_array(n, out)
+            out[:] = integrated
+            integrated = out
+        state._advance(block, integrated, grid_sum=last_even_value)
+        return integrated, state
 
 class RectangularIntegrator(Integrator):
     """Rectangular rule integration implementation."""
-    def integrate(self, data_series):
+    def integrate_block(self, block, state=None, out=None):
+        state = state if state is not None else IntegratorState()
+        block = np.asarray(block, dtype=float)
+        if len(block) == 0:
+            return np.array([]), state
+
+        integrated = self._output_array(len(block), out)
+        if kernels.rectangular is not None:
+            kernels.rectangular(block, self.dt, state.count == 0, state.running_sum, integrated)
+            state._advance(block, integrated)
+            return integrated, state
+        if state.count == 0:
+            # First sample of the stream sits at the initial value
+            integrated[0] = state.running_sum
+            steps, samples = integrated[1:], block[1:]
+        else:
+            steps, samples = integrated, block
+        np.multiply(samples, self.dt, out=steps)
+        np.cumsum(steps, out=steps)
+        steps += state.running_sum
+        state._advance(block, integrated)
+        return integrated, state
+
+class FrequencyIntegratorState:
+    """
+    Streaming state of FrequencyIntegrator.
+
+    Attributes:
+        count (int): Number of samples integrated so far
+        history (np.ndarray): Input samples not yet covered by a complete segment
+        overlap (np.ndarray): Second half of the last segment's output, waiting for the next segment
+        output (np.ndarray): Finished output samples not yet returned
+        lead_in (int): Finished samples of the zero lead-in still to be discarded
+    """
+    __slots__ = ('count', 'history', 'overlap', 'output', 'lead_in')
+
+    def __init__(self, segment_size):
+        hop = segment_size // 2
+        self.count = 0
+        # The stream is preceded by one hop of zeros so the first samples get two segments
+        self.history = np.zeros(hop)
+        self.overlap = np.zeros(hop)
+        self.lead_in = hop
+        # Output starts with zeros so that it lags the input by exactly segment_size - 1 samples
+        self.output = np.zeros(segment_size - 1)
+
+    def get_state(self):
+        """Returns the state as a dict of plain values and array copies (see set_state())."""
+        return {'count': self.count, 'history': self.history.copy(), 'overlap': self.overlap.copy(),
+                'output': self.output.copy(), 'lead_in': self.lead_in}
+
+    def set_state(self, state):
+        """Restores a state returned by get_state() of a state with the same segment_size."""
+        overlap = np.array(state['overlap'], dtype=float)
+        if overlap.shape != self.overlap.shape:
+            raise ValueError(f"State is for segment size {2 * len(overlap)}, not {2 * len(self.overlap)}.")
+        self.count = int(state['count'])
+        self.history = np.array(state['history'], dtype=float)
+        self.overlap = overlap
+        self.output = np.array(state['output'], dtype=float)
+        self.lead_in = int(state['lead_in'])
+
+class FrequencyIntegrator(Integrator):
+    """
+    Frequency-domain integration by weighted overlap-add.
+
+    The input is cut into segments of segment_size samples with 50% overlap, weighted with a
+    periodic Hann window (whose overlapped copies sum to one), and each segment's spectrum is
+    divided by (j*omega)^order. Bins outside [low_cut_hz, high_cut_hz] are set to zero, so DC
+    offsets and drift are removed without a detrending stage. The inverse transforms are
+    overlap-added. The cost is one FFT of segment_size per segment_size / 2 samples.
+
+    A sample is final once both segments covering it have been transformed, so integrate_block()
+    returns its results with a latency of segment_size - 1 samples (the first outputs are zeros).
+    integrate() processes a whole series and returns it without delay; streaming the same series
+    gives integrate()'s output delayed by the latency.
+
+    The result is accurate for components well inside the band and at least about four
+    frequency bins (4 / (segment_size * dt) Hz) above zero; choose low_cut_hz accordingly.
+    """
+    def __init__(self, dt, low_cut_hz=1.0, high_cut_hz=None, segment_size=512, order=1):
+        """
+        Args:
+            dt (float): Time step between data points
+            low_cut_hz (float): Lower band edge (must be positive)
+            high_cut_hz (float): Upper band edge (None for the Nyquist frequency)
+            segment_size (int): FFT segment length (even, at least 4)
+            order (int): Number of integrations (1: divide by j*omega, 2: by (j*omega)^2)
+        """
+        super().__init__(dt)
+        segment_size = int(segment_size)
+        if segment_size < 4 or segment_size % 2:
+            raise ValueError("segment_size must be an even number of at least 4.")
+        if low_cut_hz is None or low_cut_hz <= 0:
+            raise ValueError("low_cut_hz must be positive.")
+        if order < 1:
+            raise ValueError("order must be at least 1.")
+        self.segment_size = segment_size
+        self.hop = segment_size // 2
+        self.low_cut_hz = low_cut_hz
+        self.high_cut_hz = high_cut_hz
+        self.order = order
+        self.latency = segment_size - 1
+
+        self.window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(segment_size) / segment_size)
+        freqs = np.fft.rfftfreq(segment_size, dt)
+        band = freqs >= low_cut_hz
+        if high_cut_hz:
+            band &= freqs <= high_cut_hz
+        self.gain = np.zeros(len(freqs), dtype=complex)
+        self.gain[band] = (1.0 / (2j * np.pi * freqs[band])) ** order
+
+    def create_state(self, initial_value=0.0):
+        # The band limit removes DC, so an initial value does not apply
+        return FrequencyIntegratorState(self.segment_size)
+
+    def integrate(self, data_series, out=None):
         if not isinstance(data_series, np.ndarray) or data_series.ndim != 1:
             raise ValueError("Input data_series must be a 1D numpy array.")
-        if len(data_series) == 0:
+        n = len(data_series)
+        if n == 0:
             return np.array([])
-            
-        integrated_series = np.zeros_like(data_series, dtype=float)
-        for i in range(1, len(data_series)):
-            integrated_series[i] = integrated_series[i-1] + data_series[i] * self.dt
-        return integrated_series
+        # Stream the series, then zeros to flush the latency, and drop the leading delay
+        state = self.create_state()
+        head, _ = self.integrate_block(data_series, state)
+        tail, _ = self.integrate_block(np.zeros(self.latency), state)
+        integrated = np.concatenate((head, tail))[self.latency:]
+        if out is not None:
+            out = self._output_array(n, out)
+            out[:] = integrated
+            return out
+        return integrated
+
+    def integrate_block(self, block, state=None, out=None):
+        state = state if state is not None else self.create_state()
+        block = np.asarray(block, dtype=float)
+        n = len(block)
+        if n == 0:
+            return np.array([]), state
 
-def create_integrator(method, dt):
+        samples = np.concatenate((state.history, block))
+        L, H = self.segment_size, self.hop
+        num_segments = (len(samples) - L) // H + 1 if len(samples) >= L else 0
+        if num_segments:
+            index = np.arange(num_segments)[:, np.newaxis] * H + np.arange(L)
+            spectra = np.fft.rfft(samples[index] * self.window, axis=1) * self.gain
+            segments = np.fft.irfft(spectra, n=L, axis=1)
+            # First half of each segment plus the second half of the previous one is final
+            finished = segments[:, :H].copy()
+            finished[0] += state.overlap
+            finished[1:] += segments[:-1, H:]
+            state.overlap = segments[-1, H:].copy()
+            finished = finished.ravel()[state.lead_in:]
+            state.lead_in = 0
+            state.output = np.concatenate((state.output, finished))
+            samples = samples[num_segments * H:]
+        state.history = samples.copy()
+
+        integrated = state.output[:n]
+        state.output = state.output[n:]
+        state.count += n
+        if out is not None:
+            out = self._output_array(n, out)
+            out[:] = integrated
+            integrated = out
+        return integrated, state
+
+def create_integrator(method, dt, params=None):
     """
     Factory function to create an integrator instance.
     
     Args:
-        method (str): Integration method ("Trapezoidal", "Simpson", or "Rectangular")
+        method (str): Integration method ("Trapezoidal", "Simpson", "Rectangular" or "Frequency")
         dt (float): Time step between data points
+        params (dict): Parameters specific to the integration method ("Frequency": 'low_cut_hz',
+                       'high_cut_hz', 'segment_size', 'order')
         
     Returns:
         Integrator: An instance of the specified integration method
     """
+    params = params or {}
     if method == "Trapezoidal":
         return TrapezoidalIntegrator(dt)
     elif method == "Simpson":
         return SimpsonIntegrator(dt)
     elif method == "Rectangular":
         return RectangularIntegrator(dt)
+    elif method == "Frequency":
+        return FrequencyIntegrator(dt, low_cut_hz=params.get('low_cut_hz', 1.0),
+                                   high_cut_hz=params.get('high_cut_hz'),
+                                   segment_size=params.get('segment_size', 512),
+                                   order=params.get('order', 1))
     else:
         raise ValueError(f"Unknown integration method: {method}")
 
@@ -108,6 +399,10 @@ class SignalIntegrator(Integrator):
         self.method = method
         logger.info(f"SignalIntegrator initialized with dt={dt}, method={method}")
 
-    def integrate(self, data_series):
+    def integrate(self, data_series, out=None):
+        integrator = create_integrator(self.method, self.dt)
+        return integrator.integrate(data_series, out=out)
+
+    def integrate_block(self, block, state=None, out=None):
         integrator = create_integrator(self.method, self.dt)
-        return integrator.integrate(data_series) 
\ No newline at end of file
+        return integrator.integrate_block(block, state, out=out) 
\ No newline at end of file
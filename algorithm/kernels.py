@@ -0,0 +1,165 @@
+"""
+Optional JIT-compiled kernels of the sequential recurrences.
+
+The RLS block update, the segment recurrence of converged RLS detrenders and the streaming
+integration rules are short loops over a frame. Their NumPy versions are vectorized but
+spend most of their time in per-call overhead of small-array operations (tens of
+microseconds per frame). If numba is installed, the loop versions below are compiled at
+import time and the callers use them; otherwise every kernel is None and the callers keep
+their NumPy code paths. JIT_ENABLED tells which layer is active. Setting the environment
+variable BASE_REALTIME_DISPLACEMENT_NO_JIT disables compilation even if numba is available.
+
+The *_loop functions are plain Python in the subset numba compiles, so they also serve as
+the reference implementations in the equivalence tests.
+"""
+import logging
+import os
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+JIT_ENABLED = numba is not None and not os.environ.get('BASE_REALTIME_DISPLACEMENT_NO_JIT')
+
+
+def _compile(func):
+    """Returns func compiled with numba, or None if the JIT layer is disabled."""
+    if not JIT_ENABLED:
+        return None
+    return numba.njit(cache=True, nogil=True)(func)
+
+
+def rls_detrend_block_loop(data, time_vector, w_tau, weights, moments, prior_weight, t_ref,
+                           theta, P, detrended, trend, origin_shift):
+    """
+    rls_linear_detrend() of one block: closed-form RLS fit of y = a*t + b with 2x2 algebra
+    on scalars, then the trend and the detrended data are written to trend and detrended.
+
+    Returns:
+        tuple: (theta, P) after the block, for the time origin moved to origin_shift.
+    """
+    s0 = 0.0
+    s1 = 0.0
+    for i in range(len(data)):
+        s0 += w_tau[i] * data[i]
+        s1 += weights[i] * data[i]
+
+    # Parameters and covariance with the time origin at the block's last sample
+    a = theta[0]
+    b = theta[1] + a * t_ref
+    p00 = P[0, 0]
+    p01 = 0.5 * (P[0, 1] + P[1, 0])
+    p11 = P[1, 1]
+    r01 = p01 + t_ref * p00
+    r11 = p11 + 2.0 * t_ref * p01 + t_ref * t_ref * p00
+    det = p00 * r11 - r01 * r01
+    i00 = r11 / det * prior_weight
+    i01 = -r01 / det * prior_weight
+    i11 = p00 / det * prior_weight
+
+    f00 = i00 + moments[0, 0]
+    f01 = i01 + moments[0, 1]
+    f11 = i11 + moments[1, 1]
+    det = f00 * f11 - f01 * f01
+    n00 = f11 / det
+    n01 = -f01 / det
+    n11 = f00 / det
+    rhs0 = i00 * a + i01 * b + s0
+    rhs1 = i01 * a + i11 * b + s1
+    a_new = n00 * rhs0 + n01 * rhs1
+    b_new = n01 * rhs0 + n11 * rhs1 - a_new * t_ref
+
+    for i in range(len(data)):
+        trend[i] = a_new * time_vector[i] + b_new
+        detrended[i] = data[i] - trend[i]
+
+    shift = origin_shift - t_ref # From the reference time to the new origin
+    theta_new = np.empty(2)
+    theta_new[0] = a_new
+    theta_new[1] = b_new + a_new * origin_shift
+    P_new = np.empty((2, 2))
+    P_new[0, 0] = n00
+    P_new[0, 1] = n01 + shift * n00
+    P_new[1, 0] = P_new[0, 1]
+    P_new[1, 1] = n11 + 2.0 * shift * n01 + shift * shift * n00
+    return theta_new, P_new
+
+
+def linear_recurrence_loop(g00, g01, g10, g11, u0, u1, a, b, states_a, states_b):
+    """
+    Runs x_k = G x_{k-1} + u_k for each row r (G and x of shape (rows,), u of shape (m, rows)).
+
+    states_a/states_b (m, rows) receive the state before each step; a and b hold the initial
+    state and are updated in place to the final one.
+    """
+    for r in range(len(a)):
+        x0 = a[r]
+        x1 = b[r]
+        for k in range(u0.shape[0]):
+            states_a[k, r] = x0
+            states_b[k, r] = x1
+            x0, x1 = g00[r] * x0 + g01[r] * x1 + u0[k, r], g10[r] * x0 + g11[r] * x1 + u1[k, r]
+        a[r] = x0
+        b[r] = x1
+
+
+def trapezoidal_loop(block, dt, at_start, last_sample, running_sum, out):
+    """Trapezoidal integration of one block (see TrapezoidalIntegrator.integrate_block())."""
+    previous = last_sample
+    value = running_sum
+    for i in range(len(block)):
+        if i > 0 or not at_start:
+            value += (previous + block[i]) * dt / 2
+        previous = block[i]
+        out[i] = value
+
+
+def rectangular_loop(block, dt, at_start, running_sum, out):
+    """Rectangular integration of one block (see RectangularIntegrator.integrate_block())."""
+    value = running_sum
+    for i in range(len(block)):
+        if i > 0 or not at_start:
+            value += block[i] * dt
+        out[i] = value
+
+
+def simpson_loop(block, dt, count, prev_sample, last_sample, grid_sum, out):
+    """
+    Cumulative Simpson integration of one block (see SimpsonIntegrator.integrate_block()).
+
+    Returns:
+        float: The integral at the block's last even global sample index (the new grid_sum).
+    """
+    y2 = prev_sample # Sample at global index g - 2
+    y1 = last_sample # Sample at global index g - 1
+    grid = grid_sum # Integral at the last even global index
+    for i in range(len(block)):
+        g = count + i
+        y = block[i]
+        if g == 0:
+            out[i] = grid
+        elif g % 2 == 0:
+            grid += (y2 + 4.0 * y1 + y) * dt / 3.0
+            out[i] = grid
+        elif g == 1:
+            out[i] = grid + (y1 + y) * dt / 2.0
+        else:
+            out[i] = grid + (-y2 + 8.0 * y1 + 5.0 * y) * dt / 12.0
+        y2 = y1
+        y1 = y
+    return grid
+
+
+rls_detrend_block = _compile(rls_detrend_block_loop)
+linear_recurrence = _compile(linear_recurrence_loop)
+trapezoidal = _compile(trapezoidal_loop)
+rectangular = _compile(rectangular_loop)
+simpson = _compile(simpson_loop)
+
+if JIT_ENABLED:
+    logger.info(f"Using numba {numba.__version__} kernels for the sequential recurrences.")
@@ -3,18 +3,55 @@ import logging
 from .detrenders import create_detrender
 from .integrator import create_integrator
 from .filters import create_filter
+from .ring_buffer import RingBuffer
 
 logger = logging.getLogger(__name__)
 
+PROCESSING_MODES = ("Full", "Incremental")
+
 class KinematicProcessor:
     """
     Processes acceleration data to calculate velocity and displacement in real-time.
     Supports various integration and detrending methods.
+
+    Two processing modes are available:
+
+    * "Full": every frame re-integrates and re-detrends the whole calc_frame_size buffer,
+      so the cost per frame is O(calc_frame_size).
+    * "Incremental": integrator and detrender state is carried between frames and only the
+      new samples are processed, so the cost per frame is O(sample_frame_size) and does not
+      depend on calc_frame_multiplier. Requires a detrender that supports incremental
+      updates (RLS, Kalman or None); otherwise "Full" is used. detrend_method="Kalman"
+      always uses this mode.
+
+    integration_method="Frequency" integrates in the frequency domain (see
+    FrequencyIntegrator): velocity and displacement are band-limited integrals of the
+    acceleration computed by streaming overlap-add, so no detrending is applied and the
+    processor always streams like "Incremental". All three outputs of process_frame() lag
+    the input by `latency` samples (acceleration is delayed to stay aligned).
+
+    Equivalence of "Incremental" with "Full" (RLS detrending; measured at dt=0.005,
+    frame 20, multiplier 50, sinusoidal acceleration with a constant bias, after warm-up):
+
+    * Velocity: both modes fit the same exponentially weighted linear trend and apply the
+      end-of-frame parameters to the frame. The relative RMS difference is below 1e-4 for
+      q=0.9875 at 5-20 Hz, and below 2% for q=0.995 at 3-20 Hz. The difference grows as the
+      signal frequency approaches the detrender cutoff, roughly (1 - q) / (2 * pi * dt).
+    * Displacement: "Full" integrates the whole buffer's detrended velocity with the latest
+      trend, while "Incremental" integrates each frame's detrended velocity once. The two
+      differ by up to about 30% relative RMS. Compared with the exact displacement, the
+      "Incremental" error was similar to or lower than the "Full" error in the same tests.
+
+    History is kept in RingBuffers and all per-frame work arrays are allocated once, so a
+    frame does not allocate arrays of buffer size (with the Trapezoidal or Rectangular
+    integrator). The arrays returned by process_frame() are views that stay valid until the
+    next call.
     """
     def __init__(self, dt, sample_frame_size=20, calc_frame_multiplier=100,
                  rls_filter_q_vel=0.9825, rls_filter_q_disp=0.9825,
                  warmup_frames=5, integration_method="Trapezoidal",
-                 detrend_method="RLS", detrend_params=None):
+                 detrend_method="RLS", detrend_params=None, processing_mode="Full",
+                 integration_params=None):
         """
         Initializes the KinematicProcessor.
 
@@ -27,19 +64,34 @@ class KinematicProcessor:
             rls_filter_q_disp (float): Forgetting factor for the displacement RLS filter.
             warmup_frames (int): Number of frames to process before results are considered reliable.
             integration_method (str): Method to use for numerical integration.
-            detrend_method (str): Method to use for detrending ("RLS", "Polynomial", or "None").
+            detrend_method (str): Method to use for detrending ("RLS", "Polynomial", "Kalman", or "None").
             detrend_params (dict): Parameters for the detrending method.
+            processing_mode (str): "Full" or "Incremental" (see class docstring).
+            integration_params (dict): Parameters for the integration method (see create_integrator).
         """
         self.dt = dt
         self.sample_frame_size = sample_frame_size
         self.calc_frame_size = sample_frame_size * calc_frame_multiplier
         
-        self.acc_buffer = np.zeros(self.calc_frame_size)
-        self.vel_buffer_detrended = np.zeros(self.calc_frame_size)
-        self.disp_buffer_detrended = np.zeros(self.calc_frame_size)
+        # Acceleration history; velocity and displacement are recomputed into the work arrays
+        # in Full mode and kept as histories in Incremental mode
+        self._acc_history = RingBuffer(self.calc_frame_size)
+        self._vel_history = RingBuffer(self.calc_frame_size)
+        self._disp_history = RingBuffer(self.calc_frame_size)
+        self._vel_raw_work = np.zeros(self.calc_frame_size)
+        self._disp_raw_work = np.zeros(self.calc_frame_size)
+        self._vel_work = np.zeros(self.calc_frame_size)
+        self._disp_work = np.zeros(self.calc_frame_size)
+        self._frame_acc = np.zeros(sample_frame_size)
 
         # Initialize integrator with specified method
-        self.integrator = create_integrator(integration_method, dt)
+        self.integrator = create_integrator(integration_method, dt, integration_params)
+        self.latency = self.integrator.latency
+        # Frequency integration computes displacement directly from acceleration (order 2)
+        self._disp_integrator = None
+        if self.latency:
+            self._disp_integrator = create_integrator(integration_method, dt,
+                                                      dict(integration_params or {}, order=2))
         
         # Initialize detrending filters
         vel_detrend_params = detrend_params or {}
@@ -51,63 +103,238 @@ class KinematicProcessor:
         if detrend_method == "RLS":
             disp_detrend_params['filter_q'] = rls_filter_q_disp
         self.disp_detrender = create_detrender(detrend_method, disp_detrend_params)
+
+        if self._disp_integrator is not None:
+            if detrend_method != "None":
+                logger.warning(f"{integration_method} integration is band-limited; "
+                               f"detrend method {detrend_method} is not applied.")
+            self.vel_detrender = self.disp_detrender = None
+            processing_mode = "Incremental"
+        elif detrend_method == "Kalman" and processing_mode != "Incremental":
+            logger.info("Kalman detrending is recursive and keeps no history; using Incremental mode.")
+            processing_mode = "Incremental"
         
         # Pre-calculate time vector for the buffer length
-        self.time_vector_buffer = np.arange(0, self.calc_frame_size * self.dt, self.dt)[:self.calc_frame_size]
+        # Read-only so detrenders can cache what they derive from it
+        self.time_vector_buffer = np.arange(0, self.calc_frame_size * self.dt, self.dt)[:self.calc_frame_size].copy()
+        self.time_vector_buffer.flags.writeable = False
 
         self.frame_count = 0
         self.warmup_frames = warmup_frames
+
+        if processing_mode not in PROCESSING_MODES:
+            raise ValueError(f"Unknown processing mode: {processing_mode}")
+        if processing_mode == "Incremental" and not all(
+                detrender is None or detrender.supports_incremental()
+                for detrender in (self.vel_detrender, self.disp_detrender)):
+            logger.warning(f"Detrend method {detrend_method} does not support incremental processing. "
+                           f"Using Full mode.")
+            processing_mode = "Full"
+        self.processing_mode = processing_mode
+        self._reset_incremental_state()
+
+        # Per-frame work arrays of the Incremental mode
+        self._frame_vel_raw = np.zeros(sample_frame_size)
+        self._frame_disp_raw = np.zeros(sample_frame_size)
+        self._frame_vel = np.zeros(sample_frame_size)
+        self._frame_disp = np.zeros(sample_frame_size)
         
         logger.info(f"KinematicProcessor initialized: dt={dt}, frame_size={sample_frame_size}, "
                     f"calc_buffer_size={self.calc_frame_size}, "
                     f"integration_method={integration_method}, "
                     f"detrend_method={detrend_method}, "
                     f"q_vel={rls_filter_q_vel}, q_disp={rls_filter_q_disp}, "
-                    f"warmup={warmup_frames}")
+                    f"warmup={warmup_frames}, mode={self.processing_mode}")
 
     def is_warmed_up(self):
         """Checks if the processor has processed enough frames for reliable output."""
         return self.frame_count >= self.warmup_frames
 
+    @property
+    def acc_buffer(self):
+        """Acceleration history of calc_frame_size samples, oldest first (read-only view)."""
+        return self._acc_history.view()
+
+    @property
+    def vel_buffer_detrended(self):
+        if self.processing_mode == "Incremental":
+            return self._vel_history.view()
+        return self._vel_work
+
+    @property
+    def disp_buffer_detrended(self):
+        if self.processing_mode == "Incremental":
+            return self._disp_history.view()
+        return self._disp_work
+
     def reset(self):
         """Resets the processor to its initial state."""
-        self.acc_buffer.fill(0)
-        self.vel_buffer_detrended.fill(0)
-        self.disp_buffer_detrended.fill(0)
+        for history in (self._acc_history, self._vel_history, self._disp_history):
+            history.fill(0)
+        for work in (self._vel_work, self._disp_work):
+            work.fill(0)
         
         if hasattr(self.vel_detrender, 'reset'):
             self.vel_detrender.reset()
         if hasattr(self.disp_detrender, 'reset'):
             self.disp_detrender.reset()
         
+        self._reset_incremental_state()
         self.frame_count = 0
         logger.info("KinematicProcessor reset.")
 
+    def get_state(self):
+        """
+        Returns everything carried between frames (histories, integration and detrender
+        state, frame count) as a nested dict of plain values and array copies, e.g. to write
+        a checkpoint. A processor created with the same parameters continues exactly where
+        this one was after set_state(), without a warm-up.
+        """
+        return {
+            'frame_count': self.frame_count,
+            'acc_history': self._acc_history.get_state(),
+            # Detrended output buffers: the histories (Incremental) or work arrays (Full)
+            'vel_buffer': self.vel_buffer_detrended.copy(),
+            'disp_buffer': self.disp_buffer_detrended.copy(),
+            'acc_delay': self._acc_delay.copy(),
+            'vel_integration': self._vel_integration.get_state(),
+            'disp_integration': self._disp_integration.get_state(),
+            'vel_detrender': self.vel_detrender.get_state() if self.vel_detrender is not None else {},
+            'disp_detrender': self.disp_detrender.get_state() if self.disp_detrender is not None else {}
+        }
+
+    def set_state(self, state):
+        """
+        Restores a state returned by get_state() of a processor with the same parameters.
+
+        Raises:
+            ValueError: If the state does not fit this processor's buffer sizes or methods.
+        """
+        acc_delay = np.array(state['acc_delay'], dtype=float)
+        if acc_delay.shape != (self.latency,):
+            raise ValueError(f"State latency {len(acc_delay)} does not match the processor latency {self.latency}.")
+        # Detrenders without state (or not started yet) may have no entry
+        for detrender, detrender_state in ((self.vel_detrender, state.get('vel_detrender', {})),
+                                           (self.disp_detrender, state.get('disp_detrender', {}))):
+            if detrender is not None:
+                detrender.set_state(detrender_state)
+        self._acc_history.set_state(state['acc_history'])
+        if self.processing_mode == "Incremental":
+            self._vel_history.set_state(state['vel_buffer'])
+            self._disp_history.set_state(state['disp_buffer'])
+        else:
+            self._vel_work[:] = state['vel_buffer']
+            self._disp_work[:] = state['disp_buffer']
+        self._vel_integration.set_state(state['vel_integration'])
+        self._disp_integration.set_state(state['disp_integration'])
+        self._acc_delay = acc_delay
+        self.frame_count = int(state['frame_count'])
+
+    def _reset_incremental_state(self):
+        # Integration state carried between frames in Incremental mode
+        self._vel_integration = self.integrator.create_state()
+        self._disp_integration = (self._disp_integrator or self.integrator).create_state()
+        # Acceleration samples held back to stay aligned with the integrator latency
+        self._acc_delay = np.zeros(self.latency)
+
+    def seed(self, acc_history):
+        """
+        Primes the processor from previously received acceleration.
+
+        The most recent calc_frame_size samples are loaded into the buffer and integrated and
+        detrended in one pass, so detrender state is already adapted and the next processed
+        frame continues without a warm-up transient.
+
+        Args:
+            acc_history (np.ndarray): Acceleration samples, oldest first.
+        """
+        acc_history = np.asarray(acc_history, dtype=float)[-self.calc_frame_size:]
+        self.reset()
+        n = len(acc_history)
+        if n == 0:
+            return
+        if self.processing_mode == "Incremental":
+            # Replay the history once through the carried state
+            disp, vel = self._process_incremental(acc_history)
+            self._shift_into_buffers(self._delay_acc(acc_history), vel, disp)
+        else:
+            self._acc_history.append(acc_history)
+            self._process_full_buffer()
+        self.frame_count = max(self.warmup_frames, -(-n // self.sample_frame_size))
+        logger.info(f"KinematicProcessor seeded with {n} samples.")
+
     def _process_full_buffer(self):
         """
         Internal method to integrate and detrend the entire current acc_buffer.
         Filters are stateful and update their state internally.
+        Results are written into the preallocated work arrays.
         """
-        # Integrate acceleration to get velocity
-        raw_vel_buffer = self.integrator.integrate(self.acc_buffer)
-        
-        # Detrend velocity if detrender exists
+        acc_buffer = self._acc_history.view()
+
+        # Integrate acceleration to get velocity, detrend it if a detrender exists
         if self.vel_detrender is not None:
-            self.vel_buffer_detrended, _ = self.vel_detrender.detrend(raw_vel_buffer, self.time_vector_buffer)
+            self.integrator.integrate(acc_buffer, out=self._vel_raw_work)
+            self.vel_detrender.detrend(self._vel_raw_work, self.time_vector_buffer, out=self._vel_work)
         else:
-            self.vel_buffer_detrended = raw_vel_buffer
+            self.integrator.integrate(acc_buffer, out=self._vel_work)
         
-        # Integrate velocity to get displacement
-        raw_disp_buffer = self.integrator.integrate(self.vel_buffer_detrended)
-        
-        # Detrend displacement if detrender exists
+        self._displacement_full()
+        # Acceleration is not filtered in this scheme, passed through
+        return self._disp_work, self._vel_work, acc_buffer
+
+    def _displacement_full(self):
+        """Integrates the velocity work array to displacement and detrends it if a detrender exists."""
         if self.disp_detrender is not None:
-            self.disp_buffer_detrended, _ = self.disp_detrender.detrend(raw_disp_buffer, self.time_vector_buffer)
+            self.integrator.integrate(self._vel_work, out=self._disp_raw_work)
+            self.disp_detrender.detrend(self._disp_raw_work, self.time_vector_buffer, out=self._disp_work)
         else:
-            self.disp_buffer_detrended = raw_disp_buffer
-        
-        # Acceleration is not filtered in this scheme, passed through
-        return self.disp_buffer_detrended, self.vel_buffer_detrended, self.acc_buffer
+            self.integrator.integrate(self._vel_work, out=self._disp_work)
+
+    def _process_incremental(self, acc_segment):
+        """
+        Internal method to integrate and detrend only the new samples, continuing from the
+        state left by the previous segment.
+
+        Returns:
+            tuple: (disp, vel) for the new samples.
+        """
+        if self._disp_integrator is not None:
+            vel, _ = self.integrator.integrate_block(acc_segment, self._vel_integration)
+            disp, _ = self._disp_integrator.integrate_block(acc_segment, self._disp_integration)
+            return disp, vel
+
+        # Segments of one frame use the preallocated frame work arrays
+        if len(acc_segment) == self.sample_frame_size:
+            vel_raw_out, disp_raw_out = self._frame_vel_raw, self._frame_disp_raw
+            vel_out, disp_out = self._frame_vel, self._frame_disp
+        else:
+            vel_raw_out = disp_raw_out = vel_out = disp_out = None
+
+        vel, _ = self.integrator.integrate_block(acc_segment, self._vel_integration, out=vel_raw_out)
+        if self.vel_detrender is not None:
+            vel, _ = self.vel_detrender.detrend_incremental(vel, self.dt, out=vel_out)
+        return self._displacement_incremental(vel, disp_raw_out, disp_out), vel
+
+    def _displacement_incremental(self, vel, disp_raw_out=None, disp_out=None):
+        """Integrates and detrends the displacement of new velocity samples (Incremental mode)."""
+        disp, _ = self.integrator.integrate_block(vel, self._disp_integration, out=disp_raw_out)
+        if self.disp_detrender is not None:
+            disp, _ = self.disp_detrender.detrend_incremental(disp, self.dt, out=disp_out)
+        return disp
+
+    def _delay_acc(self, acc):
+        """Returns acceleration delayed by the integrator latency."""
+        if not self.latency:
+            return acc
+        samples = np.concatenate((self._acc_delay, acc))
+        self._acc_delay = samples[len(acc):]
+        return samples[:len(acc)]
+
+    def _shift_into_buffers(self, acc, vel, disp):
+        """Appends new samples to the end of the history buffers (Incremental mode)."""
+        self._acc_history.append(acc)
+        self._vel_history.append(vel)
+        self._disp_history.append(disp)
 
     def process_frame(self, acc_frame_new):
         """
@@ -128,7 +355,7 @@ class KinematicProcessor:
                     np.full(nan_output_len, np.nan))
 
         actual_frame_len_for_processing = self.sample_frame_size
-        processed_acc_frame = np.zeros(self.sample_frame_size)
+        processed_acc_frame = self._frame_acc
 
         if frame_len >= self.sample_frame_size:
             if frame_len > self.sample_frame_size:
@@ -146,9 +373,15 @@ class KinematicProcessor:
         output_segment_len = actual_frame_len_for_processing
 
         self.frame_count += 1
+
+        if self.processing_mode == "Incremental":
+            disp_output, vel_output = self._process_incremental(processed_acc_frame)
+            self._shift_into_buffers(self._delay_acc(processed_acc_frame), vel_output, disp_output)
+            if not self.is_warmed_up():
+                logger.debug(f"Frame {self.frame_count}/{self.warmup_frames} processed (warm-up phase).")
+            return disp_output, vel_output, self._acc_history.tail(output_segment_len)
             
-        self.acc_buffer = np.roll(self.acc_buffer, -output_segment_len)
-        self.acc_buffer[-output_segment_len:] = processed_acc_frame
+        self._acc_history.append(processed_acc_frame)
         
         disp_full, vel_full, acc_full_buffer = self._process_full_buffer()
             
@@ -162,6 +395,80 @@ class KinematicProcessor:
         
         return disp_output, vel_output, acc_output
 
+    def process_frame_shared(self, acc_frame_new, source):
+        """
+        Processes a frame whose velocity stage was already computed by `source`.
+
+        `source` must have the same dt, frame sizes, processing mode, integration and velocity
+        detrending as this processor (and no integrator latency), and must have just processed
+        the same frame. Only the displacement stage runs here, so configurations that differ
+        in displacement detrending share the velocity work. The velocity detrender of this
+        processor is not updated.
+
+        Args:
+            acc_frame_new (np.ndarray): New frame of sample_frame_size acceleration samples.
+            source (KinematicProcessor): Processor whose velocity output is reused.
+
+        Returns:
+            tuple: (disp_output, vel_output, acc_output) for the new frame, as process_frame().
+        """
+        frame_size = self.sample_frame_size
+        self._frame_acc[:] = acc_frame_new
+        self.frame_count += 1
+        if self.processing_mode == "Incremental":
+            vel = source.vel_buffer_detrended[-frame_size:]
+            disp = self._displacement_incremental(vel, self._frame_disp_raw, self._frame_disp)
+            self._shift_into_buffers(self._frame_acc, vel, disp)
+            return disp, self._vel_history.tail(frame_size), self._acc_history.tail(frame_size)
+
+        self._acc_history.append(self._frame_acc)
+        self._vel_work[:] = source.vel_buffer_detrended
+        self._displacement_full()
+        return (self._disp_work[-frame_size:], self._vel_work[-frame_size:],
+                self._acc_history.tail(frame_size))
+
+    def process_chunk(self, acc_chunk):
+        """
+        Processes many consecutive frames at once (e.g. offline reprocessing).
+
+        Gives the same results as calling process_frame() on each sample_frame_size frame of
+        the chunk, up to floating-point rounding. In "Incremental" mode (and with frequency
+        integration) the whole chunk goes through the vectorized integrators and
+        Detrender.detrend_segments(); in "Full" mode the frames are processed one by one.
+
+        Args:
+            acc_chunk (np.ndarray): Acceleration samples; the length must be a multiple of
+                                    sample_frame_size.
+
+        Returns:
+            tuple: (disp, vel, acc) with one value per input sample.
+        """
+        acc_chunk = np.asarray(acc_chunk, dtype=float)
+        n, frame_size = len(acc_chunk), self.sample_frame_size
+        if n % frame_size:
+            raise ValueError(f"Chunk length ({n}) must be a multiple of sample_frame_size ({frame_size}).")
+        if self.processing_mode == "Full":
+            outputs = np.empty((3, n))
+            for start in range(0, n, frame_size):
+                outputs[:, start:start + frame_size] = self.process_frame(acc_chunk[start:start + frame_size])
+            return outputs[0], outputs[1], outputs[2]
+        if n == 0:
+            return np.array([]), np.array([]), np.array([])
+
+        if self._disp_integrator is not None:
+            disp, vel = self._process_incremental(acc_chunk)
+        else:
+            vel, _ = self.integrator.integrate_block(acc_chunk, self._vel_integration)
+            if self.vel_detrender is not None:
+                vel, _ = self.vel_detrender.detrend_segments(vel, self.dt, frame_size)
+            disp, _ = self.integrator.integrate_block(vel, self._disp_integration)
+            if self.disp_detrender is not None:
+                disp, _ = self.disp_detrender.detrend_segments(disp, self.dt, frame_size)
+        acc = self._delay_acc(acc_chunk)
+        self._shift_into_buffers(acc, vel, disp)
+        self.frame_count += n // frame_size
+        return disp, vel, acc
+
     def get_cumulative_results(self):
         """Returns the current full internal buffers and corresponding time vector."""
         return self.time_vector_buffer, self.disp_buffer_detrended, self.vel_buffer_detrended, self.acc_buffer 
\ No newline at end of file
@@ -0,0 +1,343 @@
+import numpy as np
+import logging
+from scipy.signal import firwin
+from .kinematic_processor import KinematicProcessor
+from .ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+UPSAMPLING_METHODS = ("Linear", "Hold")
+
+
+def design_decimation_filter(factor, num_taps=None, cutoff_ratio=0.8):
+    """
+    Designs the linear-phase anti-aliasing low-pass FIR used before decimation.
+
+    Args:
+        factor (int): Decimation factor.
+        num_taps (int): Odd number of taps (default 16 * factor + 1).
+        cutoff_ratio (float): Cutoff as a fraction of the decimated Nyquist frequency.
+
+    Returns:
+        np.ndarray: Filter taps with unit DC gain.
+    """
+    if num_taps is None:
+        num_taps = 16 * factor + 1
+    if num_taps < 3 or num_taps % 2 == 0:
+        raise ValueError(f"Decimation filter needs an odd number of taps >= 3, got {num_taps}.")
+    return firwin(num_taps, cutoff_ratio / factor)
+
+
+class PolyphaseDecimator:
+    """
+    Stateful anti-aliasing FIR filter and decimator.
+
+    Only every factor-th output of the FIR filter is computed (the polyphase form of
+    filter-then-downsample), so the cost is num_taps / factor multiply-adds per input sample.
+    The last num_taps - 1 inputs and the decimation phase are carried between blocks, so
+    consecutive blocks of any length give the same output as one long block.
+
+    Output m is the filtered input at sample m * factor + factor - 1, i.e. the last sample of
+    each group of factor inputs; it lags that sample by `latency` = (num_taps - 1) / 2 samples.
+    """
+    # Blocks with up to this many outputs gather their input windows with a cached index
+    # matrix (frames); longer blocks convolve each polyphase branch (chunks)
+    MAX_GATHERED_OUTPUTS = 64
+    MAX_CACHED_INDICES = 8
+
+    def __init__(self, factor, taps=None):
+        if factor < 1:
+            raise ValueError(f"Decimation factor must be >= 1, got {factor}.")
+        self.factor = factor
+        self.taps = design_decimation_filter(factor) if taps is None else np.asarray(taps, dtype=float)
+        self.latency = (len(self.taps) - 1) // 2
+        self._reversed_taps = self.taps[::-1].copy()
+        self._branches = [self.taps[r::factor].copy() for r in range(factor)]
+        self._window_indices = {}
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(len(self.taps) - 1)
+        self._phase = self.factor - 1 # Index in the next block of the next kept output
+
+    def get_state(self):
+        return {'history': self._history.copy(), 'phase': self._phase}
+
+    def set_state(self, state):
+        history = np.array(state['history'], dtype=float)
+        if history.shape != self._history.shape:
+            raise ValueError(f"Decimator state has {len(history)} samples, expected {len(self._history)}.")
+        self._history = history
+        self._phase = int(state['phase'])
+
+    def _gather_indices(self, num_outputs):
+        key = (num_outputs, self._phase)
+        indices = self._window_indices.get(key)
+        if indices is None:
+            if len(self._window_indices) >= self.MAX_CACHED_INDICES:
+                self._window_indices.clear()
+            starts = self._phase + np.arange(num_outputs) * self.factor
+            indices = self._window_indices[key] = starts[:, None] + np.arange(len(self.taps))
+        return indices
+
+    def process(self, block):
+        """Filters and decimates a block of samples; returns the new decimated samples."""
+        block = np.asarray(block, dtype=float)
+        n, history_len = len(block), len(self._history)
+        samples = np.concatenate((self._history, block))
+        num_outputs = len(range(self._phase, n, self.factor))
+        if num_outputs <= self.MAX_GATHERED_OUTPUTS:
+            output = samples[self._gather_indices(num_outputs)] @ self._reversed_taps
+        else:
+            # Branch r filters every factor-th sample with taps[r::factor]
+            output = np.zeros(num_outputs)
+            last = history_len + self._phase # Newest sample of the first output's window
+            for r, branch in enumerate(self._branches):
+                start = last - r - (len(branch) - 1) * self.factor
+                branch_input = samples[start:start + (num_outputs + len(branch) - 1) * self.factor:self.factor]
+                output += np.convolve(branch_input, branch, mode='valid')
+        self._phase = (self._phase - n) % self.factor
+        self._history = samples[n:] if n < history_len else block[n - history_len:].copy()
+        return output
+
+
+class Upsampler:
+    """
+    Stateful upsampler that restores the input rate after a PolyphaseDecimator.
+
+    "Linear" interpolates between consecutive decimated samples so the output keeps the
+    decimator's constant latency. "Hold" repeats each decimated sample factor times, which
+    is cheaper but leaves a staircase of up to factor - 1 samples.
+    """
+    def __init__(self, factor, method="Linear"):
+        if method not in UPSAMPLING_METHODS:
+            raise ValueError(f"Unknown upsampling method: {method}")
+        self.factor = factor
+        self.method = method
+        self._fractions = np.arange(1, factor + 1) / factor
+        self.reset()
+
+    def reset(self):
+        self._last = 0.0
+
+    def get_state(self):
+        return {'last': self._last}
+
+    def set_state(self, state):
+        self._last = float(state['last'])
+
+    def process(self, samples, out=None):
+        """Returns factor output samples per input sample."""
+        n = len(samples)
+        if out is None:
+            out = np.empty(n * self.factor)
+        if n == 0:
+            return out
+        grid = out.reshape(n, self.factor)
+        if self.method == "Hold":
+            grid[:] = samples[:, None]
+        else:
+            previous = np.empty(n)
+            previous[0] = self._last
+            previous[1:] = samples[:-1]
+            np.multiply(samples - previous, self._fractions[:, None], out=grid.T)
+            grid += previous[:, None]
+        self._last = samples[-1]
+        return out
+
+
+class MultirateKinematicProcessor:
+    """
+    KinematicProcessor that integrates and detrends at a reduced sample rate.
+
+    Displacement content is far below the input Nyquist frequency, so acceleration is
+    anti-alias filtered and decimated by `decimation_factor` (PolyphaseDecimator), processed
+    by an inner KinematicProcessor at dt * decimation_factor, and velocity and displacement
+    are upsampled back to the input rate (Upsampler). The inner buffers are
+    decimation_factor times shorter, so the per-frame cost of "Full" mode (re-integrating the
+    whole buffer) drops roughly by that factor.
+
+    The interface matches KinematicProcessor. RLS forgetting factors are converted to the
+    reduced rate (q ** decimation_factor) so the detrending time constant stays the same.
+    All outputs lag the input by `latency` samples (the FIR group delay plus the latency of
+    the integration method); acceleration is delayed to stay aligned. The velocity and
+    displacement buffers hold the upsampled output history.
+    """
+    def __init__(self, dt, sample_frame_size=20, calc_frame_multiplier=100,
+                 rls_filter_q_vel=0.9825, rls_filter_q_disp=0.9825,
+                 warmup_frames=5, integration_method="Trapezoidal",
+                 detrend_method="RLS", detrend_params=None, processing_mode="Full",
+                 integration_params=None, decimation_factor=2, decimation_params=None):
+        """
+        Initializes the MultirateKinematicProcessor.
+
+        Args:
+            decimation_factor (int): Rate reduction; must divide sample_frame_size.
+            decimation_params (dict): 'num_taps' of the anti-aliasing FIR (see
+                                      design_decimation_filter) and 'upsampling'
+                                      ("Linear" or "Hold").
+            Other arguments: see KinematicProcessor.
+        """
+        if decimation_factor < 2 or sample_frame_size % decimation_factor:
+            raise ValueError(f"Decimation factor ({decimation_factor}) must be >= 2 and divide "
+                             f"sample_frame_size ({sample_frame_size}).")
+        decimation_params = decimation_params or {}
+        self.dt = dt
+        self.decimation_factor = decimation_factor
+        self.sample_frame_size = sample_frame_size
+        self.calc_frame_size = sample_frame_size * calc_frame_multiplier
+
+        self.decimator = PolyphaseDecimator(
+            decimation_factor, design_decimation_filter(decimation_factor, decimation_params.get('num_taps')))
+        upsampling = decimation_params.get('upsampling', "Linear")
+        self._vel_upsampler = Upsampler(decimation_factor, upsampling)
+        self._disp_upsampler = Upsampler(decimation_factor, upsampling)
+        self.low_rate_processor = KinematicProcessor(
+            dt=dt * decimation_factor,
+            sample_frame_size=sample_frame_size // decimation_factor,
+            calc_frame_multiplier=calc_frame_multiplier,
+            rls_filter_q_vel=rls_filter_q_vel ** decimation_factor,
+            rls_filter_q_disp=rls_filter_q_disp ** decimation_factor,
+            warmup_frames=warmup_frames,
+            integration_method=integration_method,
+            detrend_method=detrend_method,
+            detrend_params=detrend_params,
+            processing_mode=processing_mode,
+            integration_params=integration_params)
+        self.processing_mode = self.low_rate_processor.processing_mode
+        self.warmup_frames = warmup_frames
+        self.latency = self.decimator.latency + self.low_rate_processor.latency * decimation_factor
+
+        self._acc_history = RingBuffer(self.calc_frame_size)
+        self._vel_history = RingBuffer(self.calc_frame_size)
+        self._disp_history = RingBuffer(self.calc_frame_size)
+        self._frame_vel = np.zeros(sample_frame_size)
+        self._frame_disp = np.zeros(sample_frame_size)
+        self._acc_delay = np.zeros(self.latency)
+
+        self.time_vector_buffer = np.arange(0, self.calc_frame_size * self.dt, self.dt)[:self.calc_frame_size].copy()
+        self.time_vector_buffer.flags.writeable = False
+
+        logger.info(f"MultirateKinematicProcessor initialized: decimation_factor={decimation_factor}, "
+                    f"taps={len(self.decimator.taps)}, upsampling={upsampling}, "
+                    f"latency={self.latency} samples")
+
+    @property
+    def frame_count(self):
+        return self.low_rate_processor.frame_count
+
+    def is_warmed_up(self):
+        """Checks if the processor has processed enough frames for reliable output."""
+        return self.low_rate_processor.is_warmed_up()
+
+    @property
+    def acc_buffer(self):
+        """Acceleration history of calc_frame_size samples, oldest first (read-only view)."""
+        return self._acc_history.view()
+
+    @property
+    def vel_buffer_detrended(self):
+        return self._vel_history.view()
+
+    @property
+    def disp_buffer_detrended(self):
+        return self._disp_history.view()
+
+    def reset(self):
+        """Resets the processor to its initial state."""
+        for history in (self._acc_history, self._vel_history, self._disp_history):
+            history.fill(0)
+        self._acc_delay = np.zeros(self.latency)
+        self.decimator.reset()
+        self._vel_upsampler.reset()
+        self._disp_upsampler.reset()
+        self.low_rate_processor.reset()
+
+    def get_state(self):
+        """Returns the processing state (see KinematicProcessor.get_state())."""
+        return {
+            'acc_history': self._acc_history.get_state(),
+            'vel_history': self._vel_history.get_state(),
+            'disp_history': self._disp_history.get_state(),
+            'acc_delay': self._acc_delay.copy(),
+            'decimator': self.decimator.get_state(),
+            'vel_upsampler': self._vel_upsampler.get_state(),
+            'disp_upsampler': self._disp_upsampler.get_state(),
+            'low_rate': self.low_rate_processor.get_state()
+        }
+
+    def set_state(self, state):
+        """Restores a state returned by get_state() (see KinematicProcessor.set_state())."""
+        acc_delay = np.array(state['acc_delay'], dtype=float)
+        if acc_delay.shape != (self.latency,):
+            raise ValueError(f"State latency {len(acc_delay)} does not match the processor latency {self.latency}.")
+        self.low_rate_processor.set_state(state['low_rate'])
+        self.decimator.set_state(state['decimator'])
+        self._vel_upsampler.set_state(state['vel_upsampler'])
+        self._disp_upsampler.set_state(state['disp_upsampler'])
+        self._acc_history.set_state(state['acc_history'])
+        self._vel_history.set_state(state['vel_history'])
+        self._disp_history.set_state(state['disp_history'])
+        self._acc_delay = acc_delay
+
+    def _delay_acc(self, acc):
+        """Returns acceleration delayed by the processor latency."""
+        samples = np.concatenate((self._acc_delay, acc))
+        self._acc_delay = samples[len(acc):]
+        return samples[:len(acc)]
+
+    def _process(self, acc, low_rate_step, disp_out=None, vel_out=None):
+        disp_low, vel_low, _ = low_rate_step(self.decimator.process(acc))
+        vel = self._vel_upsampler.process(vel_low, out=vel_out)
+        disp = self._disp_upsampler.process(disp_low, out=disp_out)
+        acc = self._delay_acc(acc)
+        self._acc_history.append(acc)
+        self._vel_history.append(vel)
+        self._disp_history.append(disp)
+        return disp, vel, acc
+
+    def process_frame(self, acc_frame_new):
+        """
+        Processes a new frame of acceleration data (see KinematicProcessor.process_frame).
+
+        Frames shorter than sample_frame_size are padded with their last value and longer
+        ones are truncated.
+        """
+        frame_len = len(acc_frame_new)
+        if frame_len == 0:
+            logger.warning("Received empty acceleration frame. Using sample_frame_size for NaN output.")
+            return tuple(np.full(self.sample_frame_size, np.nan) for _ in range(3))
+        frame = np.empty(self.sample_frame_size)
+        frame[:min(frame_len, self.sample_frame_size)] = acc_frame_new[:self.sample_frame_size]
+        frame[frame_len:] = acc_frame_new[-1]
+        disp, vel, _ = self._process(frame, self.low_rate_processor.process_frame,
+                                     self._frame_disp, self._frame_vel)
+        return disp, vel, self._acc_history.tail(self.sample_frame_size)
+
+    def process_chunk(self, acc_chunk):
+        """Processes many consecutive frames at once (see KinematicProcessor.process_chunk)."""
+        acc_chunk = np.asarray(acc_chunk, dtype=float)
+        if len(acc_chunk) % self.sample_frame_size:
+            raise ValueError(f"Chunk length ({len(acc_chunk)}) must be a multiple of "
+                             f"sample_frame_size ({self.sample_frame_size}).")
+        return self._process(acc_chunk, self.low_rate_processor.process_chunk)
+
+    def seed(self, acc_history):
+        """
+        Primes the processor from previously received acceleration.
+
+        The most recent whole frames (up to calc_frame_size samples) are processed as one
+        chunk, so filter and detrender state is adapted when the next frame arrives.
+        """
+        acc_history = np.asarray(acc_history, dtype=float)[-self.calc_frame_size:]
+        self.reset()
+        n = len(acc_history) - len(acc_history) % self.sample_frame_size
+        if n == 0:
+            return
+        self.process_chunk(acc_history[len(acc_history) - n:])
+        self.low_rate_processor.frame_count = max(self.warmup_frames, self.low_rate_processor.frame_count)
+        logger.info(f"MultirateKinematicProcessor seeded with {n} samples.")
+
+    def get_cumulative_results(self):
+        """Returns the current full internal buffers and corresponding time vector."""
+        return self.time_vector_buffer, self.disp_buffer_detrended, self.vel_buffer_detrended, self.acc_buffer
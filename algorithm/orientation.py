@@ -0,0 +1,159 @@
+"""
+Orientation compensation of IMU acceleration.
+
+The accelerometer measures specific force in the sensor (body) frame, i.e. acceleration plus
+1 g pointing up. Subtracting 1 g from the body Z axis is only correct while the sensor is
+level; any tilt leaks a fraction of gravity into the horizontal axes (and the integrated
+displacement). OrientationCompensator rotates whole blocks of acceleration into the world
+frame (Z up) with the attitude from the angle stream and subtracts gravity there.
+
+Angles follow the WIT convention: angleX = roll, angleY = pitch, angleZ = yaw in degrees,
+body-to-world rotation R = Rz(yaw) @ Ry(pitch) @ Rx(roll).
+"""
+import numpy as np
+import logging
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+STANDARD_GRAVITY = 9.80665 # m/s^2
+MAX_FUSION_PITCH = np.radians(89.0)
+
+
+def rotation_matrices(angles):
+    """
+    Body-to-world rotation matrices of a block of attitudes.
+
+    Args:
+        angles (np.ndarray): (3, n) roll, pitch, yaw in degrees.
+
+    Returns:
+        np.ndarray: (n, 3, 3) rotation matrices.
+    """
+    roll, pitch, yaw = np.radians(np.asarray(angles, dtype=float))
+    sr, cr = np.sin(roll), np.cos(roll)
+    sp, cp = np.sin(pitch), np.cos(pitch)
+    sy, cy = np.sin(yaw), np.cos(yaw)
+    R = np.empty((len(roll), 3, 3))
+    R[:, 0, 0] = cy * cp
+    R[:, 0, 1] = cy * sp * sr - sy * cr
+    R[:, 0, 2] = cy * sp * cr + sy * sr
+    R[:, 1, 0] = sy * cp
+    R[:, 1, 1] = sy * sp * sr + cy * cr
+    R[:, 1, 2] = sy * sp * cr - cy * sr
+    R[:, 2, 0] = -sp
+    R[:, 2, 1] = cp * sr
+    R[:, 2, 2] = cp * cr
+    return R
+
+
+def euler_rates(angles, gyro):
+    """
+    Converts body angular rates to Euler angle rates.
+
+    Args:
+        angles (np.ndarray): (3, n) roll, pitch, yaw in degrees.
+        gyro (np.ndarray): (3, n) body angular rates in deg/s.
+
+    Returns:
+        np.ndarray: (3, n) roll, pitch, yaw rates in deg/s.
+    """
+    roll, pitch, _ = np.radians(np.asarray(angles, dtype=float))
+    p, q, r = np.asarray(gyro, dtype=float)
+    sr, cr = np.sin(roll), np.cos(roll)
+    # Pitch is kept away from +-90 deg (gimbal lock), where yaw and roll rates are undefined
+    pitch = np.clip(pitch, -MAX_FUSION_PITCH, MAX_FUSION_PITCH)
+    cp, tp = np.cos(pitch), np.tan(pitch)
+    return np.stack((p + (sr * q + cr * r) * tp,
+                     cr * q - sr * r,
+                     (sr * q + cr * r) / cp))
+
+
+class OrientationCompensator:
+    """
+    Streaming world-frame acceleration with gravity removed.
+
+    Without gyro fusion, every sample is rotated with the attitude of its angle packet. With
+    gyro fusion, the attitude is a complementary filter of the angle stream (low frequencies)
+    and the integrated gyro rates (high frequencies) with time constant fusion_time_constant;
+    its state is carried between blocks. All work is done on whole (3, n) blocks.
+    """
+    def __init__(self, dt, gyro_fusion=False, fusion_time_constant=0.5, gravity=STANDARD_GRAVITY):
+        """
+        Args:
+            dt (float): Sample interval (seconds).
+            gyro_fusion (bool): Fuse the angle stream with gyro rates.
+            fusion_time_constant (float): Crossover time constant of the fusion (seconds).
+            gravity (float): Gravity subtracted from the world Z axis (m/s^2).
+        """
+        if fusion_time_constant <= 0:
+            raise ValueError(f"Fusion time constant must be positive, got {fusion_time_constant}.")
+        self.dt = dt
+        self.gyro_fusion = gyro_fusion
+        self.fusion_time_constant = fusion_time_constant
+        self.gravity = gravity
+        # Weight of the gyro-propagated attitude per sample
+        self.alpha = fusion_time_constant / (fusion_time_constant + dt)
+        self.reset()
+
+    def reset(self):
+        """Forgets the fused attitude; the next block starts from its first angle packet."""
+        self._attitude = None # Fused (unwrapped) attitude of the last sample, degrees
+        self._last_angles = None # Last unwrapped measured angles, degrees
+
+    def get_state(self):
+        """Returns the fusion state (arrays or None), e.g. to checkpoint it."""
+        return {'attitude': None if self._attitude is None else self._attitude.copy(),
+                'last_angles': None if self._last_angles is None else self._last_angles.copy()}
+
+    def set_state(self, state):
+        """Restores a state returned by get_state()."""
+        attitude, last_angles = state.get('attitude'), state.get('last_angles')
+        for value in (attitude, last_angles):
+            if value is not None and np.shape(value) != (3,):
+                raise ValueError(f"Orientation state of shape {np.shape(value)} is not (3,).")
+        self._attitude = None if attitude is None else np.array(attitude, dtype=float)
+        self._last_angles = None if last_angles is None else np.array(last_angles, dtype=float)
+
+    def attitude(self, angles, gyro=None):
+        """
+        Attitude used for each sample of a block.
+
+        Args:
+            angles (np.ndarray): (3, n) measured roll, pitch, yaw in degrees.
+            gyro (np.ndarray): (3, n) body rates in deg/s (used with gyro_fusion).
+
+        Returns:
+            np.ndarray: (3, n) roll, pitch, yaw in degrees.
+        """
+        angles = np.asarray(angles, dtype=float)
+        if not self.gyro_fusion or gyro is None or angles.shape[1] == 0:
+            return angles
+        # Unwrap across blocks so the filter does not see the +-180 deg jumps
+        previous = angles[:, :1] if self._last_angles is None else self._last_angles[:, np.newaxis]
+        unwrapped = np.unwrap(np.concatenate((previous, angles), axis=1), period=360.0, axis=1)[:, 1:]
+        self._last_angles = unwrapped[:, -1].copy()
+
+        # attitude_k = alpha * (attitude_{k-1} + rate_k * dt) + (1 - alpha) * angle_k
+        drive = self.alpha * self.dt * euler_rates(angles, gyro) + (1 - self.alpha) * unwrapped
+        start = unwrapped[:, 0] if self._attitude is None else self._attitude
+        fused, _ = lfilter([1.0], [1.0, -self.alpha], drive, axis=1, zi=(self.alpha * start)[:, np.newaxis])
+        self._attitude = fused[:, -1].copy()
+        return fused
+
+    def apply(self, acc, angles, gyro=None):
+        """
+        Rotates a block of body-frame acceleration into the world frame and removes gravity.
+
+        Args:
+            acc (np.ndarray): (3, n) measured acceleration (specific force) in m/s^2.
+            angles (np.ndarray): (3, n) roll, pitch, yaw in degrees.
+            gyro (np.ndarray): (3, n) body rates in deg/s (used with gyro_fusion).
+
+        Returns:
+            np.ndarray: (3, n) world-frame acceleration (X, Y, Z up) without gravity, m/s^2.
+        """
+        R = rotation_matrices(self.attitude(angles, gyro))
+        world = np.einsum('nij,jn->in', R, np.asarray(acc, dtype=float))
+        world[2] -= self.gravity
+        return world
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size circular buffer that always exposes its contents as one contiguous array.
+
+    Samples are stored twice, at position i and i + size of a 2*size backing array, and a head
+    index marks the oldest sample. The window backing[head:head + size] therefore holds the
+    samples oldest first without copying, and appending n samples writes 2*n values without
+    moving the rest of the buffer or allocating.
+
+    Views returned by view() are overwritten by later appends.
+    """
+    __slots__ = ('size', '_data', '_head')
+
+    def __init__(self, size, dtype=float):
+        if size < 1:
+            raise ValueError("RingBuffer size must be at least 1.")
+        self.size = size
+        self._data = np.zeros(2 * size, dtype=dtype)
+        self._head = 0
+
+    def __len__(self):
+        return self.size
+
+    def fill(self, value):
+        self._data.fill(value)
+        self._head = 0
+
+    def append(self, values):
+        """Appends samples, dropping the oldest ones. Only the last size values are kept."""
+        n = len(values)
+        if n == 0:
+            return
+        if n > self.size:
+            values = values[n - self.size:]
+            n = self.size
+        size, head = self.size, self._head
+        first = min(n, size - head)
+        # The oldest n slots (starting at head) take the new samples, in both copies
+        self._data[head:head + first] = values[:first]
+        self._data[head + size:head + size + first] = values[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = values[first:]
+            self._data[size:size + rest] = values[first:]
+        self._head = (head + n) % size
+
+    def get_state(self):
+        """Returns a copy of the samples, oldest first."""
+        return self.view().copy()
+
+    def set_state(self, values):
+        """Restores samples returned by get_state() (exactly size values)."""
+        values = np.asarray(values)
+        if values.shape != (self.size,):
+            raise ValueError(f"RingBuffer state has shape {values.shape}, expected ({self.size},).")
+        self.fill(0)
+        self.append(values)
+
+    def view(self):
+        """Returns the samples, oldest first, as a read-only view of length size."""
+        window = self._data[self._head:self._head + self.size]
+        window.flags.writeable = False
+        return window
+
+    def tail(self, n):
+        """Returns a read-only view of the newest n samples."""
+        return self.view()[self.size - n:]
@@ -1,6 +1,7 @@
 import numpy as np
 import logging
 from scipy import signal
+from .detrenders import rls_linear_detrend
 
 logger = logging.getLogger(__name__)
 
@@ -65,31 +66,8 @@ class RLSFilter:
 
     def _rls_detrend(self, data, time_vector):
         """Removes trend using RLS algorithm."""
-        n = len(data)
-        trend_values = np.zeros_like(data)
-        
-        for i in range(n):
-            phi = np.array([time_vector[i], 1.0])  # Regressor vector for y = a*t + b
-            
-            y_pred = np.dot(self.theta, phi)  # Predict using current parameters
-            e = data[i] - y_pred  # Prediction error
-            
-            # Update gain vector k
-            P_phi = np.dot(self.P, phi)
-            denom = self.filter_q + np.dot(phi, P_phi)
-            k = P_phi / denom if denom != 0 else np.zeros_like(phi)
-            
-            # Update parameters theta
-            self.theta = self.theta + k * e
-            
-            # Update covariance matrix P
-            self.P = (self.P - np.outer(k, np.dot(phi, self.P))) / self.filter_q
-        
-        # Calculate the trend based on the final (updated) theta for this batch
-        for i in range(n):
-            trend_values[i] = np.dot(self.theta, np.array([time_vector[i], 1.0]))
-            
-        detrended_data = data - trend_values
+        detrended_data, trend_values, self.theta, self.P = rls_linear_detrend(
+            data, time_vector, self.theta, self.P, self.filter_q)
         return detrended_data, trend_values
 
     def _polynomial_detrend(self, data, time_vector):
@@ -1,6 +1,9 @@
 # rls_flt_disp_revised.py
 import numpy as np
 import logging
+from .detrenders import rls_linear_detrend, RLSBlockWeights
+from .integrator import TrapezoidalIntegrator
+from .ring_buffer import RingBuffer
 # import matplotlib.pyplot as plt # Loại bỏ matplotlib
 # from scipy.integrate import cumtrapz # cumtrapz không được sử dụng trong phiên bản trước
 
@@ -30,10 +33,18 @@ class RealTimeAccelerationIntegrator:
         self.dt = dt
         self.filter_q = filter_q
         
-        # Khởi tạo các buffer tính toán
-        self.acc_buffer = np.zeros(self.calc_frame_size)
+        # Khởi tạo các buffer tính toán: gia tốc lưu trong buffer vòng, vận tốc/vị trí và
+        # các mảng trung gian được cấp phát một lần và dùng lại cho mọi frame
+        self._acc_history = RingBuffer(self.calc_frame_size)
         self.vel_buffer = np.zeros(self.calc_frame_size)
         self.disp_buffer = np.zeros(self.calc_frame_size)
+        self._raw_work = np.zeros(self.calc_frame_size)
+        self._trend_work = np.zeros(self.calc_frame_size)
+        self._integrator = TrapezoidalIntegrator(dt)
+
+        # Trục thời gian cố định của buffer, trọng số RLS tương ứng được tính sẵn
+        self._time_vector = np.arange(0, self.calc_frame_size * dt, dt)[:self.calc_frame_size]
+        self._block_weights = RLSBlockWeights(self._time_vector, filter_q)
         
         # Các biến theo dõi trạng thái
         self.frame_count = 0
@@ -54,51 +65,35 @@ class RealTimeAccelerationIntegrator:
         """Kiểm tra xem bộ lọc đã 'làm ấm' đủ chưa để cung cấp kết quả tin cậy"""
         return self.frame_count >= self.warmup_frames
     
+    @property
+    def acc_buffer(self):
+        """Buffer gia tốc (cũ nhất trước), dạng view chỉ đọc"""
+        return self._acc_history.view()
+
     def reset(self):
         """Reset bộ tích hợp"""
-        self.acc_buffer = np.zeros(self.calc_frame_size)
-        self.vel_buffer = np.zeros(self.calc_frame_size)
-        self.disp_buffer = np.zeros(self.calc_frame_size)
+        self._acc_history.fill(0)
+        self.vel_buffer.fill(0)
+        self.disp_buffer.fill(0)
         self.frame_count = 0
         self.is_initialized = False
         self.P = np.eye(2) * 1000
         self.theta = np.zeros(2)
         
-    def _remove_linear_trend(self, data, t):
+    def _remove_linear_trend(self, data, t, out=None):
         """
         Loại bỏ xu hướng tuyến tính từ mảng dữ liệu bằng RLS
+        (out: mảng nhận kết quả, khi đó xu hướng trả về là mảng trung gian dùng lại)
         """
-        n = len(data)
-        for i in range(n):
-            # Tạo vector đầu vào: [t, 1] - mô hình tuyến tính y = a*t + b
-            phi = np.array([t[i], 1.0])
-            
-            # Dự đoán giá trị với các thông số hiện tại
-            y_pred = np.dot(self.theta, phi)
-            
-            # Tính toán sai số dự đoán
-            e = data[i] - y_pred
-            
-            # Cập nhật gain vector
-            # Công thức: k = P*phi / (q + phi^T * P * phi)
-            P_phi = np.dot(self.P, phi)
-            denom = self.filter_q + np.dot(phi, P_phi)
-            k = P_phi / denom
-            
-            # Cập nhật các tham số
-            # theta = theta + k * e
-            self.theta = self.theta + k * e
-            
-            # Cập nhật ma trận hiệp phương sai
-            # P = (P - k*phi^T*P) / q
-            self.P = (self.P - np.outer(k, np.dot(phi, self.P))) / self.filter_q
-        
-        # Trả về tín hiệu đã khử xu hướng
-        trend = np.zeros_like(data)
-        for i in range(n):
-            trend[i] = np.dot(self.theta, [t[i], 1.0])
-        
-        return data - trend, trend
+        # Khớp xu hướng y = a*t + b cho cả khối bằng kernel RLS dùng chung (xem detrenders.rls_linear_fit)
+        block_weights = None
+        if t is self._time_vector and self._block_weights.filter_q == self.filter_q:
+            block_weights = self._block_weights
+        t = t[:len(data)]
+        detrended, trend, self.theta, self.P = rls_linear_detrend(
+            data, t, self.theta, self.P, self.filter_q, block_weights=block_weights, out=out,
+            trend_out=None if out is None else self._trend_work[:len(data)])
+        return detrended, trend
     
     def integrate_acceleration(self, acc_data):
         """
@@ -106,25 +101,21 @@ class RealTimeAccelerationIntegrator:
         kết hợp với bộ lọc khử xu hướng RLS
         """
         n = len(acc_data)
-        
-        # Tạo mảng thời gian
-        t = np.arange(0, n*self.dt, self.dt)
-        
-        # Tích phân gia tốc thành vận tốc sử dụng phương pháp tích phân hình thang
-        vel = np.zeros(n)
-        for i in range(1, n):
-            vel[i] = vel[i-1] + (acc_data[i-1] + acc_data[i]) * self.dt / 2
-        
-        # Loại bỏ xu hướng dài hạn khỏi vận tốc sử dụng bộ lọc RLS
-        vel_detrended, vel_trend = self._remove_linear_trend(vel, t)
-        
-        # Tích phân vận tốc đã lọc thành vị trí
-        disp = np.zeros(n)
-        for i in range(1, n):
-            disp[i] = disp[i-1] + (vel_detrended[i-1] + vel_detrended[i]) * self.dt / 2
-        
-        # Loại bỏ xu hướng dài hạn từ vị trí
-        disp_detrended, disp_trend = self._remove_linear_trend(disp, t)
+        if n != self.calc_frame_size:
+            # Khối có độ dài khác buffer: dùng mảng mới thay cho các mảng dùng lại
+            t = np.arange(0, n*self.dt, self.dt)
+            vel_detrended, _ = self._remove_linear_trend(self._integrator.integrate(acc_data), t)
+            disp_detrended, _ = self._remove_linear_trend(self._integrator.integrate(vel_detrended), t)
+            return disp_detrended, vel_detrended, acc_data
+        
+        # Tích phân gia tốc thành vận tốc sử dụng phương pháp tích phân hình thang,
+        # rồi loại bỏ xu hướng dài hạn khỏi vận tốc sử dụng bộ lọc RLS
+        self._integrator.integrate(acc_data, out=self._raw_work)
+        vel_detrended, _ = self._remove_linear_trend(self._raw_work, self._time_vector, out=self.vel_buffer)
+        
+        # Tích phân vận tốc đã lọc thành vị trí, rồi loại bỏ xu hướng dài hạn từ vị trí
+        self._integrator.integrate(vel_detrended, out=self._raw_work)
+        disp_detrended, _ = self._remove_linear_trend(self._raw_work, self._time_vector, out=self.disp_buffer)
         
         return disp_detrended, vel_detrended, acc_data
     
@@ -144,21 +135,16 @@ class RealTimeAccelerationIntegrator:
         # Cập nhật frame thứ mấy để theo dõi warm-up
         self.frame_count += 1
             
-        # Dịch buffer hiện tại để thêm dữ liệu mới
-        self.acc_buffer = np.roll(self.acc_buffer, -frame_len)
-        # Thêm dữ liệu mới vào cuối buffer
-        self.acc_buffer[-frame_len:] = acc_frame
+        # Thêm dữ liệu mới vào cuối buffer vòng (không dịch/copy toàn bộ buffer)
+        self._acc_history.append(acc_frame)
         
         # Chỉ xử lý khi có đủ dữ liệu
         if self.frame_count >= 1:
-            # Tích hợp toàn bộ buffer
+            # Tích hợp toàn bộ buffer, kết quả ghi vào vel_buffer/disp_buffer
             disp_buffer, vel_buffer, acc_filtered = self.integrate_acceleration(self.acc_buffer)
             
-            # Cập nhật các buffer
-            self.vel_buffer = vel_buffer
-            self.disp_buffer = disp_buffer
-            
             # Trả về chỉ phần dữ liệu mới nhất tương ứng với frame đầu vào
+            # (view vào buffer, có hiệu lực đến lần gọi process_frame tiếp theo)
             return disp_buffer[-frame_len:], vel_buffer[-frame_len:], acc_filtered[-frame_len:]
         else:
             # Nếu chưa có đủ dữ liệu, trả về mảng NaN
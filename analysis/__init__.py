@@ -1,32 +1,53 @@
 from .statistical_tools import (
     calculate_descriptive_stats,
+    descriptive_stats_matrix,
     calculate_correlation_matrix,
     calculate_histogram
 )
 
 from .spectral_tools import (
     calculate_fft,
+    calculate_psd_welch,
+    calculate_spectrogram,
     find_dominant_frequency
 )
 
 from .anomaly_detection_tools import (
     detect_outliers_zscore,
     detect_anomalies_moving_average,
-    detect_sudden_changes
+    detect_sudden_changes,
+    rolling_mean_std
+)
+
+from .streaming_stats import (
+    StreamingStats,
+    WindowedStats,
+    QuantileSketch,
+    descriptive_stats_from_summary
 )
 
 __all__ = [
     # Statistical tools
     'calculate_descriptive_stats',
+    'descriptive_stats_matrix',
     'calculate_correlation_matrix',
     'calculate_histogram',
     
     # Spectral tools
     'calculate_fft',
+    'calculate_psd_welch',
+    'calculate_spectrogram',
     'find_dominant_frequency',
     
     # Anomaly detection tools
     'detect_outliers_zscore',
     'detect_anomalies_moving_average',
-    'detect_sudden_changes'
+    'detect_sudden_changes',
+    'rolling_mean_std',
+
+    # Streaming statistics
+    'StreamingStats',
+    'WindowedStats',
+    'QuantileSketch',
+    'descriptive_stats_from_summary'
 ] 
\ No newline at end of file
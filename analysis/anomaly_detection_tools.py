@@ -23,9 +23,97 @@ def detect_outliers_zscore(data_array: np.ndarray,
     
     return outlier_indices, outlier_values
 
+def rolling_mean_std(data_array: np.ndarray,
+                     window_size: int,
+                     center: bool = False,
+                     min_periods: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and (population) standard deviation in O(n).
+
+    Window sums come from cumulative sums of the samples and their squares. To avoid
+    cancellation when the signal has a large offset or drifts, the samples are split into
+    blocks of window_size and shifted by the mean of their block; a window spans at most two
+    blocks, and the part in the second block is moved to the first block's offset before
+    the variance is formed. Non-finite samples (NaN, inf) are left out of the windows.
+
+    Args:
+        data_array: Input data array
+        window_size: Number of samples per window
+        center: Center the window on each sample instead of ending it there
+        min_periods: Minimum number of finite samples for a window to be evaluated
+                     (default: window_size)
+
+    Returns:
+        Tuple of (rolling mean, rolling std), same length as data_array, NaN where the
+        window has fewer than min_periods finite samples (including the truncated windows
+        at the edges)
+    """
+    if window_size < 1:
+        raise ValueError(f"window_size must be at least 1, got {window_size}")
+    if min_periods is None:
+        min_periods = window_size
+    if not 1 <= min_periods <= window_size:
+        raise ValueError(f"min_periods must be between 1 and window_size, got {min_periods}")
+
+    data = np.asarray(data_array, dtype=float)
+    n = data.size
+    if n == 0:
+        return np.array([]), np.array([])
+    valid = np.isfinite(data)
+    finite_data = np.where(valid, data, 0.0)
+
+    # Offset of each block: the mean of its finite samples (blocks without any take the nearest block's)
+    block = np.arange(n) // window_size
+    block_starts = np.arange(0, n, window_size)
+    block_counts = np.add.reduceat(valid.astype(int), block_starts)
+    with np.errstate(invalid='ignore'):
+        offsets = np.add.reduceat(finite_data, block_starts) / block_counts
+    has_data = block_counts > 0
+    if has_data.any():
+        nearest = np.maximum.accumulate(np.where(has_data, np.arange(len(offsets)), 0))
+        nearest = np.where(has_data[nearest], nearest, np.argmax(has_data))
+        offsets = offsets[nearest]
+    else:
+        offsets = np.zeros(len(offsets))
+    values = np.where(valid, data - offsets[block], 0.0)
+
+    # Prefix sums with a leading zero: the sum over samples [a, b) is s[b] - s[a]
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    sums_sq = np.concatenate(([0.0], np.cumsum(values * values)))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    # Window of sample i: [i + 1 + offset - window_size, i + 1 + offset), clipped to the data
+    offset = (window_size - 1) // 2 if center else 0
+    stop = np.arange(1, n + 1) + offset
+    start = np.maximum(stop - window_size, 0)
+    end = np.minimum(stop, n)
+
+    # Split each window at the start of the next block: [start, split) and [split, end)
+    first_block = block[start]
+    split = np.minimum((first_block + 1) * window_size, end)
+    first_count = counts[split] - counts[start]
+    second_count = counts[end] - counts[split]
+    second_sum = sums[end] - sums[split]
+    # Second part relative to the first block's offset: x - c1 = (x - c2) + delta
+    delta = offsets[np.minimum(first_block + 1, len(offsets) - 1)] - offsets[first_block]
+    count = first_count + second_count
+    window_sum = sums[split] - sums[start] + second_sum + second_count * delta
+    window_sum_sq = (sums_sq[split] - sums_sq[start] + sums_sq[end] - sums_sq[split]
+                     + 2 * delta * second_sum + second_count * delta * delta)
+
+    evaluated = count >= min_periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = window_sum / count
+        variance = np.maximum(window_sum_sq / count - mean * mean, 0.0)
+    moving_avg = np.where(evaluated, mean + offsets[first_block], np.nan)
+    moving_std = np.where(evaluated, np.sqrt(variance), np.nan)
+    return moving_avg, moving_std
+
 def detect_anomalies_moving_average(data_array: np.ndarray,
                                   window_size: int = 20,
-                                  threshold: float = 2.0) -> Tuple[np.ndarray, np.ndarray]:
+                                  threshold: float = 2.0,
+                                  center: bool = False,
+                                  min_periods: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
     """
     Detect anomalies using moving average and standard deviation.
     
@@ -33,26 +121,29 @@ def detect_anomalies_moving_average(data_array: np.ndarray,
         data_array: Input data array
         window_size: Size of moving window
         threshold: Number of standard deviations for anomaly detection
+        center: Use windows centered on each sample (default: windows ending at the sample)
+        min_periods: Minimum number of finite samples in a window (default: window_size);
+                     non-finite samples are skipped and never reported
         
     Returns:
         Tuple of (anomaly indices, anomaly values)
     """
+    if window_size < 1:
+        raise ValueError(f"window_size must be at least 1, got {window_size}")
     if data_array.size < window_size:
         return np.array([]), np.array([])
         
     # Calculate moving average and standard deviation
-    moving_avg = np.convolve(data_array, np.ones(window_size)/window_size, mode='valid')
-    moving_std = np.array([np.std(data_array[i:i+window_size]) 
-                          for i in range(len(data_array)-window_size+1)])
+    moving_avg, moving_std = rolling_mean_std(data_array, window_size, center, min_periods)
     
     # Calculate upper and lower bounds
     upper_bound = moving_avg + threshold * moving_std
     lower_bound = moving_avg - threshold * moving_std
     
-    # Find anomalies
-    anomalies = np.zeros_like(data_array, dtype=bool)
-    anomalies[window_size-1:] = (data_array[window_size-1:] > upper_bound) | \
-                               (data_array[window_size-1:] < lower_bound)
+    # Find anomalies (comparisons with NaN bounds or samples are False)
+    with np.errstate(invalid='ignore'):
+        anomalies = (data_array > upper_bound) | (data_array < lower_bound)
+    anomalies &= np.isfinite(data_array)
     
     anomaly_indices = np.where(anomalies)[0]
     anomaly_values = data_array[anomaly_indices]
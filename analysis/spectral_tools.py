@@ -1,7 +1,38 @@
 import numpy as np
+from functools import lru_cache
+from scipy.fft import rfft, rfftfreq
 from scipy.signal import windows
 from typing import Tuple, Optional
 
+# Window names accepted by the spectral functions and their scipy.signal.windows functions
+WINDOW_FUNCTIONS = {
+    'Hann': windows.hann,
+    'Hamming': windows.hamming,
+    'Blackman': windows.blackman,
+    'Rectangular': windows.boxcar,
+}
+DETREND_TYPES = ('constant', 'linear', None)
+
+@lru_cache(maxsize=64)
+def get_window(window_type: str, n_points: int, periodic: bool = False) -> np.ndarray:
+    """
+    Return a (cached, read-only) window of n_points samples.
+
+    Args:
+        window_type: Name of the window function (see WINDOW_FUNCTIONS)
+        n_points: Window length
+        periodic: DFT-even window for spectral averaging (as scipy.signal.welch) instead
+            of the symmetric window
+
+    Returns:
+        Window array
+    """
+    if window_type not in WINDOW_FUNCTIONS:
+        raise ValueError(f"Unknown window type: {window_type}")
+    window = WINDOW_FUNCTIONS[window_type](n_points, sym=not periodic)
+    window.setflags(write=False)
+    return window
+
 def calculate_fft(data_array: np.ndarray, 
                  dt: float,
                  n_fft_points: int,
@@ -18,6 +49,8 @@ def calculate_fft(data_array: np.ndarray,
     Returns:
         Tuple of (frequency array, amplitude spectrum)
     """
+    _check_spectral_params(dt, n_fft_points)
+    window = get_window(window_type, n_fft_points)
     if data_array.size < n_fft_points:
         return np.array([]), np.array([])
         
@@ -25,15 +58,6 @@ def calculate_fft(data_array: np.ndarray,
     segment = data_array[-n_fft_points:]
     
     # Apply window function
-    if window_type == 'Hann':
-        window = windows.hann(n_fft_points)
-    elif window_type == 'Hamming':
-        window = windows.hamming(n_fft_points)
-    elif window_type == 'Blackman':
-        window = windows.blackman(n_fft_points)
-    else:  # Rectangular
-        window = np.ones(n_fft_points)
-        
     segment_windowed = segment * window
     
     # Calculate FFT
@@ -45,6 +69,111 @@ def calculate_fft(data_array: np.ndarray,
     
     return xf, amplitude_spectrum
 
+def _check_spectral_params(dt: float, n_points: int, overlap: float = 0.0, detrend: Optional[str] = None):
+    if dt <= 0:
+        raise ValueError(f"dt must be positive, got {dt}")
+    if n_points < 1:
+        raise ValueError(f"Number of FFT points must be at least 1, got {n_points}")
+    if not 0 <= overlap < 1:
+        raise ValueError(f"Overlap must be in [0, 1), got {overlap}")
+    if detrend not in DETREND_TYPES:
+        raise ValueError(f"Unknown detrend type: {detrend}")
+
+def _segment_psd(data_array: np.ndarray, dt: float, nperseg: int, overlap: float,
+                 window_type: str, detrend: Optional[str]):
+    """
+    One-sided power spectral density of every segment of a signal.
+
+    The segments are a strided view of the data (no copies); detrending, windowing and a
+    single 2-D rfft are applied to all of them at once.
+
+    Returns:
+        Tuple of (frequency array, segment start indices, PSD of shape (segments, frequencies)),
+        or None if the data is shorter than one segment
+    """
+    _check_spectral_params(dt, nperseg, overlap, detrend)
+    window = get_window(window_type, nperseg, periodic=True)
+    data_array = np.asarray(data_array, dtype=float).ravel()
+    if data_array.size < nperseg:
+        return None
+
+    step = nperseg - min(int(round(overlap * nperseg)), nperseg - 1)
+    segments = np.lib.stride_tricks.sliding_window_view(data_array, nperseg)[::step]
+    starts = np.arange(segments.shape[0]) * step
+
+    if detrend == 'constant':
+        segments = segments - segments.mean(axis=1, keepdims=True)
+    elif detrend == 'linear':
+        # Least-squares line of each segment against a centered time index
+        t = np.arange(nperseg) - (nperseg - 1) / 2
+        slopes = segments @ t / (t @ t) if nperseg > 1 else np.zeros(segments.shape[0])
+        segments = segments - segments.mean(axis=1, keepdims=True) - slopes[:, np.newaxis] * t
+
+    spectra = rfft(segments * window, axis=1)
+    psd = spectra.real ** 2 + spectra.imag ** 2
+    psd *= dt / (window @ window) # Density scaling, units^2/Hz
+    # One-sided: double all bins except DC and (for even lengths) Nyquist
+    psd[:, 1:(nperseg + 1) // 2] *= 2
+    return rfftfreq(nperseg, dt), starts, psd
+
+def calculate_psd_welch(data_array: np.ndarray,
+                        dt: float,
+                        nperseg: int = 256,
+                        overlap: float = 0.5,
+                        window_type: str = 'Hann',
+                        detrend: Optional[str] = 'constant') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the power spectral density with Welch's method.
+
+    The whole signal is split into overlapping segments whose periodograms are averaged,
+    which lowers the variance of the estimate compared with a single FFT.
+
+    Args:
+        data_array: Input data array
+        dt: Sampling time interval
+        nperseg: Number of points per segment
+        overlap: Overlap of consecutive segments as a fraction of nperseg, in [0, 1)
+        window_type: Type of window function ('Hann', 'Hamming', 'Blackman', 'Rectangular')
+        detrend: Detrending of each segment ('constant', 'linear' or None)
+
+    Returns:
+        Tuple of (frequency array, power spectral density in units^2/Hz); empty arrays if
+        the data is shorter than one segment
+    """
+    result = _segment_psd(data_array, dt, nperseg, overlap, window_type, detrend)
+    if result is None:
+        return np.array([]), np.array([])
+    freq_array, _, psd = result
+    return freq_array, psd.mean(axis=0)
+
+def calculate_spectrogram(data_array: np.ndarray,
+                          dt: float,
+                          nperseg: int = 256,
+                          overlap: float = 0.5,
+                          window_type: str = 'Hann',
+                          detrend: Optional[str] = 'constant') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the spectrogram (power spectral density of each overlapping segment).
+
+    Args:
+        data_array: Input data array
+        dt: Sampling time interval
+        nperseg: Number of points per segment
+        overlap: Overlap of consecutive segments as a fraction of nperseg, in [0, 1)
+        window_type: Type of window function ('Hann', 'Hamming', 'Blackman', 'Rectangular')
+        detrend: Detrending of each segment ('constant', 'linear' or None)
+
+    Returns:
+        Tuple of (frequency array, segment center times relative to the first sample,
+        power spectral density of shape (frequencies, segments)); empty arrays if the data
+        is shorter than one segment
+    """
+    result = _segment_psd(data_array, dt, nperseg, overlap, window_type, detrend)
+    if result is None:
+        return np.array([]), np.array([]), np.empty((0, 0))
+    freq_array, starts, psd = result
+    return freq_array, (starts + nperseg / 2) * dt, psd.T
+
 def find_dominant_frequency(freq_array: np.ndarray,
                           amplitude_spectrum: np.ndarray,
                           min_freq: float = 0.1) -> Optional[float]:
@@ -1,35 +1,117 @@
 import numpy as np
 from typing import Dict, List, Tuple, Union, Optional
 
-def calculate_descriptive_stats(data_dict: Dict[str, np.ndarray]) -> List[Dict[str, Union[str, float]]]:
+# Metric rows of calculate_descriptive_stats(), in table order
+DESCRIPTIVE_METRICS = ["Mean", "Median", "Std Dev", "Min", "Max", "Variance"]
+EXTENDED_METRICS = ["RMS", "Peak-to-Peak", "Skewness", "Kurtosis", "Crest Factor"]
+
+def _median_rows(data: np.ndarray) -> np.ndarray:
+    """Median of each row of a 2-D array, partitioning data in place (a single selection per row)."""
+    k = data.shape[1] // 2
+    data.partition(k, axis=1)
+    upper = data[:, k]
+    if data.shape[1] % 2:
+        return upper.copy()
+    # After the partition the lower middle value is the largest of the left part
+    return (data[:, :k].max(axis=1) + upper) / 2
+
+def descriptive_stats_matrix(data: np.ndarray, extended: bool = False,
+                             overwrite_input: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Calculate descriptive statistics of each row of a 2-D array.
+
+    All rows are reduced together: one pass each for the mean, min/max and the centered
+    moments and a single partition for the median; RMS, peak-to-peak and crest factor are
+    derived from those without further passes.
+
+    Args:
+        data: Array of shape (fields, n), n > 0
+        extended: Also compute EXTENDED_METRICS
+        overwrite_input: Allow overwriting data (avoids a scratch copy for the median and
+            the centered moments)
+
+    Returns:
+        Dictionary mapping each metric name to an array of one value per row
+    """
+    data = np.asarray(data, dtype=float)
+    if data.ndim != 2 or data.shape[1] == 0:
+        raise ValueError(f"Expected a non-empty 2-D array, got shape {data.shape}")
+    # Rows with NaN/inf propagate NaN silently (calculate_descriptive_stats() reports them as "N/A")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = data.shape[1]
+        mean = data.mean(axis=1)
+        minimum = data.min(axis=1)
+        maximum = data.max(axis=1)
+        scratch = data if overwrite_input else data.copy()
+        median = _median_rows(scratch)
+        # All remaining statistics are invariant to the reordering, so the scratch array is centered in place
+        centered = np.subtract(scratch, mean[:, np.newaxis], out=scratch)
+        variance = np.einsum('ij,ij->i', centered, centered) / n
+        result = {
+            "Mean": mean,
+            "Median": median,
+            "Std Dev": np.sqrt(variance),
+            "Min": minimum,
+            "Max": maximum,
+            "Variance": variance,
+        }
+        if extended:
+            rms = np.sqrt(mean * mean + variance)
+            nonconstant = variance > 0
+            squared = centered * centered
+            # Population (biased) moments, as scipy.stats.skew/kurtosis; kurtosis is the excess (Fisher) kurtosis
+            skewness = np.where(nonconstant, np.einsum('ij,ij->i', squared, centered) / n / variance ** 1.5, np.nan)
+            kurtosis = np.where(nonconstant, np.einsum('ij,ij->i', squared, squared) / n / variance ** 2 - 3.0, np.nan)
+            crest_factor = np.where(rms > 0, np.maximum(np.abs(minimum), np.abs(maximum)) / rms, np.nan)
+            result.update({
+                "RMS": rms,
+                "Peak-to-Peak": maximum - minimum,
+                "Skewness": skewness,
+                "Kurtosis": kurtosis,
+                "Crest Factor": crest_factor,
+            })
+    return result
+
+def calculate_descriptive_stats(data_dict: Dict[str, np.ndarray],
+                                extended: bool = False) -> List[Dict[str, Union[str, float]]]:
     """
     Calculate descriptive statistics for multiple data arrays.
-    
+
+    Fields of equal length are stacked into one 2-D array and reduced together (see
+    descriptive_stats_matrix()). Empty fields and fields containing NaN or infinite values
+    are reported as "N/A".
+
     Args:
         data_dict: Dictionary of data arrays with field names as keys
-        
+        extended: Also report EXTENDED_METRICS (RMS, Peak-to-Peak, Skewness, Kurtosis, Crest Factor)
+
     Returns:
         List of dictionaries containing statistics for each metric
     """
-    metrics = ["Mean", "Median", "Std Dev", "Min", "Max", "Variance"]
+    metrics = DESCRIPTIVE_METRICS + EXTENDED_METRICS if extended else DESCRIPTIVE_METRICS
+    values = {field: "N/A" for field in data_dict}
+
+    fields_by_length = {}
+    for field, data_array in data_dict.items():
+        data_array = np.ravel(data_array)
+        if data_array.size:
+            fields_by_length.setdefault(data_array.size, []).append((field, data_array))
+
+    for group in fields_by_length.values():
+        stats = descriptive_stats_matrix(np.stack([data_array for _, data_array in group]).astype(float, copy=False),
+                                         extended, overwrite_input=True)
+        finite = np.isfinite(stats["Min"]) & np.isfinite(stats["Max"])
+        for idx, (field, _) in enumerate(group):
+            if finite[idx]:
+                values[field] = {metric_name: stats[metric_name][idx] for metric_name in metrics}
+
     stats_list = []
-    
     for metric_name in metrics:
         row_data = {'Metric': metric_name}
-        for field, data_array in data_dict.items():
-            if data_array.size == 0:
-                row_data[field] = "N/A"
-                continue
-                
-            if metric_name == "Mean": row_data[field] = np.mean(data_array)
-            elif metric_name == "Median": row_data[field] = np.median(data_array)
-            elif metric_name == "Std Dev": row_data[field] = np.std(data_array)
-            elif metric_name == "Min": row_data[field] = np.min(data_array)
-            elif metric_name == "Max": row_data[field] = np.max(data_array)
-            elif metric_name == "Variance": row_data[field] = np.var(data_array)
-            
+        for field, field_values in values.items():
+            row_data[field] = field_values[metric_name] if isinstance(field_values, dict) else field_values
         stats_list.append(row_data)
-    
+
     return stats_list
 
 def calculate_correlation_matrix(data_dict: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[str]]:
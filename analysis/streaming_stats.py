@@ -0,0 +1,266 @@
+import numpy as np
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+# Statistics of a summary() and the metric names used in descriptive statistics tables
+SUMMARY_METRICS = (("Mean", 'mean'), ("Median", 'median'), ("Std Dev", 'std'),
+                   ("Min", 'min'), ("Max", 'max'), ("Variance", 'variance'))
+
+
+def merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Combines the count, mean and sum of squared deviations (M2) of two sample sets
+    (Chan et al. parallel form of Welford's algorithm).
+
+    Returns:
+        Tuple of (count, mean, M2) of the union
+    """
+    count = count_a + count_b
+    if count_b == 0:
+        return count_a, mean_a, m2_a
+    if count_a == 0:
+        return count_b, mean_b, m2_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta * delta * (count_a * count_b / count)
+    return count, mean, m2
+
+
+def block_moments(block: np.ndarray):
+    """Returns (count, mean, M2) per channel of a (channels, n) block."""
+    count = block.shape[1]
+    if count == 0:
+        zeros = np.zeros(block.shape[0])
+        return 0, zeros, zeros.copy()
+    mean = block.mean(axis=1)
+    deviations = block - mean[:, np.newaxis]
+    return count, mean, np.einsum('ij,ij->i', deviations, deviations)
+
+
+def weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> np.ndarray:
+    """
+    Quantile of weighted samples per channel.
+
+    Each sample covers a rank interval of its weight and is placed at the interval's
+    center; the quantile is interpolated linearly between samples, so with unit weights the
+    result equals np.quantile(..., method='hazen') (e.g. the usual median).
+
+    Args:
+        values: (channels, m) samples
+        weights: (m,) sample weights, shared by all channels
+        q: Quantile in [0, 1]
+
+    Returns:
+        (channels,) quantiles (NaN if there are no samples)
+    """
+    num_channels = values.shape[0]
+    if values.shape[1] == 0:
+        return np.full(num_channels, np.nan)
+    order = np.argsort(values, axis=1)
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    sorted_weights = weights[order]
+    centers = np.cumsum(sorted_weights, axis=1) - sorted_weights / 2
+    target = q * weights.sum()
+    return np.array([np.interp(target, centers[c], sorted_values[c]) for c in range(num_channels)])
+
+
+class QuantileSketch:
+    """
+    Approximate streaming quantiles of several channels in bounded memory.
+
+    Samples enter level 0; level h holds samples of weight 2**h. When a level holds 2*k
+    samples it is sorted and every other sample (starting at a random offset) moves up one
+    level with twice the weight (a compactor hierarchy, as in the MRL/KLL sketches). Memory
+    is O(k * log2(n / k)) per channel and the rank error is typically well below 1% for the
+    default k. Quantiles are exact while fewer than 2*k samples have been added.
+    """
+    def __init__(self, num_channels: int, k: int = 256, seed: int = 0):
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.num_channels = num_channels
+        self.k = k
+        self._rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._levels = [np.empty((self.num_channels, 0))]
+
+    @property
+    def num_retained(self) -> int:
+        """Number of samples kept per channel."""
+        return sum(level.shape[1] for level in self._levels)
+
+    def update(self, block: np.ndarray):
+        """Adds a (num_channels, n) block of samples."""
+        block = np.asarray(block, dtype=float)
+        self.count += block.shape[1]
+        self._levels[0] = np.concatenate((self._levels[0], block), axis=1)
+        h = 0
+        while h < len(self._levels) and self._levels[h].shape[1] >= 2 * self.k:
+            level = np.sort(self._levels[h], axis=1)
+            paired = level.shape[1] - level.shape[1] % 2
+            offset = int(self._rng.integers(2))
+            promoted = level[:, offset:paired:2]
+            self._levels[h] = level[:, paired:]
+            if h + 1 == len(self._levels):
+                self._levels.append(np.empty((self.num_channels, 0)))
+            self._levels[h + 1] = np.concatenate((self._levels[h + 1], promoted), axis=1)
+            h += 1
+
+    def weighted_samples(self):
+        """Returns (values (num_channels, m), weights (m,)) of the retained samples."""
+        values = np.concatenate(self._levels, axis=1)
+        weights = np.concatenate([np.full(level.shape[1], 2.0 ** h) for h, level in enumerate(self._levels)])
+        return values, weights
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Returns the approximate q-quantile of each channel."""
+        return weighted_quantile(*self.weighted_samples(), q)
+
+
+class StreamingStats:
+    """
+    Count, mean, variance (Welford/Chan block updates), min, max and approximate median of
+    several channels over everything added since the last reset, in O(1) memory per
+    channel apart from the quantile sketch.
+    """
+    def __init__(self, num_channels: int, sketch_k: int = 256):
+        self.num_channels = num_channels
+        self.sketch = QuantileSketch(num_channels, sketch_k)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = np.zeros(self.num_channels)
+        self.m2 = np.zeros(self.num_channels)
+        self.min = np.full(self.num_channels, np.inf)
+        self.max = np.full(self.num_channels, -np.inf)
+        self.sketch.reset()
+
+    def update(self, block: np.ndarray):
+        """Adds a (num_channels, n) block of samples."""
+        block = np.asarray(block, dtype=float)
+        if block.shape[1] == 0:
+            return
+        self.count, self.mean, self.m2 = merge_moments(self.count, self.mean, self.m2, *block_moments(block))
+        np.minimum(self.min, block.min(axis=1), out=self.min)
+        np.maximum(self.max, block.max(axis=1), out=self.max)
+        self.sketch.update(block)
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """
+        Returns:
+            Dictionary with 'count' and per-channel arrays 'mean', 'median', 'std',
+            'variance', 'min', 'max' (population statistics; NaN while empty)
+        """
+        return _summary(self.count, self.mean, self.m2, self.min, self.max,
+                        self.sketch.quantile(0.5) if self.count else None, self.num_channels)
+
+
+class WindowedStats:
+    """
+    The statistics of StreamingStats over the most recent window_len samples.
+
+    Samples are summarized in chunks of chunk_len (moments, min, max and `points` quantile
+    points per channel). Chunks are dropped once they have left the window, and summary()
+    merges the remaining chunks with the samples of the current partial chunk, so the
+    window is exact to within one chunk and the median is approximate.
+    """
+    def __init__(self, num_channels: int, window_len: int, chunk_len: int = 256, points: int = 32):
+        self.num_channels = num_channels
+        self.chunk_len = max(1, int(chunk_len))
+        self.points = points
+        self._quantile_levels = (np.arange(points) + 0.5) / points
+        self.window_len = window_len
+        self._pending = np.empty((num_channels, self.chunk_len))
+        self.reset()
+
+    def reset(self):
+        self._chunks = deque()
+        self._chunk_samples = 0
+        self._pending_count = 0
+
+    @property
+    def count(self) -> int:
+        return self._chunk_samples + self._pending_count
+
+    def set_window(self, window_len: int):
+        """Changes the window length (e.g. when the retention of the recent tier changes)."""
+        self.window_len = window_len
+        self._drop_old_chunks()
+
+    def update(self, block: np.ndarray):
+        """Adds a (num_channels, n) block of samples."""
+        block = np.asarray(block, dtype=float)
+        start = 0
+        while start < block.shape[1]:
+            take = min(self.chunk_len - self._pending_count, block.shape[1] - start)
+            self._pending[:, self._pending_count:self._pending_count + take] = block[:, start:start + take]
+            self._pending_count += take
+            start += take
+            if self._pending_count == self.chunk_len:
+                self._close_chunk()
+        self._drop_old_chunks()
+
+    def _close_chunk(self):
+        chunk = self._pending
+        count, mean, m2 = block_moments(chunk)
+        self._chunks.append((count, mean, m2, chunk.min(axis=1), chunk.max(axis=1),
+                             np.quantile(chunk, self._quantile_levels, axis=1).T))
+        self._chunk_samples += count
+        self._pending_count = 0
+
+    def _drop_old_chunks(self):
+        while self._chunks and self.count - self._chunks[0][0] >= self.window_len:
+            self._chunk_samples -= self._chunks.popleft()[0]
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """Returns the window statistics in the format of StreamingStats.summary()."""
+        pending = self._pending[:, :self._pending_count]
+        count, mean, m2 = block_moments(pending)
+        minimum = pending.min(axis=1) if self._pending_count else np.full(self.num_channels, np.inf)
+        maximum = pending.max(axis=1) if self._pending_count else np.full(self.num_channels, -np.inf)
+        values, weights = [pending], [np.ones(self._pending_count)]
+        for chunk_count, chunk_mean, chunk_m2, chunk_min, chunk_max, chunk_points in self._chunks:
+            count, mean, m2 = merge_moments(count, mean, m2, chunk_count, chunk_mean, chunk_m2)
+            minimum = np.minimum(minimum, chunk_min)
+            maximum = np.maximum(maximum, chunk_max)
+            values.append(chunk_points)
+            weights.append(np.full(self.points, chunk_count / self.points))
+        median = weighted_quantile(np.concatenate(values, axis=1), np.concatenate(weights), 0.5) if count else None
+        return _summary(count, mean, m2, minimum, maximum, median, self.num_channels)
+
+
+def _summary(count, mean, m2, minimum, maximum, median, num_channels):
+    if not count:
+        nan = np.full(num_channels, np.nan)
+        return {'count': 0, 'mean': nan, 'median': nan.copy(), 'std': nan.copy(),
+                'variance': nan.copy(), 'min': nan.copy(), 'max': nan.copy()}
+    variance = m2 / count
+    return {'count': count, 'mean': np.array(mean, dtype=float), 'median': median,
+            'std': np.sqrt(variance), 'variance': variance,
+            'min': np.array(minimum, dtype=float), 'max': np.array(maximum, dtype=float)}
+
+
+def descriptive_stats_from_summary(summary: Dict[str, np.ndarray], field_names: Sequence[str],
+                                   fields: Optional[Sequence[str]] = None):
+    """
+    Formats a StreamingStats/WindowedStats summary like calculate_descriptive_stats().
+
+    Args:
+        summary: Summary with one value per channel
+        field_names: Field name of each channel
+        fields: Fields to include (default: all)
+
+    Returns:
+        List of dictionaries containing statistics for each metric
+    """
+    columns = [(idx, name) for idx, name in enumerate(field_names) if fields is None or name in fields]
+    stats_list = []
+    for metric_name, key in SUMMARY_METRICS:
+        row_data = {'Metric': metric_name}
+        for idx, name in columns:
+            row_data[name] = float(summary[key][idx]) if summary['count'] else "N/A"
+        stats_list.append(row_data)
+    return stats_list
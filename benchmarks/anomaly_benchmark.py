@@ -0,0 +1,84 @@
+"""
+Benchmark of the O(n) rolling-window anomaly detection against the previous per-window version.
+
+Usage:
+    python -m benchmarks.anomaly_benchmark [--sizes 1000 100000 ...] [--windows 20 200] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analysis.anomaly_detection_tools import detect_anomalies_moving_average
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_WINDOWS = (20, 200)
+
+
+def loop_detect_anomalies_moving_average(data_array, window_size=20, threshold=2.0):
+    # Previous implementation: np.std of every window, O(n * window_size)
+    moving_avg = np.convolve(data_array, np.ones(window_size)/window_size, mode='valid')
+    moving_std = np.array([np.std(data_array[i:i+window_size])
+                          for i in range(len(data_array)-window_size+1)])
+    upper_bound = moving_avg + threshold * moving_std
+    lower_bound = moving_avg - threshold * moving_std
+    anomalies = np.zeros_like(data_array, dtype=bool)
+    anomalies[window_size-1:] = (data_array[window_size-1:] > upper_bound) | \
+                               (data_array[window_size-1:] < lower_bound)
+    anomaly_indices = np.where(anomalies)[0]
+    return anomaly_indices, data_array[anomaly_indices]
+
+
+def _best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, windows=DEFAULT_WINDOWS, repeat=3, threshold=2.0):
+    """
+    Times the previous and the rolling-sum detection on noisy sinusoids with spikes.
+
+    Returns:
+        list: One dict per (size, window) with times in seconds and whether both versions
+              report the same anomaly indices.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        t = np.arange(size) * 0.005
+        data = np.sin(2 * np.pi * 1.5 * t) + 0.1 * rng.standard_normal(size)
+        data[rng.integers(0, size, max(1, size // 1000))] += 5.0
+        for window in windows:
+            loop_indices, _ = loop_detect_anomalies_moving_average(data, window, threshold)
+            indices, _ = detect_anomalies_moving_average(data, window, threshold)
+            results.append({
+                'size': size,
+                'window': window,
+                'loop_s': _best_time(lambda: loop_detect_anomalies_moving_average(data, window, threshold), repeat),
+                'rolling_s': _best_time(lambda: detect_anomalies_moving_average(data, window, threshold), repeat),
+                'anomalies': len(indices),
+                'same_indices': bool(np.array_equal(loop_indices, indices))
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--windows', type=int, nargs='+', default=list(DEFAULT_WINDOWS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>10}{'window':>8}{'loop [ms]':>14}{'rolling [ms]':>14}{'speedup':>10}"
+          f"{'anomalies':>11}{'same':>6}")
+    for row in run_benchmark(args.sizes, args.windows, args.repeat):
+        print(f"{row['size']:>10}{row['window']:>8}{row['loop_s'] * 1e3:>14.3f}{row['rolling_s'] * 1e3:>14.3f}"
+              f"{row['loop_s'] / row['rolling_s']:>9.0f}x{row['anomalies']:>11}{str(row['same_indices']):>6}")
+
+
+if __name__ == '__main__':
+    main()
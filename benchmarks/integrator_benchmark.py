@@ -0,0 +1,100 @@
+"""
+Benchmark of the vectorized integrators against the previous per-sample loop versions.
+
+Usage:
+    python -m benchmarks.integrator_benchmark [--sizes 100 1000 ...] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from algorithm.integrator import (TrapezoidalIntegrator, SimpsonIntegrator,
+                                  RectangularIntegrator, IntegratorState)
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def loop_trapezoidal(data, dt):
+    result = np.zeros_like(data, dtype=float)
+    for i in range(1, len(data)):
+        result[i] = result[i-1] + (data[i-1] + data[i]) * dt / 2
+    return result
+
+
+def loop_simpson(data, dt):
+    # Previous implementation (odd lengths only)
+    result = np.zeros_like(data, dtype=float)
+    for i in range(1, len(data)-1, 2):
+        result[i+1] = result[i-1] + (data[i-1] + 4*data[i] + data[i+1]) * dt / 3
+    return result
+
+
+def loop_rectangular(data, dt):
+    result = np.zeros_like(data, dtype=float)
+    for i in range(1, len(data)):
+        result[i] = result[i-1] + data[i] * dt
+    return result
+
+
+def _best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=3, dt=0.001, block_size=20):
+    """
+    Times loop, vectorized and streaming (block_size samples per call) integration.
+
+    Returns:
+        list: One dict per (method, size) with times in seconds and the max abs difference
+              between the loop and vectorized results on the samples both define.
+    """
+    methods = (("Trapezoidal", loop_trapezoidal, TrapezoidalIntegrator(dt)),
+               ("Simpson", loop_simpson, SimpsonIntegrator(dt)),
+               ("Rectangular", loop_rectangular, RectangularIntegrator(dt)))
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        data = rng.standard_normal(size + 1 - size % 2) # Odd length for the previous Simpson version
+        for name, loop_func, integrator in methods:
+            loop_result = loop_func(data, dt)
+            vector_result = integrator.integrate(data)
+            compared = slice(None, None, 2) if name == "Simpson" else slice(None)
+
+            def stream():
+                state = IntegratorState()
+                for start in range(0, len(data), block_size):
+                    integrator.integrate_block(data[start:start + block_size], state)
+
+            results.append({
+                'method': name,
+                'size': len(data),
+                'loop_s': _best_time(lambda: loop_func(data, dt), repeat),
+                'vectorized_s': _best_time(lambda: integrator.integrate(data), repeat),
+                'streaming_s': _best_time(stream, repeat),
+                'max_abs_diff': float(np.max(np.abs(loop_result[compared] - vector_result[compared])))
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'method':<12}{'size':>10}{'loop [ms]':>14}{'vector [ms]':>14}{'stream [ms]':>14}"
+          f"{'speedup':>10}{'max diff':>12}")
+    for row in run_benchmark(args.sizes, args.repeat):
+        print(f"{row['method']:<12}{row['size']:>10}{row['loop_s'] * 1e3:>14.3f}"
+              f"{row['vectorized_s'] * 1e3:>14.3f}{row['streaming_s'] * 1e3:>14.3f}"
+              f"{row['loop_s'] / row['vectorized_s']:>9.0f}x{row['max_abs_diff']:>12.1e}")
+
+
+if __name__ == '__main__':
+    main()
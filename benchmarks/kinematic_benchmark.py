@@ -0,0 +1,187 @@
+"""
+Accuracy and throughput of KinematicProcessor configurations on reference signals.
+
+Synthetic accelerations with analytically known displacement (sinusoid, chirp, smoothed
+displacement step, band-limited noise plus an acceleration bias) are streamed frame by frame
+through every configuration of integration method, detrend method, processing mode and frame
+parameters. Each run reports the RMS displacement error (after a settling period), the
+processing time per frame and the throughput in samples per second.
+
+Usage:
+    python -m benchmarks.kinematic_benchmark [--duration 60] [--signals sine chirp ...]
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from algorithm.detrenders import create_detrender
+from algorithm.kinematic_processor import KinematicProcessor
+
+DEFAULT_DT = 0.005
+DEFAULT_DURATION_S = 60.0
+DEFAULT_SETTLE_S = 10.0
+
+INTEGRATION_METHODS = ("Trapezoidal", "Simpson", "Rectangular")
+DETREND_METHODS = ("RLS", "Polynomial", "None")
+PROCESSING_MODES = ("Full", "Incremental")
+# (sample_frame_size, calc_frame_multiplier)
+FRAME_PARAMS = ((20, 50), (10, 100), (40, 25))
+
+
+def sine_signal(t, amplitude=0.01, freq=1.5):
+    """Displacement A sin(2 pi f t)."""
+    omega = 2 * np.pi * freq
+    disp = amplitude * np.sin(omega * t)
+    return -omega ** 2 * disp, disp
+
+
+def chirp_signal(t, amplitude=0.01, f0=0.5, f1=5.0):
+    """Displacement A sin(phi(t)) with the frequency rising linearly from f0 to f1."""
+    rate = (f1 - f0) / t[-1]
+    phase = 2 * np.pi * (f0 * t + 0.5 * rate * t ** 2)
+    phase_rate = 2 * np.pi * (f0 + rate * t)
+    disp = amplitude * np.sin(phase)
+    acc = amplitude * (2 * np.pi * rate * np.cos(phase) - phase_rate ** 2 * np.sin(phase))
+    return acc, disp
+
+
+def step_signal(t, amplitude=0.01, period=8.0, rise_time=0.5):
+    """
+    Displacement alternating between 0 and A with raised-cosine transitions of rise_time,
+    i.e. acceleration steps at the start and end of every transition.
+    """
+    phase = np.mod(t, period)
+    half = period / 2
+    rising = phase < rise_time
+    falling = (phase >= half) & (phase < half + rise_time)
+    level = (phase >= rise_time) & (phase < half)
+    local = np.where(rising, phase, phase - half) * np.pi / rise_time
+    disp = np.where(level, amplitude, 0.0)
+    acc = np.zeros_like(t)
+    scale = amplitude * np.pi ** 2 / (2 * rise_time ** 2)
+    disp = np.where(rising, 0.5 * amplitude * (1 - np.cos(local)), disp)
+    disp = np.where(falling, 0.5 * amplitude * (1 + np.cos(local)), disp)
+    acc = np.where(rising, scale * np.cos(local), acc)
+    acc = np.where(falling, -scale * np.cos(local), acc)
+    return acc, disp
+
+
+def noise_signal(t, amplitude=0.005, band=(0.5, 8.0), bias=0.02, components=40, seed=0):
+    """
+    Band-limited random displacement (sum of sinusoids with random frequencies in the band
+    and random phases, RMS about amplitude) plus a constant acceleration bias that the
+    reference displacement does not contain.
+    """
+    rng = np.random.default_rng(seed)
+    freqs = rng.uniform(*band, components)
+    phases = rng.uniform(0, 2 * np.pi, components)
+    weights = amplitude * np.sqrt(2.0 / components)
+    disp = np.zeros_like(t)
+    acc = np.full_like(t, bias)
+    for freq, phase in zip(freqs, phases):
+        omega = 2 * np.pi * freq
+        component = weights * np.sin(omega * t + phase)
+        disp += component
+        acc -= omega ** 2 * component
+    return acc, disp
+
+
+SIGNALS = {
+    'sine': sine_signal,
+    'chirp': chirp_signal,
+    'step': step_signal,
+    'noise': noise_signal,
+}
+
+
+def benchmark_configurations(integration_methods=INTEGRATION_METHODS, detrend_methods=DETREND_METHODS,
+                             processing_modes=PROCESSING_MODES, frame_params=FRAME_PARAMS):
+    """
+    Returns the configurations (dicts of KinematicProcessor arguments) of a benchmark grid.
+    "Incremental" configurations of detrend methods without incremental support are left out
+    (the processor would fall back to "Full", which is already in the grid).
+    """
+    def supported(detrend, mode):
+        detrender = create_detrender(detrend, {})
+        return mode != "Incremental" or detrender is None or detrender.supports_incremental()
+
+    return [{'integration_method': integration, 'detrend_method': detrend, 'processing_mode': mode,
+             'sample_frame_size': frame_size, 'calc_frame_multiplier': multiplier}
+            for integration, detrend, mode, (frame_size, multiplier)
+            in itertools.product(integration_methods, detrend_methods, processing_modes, frame_params)
+            if supported(detrend, mode)]
+
+
+def run_configuration(acc, disp, dt, config, settle_s=DEFAULT_SETTLE_S):
+    """
+    Streams acc through one processor configuration frame by frame.
+
+    Returns:
+        dict: The config, 'rms_error' and 'relative_error' (RMS error / RMS of the reference)
+            after settle_s, 'frame_latency_us' and 'frame_latency_p99_us' (mean and 99th
+            percentile processing time per frame) and 'samples_per_s'.
+    """
+    processor = KinematicProcessor(dt, **config)
+    frame_size = processor.sample_frame_size
+    num_frames = len(acc) // frame_size
+    output = np.empty(num_frames * frame_size)
+    frame_times = np.empty(num_frames)
+    for i in range(num_frames):
+        frame = acc[i * frame_size:(i + 1) * frame_size]
+        started = time.perf_counter()
+        frame_disp = processor.process_frame(frame)[0]
+        frame_times[i] = time.perf_counter() - started
+        output[i * frame_size:(i + 1) * frame_size] = frame_disp
+
+    compared = slice(int(round(settle_s / dt)), len(output))
+    error = output[compared] - disp[compared]
+    rms_error = float(np.sqrt(np.mean(error ** 2))) if len(error) else float('nan')
+    reference_rms = float(np.sqrt(np.mean(disp[compared] ** 2))) if len(error) else float('nan')
+    return dict(config, rms_error=rms_error, relative_error=rms_error / reference_rms,
+                frame_latency_us=float(frame_times.mean() * 1e6),
+                frame_latency_p99_us=float(np.percentile(frame_times, 99) * 1e6),
+                samples_per_s=float(len(output) / frame_times.sum()))
+
+
+def run_benchmark(signals=tuple(SIGNALS), configs=None, dt=DEFAULT_DT, duration_s=DEFAULT_DURATION_S,
+                  settle_s=DEFAULT_SETTLE_S):
+    """
+    Runs every configuration on every reference signal.
+
+    Args:
+        configs (list): KinematicProcessor argument dicts (default: benchmark_configurations()).
+
+    Returns:
+        list: One dict per (signal, configuration), see run_configuration(), plus 'signal'.
+    """
+    configs = benchmark_configurations() if configs is None else configs
+    t = np.arange(int(round(duration_s / dt))) * dt
+    results = []
+    for name in signals:
+        acc, disp = SIGNALS[name](t)
+        results.extend(dict(run_configuration(acc, disp, dt, config, settle_s), signal=name)
+                       for config in configs)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--signals', nargs='+', default=list(SIGNALS), choices=list(SIGNALS))
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION_S, help="Seconds per signal")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_S, help="Seconds left out of the error")
+    parser.add_argument('--dt', type=float, default=DEFAULT_DT)
+    args = parser.parse_args()
+
+    print(f"{'signal':<7}{'integration':<13}{'detrend':<12}{'mode':<13}{'frame':>6}{'mult':>6}"
+          f"{'rms err [mm]':>14}{'rel err':>9}{'frame [us]':>12}{'p99 [us]':>10}{'samples/s':>12}")
+    for row in run_benchmark(args.signals, dt=args.dt, duration_s=args.duration, settle_s=args.settle):
+        print(f"{row['signal']:<7}{row['integration_method']:<13}{row['detrend_method']:<12}"
+              f"{row['processing_mode']:<13}{row['sample_frame_size']:>6}{row['calc_frame_multiplier']:>6}"
+              f"{row['rms_error'] * 1e3:>14.4f}{row['relative_error']:>9.3f}{row['frame_latency_us']:>12.1f}"
+              f"{row['frame_latency_p99_us']:>10.1f}{row['samples_per_s']:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
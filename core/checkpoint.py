@@ -0,0 +1,106 @@
+"""
+Binary checkpoints of per-sensor processing state.
+
+A checkpoint holds the nested state dicts returned by the processors' get_state() (see
+KinematicProcessor.get_state()) flattened into one uncompressed .npz file: every array or
+scalar is stored under its '/'-joined key path, and None values are left out. The sensor's
+processing configuration is stored alongside as JSON so a checkpoint is only restored into
+processors created with the same parameters.
+"""
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FORMAT_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".base_realtime_displacement", "checkpoints")
+
+_CONFIG_KEY = '__config__'
+_VERSION_KEY = '__version__'
+
+
+def checkpoint_path(checkpoint_dir, sensor_id):
+    """Returns the checkpoint file path of a sensor."""
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', str(sensor_id))
+    return os.path.join(checkpoint_dir, f"{name}.npz")
+
+
+def config_signature(config):
+    """JSON text of the config entries that processor state depends on."""
+    return json.dumps({key: config.get(key) for key in ('dt', 'kinematic_params', 'advanced_processing_params')},
+                      sort_keys=True, default=str)
+
+
+def flatten_state(state, prefix=''):
+    """Flattens a nested state dict into {'a/b/c': np.ndarray}, dropping None values."""
+    flat = {}
+    for key, value in state.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_state(value, path + '/'))
+        elif value is not None:
+            flat[path] = np.asarray(value)
+    return flat
+
+
+def unflatten_state(flat):
+    """Inverse of flatten_state(); 0-d arrays become Python scalars."""
+    state = {}
+    for path, value in flat.items():
+        node = state
+        *parents, leaf = path.split('/')
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value.item() if value.ndim == 0 else value
+    return state
+
+
+def save_checkpoint(path, state, config):
+    """
+    Writes a state dict and the config it belongs to.
+
+    The file is written next to its destination and then renamed, so a crash while saving
+    leaves the previous checkpoint intact.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    arrays = flatten_state(state)
+    arrays[_CONFIG_KEY] = np.array(config_signature(config))
+    arrays[_VERSION_KEY] = np.array(CHECKPOINT_FORMAT_VERSION)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path, config=None):
+    """
+    Reads a checkpoint written by save_checkpoint().
+
+    Args:
+        path (str): Checkpoint file.
+        config (dict): If given, the checkpoint is only returned if it was saved with the
+                       same processing configuration.
+
+    Returns:
+        dict: The nested state, or None if there is no usable checkpoint.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            flat = {key: data[key] for key in data.files}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot read checkpoint {path}: {e}")
+        return None
+    if flat.pop(_VERSION_KEY, np.array(0)).item() != CHECKPOINT_FORMAT_VERSION:
+        logger.info(f"Checkpoint {path} has an unsupported format version; ignored.")
+        return None
+    saved_config = flat.pop(_CONFIG_KEY, np.array('')).item()
+    if config is not None and saved_config != config_signature(config):
+        logger.info(f"Checkpoint {path} was saved with different processing parameters; ignored.")
+        return None
+    return unflatten_state(flat)
@@ -1,150 +1,350 @@
+import copy
+import threading
+import time
 import numpy as np
 from scipy.fft import rfft, rfftfreq
 from scipy.signal import windows
 import logging
 from PyQt6.QtCore import QObject
-from algorithm.kinematic_processor import KinematicProcessor #
+from algorithm.orientation import STANDARD_GRAVITY
+from core.processing_config import (DEFAULT_KINEMATIC_PARAMS, DEFAULT_ADVANCED_PROCESSING_PARAMS,
+                                    create_kinematic_processor, create_pre_filter,
+                                    create_orientation_compensator)
+from core.sensor_state import (SensorState, AXES, NUM_PROCESSED_ROWS,
+                               ACC_ROWS, VEL_ROWS, DISP_ROWS, LONG_TERM_STATS)
+from core.retention import (DEFAULT_RETENTION_PARAMS, retention_points,
+                            scale_retention_points, estimate_state_bytes)
+from core.checkpoint import checkpoint_path, save_checkpoint, load_checkpoint
+from core.shadow_pipeline import ShadowSet
 
 logger = logging.getLogger(__name__)
 
+STREAMING_STATS_SCOPES = ('session', 'window')
+
+# Packet keys of the pending orientation rows: angles (deg), then gyro rates (deg/s)
+ORIENTATION_KEYS = ('angleX', 'angleY', 'angleZ', 'gyroX', 'gyroY', 'gyroZ')
+
 class DataProcessor(QObject):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, checkpoint_dir=None):
         super().__init__(parent)
         self.N_FFT_POINTS = 512
+        self.MIN_RECENT_POINTS = 2000 # Floor for the full-resolution tier when the memory budget is tight
+        self.memory_budget_bytes = 512 * 1024 * 1024 # Global budget for all sensors' retention tiers
         self._sensor_data_store = {}
-        self.default_kinematic_params = {
-            'sample_frame_size': 20,
-            'calc_frame_multiplier': 50,
-            'rls_filter_q_vel': 0.9875,
-            'rls_filter_q_disp': 0.9875,
-            'warmup_frames': 5
-        }
-        self.default_advanced_processing_params = {
-            'pre_filter_type': "None",
-            'pre_filter_params': {'cutoff_hz': 0.5, 'order': 2},
-            'integration_method': "Trapezoidal",
-            'detrend_method': "RLS",
-            'detrend_params': {'poly_order': 2}
-        }
+        # Guards creation/removal of sensors and tier resizing. Lock order: _store_lock, then SensorState.lock
+        self._store_lock = threading.RLock()
+        self.default_kinematic_params = DEFAULT_KINEMATIC_PARAMS.copy()
+        self.default_advanced_processing_params = copy.deepcopy(DEFAULT_ADVANCED_PROCESSING_PARAMS)
+        self.default_retention_params = DEFAULT_RETENTION_PARAMS.copy()
+        # Processing state is checkpointed per sensor to this directory (None: disabled) and
+        # restored when the sensor's processors are created, see save_checkpoint()
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_interval_s = 30.0
         self.reset_all_data()
 
+    def _create_kinematic_processors(self, dt, kin_params, adv_params):
+        """Creates one KinematicProcessor per axis, in AXES order."""
+        return tuple(create_kinematic_processor(dt, kin_params, adv_params) for _ in AXES)
+
     def _ensure_sensor_id_structure(self, sensor_id, sensor_type="wit_motion_imu", dt=0.005,
                                    kin_params=None, adv_params=None):
-        if sensor_id not in self._sensor_data_store:
-            logger.info(f"DataProcessor: Initializing data structure for sensor_id: {sensor_id}")
-            
-            current_kin_params = kin_params if kin_params else self.default_kinematic_params.copy()
-            # Ensure all required keys are present in current_kin_params, falling back to default if not
-            for key, default_val in self.default_kinematic_params.items():
-                if key not in current_kin_params:
-                    current_kin_params[key] = default_val
-
-            current_adv_params = adv_params if adv_params else self.default_advanced_processing_params.copy()
-            # Ensure all required keys are present in current_adv_params, falling back to default if not
-            for key, default_val in self.default_advanced_processing_params.items():
-                if key not in current_adv_params:
-                    current_adv_params[key] = default_val
-            
-            self._sensor_data_store[sensor_id] = {
-                'config': {
-                    'type': sensor_type, 
-                    'dt': dt,
-                    'kinematic_params': current_kin_params.copy(),
-                    'advanced_processing_params': current_adv_params.copy()
-                },
-                'time_data': np.array([]),
-                'raw_acc': {'x': np.array([]), 'y': np.array([]), 'z': np.array([])},
-                'processed_acc': {'x': np.array([]), 'y': np.array([]), 'z': np.array([])},
-                'processed_vel': {'x': np.array([]), 'y': np.array([]), 'z': np.array([])},
-                'processed_disp': {'x': np.array([]), 'y': np.array([]), 'z': np.array([])},
-                'current_time_plot': 0.0,
-                'acc_input_buffers': {'x': [], 'y': [], 'z': []},
-                'kinematic_processors': {
-                    axis: KinematicProcessor(
-                        dt=dt,
-                        sample_frame_size=current_kin_params['sample_frame_size'],
-                        calc_frame_multiplier=current_kin_params['calc_frame_multiplier'],
-                        rls_filter_q_vel=current_kin_params['rls_filter_q_vel'],
-                        rls_filter_q_disp=current_kin_params['rls_filter_q_disp'],
-                        warmup_frames=current_kin_params['warmup_frames'],
-                        integration_method=current_adv_params['integration_method'],
-                        detrend_method=current_adv_params['detrend_method'],
-                        detrend_params=current_adv_params['detrend_params']
-                    ) for axis in ['x', 'y', 'z']
-                },
-                'fft_plot_data': {ax: {'freq': None, 'amp': None} for ax in ['x', 'y', 'z']},
-                'dominant_freqs': {'x': 0, 'y': 0, 'z': 0}
-            }
-        else: # Sensor structure already exists, check if dt or params need update
-            sds_config = self._sensor_data_store[sensor_id]['config']
-            config_changed = False
-            if sds_config['dt'] != dt:
-                sds_config['dt'] = dt
-                config_changed = True
-            
-            if kin_params and sds_config.get('kinematic_params') != kin_params:
+        state = self._sensor_data_store.get(sensor_id)
+        if state is None:
+            with self._store_lock:
+                if sensor_id not in self._sensor_data_store:
+                    self._create_sensor_state(sensor_id, sensor_type, dt, kin_params, adv_params)
+            return
+
+        # Sensor structure already exists, check if dt or params need update
+        self._update_sensor_config(sensor_id, state, dt, kin_params, adv_params)
+
+    def _update_sensor_config(self, sensor_id, state, dt, kin_params=None, adv_params=None):
+        """Re-initializes the processors of an existing sensor if its dt or params changed."""
+        sds_config = state.config
+        dt_changed = sds_config['dt'] != dt
+        kin_changed = bool(kin_params) and sds_config.get('kinematic_params') != kin_params
+        adv_changed = bool(adv_params) and sds_config.get('advanced_processing_params') != adv_params
+        if not (dt_changed or kin_changed or adv_changed):
+            return
+
+        with self._store_lock, state.lock:
+            sds_config['dt'] = dt
+            if kin_changed:
                 sds_config['kinematic_params'] = kin_params.copy()
-                config_changed = True
-
-            if adv_params and sds_config.get('advanced_processing_params') != adv_params:
+            if adv_changed:
                 sds_config['advanced_processing_params'] = adv_params.copy()
-                config_changed = True
-
-            if config_changed:
-                logger.info(f"DataProcessor: Re-initializing KinematicProcessors for {sensor_id} due to config change.")
-                current_kin_params = sds_config['kinematic_params']
-                current_adv_params = sds_config['advanced_processing_params']
-                for axis in ['x', 'y', 'z']:
-                    self._sensor_data_store[sensor_id]['kinematic_processors'][axis] = KinematicProcessor(
-                        dt=sds_config['dt'],
-                        sample_frame_size=current_kin_params['sample_frame_size'],
-                        calc_frame_multiplier=current_kin_params['calc_frame_multiplier'],
-                        rls_filter_q_vel=current_kin_params['rls_filter_q_vel'],
-                        rls_filter_q_disp=current_kin_params['rls_filter_q_disp'],
-                        warmup_frames=current_kin_params['warmup_frames'],
-                        integration_method=current_adv_params['integration_method'],
-                        detrend_method=current_adv_params['detrend_method'],
-                        detrend_params=current_adv_params['detrend_params']
-                    )
-
-    def update_processing_parameters(self, sensor_id, new_kin_params=None, new_adv_params=None):
-        """Updates both kinematic and advanced processing parameters for a sensor."""
+
+            logger.info(f"DataProcessor: Re-initializing KinematicProcessors for {sensor_id} due to config change.")
+            state.kinematic_processors = self._create_kinematic_processors(
+                sds_config['dt'], sds_config['kinematic_params'], sds_config['advanced_processing_params'])
+            state.pre_filter = create_pre_filter(sds_config['dt'], sds_config['advanced_processing_params'])
+            state.orientation = create_orientation_compensator(sds_config['dt'],
+                                                               sds_config['advanced_processing_params'])
+            state.resize_pending(sds_config['kinematic_params']['sample_frame_size'])
+            self._rebuild_shadows(state)
+            self._restore_checkpoint(sensor_id, state)
+            self._enforce_memory_budget() # Tier sizes depend on dt
+
+    def _create_sensor_state(self, sensor_id, sensor_type, dt, kin_params, adv_params):
+        logger.info(f"DataProcessor: Initializing data structure for sensor_id: {sensor_id}")
+
+        current_kin_params = kin_params if kin_params else self.default_kinematic_params.copy()
+        # Ensure all required keys are present in current_kin_params, falling back to default if not
+        for key, default_val in self.default_kinematic_params.items():
+            if key not in current_kin_params:
+                current_kin_params[key] = default_val
+
+        current_adv_params = adv_params if adv_params else self.default_advanced_processing_params.copy()
+        # Ensure all required keys are present in current_adv_params, falling back to default if not
+        for key, default_val in self.default_advanced_processing_params.items():
+            if key not in current_adv_params:
+                current_adv_params[key] = default_val
+
+        config = {
+            'type': sensor_type,
+            'dt': dt,
+            'kinematic_params': current_kin_params.copy(),
+            'advanced_processing_params': current_adv_params.copy(),
+            'retention_params': self.default_retention_params.copy()
+        }
+        self._sensor_data_store[sensor_id] = SensorState(
+            config,
+            self._create_kinematic_processors(dt, current_kin_params, current_adv_params),
+            pre_filter=create_pre_filter(dt, current_adv_params),
+            orientation=create_orientation_compensator(dt, current_adv_params)
+        )
+        self._enforce_memory_budget()
+        self._restore_checkpoint(sensor_id, self._sensor_data_store[sensor_id])
+
+    def _requested_retention_points(self, config):
+        """Tier sizes for a sensor's retention config, capped by its own memory_budget_mb if set."""
+        points = retention_points(config['retention_params'], config['dt'])
+        points = scale_retention_points(points, 1.0, self.MIN_RECENT_POINTS, self.N_FFT_POINTS * 2)
+        budget_mb = config['retention_params'].get('memory_budget_mb')
+        if budget_mb:
+            requested = estimate_state_bytes(points, NUM_PROCESSED_ROWS, len(AXES))
+            scale = min(1.0, budget_mb * 1024 * 1024 / requested)
+            points = scale_retention_points(points, scale, self.MIN_RECENT_POINTS, self.N_FFT_POINTS * 2)
+        return points
+
+    def _enforce_memory_budget(self):
+        """
+        Sizes every sensor's retention tiers so that all sensors together fit into
+        memory_budget_bytes. When the requested retention does not fit, all tiers are
+        shrunk by the same factor (the recent tier never below MIN_RECENT_POINTS).
+        """
+        with self._store_lock:
+            if not self._sensor_data_store:
+                return
+            requested = {sensor_id: self._requested_retention_points(state.config)
+                         for sensor_id, state in self._sensor_data_store.items()}
+            total_bytes = sum(estimate_state_bytes(points, NUM_PROCESSED_ROWS, len(AXES))
+                              for points in requested.values())
+            scale = min(1.0, self.memory_budget_bytes / total_bytes) if total_bytes else 1.0
+            if scale < 1.0:
+                logger.warning(f"DataProcessor: Requested retention ({total_bytes / 2**20:.1f} MB) exceeds the memory "
+                               f"budget ({self.memory_budget_bytes / 2**20:.1f} MB). Scaling tiers by {scale:.3f}.")
+            for sensor_id, state in self._sensor_data_store.items():
+                with state.lock:
+                    state.apply_retention(scale_retention_points(requested[sensor_id], scale,
+                                                                 self.MIN_RECENT_POINTS, self.N_FFT_POINTS * 2))
+
+    def set_memory_budget(self, budget_bytes):
+        """Sets the global memory budget for retained data and resizes all sensors' tiers."""
+        self.memory_budget_bytes = budget_bytes
+        self._enforce_memory_budget()
+
+    def get_memory_usage(self):
+        """Returns the bytes currently allocated for retained data, per sensor."""
+        with self._store_lock:
+            return {sensor_id: state.nbytes for sensor_id, state in self._sensor_data_store.items()}
+
+    def update_retention_parameters(self, sensor_id, new_retention_params):
+        """Updates a sensor's retention tiers. Recent data that still fits is kept."""
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            logger.warning(f"Cannot update retention parameters. Sensor ID {sensor_id} not found.")
+            return
+        with state.lock:
+            retention_params = state.config['retention_params'].copy()
+            retention_params.update(new_retention_params)
+            state.config['retention_params'] = retention_params
+        self._enforce_memory_budget()
+        logger.info(f"Retention parameters updated for {sensor_id}: {retention_params}")
+
+    def get_sensor_retention_params(self, sensor_id):
         if sensor_id in self._sensor_data_store:
-            sds = self._sensor_data_store[sensor_id]
-            config_changed = False
+            return self._sensor_data_store[sensor_id].config.get('retention_params')
+        return None
 
-            if new_kin_params:
-                sds['config']['kinematic_params'] = new_kin_params.copy()
-                config_changed = True
+    def get_recent_capacity(self, sensor_id):
+        """Returns the number of full-resolution points kept for a sensor."""
+        state = self._sensor_data_store.get(sensor_id)
+        return state.processed.max_points if state else 0
+
+    def register_sensor(self, sensor_id, sensor_type="wit_motion_imu", dt=0.005,
+                        kin_params=None, adv_params=None):
+        """Creates (or updates the configuration of) the processing state for a sensor."""
+        self._ensure_sensor_id_structure(sensor_id, sensor_type, dt, kin_params, adv_params)
+
+    def has_sensor(self, sensor_id):
+        return sensor_id in self._sensor_data_store
+
+    def get_sensor_ids(self):
+        return list(self._sensor_data_store.keys())
+
+    def get_sensor_dt(self, sensor_id):
+        state = self._sensor_data_store.get(sensor_id)
+        return state.config['dt'] if state else None
+
+    def get_sensor_type(self, sensor_id):
+        state = self._sensor_data_store.get(sensor_id)
+        return state.config['type'] if state else None
+
+    def get_sensor_state(self, sensor_id):
+        """Returns the SensorState of a sensor (or None). Intended for read access only."""
+        return self._sensor_data_store.get(sensor_id)
+
+    def update_processing_parameters(self, sensor_id, new_kin_params=None, new_adv_params=None,
+                                     preserve_history=True):
+        """
+        Updates both kinematic and advanced processing parameters for a sensor.
+
+        With preserve_history (the default) the stored data is kept and the new
+        KinematicProcessors are seeded from the retained acceleration, so output continues
+        without a gap or warm-up transient. Otherwise the data arrays are reset.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            logger.warning(f"Cannot update processing parameters. Sensor ID {sensor_id} not found.")
+            return
+        if not (new_kin_params or new_adv_params):
+            return
 
+        with state.lock:
+            if new_kin_params:
+                state.config['kinematic_params'] = new_kin_params.copy()
             if new_adv_params:
-                sds['config']['advanced_processing_params'] = new_adv_params.copy()
-                config_changed = True
-
-            if config_changed:
-                logger.info(f"DataProcessor: Updating processing parameters for sensor {sensor_id}.")
-                current_kin_params = sds['config']['kinematic_params']
-                current_adv_params = sds['config']['advanced_processing_params']
-                
-                # Re-initialize KinematicProcessors with new parameters
-                for axis in ['x', 'y', 'z']:
-                    sds['kinematic_processors'][axis] = KinematicProcessor(
-                        dt=sds['config']['dt'],
-                        sample_frame_size=current_kin_params['sample_frame_size'],
-                        calc_frame_multiplier=current_kin_params['calc_frame_multiplier'],
-                        rls_filter_q_vel=current_kin_params['rls_filter_q_vel'],
-                        rls_filter_q_disp=current_kin_params['rls_filter_q_disp'],
-                        warmup_frames=current_kin_params['warmup_frames'],
-                        integration_method=current_adv_params['integration_method'],
-                        detrend_method=current_adv_params['detrend_method'],
-                        detrend_params=current_adv_params['detrend_params']
-                    )
-                
+                state.config['advanced_processing_params'] = new_adv_params.copy()
+
+            logger.info(f"DataProcessor: Updating processing parameters for sensor {sensor_id}.")
+            current_kin_params = state.config['kinematic_params']
+            current_adv_params = state.config['advanced_processing_params']
+
+            # Re-initialize KinematicProcessors with new parameters
+            state.kinematic_processors = self._create_kinematic_processors(
+                state.config['dt'], current_kin_params, current_adv_params)
+            state.pre_filter = create_pre_filter(state.config['dt'], current_adv_params)
+            state.orientation = create_orientation_compensator(state.config['dt'], current_adv_params)
+
+            if not preserve_history:
+                state.resize_pending(current_kin_params['sample_frame_size'])
+                self._rebuild_shadows(state)
                 # Reset data arrays as processing will restart with new parameters
                 self.reset_sensor_data_arrays_only(sensor_id)
                 logger.info(f"Processing parameters updated and data reset for {sensor_id}.")
-        else:
-            logger.warning(f"Cannot update processing parameters. Sensor ID {sensor_id} not found.")
+                return
+
+            self._hot_swap_processors(state, current_kin_params['sample_frame_size'])
+            self._rebuild_shadows(state, seed=True)
+        logger.info(f"Processing parameters updated for {sensor_id}, history preserved.")
+
+    def _hot_swap_processors(self, state, frame_size):
+        """Seeds freshly created KinematicProcessors from the retained acceleration history."""
+        # Samples waiting for the next frame are carried over (up to one frame less than the new size)
+        pending = state.pending_acc[:, :state.pending_count]
+        pending_orientation = state.pending_orientation[:, :state.pending_count]
+        state.resize_pending(frame_size)
+        keep = min(pending.shape[1], frame_size - 1)
+        if keep > 0:
+            state.pending_acc[:, :keep] = pending[:, -keep:]
+            state.pending_orientation[:, :keep] = pending_orientation[:, -keep:]
+            state.pending_count = keep
+
+        acc_history = state.acc
+        for axis_idx, kp_axis in enumerate(state.kinematic_processors):
+            kp_axis.seed(acc_history[axis_idx])
+
+    def _rebuild_shadows(self, state, seed=False):
+        """Rebuilds the shadow configurations against new primary processors (call with state.lock held)."""
+        if state.shadows is None:
+            return
+        state.shadows = state.shadows.rebuilt(state.config['dt'], state.config['kinematic_params'],
+                                              state.config['advanced_processing_params'],
+                                              state.kinematic_processors, state.acc if seed else None)
+
+    def add_shadow_configuration(self, sensor_id, name, kin_params=None, adv_params=None):
+        """
+        Runs another processing configuration next to the primary one of a sensor, on the
+        same conditioned input, for A/B comparison (see core/shadow_pipeline.py). The shadow
+        is seeded from the retained acceleration; its divergence from the primary output is
+        read with get_shadow_divergence().
+
+        Args:
+            name (str): Shadow name; a shadow of the same name is replaced.
+            kin_params (dict): Kinematic parameters that differ from the primary ones.
+            adv_params (dict): Advanced processing parameters that differ from the primary
+                               ones. The input stages (pre-filter, orientation) are always
+                               shared with the primary.
+
+        Returns:
+            bool: True if the shadow runs (it must keep the primary sample_frame_size).
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            logger.warning(f"Cannot add shadow configuration. Sensor ID {sensor_id} not found.")
+            return False
+        with state.lock:
+            shadows = state.shadows or ShadowSet(state.config['dt'], state.config['kinematic_params'],
+                                                 state.config['advanced_processing_params'],
+                                                 state.kinematic_processors)
+            state.shadows = shadows.with_shadow(name, kin_params, adv_params, state.acc)
+            added = name in state.shadows.pipelines
+        if added:
+            logger.info(f"DataProcessor: Shadow configuration '{name}' added for sensor {sensor_id}.")
+        return added
+
+    def remove_shadow_configuration(self, sensor_id, name):
+        """Stops a shadow configuration. Returns True if it existed."""
+        state = self._sensor_data_store.get(sensor_id)
+        if not state or state.shadows is None or name not in state.shadows.pipelines:
+            return False
+        with state.lock:
+            # Other shadows may share stages with the removed one, so the set is rebuilt
+            state.shadows = state.shadows.without_shadow(name, state.acc) or None
+        logger.info(f"DataProcessor: Shadow configuration '{name}' removed for sensor {sensor_id}.")
+        return True
+
+    def get_shadow_divergence(self, sensor_id):
+        """
+        Returns the divergence statistics of each shadow configuration of a sensor:
+        {name: {'samples': n, 'vel': {axis: stats}, 'disp': {axis: stats}}} with stats
+        'mean', 'rms', 'max_abs' and 'relative_rms' of shadow - primary (see
+        ShadowPipeline.divergence()), or an empty dict.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state or state.shadows is None:
+            return {}
+        with state.lock:
+            return state.shadows.divergence()
+
+    def get_streaming_stats(self, sensor_id, scope='session'):
+        """
+        Returns the descriptive statistics of a sensor's processed rows maintained at ingest
+        (see StreamingStats.summary(); arrays in PROCESSED_FIELD_NAMES order), or None.
+
+        Args:
+            scope (str): 'session' for all samples since the last reset (including samples
+                that have aged out of the retention tiers), 'window' for the recent tier.
+        """
+        if scope not in STREAMING_STATS_SCOPES:
+            raise ValueError(f"Unknown streaming statistics scope: {scope}")
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            return None
+        with state.lock:
+            stats = state.session_stats if scope == 'session' else state.window_stats
+            return stats.summary()
 
     def update_kinematic_parameters(self, sensor_id, new_kin_params):
         """Legacy method for backward compatibility. Use update_processing_parameters instead."""
@@ -156,48 +356,46 @@ class DataProcessor(QObject):
 
     def get_sensor_kinematic_params(self, sensor_id):
         if sensor_id in self._sensor_data_store:
-            return self._sensor_data_store[sensor_id]['config'].get('kinematic_params')
+            return self._sensor_data_store[sensor_id].config.get('kinematic_params')
         return None
 
     def get_sensor_advanced_processing_params(self, sensor_id):
         if sensor_id in self._sensor_data_store:
-            return self._sensor_data_store[sensor_id]['config'].get('advanced_processing_params')
+            return self._sensor_data_store[sensor_id].config.get('advanced_processing_params')
         return None
 
     def reset_sensor_data_arrays_only(self, sensor_id):
-        """Resets only the data arrays, not the entire structure or processors, for a sensor."""
-        if sensor_id in self._sensor_data_store:
-            sds = self._sensor_data_store[sensor_id]
-            sds['time_data'] = np.array([])
-            for dtype in ['raw_acc', 'processed_acc', 'processed_vel', 'processed_disp']:
-                for axis in ['x', 'y', 'z']:
-                    if dtype in sds and axis in sds[dtype]:
-                         sds[dtype][axis] = np.array([])
-            sds['current_time_plot'] = 0.0
-            sds['acc_input_buffers'] = {'x': [], 'y': [], 'z': []}
-            sds['fft_plot_data'] = {ax: {'freq': None, 'amp': None} for ax in ['x', 'y', 'z']}
-            sds['dominant_freqs'] = {'x': 0, 'y': 0, 'z': 0}
-            # Also reset state of kinematic processors
-            for kp_axis in sds['kinematic_processors'].values():
-                kp_axis.reset() #
+        """Resets only the data arrays, not the entire structure or configuration, for a sensor."""
+        state = self._sensor_data_store.get(sensor_id)
+        if state:
+            with state.lock:
+                # clear_data() bumps reset_version, so a frame in flight is discarded
+                state.clear_data()
+                # A frame in flight still uses the previous processors outside the lock, so they are
+                # replaced with fresh instances rather than reset in place (as in _hot_swap_processors)
+                dt = state.config['dt']
+                adv_params = state.config['advanced_processing_params']
+                state.kinematic_processors = self._create_kinematic_processors(
+                    dt, state.config['kinematic_params'], adv_params)
+                state.pre_filter = create_pre_filter(dt, adv_params)
+                state.orientation = create_orientation_compensator(dt, adv_params)
+                self._rebuild_shadows(state)
             logger.info(f"Data arrays and processor states reset for sensor {sensor_id}.")
 
 
     def reset_sensor_data(self, sensor_id):
-        if sensor_id in self._sensor_data_store:
-            # Retrieve original config before full reset by _ensure_sensor_id_structure
-            original_config = self._sensor_data_store[sensor_id]['config'].copy()
-            dt = original_config['dt']
-            sensor_type = original_config['type']
-            kin_params = original_config.get('kinematic_params', self.default_kinematic_params.copy())
-            adv_params = original_config.get('advanced_processing_params', self.default_advanced_processing_params.copy())
-
-            # This will effectively reset by re-initializing if it exists
-            self._ensure_sensor_id_structure(sensor_id, sensor_type, dt, kin_params, adv_params)
-            
-            # Explicitly reset data arrays after re-initialization of structure and processors
-            self.reset_sensor_data_arrays_only(sensor_id)
-            logger.info(f"Full data and structure for sensor {sensor_id} has been reset.")
+        """
+        Clears the stored data of a sensor (e.g. when the plots are reset or the plotted sensor
+        changes). The processors keep their state, including state restored from a checkpoint,
+        so processing continues without a new warm-up; use reset_sensor_data_arrays_only() to
+        restart processing as well.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if state:
+            with state.lock:
+                # clear_data() bumps reset_version, so a frame in flight is not published
+                state.clear_data()
+            logger.info(f"Data for sensor {sensor_id} has been reset.")
         else:
             logger.warning(f"Cannot reset data for unknown sensor_id: {sensor_id}")
 
@@ -208,20 +406,23 @@ class DataProcessor(QObject):
 
 
     def remove_sensor_data(self, sensor_id):
-        if sensor_id in self._sensor_data_store:
-            del self._sensor_data_store[sensor_id]
+        with self._store_lock:
+            state = self._sensor_data_store.pop(sensor_id, None)
+        if state:
             logger.info(f"Data structure for sensor {sensor_id} removed from DataProcessor.")
         else:
             logger.warning(f"Cannot remove data for unknown sensor_id: {sensor_id}")
 
 
     def handle_incoming_sensor_data(self, sensor_id, sensor_data_dict, sensor_config_from_manager=None):
-        _dt = 0.005 
-        _sensor_type = "unknown"
-        # Default kinematic params; will be overridden if sensor already exists with custom params
-        _kin_params = self.default_kinematic_params.copy()
-        _adv_params = self.default_advanced_processing_params.copy()
+        # Sensor state is only created by register_sensor(), so samples of a removed sensor
+        # that were still queued do not bring it back
+        state = self._sensor_data_store.get(sensor_id)
+        if state is None:
+            logger.debug(f"DataProcessor: Dropping data for unregistered sensor_id: {sensor_id}")
+            return
 
+        _dt = 0.005 
         if sensor_config_from_manager:
             _sensor_type = sensor_config_from_manager.get('type', 'unknown')
             # Determine dt based on sensor type and its config
@@ -231,14 +432,8 @@ class DataProcessor(QObject):
                 _dt = rate_map_to_dt.get(hex_val, 0.01)
             elif _sensor_type == "mock_sensor":
                  _dt = sensor_config_from_manager.get('mock_update_interval', 0.1)
-            
-            # If sensor already exists, use its stored params, otherwise use defaults
-            if sensor_id in self._sensor_data_store:
-                _kin_params = self._sensor_data_store[sensor_id]['config'].get('kinematic_params', _kin_params)
-                _adv_params = self._sensor_data_store[sensor_id]['config'].get('advanced_processing_params', _adv_params)
 
-        self._ensure_sensor_id_structure(sensor_id, _sensor_type, _dt, _kin_params, _adv_params)
-        sds = self._sensor_data_store[sensor_id]
+        self._update_sensor_config(sensor_id, state, _dt)
 
         if not sensor_data_dict: return
 
@@ -249,208 +444,351 @@ class DataProcessor(QObject):
 
             if accX is None or accY is None or accZ is None: return
 
-            g_conversion = 9.80665
+            g_conversion = STANDARD_GRAVITY
             accX_ms2 = accX * g_conversion
             accY_ms2 = accY * g_conversion
-            accZ_ms2 = (accZ - 1.0) * g_conversion if sds['config']['type'] == "wit_motion_imu" else accZ * g_conversion
-
-            # Apply pre-filtering if configured
-            pre_filter_type = sds['config']['advanced_processing_params']['pre_filter_type']
-            if pre_filter_type != "None":
-                pre_filter_params = sds['config']['advanced_processing_params']['pre_filter_params']
-                cutoff_hz = pre_filter_params['cutoff_hz']
-                order = pre_filter_params['order']
-                
-                # Apply filter to each axis
-                for acc_ms2, axis in [(accX_ms2, 'x'), (accY_ms2, 'y'), (accZ_ms2, 'z')]:
-                    if pre_filter_type == "High-pass":
-                        acc_ms2 = self._apply_highpass_filter(acc_ms2, cutoff_hz, order, _dt)
-                    elif pre_filter_type == "Low-pass":
-                        acc_ms2 = self._apply_lowpass_filter(acc_ms2, cutoff_hz, order, _dt)
-                    # Add other filter types as needed
-                    
-                    # Update the acceleration value
-                    if axis == 'x': accX_ms2 = acc_ms2
-                    elif axis == 'y': accY_ms2 = acc_ms2
-                    else: accZ_ms2 = acc_ms2
-
-            fft_buffer_size = self.N_FFT_POINTS * 2 
-            sds['raw_acc']['x'] = np.append(sds['raw_acc']['x'], accX_ms2)[-fft_buffer_size:]
-            sds['raw_acc']['y'] = np.append(sds['raw_acc']['y'], accY_ms2)[-fft_buffer_size:]
-            sds['raw_acc']['z'] = np.append(sds['raw_acc']['z'], accZ_ms2)[-fft_buffer_size:]
-
-            sds['acc_input_buffers']['x'].append(accX_ms2)
-            sds['acc_input_buffers']['y'].append(accY_ms2)
-            sds['acc_input_buffers']['z'].append(accZ_ms2)
-            
-            # Use sample_frame_size from the sensor's specific kinematic_params
-            current_frame_size = sds['config']['kinematic_params']['sample_frame_size']
-
-            if len(sds['acc_input_buffers']['x']) >= current_frame_size:
-                frames = {}
-                for axis in ['x', 'y', 'z']:
-                    frames[axis] = np.array(sds['acc_input_buffers'][axis][:current_frame_size])
-                    sds['acc_input_buffers'][axis] = sds['acc_input_buffers'][axis][current_frame_size:]
-
-                disp_f, vel_f, acc_f_filtered = {}, {}, {}
-                for axis in ['x', 'y', 'z']:
-                    disp_f[axis], vel_f[axis], acc_f_filtered[axis] = \
-                        sds['kinematic_processors'][axis].process_frame(frames[axis])
-
-                num_samples_in_frame = len(acc_f_filtered['x'])
-                dt_this_sensor = sds['config']['dt']
-                new_times_segment = np.arange(
-                    sds['current_time_plot'],
-                    sds['current_time_plot'] + num_samples_in_frame * dt_this_sensor,
-                    dt_this_sensor
-                )[:num_samples_in_frame]
-
-                if not new_times_segment.size: return
-
-                sds['current_time_plot'] += num_samples_in_frame * dt_this_sensor
-                sds['time_data'] = np.append(sds['time_data'], new_times_segment)
-
-                for axis in ['x', 'y', 'z']:
-                    sds['processed_acc'][axis] = np.append(sds['processed_acc'][axis], acc_f_filtered[axis])
-                    sds['processed_vel'][axis] = np.append(sds['processed_vel'][axis], vel_f[axis])
-                    sds['processed_disp'][axis] = np.append(sds['processed_disp'][axis], disp_f[axis])
-                
-                self._trim_data_arrays_for_sensor(sensor_id)
+
+            with state.lock:
+                orientation = state.orientation
+                if orientation is None:
+                    # Gravity is assumed to lie on the sensor Z axis (level mounting)
+                    accZ_ms2 = (accZ - 1.0) * g_conversion if state.config['type'] == "wit_motion_imu" else accZ * g_conversion
+                    state.raw_acc.append((accX_ms2, accY_ms2, accZ_ms2))
+                else:
+                    # Gravity is removed in the world frame when the frame is complete
+                    accZ_ms2 = accZ * g_conversion
+                    state.pending_orientation[:, state.pending_count] = [
+                        sensor_data_dict.get(key) or 0.0 for key in ORIENTATION_KEYS]
+
+                pending = state.pending_acc
+                pending[:, state.pending_count] = (accX_ms2, accY_ms2, accZ_ms2)
+                state.pending_count += 1
+                if state.pending_count < pending.shape[1]:
+                    return
+
+                state.pending_count = 0
+                frame = pending.copy()
+                orientation_frame = state.pending_orientation.copy() if orientation is not None else None
+                frame_len = frame.shape[1]
+                dt_this_sensor = state.config['dt']
+                processors = state.kinematic_processors
+                pre_filter = state.pre_filter
+                shadows = state.shadows
+                reset_version = state.reset_version
+                frame_start = state.current_time_plot
+                state.current_time_plot += frame_len * dt_this_sensor
+
+            # The frame is processed without holding the lock so readers are not blocked
+            if orientation is not None:
+                # World-frame acceleration without gravity, rotated with the frame's attitudes
+                frame = orientation.apply(frame, orientation_frame[:len(AXES)], orientation_frame[len(AXES):])
+            block, shadow_blocks = self._process_frame(frame, pre_filter, processors, shadows)
+
+            with state.lock:
+                if state.reset_version != reset_version:
+                    return # Data was reset while this frame was processed
+                if state.kinematic_processors is not processors:
+                    # Parameters were hot-swapped while this frame was processed. The new processors
+                    # were seeded from the history before it, so the frame is run through them instead
+                    processors = state.kinematic_processors
+                    shadows = state.shadows
+                    block, shadow_blocks = self._process_frame(frame, state.pre_filter, processors, shadows)
+                # Outputs lag the input by the integrator latency (frequency-domain integration)
+                times = frame_start + (np.arange(frame_len) - processors[0].latency) * dt_this_sensor
+                if orientation is not None:
+                    state.raw_acc.append(frame)
+                state.append_processed(times, block)
+                state.data_version += frame_len
+                if shadow_blocks and state.shadows is shadows:
+                    shadows.compare(block, shadow_blocks)
+
+            if self.checkpoint_dir and time.monotonic() - state.last_checkpoint_time >= self.checkpoint_interval_s:
+                self.save_checkpoint(sensor_id)
 
         except Exception as e:
             logger.error(f"Error processing data for sensor {sensor_id}: {e}", exc_info=True)
 
-    def _apply_highpass_filter(self, data, cutoff_hz, order, dt):
-        """Apply a high-pass filter to the input data."""
-        from scipy.signal import butter, filtfilt
-        nyquist = 0.5 / dt
-        normal_cutoff = cutoff_hz / nyquist
-        b, a = butter(order, normal_cutoff, btype='high', analog=False)
-        return filtfilt(b, a, data)
-
-    def _apply_lowpass_filter(self, data, cutoff_hz, order, dt):
-        """Apply a low-pass filter to the input data."""
-        from scipy.signal import butter, filtfilt
-        nyquist = 0.5 / dt
-        normal_cutoff = cutoff_hz / nyquist
-        b, a = butter(order, normal_cutoff, btype='low', analog=False)
-        return filtfilt(b, a, data)
-
-    def _trim_data_arrays_for_sensor(self, sensor_id, max_points=2000): # Max points for internal storage
-        sds = self._sensor_data_store.get(sensor_id)
-        if not sds: return
-
-        data_arrays_to_trim_keys = [
-            ('time_data', None),
-            ('processed_acc', 'x'), ('processed_acc', 'y'), ('processed_acc', 'z'),
-            ('processed_vel', 'x'), ('processed_vel', 'y'), ('processed_vel', 'z'),
-            ('processed_disp', 'x'), ('processed_disp', 'y'), ('processed_disp', 'z'),
-        ]
-        
-        current_min_len = -1
-
-        for key1, key2 in data_arrays_to_trim_keys:
-            target_array_container = sds.get(key1)
-            if target_array_container is None: continue # Skip if top-level key doesn't exist
-
-            arr = target_array_container if key2 is None else target_array_container.get(key2)
-            
-            if isinstance(arr, np.ndarray) and hasattr(arr, '__len__'):
-                if current_min_len == -1 or len(arr) < current_min_len:
-                    current_min_len = len(arr)
-        
-        if current_min_len == -1 or current_min_len <= max_points: return
-
-        slice_start = current_min_len - max_points
-        
-        sds['time_data'] = sds['time_data'][slice_start:]
-        for axis in ['x', 'y', 'z']:
-            if axis in sds['processed_acc']: sds['processed_acc'][axis] = sds['processed_acc'][axis][slice_start:]
-            if axis in sds['processed_vel']: sds['processed_vel'][axis] = sds['processed_vel'][axis][slice_start:]
-            if axis in sds['processed_disp']: sds['processed_disp'][axis] = sds['processed_disp'][axis][slice_start:]
+    @staticmethod
+    def _process_frame(frame, pre_filter, processors, shadows):
+        """Runs one (3, frame_len) acceleration frame through the pre-filter, processors and shadows."""
+        if pre_filter is not None:
+            # One stateful filter for all axes, so consecutive frames are filtered without edge transients
+            frame = pre_filter.apply(frame)
+        block = np.empty((NUM_PROCESSED_ROWS, frame.shape[1]))
+        for axis_idx, kp_axis in enumerate(processors):
+            disp_f, vel_f, acc_f_filtered = kp_axis.process_frame(frame[axis_idx])
+            block[ACC_ROWS.start + axis_idx] = acc_f_filtered
+            block[VEL_ROWS.start + axis_idx] = vel_f
+            block[DISP_ROWS.start + axis_idx] = disp_f
+        # Shadow configurations reuse the conditioned frame and the stages they share
+        shadow_blocks = shadows.process(frame, block) if shadows is not None else None
+        return block, shadow_blocks
+
+    def get_processing_state(self, sensor_id):
+        """
+        Returns the state of a sensor's KinematicProcessors and pre-filter as a nested dict
+        (see KinematicProcessor.get_state()), or None for an unknown sensor.
+
+        Frames are processed outside the sensor lock, so call this from the thread that
+        processes the sensor's data or while no data is being processed.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            return None
+        with state.lock:
+            processing_state = {'axes': {axis: kp_axis.get_state()
+                                         for axis, kp_axis in zip(AXES, state.kinematic_processors)}}
+            if state.pre_filter is not None:
+                processing_state['pre_filter'] = state.pre_filter.get_state()
+            if state.orientation is not None:
+                processing_state['orientation'] = state.orientation.get_state()
+        return processing_state
+
+    def save_checkpoint(self, sensor_id):
+        """
+        Writes a sensor's processing state to its checkpoint file in checkpoint_dir (see
+        get_processing_state() for when it may be called). handle_incoming_sensor_data() does
+        this every checkpoint_interval_s seconds.
+
+        Returns:
+            str: The checkpoint path, or None if checkpoints are disabled or saving failed.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state or not self.checkpoint_dir:
+            return None
+        state.last_checkpoint_time = time.monotonic()
+        processing_state = self.get_processing_state(sensor_id)
+        path = checkpoint_path(self.checkpoint_dir, sensor_id)
+        try:
+            save_checkpoint(path, processing_state, state.config)
+        except OSError as e:
+            logger.error(f"DataProcessor: Cannot save checkpoint for {sensor_id}: {e}")
+            return None
+        logger.debug(f"DataProcessor: Checkpoint saved for {sensor_id}: {path}")
+        return path
+
+    def save_all_checkpoints(self):
+        """Saves checkpoints of all sensors, e.g. when the application closes."""
+        for sensor_id in self.get_sensor_ids():
+            self.save_checkpoint(sensor_id)
+
+    def restore_checkpoint(self, sensor_id):
+        """
+        Loads a sensor's checkpoint into its processors if they have not processed any frame
+        yet and the checkpoint was saved with the same processing configuration.
+
+        Returns:
+            bool: Whether a checkpoint was restored.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            return False
+        return self._restore_checkpoint(sensor_id, state)
+
+    def _restore_checkpoint(self, sensor_id, state):
+        if not self.checkpoint_dir:
+            return False
+        with state.lock:
+            if any(kp_axis.frame_count for kp_axis in state.kinematic_processors):
+                return False # Live state is newer than any checkpoint
+            processing_state = load_checkpoint(checkpoint_path(self.checkpoint_dir, sensor_id), state.config)
+            if processing_state is None:
+                return False
+            try:
+                for axis, kp_axis in zip(AXES, state.kinematic_processors):
+                    kp_axis.set_state(processing_state['axes'][axis])
+                if state.pre_filter is not None:
+                    state.pre_filter.set_state(processing_state.get('pre_filter', {}))
+                if state.orientation is not None:
+                    state.orientation.set_state(processing_state.get('orientation', {}))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"DataProcessor: Checkpoint for {sensor_id} does not fit its processors: {e}")
+                for kp_axis in state.kinematic_processors:
+                    kp_axis.reset()
+                if state.pre_filter is not None:
+                    state.pre_filter.reset()
+                if state.orientation is not None:
+                    state.orientation.reset()
+                return False
+            state.last_checkpoint_time = time.monotonic()
+        logger.info(f"DataProcessor: Processing state of {sensor_id} restored from checkpoint.")
+        return True
+
+    def _trim_data_arrays_for_sensor(self, sensor_id, max_points=None): # Max points for internal storage
+        state = self._sensor_data_store.get(sensor_id)
+        if not state: return
+        with state.lock:
+            if max_points is None: max_points = state.processed.max_points
+            state.time.trim(max_points)
+            state.processed.trim(max_points)
 
 
     def calculate_fft_for_sensor(self, sensor_id):
-        sds = self._sensor_data_store.get(sensor_id)
-        if not sds: return
+        state = self._sensor_data_store.get(sensor_id)
+        if not state: return
         
-        dt_sensor = sds['config']['dt']
+        dt_sensor = state.config['dt']
         if dt_sensor <= 0: return
 
-        new_dominant_freqs = {}
-        for axis in ['x', 'y', 'z']:
-            acc_data_axis = sds['raw_acc'][axis]
-            if len(acc_data_axis) >= self.N_FFT_POINTS:
-                segment_for_fft = acc_data_axis[-self.N_FFT_POINTS:]
-                hanning_window = windows.hann(self.N_FFT_POINTS)
-                segment_windowed = segment_for_fft * hanning_window
-
-                yf = rfft(segment_windowed)
-                xf = rfftfreq(self.N_FFT_POINTS, dt_sensor)
-                
-                if len(xf) > 1 and len(yf) > 1: 
-                    amplitude_spectrum = np.abs(yf[1:])
-                    freq_axis_fft = xf[1:]
-
-                    if amplitude_spectrum.size > 0:
-                        sds['fft_plot_data'][axis]['freq'] = freq_axis_fft
-                        sds['fft_plot_data'][axis]['amp'] = amplitude_spectrum
-                        min_freq_idx = np.where(freq_axis_fft >= 0.1)[0]
-                        if min_freq_idx.size > 0:
-                            start_idx = min_freq_idx[0]
-                            if start_idx < len(amplitude_spectrum):
-                                peak_idx = np.argmax(amplitude_spectrum[start_idx:]) + start_idx
-                                dominant_freq = freq_axis_fft[peak_idx]
-                                new_dominant_freqs[axis] = dominant_freq
-                            else: 
-                                new_dominant_freqs[axis] = 0
-                                sds['fft_plot_data'][axis]['freq'] = None
-                                sds['fft_plot_data'][axis]['amp'] = None
-                        else: 
-                            new_dominant_freqs[axis] = 0
-                            sds['fft_plot_data'][axis]['freq'] = None
-                            sds['fft_plot_data'][axis]['amp'] = None
-                    else: 
-                        new_dominant_freqs[axis] = 0
-                        sds['fft_plot_data'][axis]['freq'] = None
-                        sds['fft_plot_data'][axis]['amp'] = None
-                else: 
-                    new_dominant_freqs[axis] = 0
-                    sds['fft_plot_data'][axis]['freq'] = None
-                    sds['fft_plot_data'][axis]['amp'] = None
-            else: 
-                new_dominant_freqs[axis] = sds['dominant_freqs'].get(axis, 0)
-        
-        if new_dominant_freqs:
-            sds['dominant_freqs'].update(new_dominant_freqs)
-
-    def get_plot_data_for_sensor(self, sensor_id):
-        sds = self._sensor_data_store.get(sensor_id)
-        if not sds:
+        with state.lock:
+            segment_for_fft = state.raw_acc.view()[:, -self.N_FFT_POINTS:]
+
+        fft_plot_data = dict(state.fft_plot_data)
+        dominant_freqs = dict(state.dominant_freqs)
+        if segment_for_fft.shape[1] >= self.N_FFT_POINTS:
+            # All three axes share one contiguous (3, N) block, so transform them together
+            hanning_window = windows.hann(self.N_FFT_POINTS)
+            yf = rfft(segment_for_fft * hanning_window, axis=1)
+            xf = rfftfreq(self.N_FFT_POINTS, dt_sensor)
+
+            freq_axis_fft = xf[1:]
+            min_freq_idx = np.where(freq_axis_fft >= 0.1)[0]
+            for axis_idx, axis in enumerate(AXES):
+                amplitude_spectrum = np.abs(yf[axis_idx, 1:])
+                if amplitude_spectrum.size > 0 and min_freq_idx.size > 0:
+                    start_idx = min_freq_idx[0]
+                    peak_idx = np.argmax(amplitude_spectrum[start_idx:]) + start_idx
+                    fft_plot_data[axis] = {'freq': freq_axis_fft, 'amp': amplitude_spectrum}
+                    dominant_freqs[axis] = freq_axis_fft[peak_idx]
+                else:
+                    fft_plot_data[axis] = {'freq': None, 'amp': None}
+                    dominant_freqs[axis] = 0
+
+        with state.lock:
+            state.fft_plot_data = fft_plot_data
+            state.dominant_freqs = dominant_freqs
+            state.fft_version += 1
+
+    @staticmethod
+    def _readonly_view(arr):
+        """Returns a read-only view of arr without copying the underlying data."""
+        view = arr.view()
+        view.flags.writeable = False
+        return view
+
+    def get_data_version(self, sensor_id):
+        """
+        Returns the current data version of a sensor, or None if the sensor is unknown.
+
+        The version increases monotonically by the number of processed samples published
+        (and by one on every reset), so it is a cheap way for consumers to detect new data.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            return None
+        return state.data_version
+
+    def get_snapshot_for_sensor(self, sensor_id, since_version=None):
+        """
+        Returns a zero-copy snapshot of a sensor's data.
+
+        All arrays are read-only views. Published samples are never overwritten in place
+        (see ChannelBuffer), so the views stay consistent after the snapshot is taken.
+
+        Args:
+            sensor_id (str): Sensor to read.
+            since_version (int): If given, time series only contain the samples published
+                after this version. If the samples are no longer retained or a reset happened
+                in between, a full snapshot is returned instead.
+
+        Returns:
+            dict: Same keys as get_plot_data_for_sensor(), plus 'version', 'fft_version',
+                  'incremental' (True if only new samples are included), 'raw_acc_data' and 'dt'.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
             empty_axis_data = {'x': np.array([]), 'y': np.array([]), 'z': np.array([])}
             empty_fft_axis_data = {'freq': None, 'amp': None}
-            return { 
+            return {
+                'version': None,
+                'fft_version': None,
+                'incremental': False,
+                'dt': None,
                 'time_data': np.array([]),
                 'acc_data': empty_axis_data.copy(),
                 'vel_data': empty_axis_data.copy(),
                 'disp_data': empty_axis_data.copy(),
+                'raw_acc_data': empty_axis_data.copy(),
                 'fft_data': {'x': empty_fft_axis_data.copy(), 'y': empty_fft_axis_data.copy(), 'z': empty_fft_axis_data.copy()},
                 'dominant_freqs': {'x': 0, 'y': 0, 'z': 0}
             }
-        
-        # Ensure all data components exist, even if empty, to prevent KeyErrors higher up
-        acc_data = sds.get('processed_acc', {'x': np.array([]), 'y': np.array([]), 'z': np.array([])})
-        vel_data = sds.get('processed_vel', {'x': np.array([]), 'y': np.array([]), 'z': np.array([])})
-        disp_data = sds.get('processed_disp', {'x': np.array([]), 'y': np.array([]), 'z': np.array([])})
-        fft_data = sds.get('fft_plot_data', {'x': {'freq': None, 'amp': None}, 
-                                             'y': {'freq': None, 'amp': None}, 
-                                             'z': {'freq': None, 'amp': None}})
-        
+
+        with state.lock:
+            version = state.data_version
+            num_stored = len(state.time)
+            start = 0
+            incremental = False
+            if since_version is not None and since_version >= state.reset_version:
+                num_new = version - since_version
+                if 0 <= num_new <= num_stored:
+                    start = num_stored - num_new
+                    incremental = True
+
+            processed = self._readonly_view(state.processed.view(start))
+            time_data = self._readonly_view(state.time.row(0, start))
+            raw_acc = self._readonly_view(state.raw_acc.view())
+            fft_plot_data = state.fft_plot_data
+            fft_version = state.fft_version
+            dominant_freqs = dict(state.dominant_freqs)
+            dt = state.config['dt']
+
+        fft_data = {}
+        for axis, fft_axis in fft_plot_data.items():
+            fft_data[axis] = {key: (self._readonly_view(arr) if arr is not None else None)
+                              for key, arr in fft_axis.items()}
+
         return {
-            'time_data': sds.get('time_data', np.array([])),
-            'acc_data': acc_data,
-            'vel_data': vel_data,
-            'disp_data': disp_data,
+            'version': version,
+            'fft_version': fft_version,
+            'incremental': incremental,
+            'dt': dt,
+            'time_data': time_data,
+            'acc_data': {axis: processed[ACC_ROWS.start + i] for i, axis in enumerate(AXES)},
+            'vel_data': {axis: processed[VEL_ROWS.start + i] for i, axis in enumerate(AXES)},
+            'disp_data': {axis: processed[DISP_ROWS.start + i] for i, axis in enumerate(AXES)},
+            'raw_acc_data': {axis: raw_acc[i] for i, axis in enumerate(AXES)},
             'fft_data': fft_data,
-            'dominant_freqs': sds.get('dominant_freqs', {'x': 0, 'y': 0, 'z': 0})
-        }
\ No newline at end of file
+            'dominant_freqs': dominant_freqs
+        }
+
+    def get_plot_data_for_sensor(self, sensor_id):
+        """Returns a full read-only snapshot of a sensor's data (see get_snapshot_for_sensor)."""
+        return self.get_snapshot_for_sensor(sensor_id)
+
+    def get_history_for_sensor(self, sensor_id, tier='medium'):
+        """
+        Returns read-only views of an older retention tier.
+
+        Args:
+            sensor_id (str): Sensor to read.
+            tier (str): 'medium' for decimated block means, or 'long_term' for per-block statistics.
+
+        Returns:
+            dict: For 'medium': 'time_data', 'acc_data', 'vel_data', 'disp_data' (same layout as a
+                  snapshot). For 'long_term': 'time_data' and, per statistic in LONG_TERM_STATS,
+                  a dict {'acc_data': ..., 'vel_data': ..., 'disp_data': ...}. None if unknown sensor.
+        """
+        state = self._sensor_data_store.get(sensor_id)
+        if not state:
+            return None
+        if tier not in ('medium', 'long_term'):
+            raise ValueError(f"Unknown retention tier: {tier}")
+
+        def split_axes(values):
+            values = self._readonly_view(values)
+            return {
+                'acc_data': {axis: values[ACC_ROWS.start + i] for i, axis in enumerate(AXES)},
+                'vel_data': {axis: values[VEL_ROWS.start + i] for i, axis in enumerate(AXES)},
+                'disp_data': {axis: values[DISP_ROWS.start + i] for i, axis in enumerate(AXES)}
+            }
+
+        with state.lock:
+            tier_data = state.medium if tier == 'medium' else state.long_term
+            history = {'time_data': self._readonly_view(tier_data.time.row(0)),
+                       'block_len': tier_data.block_len}
+            if tier == 'medium':
+                history.update(split_axes(tier_data.values.view()))
+            else:
+                for stat_name in LONG_TERM_STATS:
+                    history[stat_name] = split_axes(tier_data.stat(stat_name))
+        return history
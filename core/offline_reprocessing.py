@@ -0,0 +1,183 @@
+"""
+Offline reprocessing of recorded acceleration.
+
+Runs the live KinematicProcessor configuration over whole recordings in large chunks
+(KinematicProcessor.process_chunk) and writes velocity and displacement to disk. Every
+(sensor, axis) pair is an independent task, so the tasks are spread over a process pool.
+
+Recording format: one NumPy .npy file per sensor holding acceleration in m/s^2, either of
+shape (n, 3) with columns X, Y, Z or of shape (n,) for a single axis. Files are memory-mapped,
+so recordings larger than memory are fine.
+
+Usage:
+    python -m core.offline_reprocessing --dt 0.005 --output out/ sensor_1=sensor_1.npy ...
+"""
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from core.processing_config import create_kinematic_processor, create_pre_filter
+from core.retention import STORAGE_DTYPE
+from core.sensor_state import AXES
+
+logger = logging.getLogger(__name__)
+
+# Frames handed to KinematicProcessor.process_chunk() at once
+DEFAULT_CHUNK_FRAMES = 8192
+
+
+def output_paths(output_dir, sensor_id, axis):
+    """Returns the (velocity, displacement) .npy paths written for one sensor axis."""
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', str(sensor_id))
+    return (os.path.join(output_dir, f"{name}_{axis}_vel.npy"),
+            os.path.join(output_dir, f"{name}_{axis}_disp.npy"))
+
+
+def _load_axis(path, axis_index):
+    acc = np.load(path, mmap_mode='r')
+    if acc.ndim == 1:
+        return acc
+    if acc.ndim != 2 or acc.shape[1] != len(AXES):
+        raise ValueError(f"{path}: expected shape (n,) or (n, {len(AXES)}), got {acc.shape}")
+    return acc[:, axis_index]
+
+
+def reprocess_axis(sensor_id, axis_index, input_path, output_dir, dt,
+                   kin_params=None, adv_params=None, chunk_frames=DEFAULT_CHUNK_FRAMES):
+    """
+    Reprocesses one axis of a recording and writes its velocity and displacement.
+
+    The outputs are aligned with the input samples: the latency of frequency-domain
+    integration is flushed with zeros at the end and removed. A trailing partial frame is
+    padded as process_frame() does live. The pre-filter (if configured) runs causally with
+    its state carried across chunks, as in live processing.
+
+    Returns:
+        dict: 'sensor_id', 'axis', 'vel' and 'disp' (output paths), 'samples', 'seconds'.
+    """
+    started = time.perf_counter()
+    axis = AXES[axis_index] if len(AXES) > axis_index else str(axis_index)
+    acc = _load_axis(input_path, axis_index)
+    n = len(acc)
+    processor = create_kinematic_processor(dt, kin_params, adv_params)
+    pre_filter = create_pre_filter(dt, adv_params)
+    frame_size = processor.sample_frame_size
+    latency = processor.latency
+
+    vel_path, disp_path = output_paths(output_dir, sensor_id, axis)
+    vel_out = open_memmap(vel_path, mode='w+', dtype=STORAGE_DTYPE, shape=(n,))
+    disp_out = open_memmap(disp_path, mode='w+', dtype=STORAGE_DTYPE, shape=(n,))
+    produced = 0 # Output samples produced so far; output j belongs to input j - latency
+
+    def write(disp, vel):
+        nonlocal produced
+        start = max(produced - latency, 0)
+        skip = start - (produced - latency)
+        count = max(min(len(vel) - skip, n - start), 0)
+        vel_out[start:start + count] = vel[skip:skip + count]
+        disp_out[start:start + count] = disp[skip:skip + count]
+        produced += len(vel)
+
+    whole_frames_end = n - n % frame_size
+    chunk_size = max(1, chunk_frames) * frame_size
+    for start in range(0, whole_frames_end, chunk_size):
+        block = np.asarray(acc[start:min(start + chunk_size, whole_frames_end)], dtype=float)
+        if pre_filter is not None:
+            block = pre_filter.apply(block)
+        disp, vel, _ = processor.process_chunk(block)
+        write(disp, vel)
+    if whole_frames_end < n:
+        block = np.asarray(acc[whole_frames_end:], dtype=float)
+        if pre_filter is not None:
+            block = pre_filter.apply(block)
+        disp, vel, _ = processor.process_frame(block)
+        write(disp, vel)
+    if produced - latency < n:
+        flush_frames = -(-(n + latency - produced) // frame_size)
+        disp, vel, _ = processor.process_chunk(np.zeros(flush_frames * frame_size))
+        write(disp, vel)
+
+    vel_out.flush()
+    disp_out.flush()
+    del vel_out, disp_out
+    seconds = time.perf_counter() - started
+    logger.info(f"Offline reprocessing: {sensor_id}/{axis}: {n} samples in {seconds:.1f} s")
+    return {'sensor_id': sensor_id, 'axis': axis, 'vel': vel_path, 'disp': disp_path,
+            'samples': n, 'seconds': seconds}
+
+
+def _reprocess_axis_task(args):
+    return reprocess_axis(*args)
+
+
+def reprocess_recording(recordings, output_dir, dt, kin_params=None, adv_params=None,
+                        chunk_frames=DEFAULT_CHUNK_FRAMES, max_workers=None):
+    """
+    Reprocesses recorded sessions of several sensors.
+
+    Args:
+        recordings (dict): sensor_id -> path of the sensor's .npy acceleration file.
+        output_dir (str): Directory for the <sensor>_<axis>_vel.npy / _disp.npy outputs.
+        dt (float): Sample interval of the recordings (seconds).
+        kin_params (dict): Kinematic params as used by DataProcessor (defaults if None).
+        adv_params (dict): Advanced processing params as used by DataProcessor (defaults if None).
+            "Incremental" processing_mode (or "Frequency" integration) runs chunks through the
+            vectorized path; "Full" processes frame by frame and is much slower.
+        chunk_frames (int): Frames per process_chunk() call.
+        max_workers (int): Worker processes (None: one per CPU, 1: run in this process).
+
+    Returns:
+        list: One result dict per sensor axis (see reprocess_axis()).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    for sensor_id, path in recordings.items():
+        num_axes = 1 if np.load(path, mmap_mode='r').ndim == 1 else len(AXES)
+        tasks.extend((sensor_id, axis_index, path, output_dir, dt, kin_params, adv_params, chunk_frames)
+                     for axis_index in range(num_axes))
+
+    started = time.perf_counter()
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_reprocess_axis_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_reprocess_axis_task, tasks))
+    logger.info(f"Offline reprocessing: {len(tasks)} axis task(s) finished in "
+                f"{time.perf_counter() - started:.1f} s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprocess recorded acceleration (.npy) offline.")
+    parser.add_argument('recordings', nargs='+', metavar='SENSOR_ID=PATH',
+                        help="Recorded acceleration of one sensor, shape (n, 3) or (n,)")
+    parser.add_argument('--dt', type=float, required=True, help="Sample interval in seconds")
+    parser.add_argument('--output', required=True, help="Output directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-frames', type=int, default=DEFAULT_CHUNK_FRAMES)
+    parser.add_argument('--processing-mode', default="Incremental", choices=("Full", "Incremental"))
+    parser.add_argument('--integration-method', default="Trapezoidal")
+    parser.add_argument('--detrend-method', default="RLS")
+    parser.add_argument('--decimation-factor', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    recordings = dict(item.split('=', 1) for item in args.recordings)
+    adv_params = {'processing_mode': args.processing_mode,
+                  'integration_method': args.integration_method,
+                  'detrend_method': args.detrend_method,
+                  'decimation_factor': args.decimation_factor}
+    logging.basicConfig(level=logging.INFO)
+    for result in reprocess_recording(recordings, args.output, args.dt, adv_params=adv_params,
+                                      chunk_frames=args.chunk_frames, max_workers=args.workers):
+        print(f"{result['sensor_id']}/{result['axis']}: {result['samples']} samples, "
+              f"{result['seconds']:.1f} s -> {result['vel']}, {result['disp']}")
+
+
+if __name__ == "__main__":
+    main()
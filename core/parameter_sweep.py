@@ -0,0 +1,356 @@
+"""
+Parameter sweeps over recorded acceleration.
+
+Runs many processing configurations (e.g. a grid over rls_filter_q_vel, rls_filter_q_disp,
+sample_frame_size and calc_frame_multiplier) over one recorded axis and scores the
+displacement of each: RMS error against a reference displacement if one is given, and a
+drift metric (RMS of the displacement's window means) that needs no reference.
+
+Configurations that differ only in their RLS forgetting factors share one pass over the
+data: with "Incremental" processing, RLS detrending and a time-domain integrator, velocity
+is integrated once, detrended for all distinct rls_filter_q_vel values at once with
+RLSDetrenderBank, and the displacement of every configuration is detrended by a second bank.
+Incremental outputs do not depend on calc_frame_multiplier (or warmup_frames), so
+configurations differing only in those are computed once. Every other configuration runs its
+own KinematicProcessor.process_chunk() pass. Work is split into tasks spread over a
+process pool.
+
+Recording format as in core.offline_reprocessing: a .npy file of shape (n, 3) or (n,).
+
+Usage:
+    python -m core.parameter_sweep --dt 0.005 --axis 2 recording.npy \\
+        --grid rls_filter_q_vel=0.98,0.9875,0.995 --grid sample_frame_size=10,20
+"""
+import argparse
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from algorithm.detrenders import RLSDetrenderBank
+from algorithm.integrator import create_integrator
+from core.processing_config import (DEFAULT_ADVANCED_PROCESSING_PARAMS, DEFAULT_KINEMATIC_PARAMS,
+                                    complete_params, create_kinematic_processor, create_pre_filter)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of configurations x samples held in memory per chunk of a task
+DEFAULT_MAX_BLOCK_ELEMENTS = 1 << 22
+# Configurations computed by one task
+DEFAULT_TASK_ROWS = 64
+# Initial seconds left out of the scores (detrender convergence)
+DEFAULT_SETTLE_S = 5.0
+# Window of the drift metric
+DEFAULT_DRIFT_WINDOW_S = 10.0
+
+# Kinematic params that do not change Incremental outputs
+_OUTPUT_INDEPENDENT_PARAMS = ('calc_frame_multiplier', 'warmup_frames')
+_BANK_PARAMS = ('rls_filter_q_vel', 'rls_filter_q_disp')
+
+
+def parameter_grid(grid):
+    """
+    Expands a grid into the list of its configurations.
+
+    Args:
+        grid (dict): Parameter name -> list of values. Names are kinematic params (see
+            DEFAULT_KINEMATIC_PARAMS) or advanced processing params.
+
+    Returns:
+        list: One {name: value} dict per combination, in itertools.product order.
+    """
+    for name in grid:
+        if name not in DEFAULT_KINEMATIC_PARAMS and name not in DEFAULT_ADVANCED_PROCESSING_PARAMS:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def split_params(combination, base_kin_params=None, base_adv_params=None):
+    """Returns the complete (kin_params, adv_params) of one grid combination."""
+    kin_params = complete_params(base_kin_params, DEFAULT_KINEMATIC_PARAMS)
+    adv_params = complete_params(base_adv_params, DEFAULT_ADVANCED_PROCESSING_PARAMS)
+    for name, value in combination.items():
+        (kin_params if name in DEFAULT_KINEMATIC_PARAMS else adv_params)[name] = value
+    return kin_params, adv_params
+
+
+def supports_bank(dt, kin_params, adv_params):
+    """True if a configuration can share a pass with others differing in the RLS factors."""
+    if (adv_params['processing_mode'] != "Incremental" or adv_params['detrend_method'] != "RLS"
+            or adv_params['decimation_factor'] > 1):
+        return False
+    integrator = create_integrator(adv_params['integration_method'], dt, adv_params['integration_params'])
+    return integrator.latency == 0
+
+
+class SweepScores:
+    """
+    Streaming displacement scores of several configurations.
+
+    Samples before settle_samples are ignored. The drift metric is the RMS over complete
+    windows of each window's mean displacement, i.e. how far the displacement wanders away
+    from zero on time scales longer than the window.
+    """
+    def __init__(self, rows, num_samples, settle_samples, window_samples, reference=None):
+        self.settle_samples = settle_samples
+        self.window_samples = max(1, window_samples)
+        self.reference = reference
+        self.count = 0
+        self.sum_sq = np.zeros(rows)
+        self.error_sum_sq = np.zeros(rows)
+        self.max_abs_error = np.zeros(rows)
+        num_windows = max(0, num_samples - settle_samples) // self.window_samples
+        self.window_sums = np.zeros((rows, num_windows))
+
+    def update(self, disp, start):
+        """Adds the (rows, n) displacement of input samples start .. start + n - 1."""
+        skip = max(self.settle_samples - start, 0)
+        if skip >= disp.shape[1]:
+            return
+        disp = disp[:, skip:]
+        start += skip
+        self.count += disp.shape[1]
+        self.sum_sq += np.einsum('rn,rn->r', disp, disp)
+        if self.reference is not None:
+            error = disp - np.asarray(self.reference[start:start + disp.shape[1]], dtype=float)
+            self.error_sum_sq += np.einsum('rn,rn->r', error, error)
+            np.maximum(self.max_abs_error, np.abs(error).max(axis=1), out=self.max_abs_error)
+
+        num_windows = self.window_sums.shape[1]
+        window_index = (start - self.settle_samples + np.arange(disp.shape[1])) // self.window_samples
+        boundaries = np.flatnonzero(np.diff(window_index)) + 1
+        starts = np.concatenate(([0], boundaries))
+        sums = np.add.reduceat(disp, starts, axis=1)
+        windows = window_index[starts]
+        valid = windows < num_windows
+        self.window_sums[:, windows[valid]] += sums[:, valid]
+
+    def results(self):
+        """Returns one score dict per row."""
+        count = max(self.count, 1)
+        disp_rms = np.sqrt(self.sum_sq / count)
+        if self.window_sums.shape[1]:
+            drift = np.sqrt(np.mean((self.window_sums / self.window_samples) ** 2, axis=1))
+        else:
+            drift = np.full(len(disp_rms), np.nan)
+        scores = [{'disp_rms': float(disp_rms[i]), 'drift': float(drift[i])} for i in range(len(disp_rms))]
+        if self.reference is not None:
+            rms_error = np.sqrt(self.error_sum_sq / count)
+            for i, score in enumerate(scores):
+                score['rms_error'] = float(rms_error[i])
+                score['max_abs_error'] = float(self.max_abs_error[i])
+        return scores
+
+
+def _load_input(acc, axis_index):
+    if isinstance(acc, str):
+        acc = np.load(acc, mmap_mode='r')
+    if acc.ndim == 2:
+        acc = acc[:, axis_index]
+    return acc
+
+
+def _chunk_size(rows, frame_size, max_block_elements):
+    frames = max(1, max_block_elements // max(rows, 1) // frame_size)
+    return frames * frame_size
+
+
+def _sweep_bank(acc, dt, kin_params, adv_params, rows, scores, max_block_elements):
+    """
+    One pass for configurations that differ only in their RLS factors.
+
+    Args:
+        rows (list): (q_vel, q_disp) of each output row.
+    """
+    frame_size = kin_params['sample_frame_size']
+    n = len(acc) - len(acc) % frame_size
+    q_vel_values = sorted({q_vel for q_vel, _ in rows})
+    vel_row = np.array([q_vel_values.index(q_vel) for q_vel, _ in rows])
+    vel_bank = RLSDetrenderBank(q_vel_values)
+    disp_bank = RLSDetrenderBank([q_disp for _, q_disp in rows])
+    integrator = create_integrator(adv_params['integration_method'], dt, adv_params['integration_params'])
+    vel_integration = integrator.create_state()
+    disp_integrations = [integrator.create_state() for _ in q_vel_values]
+    pre_filter = create_pre_filter(dt, adv_params)
+
+    disp_raw = None
+    chunk_size = _chunk_size(len(rows) + len(q_vel_values), frame_size, max_block_elements)
+    for start in range(0, n, chunk_size):
+        block = np.asarray(acc[start:min(start + chunk_size, n)], dtype=float)
+        if pre_filter is not None:
+            block = pre_filter.apply(block)
+        vel_raw, _ = integrator.integrate_block(block, vel_integration)
+        vel, _ = vel_bank.detrend_segments(np.broadcast_to(vel_raw, (len(q_vel_values), len(block))),
+                                           dt, frame_size)
+        if disp_raw is None or disp_raw.shape[1] != len(block):
+            disp_raw = np.empty((len(q_vel_values), len(block)))
+        for i, state in enumerate(disp_integrations):
+            integrator.integrate_block(vel[i], state, out=disp_raw[i])
+        disp, _ = disp_bank.detrend_segments(disp_raw[vel_row], dt, frame_size)
+        scores.update(disp, start)
+
+
+def _sweep_single(acc, dt, kin_params, adv_params, scores, max_block_elements):
+    """One configuration through its own processor; outputs are aligned with the input."""
+    processor = create_kinematic_processor(dt, kin_params, adv_params)
+    pre_filter = create_pre_filter(dt, adv_params)
+    frame_size = processor.sample_frame_size
+    n = len(acc) - len(acc) % frame_size
+    latency = processor.latency
+    produced = 0
+
+    def score(disp):
+        nonlocal produced
+        skip = max(latency - produced, 0)
+        start = produced + skip - latency
+        count = min(len(disp) - skip, n - start)
+        if count > 0:
+            scores.update(disp[np.newaxis, skip:skip + count], start)
+        produced += len(disp)
+
+    chunk_size = _chunk_size(1, frame_size, max_block_elements)
+    for start in range(0, n, chunk_size):
+        block = np.asarray(acc[start:min(start + chunk_size, n)], dtype=float)
+        if pre_filter is not None:
+            block = pre_filter.apply(block)
+        score(processor.process_chunk(block)[0])
+    if latency and n:
+        score(processor.process_chunk(np.zeros(-(-latency // frame_size) * frame_size))[0])
+
+
+def _run_task(task):
+    """Scores one task: (acc, axis, dt, kin, adv, bank rows or None, reference, options)."""
+    acc, axis_index, dt, kin_params, adv_params, rows, reference, options = task
+    acc = _load_input(acc, axis_index)
+    if isinstance(reference, str):
+        reference = np.load(reference, mmap_mode='r')
+    frame_size = kin_params['sample_frame_size']
+    n = len(acc) - len(acc) % frame_size
+    scores = SweepScores(len(rows) if rows is not None else 1, n,
+                         int(round(options['settle_s'] / dt)),
+                         int(round(options['drift_window_s'] / dt)), reference)
+    if rows is not None:
+        _sweep_bank(acc, dt, kin_params, adv_params, rows, scores, options['max_block_elements'])
+    else:
+        _sweep_single(acc, dt, kin_params, adv_params, scores, options['max_block_elements'])
+    return scores.results()
+
+
+def _group_key(kin_params, adv_params):
+    kin = {name: value for name, value in kin_params.items()
+           if name not in _BANK_PARAMS + _OUTPUT_INDEPENDENT_PARAMS}
+    return json.dumps([kin, adv_params], sort_keys=True, default=str)
+
+
+def run_sweep(acc, dt, grid, base_kin_params=None, base_adv_params=None, reference=None, axis_index=0,
+              settle_s=DEFAULT_SETTLE_S, drift_window_s=DEFAULT_DRIFT_WINDOW_S, max_workers=None,
+              task_rows=DEFAULT_TASK_ROWS, max_block_elements=DEFAULT_MAX_BLOCK_ELEMENTS):
+    """
+    Scores every configuration of a grid on one recorded axis.
+
+    Args:
+        acc (np.ndarray or str): Acceleration (m/s^2) of shape (n,) or (n, 3), or the path of
+            such a .npy recording (memory-mapped; passed to workers by path).
+        dt (float): Sample interval of the recording (seconds).
+        grid (dict): Parameter name -> values (see parameter_grid()).
+        base_kin_params (dict): Kinematic params not swept (defaults if None).
+        base_adv_params (dict): Advanced processing params not swept; processing_mode
+            defaults to "Incremental" here, which allows the shared passes.
+        reference (np.ndarray or str): Optional reference displacement (m), one value per
+            input sample, or the path of a .npy file holding it.
+        axis_index (int): Column of a (n, 3) recording.
+        settle_s (float): Initial seconds left out of the scores.
+        drift_window_s (float): Window of the drift metric (seconds).
+        max_workers (int): Worker processes (None: one per CPU, 1: run in this process).
+        task_rows (int): Configurations per shared-pass task.
+        max_block_elements (int): Bound on configurations x samples per chunk.
+
+    Returns:
+        list: One dict per configuration, in grid order: 'params' (the swept values),
+            'kin_params', 'adv_params', 'disp_rms', 'drift' and, with a reference,
+            'rms_error' and 'max_abs_error'.
+    """
+    base_adv_params = dict({'processing_mode': "Incremental"}, **(base_adv_params or {}))
+    combinations = parameter_grid(grid)
+    configs = [split_params(combination, base_kin_params, base_adv_params) for combination in combinations]
+    options = {'settle_s': settle_s, 'drift_window_s': drift_window_s,
+               'max_block_elements': max_block_elements}
+
+    # Each task: (task arguments, indices of the configurations each result row belongs to)
+    tasks = []
+    groups = {}
+    for index, (kin_params, adv_params) in enumerate(configs):
+        if supports_bank(dt, kin_params, adv_params):
+            rows = groups.setdefault(_group_key(kin_params, adv_params), {})
+            rows.setdefault(tuple(kin_params[name] for name in _BANK_PARAMS), []).append(index)
+        else:
+            tasks.append(((acc, axis_index, dt, kin_params, adv_params, None, reference, options), [[index]]))
+    for rows in groups.values():
+        row_keys = list(rows)
+        for batch_start in range(0, len(row_keys), task_rows):
+            batch = row_keys[batch_start:batch_start + task_rows]
+            kin_params, adv_params = configs[rows[batch[0]][0]]
+            tasks.append(((acc, axis_index, dt, kin_params, adv_params, batch, reference, options),
+                          [rows[key] for key in batch]))
+
+    started = time.perf_counter()
+    task_args = [task for task, _ in tasks]
+    if max_workers == 1 or len(tasks) <= 1:
+        task_results = [_run_task(task) for task in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            task_results = list(pool.map(_run_task, task_args))
+
+    results = [None] * len(configs)
+    for (_, row_indices), scores in zip(tasks, task_results):
+        for indices, score in zip(row_indices, scores):
+            for index in indices:
+                kin_params, adv_params = configs[index]
+                results[index] = dict(score, params=combinations[index],
+                                      kin_params=kin_params, adv_params=adv_params)
+    logger.info(f"Parameter sweep: {len(configs)} configuration(s) in {len(tasks)} task(s), "
+                f"{time.perf_counter() - started:.1f} s")
+    return results
+
+
+def _parse_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a parameter grid on recorded acceleration (.npy).")
+    parser.add_argument('recording', help="Recorded acceleration, shape (n, 3) or (n,)")
+    parser.add_argument('--dt', type=float, required=True, help="Sample interval in seconds")
+    parser.add_argument('--axis', type=int, default=0, help="Column of a (n, 3) recording")
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2,...',
+                        help="Swept parameter and its values (repeatable)")
+    parser.add_argument('--reference', help="Reference displacement .npy, shape (n,)")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_S, help="Seconds left out of the scores")
+    parser.add_argument('--drift-window', type=float, default=DEFAULT_DRIFT_WINDOW_S)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--top', type=int, default=10, help="Configurations to print")
+    args = parser.parse_args(argv)
+
+    grid = {}
+    for item in args.grid:
+        name, values = item.split('=', 1)
+        grid[name] = [_parse_value(value) for value in values.split(',')]
+    logging.basicConfig(level=logging.INFO)
+    results = run_sweep(args.recording, args.dt, grid, reference=args.reference, axis_index=args.axis,
+                        settle_s=args.settle, drift_window_s=args.drift_window, max_workers=args.workers)
+    key = 'rms_error' if args.reference else 'drift'
+    for result in sorted(results, key=lambda result: result[key])[:args.top]:
+        print(f"{key}={result[key]:.6g} disp_rms={result['disp_rms']:.6g} {result['params']}")
+
+
+if __name__ == "__main__":
+    main()
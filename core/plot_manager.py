@@ -13,6 +13,7 @@ class PlotManager:
         self.is_collecting_data = False
         self.current_sensor_id_plotting = None # Sensor ID đang được vẽ
         self._target_plot_rate_hz = 10 # Mặc định 10Hz
+        self._last_plotted_versions = None # (sensor_id, data version, fft version) của lần vẽ gần nhất
 
     def set_plot_rate(self, rate_hz):
         if rate_hz and rate_hz > 0:
@@ -30,6 +31,7 @@ class PlotManager:
             return
             
         self.current_sensor_id_plotting = sensor_id
+        self._last_plotted_versions = None # Luôn vẽ lại ở lần cập nhật đầu tiên
         self._target_plot_rate_hz = rate_hz if rate_hz and rate_hz > 0 else self._target_plot_rate_hz
 
         if self._target_plot_rate_hz > 0:
@@ -65,6 +67,13 @@ class PlotManager:
             # logger.debug(f"No data or empty time_data for sensor {self.current_sensor_id_plotting}")
             return
 
+        # Bỏ qua việc vẽ lại nếu dữ liệu chưa thay đổi kể từ lần vẽ trước
+        if plot_data.get('version') is not None:
+            versions = (self.current_sensor_id_plotting, plot_data['version'], plot_data.get('fft_version'))
+            if versions == self._last_plotted_versions:
+                return
+            self._last_plotted_versions = versions
+
         self.display_screen.update_plots(
             time_data=plot_data['time_data'],
             acc_data=plot_data['acc_data'],
@@ -79,6 +88,8 @@ class PlotManager:
         if self.current_sensor_id_plotting:
              self.data_processor.reset_sensor_data(self.current_sensor_id_plotting)
         
+        self._last_plotted_versions = None
+
         # Reset các đường cong trên DisplayScreen
         # DisplayScreenWidget.reset_plots() đã làm việc này khá tốt
         self.display_screen.reset_plots()
@@ -0,0 +1,112 @@
+import copy
+import logging
+
+from algorithm.filters import create_filter, DEFAULT_NOTCH_Q
+from algorithm.kinematic_processor import KinematicProcessor
+from algorithm.multirate import MultirateKinematicProcessor
+from algorithm.orientation import OrientationCompensator
+
+logger = logging.getLogger(__name__)
+
+# Per-sensor processing defaults (stored in config['kinematic_params'] and
+# config['advanced_processing_params'])
+DEFAULT_KINEMATIC_PARAMS = {
+    'sample_frame_size': 20,
+    'calc_frame_multiplier': 50,
+    'rls_filter_q_vel': 0.9875,
+    'rls_filter_q_disp': 0.9875,
+    'warmup_frames': 5
+}
+
+DEFAULT_ADVANCED_PROCESSING_PARAMS = {
+    'pre_filter_type': "None",
+    'pre_filter_params': {'cutoff_hz': 0.5, 'order': 2,
+                          'high_cutoff_hz': 10.0, # "Band-pass"/"Band-stop" only
+                          'notch_q': DEFAULT_NOTCH_Q}, # "Notch" only
+    'integration_method': "Trapezoidal",
+    'integration_params': {'low_cut_hz': 1.0, 'high_cut_hz': None, 'segment_size': 512}, # "Frequency" only
+    'detrend_method': "RLS",
+    'detrend_params': {'poly_order': 2, 'kalman_cutoff_hz': 0.3, 'kalman_order': 2},
+    'processing_mode': "Full", # "Incremental": O(frame) per-frame cost, see KinematicProcessor
+    'decimation_factor': 1, # > 1: integrate at a reduced rate, see MultirateKinematicProcessor
+    'decimation_params': {'num_taps': None, 'upsampling': "Linear"},
+    # "Angles": rotate acceleration into the world frame with the angle packets and remove
+    # gravity there; "Angles+Gyro": also fuse the angles with gyro rates (see OrientationCompensator)
+    'orientation_mode': "None",
+    'orientation_params': {'fusion_time_constant_s': 0.5}
+}
+
+ORIENTATION_MODES = ("None", "Angles", "Angles+Gyro")
+
+
+def complete_params(params, defaults):
+    """Returns a copy of params with missing keys taken from defaults."""
+    completed = copy.deepcopy(defaults)
+    completed.update(params or {})
+    return completed
+
+
+def create_kinematic_processor(dt, kin_params=None, adv_params=None):
+    """
+    Creates one KinematicProcessor for a sensor axis from kinematic/advanced processing params.
+    A decimation_factor above 1 gives a MultirateKinematicProcessor; a factor that does not
+    divide sample_frame_size is ignored with a warning.
+    """
+    kin_params = complete_params(kin_params, DEFAULT_KINEMATIC_PARAMS)
+    adv_params = complete_params(adv_params, DEFAULT_ADVANCED_PROCESSING_PARAMS)
+    multirate_params = {}
+    processor_class = KinematicProcessor
+    decimation_factor = adv_params['decimation_factor']
+    if decimation_factor > 1 and kin_params['sample_frame_size'] % decimation_factor:
+        logger.warning(f"Decimation factor {decimation_factor} does not divide the frame size "
+                       f"{kin_params['sample_frame_size']}. Processing at the full rate.")
+    elif decimation_factor > 1:
+        processor_class = MultirateKinematicProcessor
+        multirate_params = {'decimation_factor': decimation_factor,
+                            'decimation_params': adv_params['decimation_params']}
+    return processor_class(
+        dt=dt,
+        sample_frame_size=kin_params['sample_frame_size'],
+        calc_frame_multiplier=kin_params['calc_frame_multiplier'],
+        rls_filter_q_vel=kin_params['rls_filter_q_vel'],
+        rls_filter_q_disp=kin_params['rls_filter_q_disp'],
+        warmup_frames=kin_params['warmup_frames'],
+        integration_method=adv_params['integration_method'],
+        detrend_method=adv_params['detrend_method'],
+        detrend_params=dict(adv_params['detrend_params'] or {}),
+        processing_mode=adv_params['processing_mode'],
+        integration_params=adv_params['integration_params'],
+        **multirate_params
+    )
+
+
+def create_pre_filter(dt, adv_params=None):
+    """
+    Creates the stateful acceleration pre-filter for one sensor (all axes filtered as one
+    (3, n) block), or returns None if pre_filter_type is "None".
+    """
+    adv_params = complete_params(adv_params, DEFAULT_ADVANCED_PROCESSING_PARAMS)
+    filter_type = adv_params['pre_filter_type']
+    if filter_type == "None":
+        return None
+    params = complete_params(adv_params['pre_filter_params'],
+                             DEFAULT_ADVANCED_PROCESSING_PARAMS['pre_filter_params'])
+    return create_filter(filter_type, params['cutoff_hz'], 1.0 / dt, order=params['order'],
+                         high_cutoff_freq=params['high_cutoff_hz'], quality=params['notch_q'])
+
+
+def create_orientation_compensator(dt, adv_params=None):
+    """
+    Creates the orientation stage of one sensor (world-frame acceleration without gravity),
+    or returns None if orientation_mode is "None".
+    """
+    adv_params = complete_params(adv_params, DEFAULT_ADVANCED_PROCESSING_PARAMS)
+    mode = adv_params['orientation_mode']
+    if mode == "None":
+        return None
+    if mode not in ORIENTATION_MODES:
+        raise ValueError(f"Unknown orientation mode: {mode}")
+    params = complete_params(adv_params['orientation_params'],
+                             DEFAULT_ADVANCED_PROCESSING_PARAMS['orientation_params'])
+    return OrientationCompensator(dt, gyro_fusion=mode == "Angles+Gyro",
+                                  fusion_time_constant=params['fusion_time_constant_s'])
@@ -0,0 +1,238 @@
+import logging
+import queue
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QThread
+
+logger = logging.getLogger(__name__)
+
+
+class _SensorLag:
+    """Processing lag statistics of one sensor (seconds from submit() to processed)."""
+    __slots__ = ('queue_depth', 'processed', 'last', 'mean', 'max')
+
+    # Weight of the newest sample in the exponentially weighted mean lag
+    EWMA_ALPHA = 0.05
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.processed = 0
+        self.last = 0.0
+        self.mean = 0.0
+        self.max = 0.0
+
+    def record(self, lag):
+        self.queue_depth -= 1
+        self.processed += 1
+        self.last = lag
+        self.mean = lag if self.processed == 1 else self.mean + self.EWMA_ALPHA * (lag - self.mean)
+        self.max = max(self.max, lag)
+
+    def as_dict(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'processed': self.processed,
+            'last_lag_ms': self.last * 1000.0,
+            'mean_lag_ms': self.mean * 1000.0,
+            'max_lag_ms': self.max * 1000.0
+        }
+
+
+class _ShardWorker(QThread):
+    """Processes the samples of the sensors assigned to one shard, in arrival order."""
+
+    # Samples handled before pending FFT updates are run
+    MAX_BATCH = 256
+
+    def __init__(self, executor, index):
+        super().__init__()
+        self.executor = executor
+        self.index = index
+        self.queue = queue.Queue()
+
+    def run(self):
+        data_processor = self.executor.data_processor
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            try:
+                while len(batch) < self.MAX_BATCH:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = False
+            fft_sensor_ids = set()
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                sensor_id, data_dict, sensor_config, submit_time, generation = item
+                if not self.executor._is_current(sensor_id, generation):
+                    continue # Queued before the sensor was removed
+                try:
+                    data_processor.handle_incoming_sensor_data(sensor_id, data_dict, sensor_config)
+                except Exception as e:
+                    logger.error(f"ProcessingExecutor: Error processing data for {sensor_id}: {e}", exc_info=True)
+                self.executor._record_lag(sensor_id, generation, time.perf_counter() - submit_time)
+                if sensor_id in self.executor.fft_sensor_ids:
+                    fft_sensor_ids.add(sensor_id)
+
+            # The spectrum only depends on the latest samples, so it is computed once per batch
+            for sensor_id in fft_sensor_ids:
+                try:
+                    data_processor.calculate_fft_for_sensor(sensor_id)
+                except Exception as e:
+                    logger.error(f"ProcessingExecutor: FFT failed for {sensor_id}: {e}", exc_info=True)
+
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                break
+
+
+class ProcessingExecutor(QObject):
+    """
+    Runs DataProcessor ingest on worker threads instead of the GUI thread.
+
+    Sensors are sharded across num_workers threads; all samples of one sensor go to the
+    same worker, so they are processed in order. Results are published into DataProcessor's
+    locked per-sensor state, which the UI only reads through snapshots.
+    """
+
+    def __init__(self, data_processor, num_workers=2, parent=None):
+        super().__init__(parent)
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.data_processor = data_processor
+        self.num_workers = num_workers
+        self.fft_sensor_ids = set() # Sensors whose spectrum is recomputed after each batch
+        self._workers = []
+        self._shard_of = {}
+        self._lag = {}
+        # Bumped by remove_sensor(), so samples queued before the removal are discarded
+        self._generation = {}
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return bool(self._workers)
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [_ShardWorker(self, i) for i in range(self.num_workers)]
+        for worker in self._workers:
+            worker.start()
+        logger.info(f"ProcessingExecutor: Started {self.num_workers} worker thread(s).")
+
+    def stop(self, timeout_ms=2000):
+        """Processes the samples already queued, then stops the worker threads."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.queue.put(None)
+        for worker in workers:
+            if not worker.wait(timeout_ms):
+                logger.warning(f"ProcessingExecutor: Worker {worker.index} did not stop in time.")
+        with self._lock:
+            self._shard_of.clear()
+        logger.info("ProcessingExecutor: Stopped.")
+
+    def set_num_workers(self, num_workers):
+        """Changes the number of worker threads (restarts the executor if it is running)."""
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        running = self.is_running()
+        if running:
+            self.stop()
+        self.num_workers = num_workers
+        if running:
+            self.start()
+
+    def set_fft_sensor(self, sensor_id):
+        """Selects the sensor whose spectrum is kept up to date (None for none)."""
+        self.fft_sensor_ids = {sensor_id} if sensor_id else set()
+
+    def _shard_for(self, sensor_id):
+        shard = self._shard_of.get(sensor_id)
+        if shard is None:
+            # New sensors go to the shard with the fewest sensors
+            counts = [0] * len(self._workers)
+            for index in self._shard_of.values():
+                counts[index] += 1
+            shard = counts.index(min(counts))
+            self._shard_of[sensor_id] = shard
+        return shard
+
+    def submit(self, sensor_id, data_dict, sensor_config=None):
+        """
+        Queues one sample for processing. Safe to call from the GUI thread.
+
+        If the executor is not running, the sample is processed synchronously.
+        """
+        if not self._workers:
+            self.data_processor.handle_incoming_sensor_data(sensor_id, data_dict, sensor_config)
+            if sensor_id in self.fft_sensor_ids:
+                self.data_processor.calculate_fft_for_sensor(sensor_id)
+            return
+        with self._lock:
+            worker = self._workers[self._shard_for(sensor_id)]
+            lag = self._lag.get(sensor_id)
+            if lag is None:
+                lag = self._lag[sensor_id] = _SensorLag()
+            lag.queue_depth += 1
+            generation = self._generation.get(sensor_id, 0)
+        worker.queue.put((sensor_id, data_dict, sensor_config, time.perf_counter(), generation))
+
+    def remove_sensor(self, sensor_id):
+        """
+        Discards the samples of a removed sensor that are still queued and forgets its shard
+        and lag metrics. Call together with DataProcessor.remove_sensor_data().
+        """
+        with self._lock:
+            self._generation[sensor_id] = self._generation.get(sensor_id, 0) + 1
+            self._shard_of.pop(sensor_id, None)
+            self._lag.pop(sensor_id, None)
+        self.fft_sensor_ids.discard(sensor_id)
+
+    def _is_current(self, sensor_id, generation):
+        with self._lock:
+            return self._generation.get(sensor_id, 0) == generation
+
+    def _record_lag(self, sensor_id, generation, lag_seconds):
+        with self._lock:
+            if self._generation.get(sensor_id, 0) == generation:
+                self._lag[sensor_id].record(lag_seconds)
+
+    def wait_until_idle(self):
+        """Blocks until every queued sample has been processed."""
+        for worker in list(self._workers):
+            worker.queue.join()
+
+    def get_shard_assignment(self):
+        with self._lock:
+            return dict(self._shard_of)
+
+    def get_lag_metrics(self, sensor_id=None):
+        """
+        Returns processing lag metrics.
+
+        Returns:
+            dict: Per sensor: 'queue_depth', 'processed', 'last_lag_ms', 'mean_lag_ms' (EWMA) and
+                  'max_lag_ms'. If sensor_id is given, only that sensor's dict (or None).
+        """
+        with self._lock:
+            if sensor_id is not None:
+                lag = self._lag.get(sensor_id)
+                return lag.as_dict() if lag else None
+            return {sid: lag.as_dict() for sid, lag in self._lag.items()}
+
+    def reset_lag_metrics(self, sensor_id=None):
+        with self._lock:
+            targets = [sensor_id] if sensor_id is not None else list(self._lag)
+            for sid in targets:
+                lag = self._lag.get(sid)
+                if lag:
+                    depth = lag.queue_depth
+                    self._lag[sid] = _SensorLag()
+                    self._lag[sid].queue_depth = depth
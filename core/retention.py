@@ -0,0 +1,54 @@
+import numpy as np
+
+# Per-sensor retention defaults (stored in config['retention_params'])
+DEFAULT_RETENTION_PARAMS = {
+    'recent_seconds': 60.0,            # Full-resolution tier
+    'medium_seconds': 3600.0,          # Decimated tier
+    'medium_decimation': 10,           # Samples averaged into one medium-tier point
+    'long_term_seconds': 86400.0,      # Statistics-only tier
+    'long_term_block_seconds': 10.0,   # Duration summarized by one long-term entry
+    'memory_budget_mb': None           # Optional per-sensor cap, on top of the global budget
+}
+
+STORAGE_DTYPE = np.float32
+
+# Row order of the statistics stored per channel in LongTermTier
+LONG_TERM_STATS = ('mean', 'min', 'max', 'std')
+
+
+def retention_points(retention_params, dt):
+    """
+    Converts retention durations into point counts for each tier.
+
+    Returns:
+        dict: 'recent', 'medium', 'medium_decimation', 'long_term' and 'long_term_block' (in samples).
+    """
+    medium_decimation = max(1, int(retention_params['medium_decimation']))
+    long_term_block = max(1, int(round(retention_params['long_term_block_seconds'] / dt)))
+    return {
+        'recent': int(retention_params['recent_seconds'] / dt),
+        'medium': int(retention_params['medium_seconds'] / (dt * medium_decimation)),
+        'medium_decimation': medium_decimation,
+        'long_term': int(retention_params['long_term_seconds'] / (dt * long_term_block)),
+        'long_term_block': long_term_block
+    }
+
+
+def scale_retention_points(points, scale, min_recent, min_raw):
+    """Scales tier sizes by scale (<= 1), keeping the floors needed for plotting and FFT."""
+    return dict(points,
+                recent=max(int(points['recent'] * scale), min_recent),
+                raw=max(int(points['recent'] * scale), min_raw),
+                medium=max(int(points['medium'] * scale), 1),
+                long_term=max(int(points['long_term'] * scale), 1))
+
+
+def estimate_state_bytes(points, num_channels, num_raw_channels):
+    """Estimates the memory allocated by a SensorState for the given tier sizes (see ChannelBuffer)."""
+    itemsize = np.dtype(STORAGE_DTYPE).itemsize
+    time_itemsize = np.dtype(float).itemsize
+    recent = 2 * points['recent'] * (num_channels * itemsize + time_itemsize)
+    raw = 2 * points.get('raw', points['recent']) * num_raw_channels * itemsize
+    medium = 2 * points['medium'] * (num_channels * itemsize + time_itemsize)
+    long_term = 2 * points['long_term'] * (num_channels * len(LONG_TERM_STATS) * itemsize + time_itemsize)
+    return recent + raw + medium + long_term
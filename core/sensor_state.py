@@ -0,0 +1,322 @@
+import threading
+import time
+
+import numpy as np
+
+from analysis.streaming_stats import StreamingStats, WindowedStats
+from core.retention import STORAGE_DTYPE, LONG_TERM_STATS
+
+AXES = ('x', 'y', 'z')
+
+# Row layout of SensorState.processed (and of the medium/long-term tiers' channels)
+ACC_ROWS = slice(0, 3)
+VEL_ROWS = slice(3, 6)
+DISP_ROWS = slice(6, 9)
+NUM_PROCESSED_ROWS = 9
+# Field name of each processed row, as used in analysis tables (AccX ... DispZ)
+PROCESSED_FIELD_NAMES = tuple(f"{kind}{axis.upper()}" for kind in ('Acc', 'Vel', 'Disp') for axis in AXES)
+
+
+class ChannelBuffer:
+    """
+    Append-only buffer of shape (channels, samples) backed by one contiguous array.
+
+    Appends write past the current end of the backing array, and trimming only moves the
+    start index, so a region that has been handed out as a view is never overwritten.
+    When the backing array is full, the retained samples are moved into a new array.
+    """
+    __slots__ = ('_data', '_start', '_end', 'num_channels', 'max_points')
+
+    def __init__(self, num_channels, max_points, dtype=float):
+        self.num_channels = num_channels
+        self.max_points = max_points
+        self._data = np.empty((num_channels, 2 * max_points), dtype=dtype)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def resize(self, max_points):
+        """Changes the capacity, keeping the most recent samples in a new backing array."""
+        if max_points == self.max_points:
+            return
+        keep = min(len(self), max_points)
+        new_data = np.empty((self.num_channels, 2 * max_points), dtype=self._data.dtype)
+        new_data[:, :keep] = self._data[:, self._end - keep:self._end]
+        self._data = new_data
+        self.max_points = max_points
+        self._start, self._end = 0, keep
+
+    def clear(self):
+        """Drops all samples. Previously returned views keep their data."""
+        self._data = np.empty_like(self._data)
+        self._start = 0
+        self._end = 0
+
+    def append(self, block):
+        """
+        Appends a block of samples.
+
+        Args:
+            block (np.ndarray): Array of shape (num_channels, n), or (num_channels,) for one sample.
+        """
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        n = block.shape[1]
+        if n == 0:
+            return
+        if n >= self.max_points:
+            self._data = np.empty_like(self._data)
+            self._data[:, :self.max_points] = block[:, -self.max_points:]
+            self._start, self._end = 0, self.max_points
+            return
+
+        if self._end + n > self._data.shape[1]:
+            keep = min(len(self), self.max_points - n)
+            new_data = np.empty_like(self._data)
+            new_data[:, :keep] = self._data[:, self._end - keep:self._end]
+            self._data = new_data
+            self._start, self._end = 0, keep
+
+        self._data[:, self._end:self._end + n] = block
+        self._end += n
+        if len(self) > self.max_points:
+            self._start = self._end - self.max_points
+
+    def trim(self, max_points):
+        """Keeps at most the last max_points samples."""
+        if len(self) > max_points:
+            self._start = self._end - max_points
+
+    def view(self, start=0):
+        """Returns a (num_channels, n) view of the retained samples, starting at sample index start."""
+        return self._data[:, self._start + start:self._end]
+
+    def row(self, index, start=0):
+        """Returns a 1-D view of a single channel."""
+        return self._data[index, self._start + start:self._end]
+
+
+class _BlockReducingTier:
+    """
+    Reduces fixed-size blocks of samples into one entry each.
+
+    Samples that do not fill a complete block yet are kept pending until the next append.
+    Time is kept in float64 (block center), values in STORAGE_DTYPE.
+    """
+    __slots__ = ('block_len', 'num_channels', 'time', 'values', '_pending_time', '_pending_values')
+
+    num_value_rows_per_channel = 1
+
+    def __init__(self, num_channels, block_len, max_points):
+        self.block_len = max(1, int(block_len))
+        self.num_channels = num_channels
+        self.time = ChannelBuffer(1, max_points)
+        self.values = ChannelBuffer(num_channels * self.num_value_rows_per_channel, max_points,
+                                    dtype=STORAGE_DTYPE)
+        self._pending_time = np.empty(0)
+        self._pending_values = np.empty((num_channels, 0))
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def max_points(self):
+        return self.time.max_points
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + self.values.nbytes
+
+    def clear(self):
+        self.time.clear()
+        self.values.clear()
+        self._pending_time = np.empty(0)
+        self._pending_values = np.empty((self.num_channels, 0))
+
+    def resize(self, max_points):
+        self.time.resize(max_points)
+        self.values.resize(max_points)
+
+    def _reduce(self, blocks):
+        """Reduces blocks of shape (C, m, block_len) to (rows, m)."""
+        raise NotImplementedError("Subclasses must implement _reduce()")
+
+    def append(self, times, block):
+        """
+        Appends samples.
+
+        Args:
+            times (np.ndarray): Sample times, shape (n,).
+            block (np.ndarray): Sample values, shape (num_channels, n).
+        """
+        if self._pending_time.size:
+            times = np.concatenate((self._pending_time, times))
+            block = np.concatenate((self._pending_values, block), axis=1)
+        num_blocks = times.size // self.block_len
+        used = num_blocks * self.block_len
+        if num_blocks:
+            block_times = times[:used].reshape(num_blocks, self.block_len).mean(axis=1)
+            reduced = self._reduce(block[:, :used].reshape(self.num_channels, num_blocks, self.block_len))
+            self.time.append(block_times[np.newaxis, :])
+            self.values.append(reduced)
+        self._pending_time = times[used:].copy()
+        self._pending_values = block[:, used:].copy()
+
+
+class DecimatedTier(_BlockReducingTier):
+    """Medium-term tier: block means (boxcar anti-aliasing) decimated by block_len."""
+    __slots__ = ()
+
+    def _reduce(self, blocks):
+        return blocks.mean(axis=2)
+
+
+class LongTermTier(_BlockReducingTier):
+    """Long-term tier: only per-block statistics (LONG_TERM_STATS) of each channel."""
+    __slots__ = ()
+
+    num_value_rows_per_channel = len(LONG_TERM_STATS)
+
+    def _reduce(self, blocks):
+        # Rows are grouped by statistic: all channels' means, then all mins, ...
+        return np.concatenate((blocks.mean(axis=2), blocks.min(axis=2),
+                               blocks.max(axis=2), blocks.std(axis=2)))
+
+    def stat(self, name):
+        """Returns a (num_channels, n) view of one statistic."""
+        idx = LONG_TERM_STATS.index(name)
+        return self.values.view()[idx * self.num_channels:(idx + 1) * self.num_channels]
+
+
+class SensorState:
+    """
+    Per-sensor processing state held by DataProcessor.
+
+    Processed data is kept in three retention tiers: `time`/`processed` hold the recent
+    samples at full resolution, `medium` holds decimated block means and `long_term` holds
+    per-block statistics only. Sizes are set by DataProcessor from the retention config.
+    `session_stats` and `window_stats` keep streaming descriptive statistics of the processed
+    rows since the last reset and over the recent tier's window, respectively.
+
+    `lock` guards all mutable fields; ingest may run on a worker thread (see ProcessingExecutor)
+    while the UI takes snapshots.
+    """
+    __slots__ = ('config', 'time', 'processed', 'raw_acc', 'medium', 'long_term',
+                 'session_stats', 'window_stats',
+                 'pending_acc', 'pending_orientation', 'pending_count', 'current_time_plot',
+                 'kinematic_processors', 'pre_filter', 'orientation', 'shadows',
+                 'fft_plot_data', 'dominant_freqs', 'data_version', 'reset_version', 'fft_version',
+                 'last_checkpoint_time', 'lock')
+
+    def __init__(self, config, kinematic_processors, max_points=2000, raw_max_points=1024,
+                 medium_points=1, medium_decimation=10, long_term_points=1, long_term_block=2000,
+                 pre_filter=None, orientation=None):
+        self.config = config
+        self.time = ChannelBuffer(1, max_points)
+        self.processed = ChannelBuffer(NUM_PROCESSED_ROWS, max_points, dtype=STORAGE_DTYPE)
+        self.raw_acc = ChannelBuffer(len(AXES), raw_max_points, dtype=STORAGE_DTYPE)
+        self.medium = DecimatedTier(NUM_PROCESSED_ROWS, medium_decimation, medium_points)
+        self.long_term = LongTermTier(NUM_PROCESSED_ROWS, long_term_block, long_term_points)
+        self.session_stats = StreamingStats(NUM_PROCESSED_ROWS)
+        self.window_stats = WindowedStats(NUM_PROCESSED_ROWS, max_points)
+        self.kinematic_processors = kinematic_processors
+        self.pre_filter = pre_filter # Stateful acceleration pre-filter applied per (3, n) frame, or None
+        # World-frame rotation and gravity removal applied per frame before the pre-filter, or None
+        self.orientation = orientation
+        self.shadows = None # ShadowSet of A/B configurations run next to kinematic_processors, or None
+        self.pending_acc = np.empty((len(AXES), config['kinematic_params']['sample_frame_size']))
+        # Angles (deg) and gyro rates (deg/s) of the pending samples, used by `orientation`
+        self.pending_orientation = np.empty((2 * len(AXES), config['kinematic_params']['sample_frame_size']))
+        self.pending_count = 0
+        self.current_time_plot = 0.0
+        self.fft_plot_data = {ax: {'freq': None, 'amp': None} for ax in AXES}
+        self.dominant_freqs = {ax: 0 for ax in AXES}
+        # Snapshot versioning: data_version counts processed samples ever published
+        # (plus one per reset), so "samples after version v" is simply the last
+        # data_version - v samples of the retained arrays.
+        self.data_version = 0
+        self.reset_version = 0
+        self.fft_version = 0
+        self.last_checkpoint_time = time.monotonic() # Of the last processing state checkpoint
+        self.lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        """Memory allocated by all data tiers."""
+        return (self.time.nbytes + self.processed.nbytes + self.raw_acc.nbytes +
+                self.medium.nbytes + self.long_term.nbytes)
+
+    def apply_retention(self, points):
+        """Resizes the tiers; points as returned by retention.scale_retention_points()."""
+        self.time.resize(points['recent'])
+        self.processed.resize(points['recent'])
+        self.window_stats.set_window(points['recent'])
+        self.raw_acc.resize(points['raw'])
+        if (self.medium.block_len != points['medium_decimation'] or
+                self.long_term.block_len != points['long_term_block']):
+            # Block sizes changed (e.g. new dt): earlier reductions are not comparable
+            self.medium = DecimatedTier(NUM_PROCESSED_ROWS, points['medium_decimation'], points['medium'])
+            self.long_term = LongTermTier(NUM_PROCESSED_ROWS, points['long_term_block'], points['long_term'])
+        else:
+            self.medium.resize(points['medium'])
+            self.long_term.resize(points['long_term'])
+
+    def append_processed(self, times, block):
+        """Appends processed samples (times: (n,), block: (NUM_PROCESSED_ROWS, n)) to all tiers."""
+        self.time.append(times[np.newaxis, :])
+        self.processed.append(block)
+        self.medium.append(times, block)
+        self.long_term.append(times, block)
+        self.session_stats.update(block)
+        self.window_stats.update(block)
+
+    def resize_pending(self, frame_size):
+        """Reallocates the pending input frame for a new sample_frame_size."""
+        self.pending_acc = np.empty((len(AXES), frame_size))
+        self.pending_orientation = np.empty((2 * len(AXES), frame_size))
+        self.pending_count = 0
+
+    def clear_data(self):
+        """Drops all stored samples and derived results, keeping config and processors."""
+        self.time.clear()
+        self.processed.clear()
+        self.raw_acc.clear()
+        self.medium.clear()
+        self.long_term.clear()
+        self.session_stats.reset()
+        self.window_stats.reset()
+        self.pending_count = 0
+        self.current_time_plot = 0.0
+        self.fft_plot_data = {ax: {'freq': None, 'amp': None} for ax in AXES}
+        self.dominant_freqs = {ax: 0 for ax in AXES}
+        # Bump the version so consumers holding an older version get a full snapshot
+        self.data_version += 1
+        self.reset_version = self.data_version
+        self.fft_version += 1
+
+    @property
+    def time_data(self):
+        return self.time.row(0)
+
+    @property
+    def acc(self):
+        return self.processed.view()[ACC_ROWS]
+
+    @property
+    def vel(self):
+        return self.processed.view()[VEL_ROWS]
+
+    @property
+    def disp(self):
+        return self.processed.view()[DISP_ROWS]
@@ -0,0 +1,341 @@
+"""
+Shadow processing configurations for A/B comparison on live data.
+
+A shadow runs another kinematic configuration of a sensor next to the primary one, on the
+same input frames: the g-conversion, orientation compensation and pre-filter run once for
+the primary and their output is passed on, so a shadow only differs in its kinematic
+stages. Work is shared where the outputs are identical:
+
+* A shadow whose kinematic configuration equals the primary's (or an earlier shadow's) has
+  no processors of its own and repeats that output.
+* A shadow that only differs in the displacement stage (e.g. rls_filter_q_disp) reuses the
+  velocity stage of a processor it has in common (KinematicProcessor.process_frame_shared()).
+
+Each shadow accumulates DivergenceStats of its velocity and displacement against the
+primary's, aligned for integrator latency and counted once both have warmed up.
+"""
+import json
+import logging
+
+import numpy as np
+
+from algorithm.kinematic_processor import KinematicProcessor
+from core.processing_config import complete_params, create_kinematic_processor
+from core.sensor_state import AXES, NUM_PROCESSED_ROWS, ACC_ROWS, VEL_ROWS, DISP_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Advanced parameters of the input stages, which shadows share with the primary configuration
+INPUT_STAGE_PARAMS = ('pre_filter_type', 'pre_filter_params', 'orientation_mode', 'orientation_params')
+# Processed rows compared between a shadow and the primary, with their names in the statistics
+COMPARED_ROWS = (('vel', VEL_ROWS), ('disp', DISP_ROWS))
+
+
+def kinematic_key(dt, kin_params, adv_params):
+    """Text key of everything the kinematic outputs depend on (warm-up and input stages left out)."""
+    kin_params = {key: value for key, value in kin_params.items() if key != 'warmup_frames'}
+    adv_params = {key: value for key, value in adv_params.items() if key not in INPUT_STAGE_PARAMS}
+    return json.dumps([dt, kin_params, adv_params], sort_keys=True, default=str)
+
+
+def velocity_stage_key(processor, dt, kin_params, adv_params):
+    """
+    Text key of everything the velocity output of a processor depends on, or None if the
+    processor has no velocity stage that can be shared (multirate or frequency-domain
+    integration).
+    """
+    if type(processor) is not KinematicProcessor or processor.latency:
+        return None
+    key = [dt, processor.processing_mode, kin_params['sample_frame_size'],
+           adv_params['integration_method'], adv_params['integration_params'],
+           adv_params['detrend_method'], adv_params['detrend_params']]
+    if processor.processing_mode == "Full":
+        key.append(kin_params['calc_frame_multiplier'])
+    if adv_params['detrend_method'] == "RLS":
+        key.append(kin_params['rls_filter_q_vel'])
+    return json.dumps(key, sort_keys=True, default=str)
+
+
+class DivergenceStats:
+    """Streaming statistics of the difference candidate - reference, one value per row."""
+    def __init__(self, num_rows):
+        self.num_rows = num_rows
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._sum = np.zeros(self.num_rows)
+        self._sum_sq = np.zeros(self.num_rows)
+        self._reference_sum_sq = np.zeros(self.num_rows)
+        self._max_abs = np.zeros(self.num_rows)
+
+    def update(self, reference, candidate):
+        """Adds (num_rows, n) blocks of aligned reference and candidate samples."""
+        if reference.shape[1] == 0:
+            return
+        diff = candidate - reference
+        self.count += diff.shape[1]
+        self._sum += diff.sum(axis=1)
+        self._sum_sq += np.einsum('ij,ij->i', diff, diff)
+        self._reference_sum_sq += np.einsum('ij,ij->i', reference, reference)
+        np.maximum(self._max_abs, np.abs(diff).max(axis=1), out=self._max_abs)
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'mean', 'rms', 'max_abs' of the difference and 'relative_rms' (RMS of the
+                difference / RMS of the reference) as arrays of one value per row (NaN before
+                the first update).
+        """
+        if not self.count:
+            nan = np.full(self.num_rows, np.nan)
+            return {'mean': nan, 'rms': nan.copy(), 'max_abs': nan.copy(), 'relative_rms': nan.copy()}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_rms = np.sqrt(self._sum_sq / self._reference_sum_sq)
+        return {'mean': self._sum / self.count, 'rms': np.sqrt(self._sum_sq / self.count),
+                'max_abs': self._max_abs.copy(), 'relative_rms': relative_rms}
+
+
+class ShadowPipeline:
+    """
+    One shadow configuration of a sensor.
+
+    The configuration is kept as overrides of the primary parameters, so the shadow follows
+    changes of the primary configuration that it does not override. Pipelines are built
+    once by ShadowSet and replaced (not rebuilt) when the configurations change.
+    """
+    def __init__(self, name, kin_overrides=None, adv_overrides=None):
+        self.name = name
+        self.kin_overrides = dict(kin_overrides or {})
+        self.adv_overrides = dict(adv_overrides or {})
+        ignored = sorted(set(self.adv_overrides) & set(INPUT_STAGE_PARAMS))
+        if ignored:
+            logger.warning(f"Shadow '{name}': input stages are shared with the primary; {ignored} ignored.")
+            for key in ignored:
+                del self.adv_overrides[key]
+        self.stats = {quantity: DivergenceStats(len(AXES)) for quantity, _ in COMPARED_ROWS}
+        self.processors = None
+        self.key = None
+        self.mirror_key = None
+        self.velocity_sources = None
+        self.warmup_frames = 0
+        self.frame_count = 0
+        self._lag = 0
+        self._held = np.zeros((NUM_PROCESSED_ROWS, 0))
+        self._samples_seen = 0
+        self._skip_samples = 0
+
+    def build(self, dt, primary_kin, primary_adv, owners):
+        """
+        Creates the shadow's processors against the current primary configuration.
+
+        Args:
+            owners (dict): Kinematic key -> (processors, kin_params, adv_params) of the
+                           pipelines that run before this one (primary first); this shadow is
+                           added if it has processors of its own.
+        """
+        kin_params = complete_params(self.kin_overrides, primary_kin)
+        adv_params = complete_params(self.adv_overrides, primary_adv)
+        self.key = kinematic_key(dt, kin_params, adv_params)
+        self.warmup_frames = kin_params['warmup_frames']
+        self.frame_count = 0
+        if kin_params['sample_frame_size'] != primary_kin['sample_frame_size']:
+            raise ValueError(f"Shadow '{self.name}' must use the primary sample_frame_size "
+                             f"({primary_kin['sample_frame_size']}).")
+
+        primary_processors = next(iter(owners.values()))[0]
+        if self.key in owners:
+            # Same kinematic configuration: repeat that output
+            self.mirror_key = self.key
+            self.processors = self.velocity_sources = None
+            source_processors = owners[self.key][0]
+        else:
+            self.mirror_key = None
+            self.processors = tuple(create_kinematic_processor(dt, kin_params, adv_params) for _ in AXES)
+            velocity_key = velocity_stage_key(self.processors[0], dt, kin_params, adv_params)
+            self.velocity_sources = None
+            for processors, owner_kin, owner_adv in owners.values():
+                if velocity_key is not None and velocity_key == velocity_stage_key(processors[0], dt, owner_kin, owner_adv):
+                    self.velocity_sources = processors
+                    break
+            owners[self.key] = (self.processors, kin_params, adv_params)
+            source_processors = self.processors
+
+        # Outputs are compared on the same input samples: the output with less latency is delayed
+        latency, primary_latency = source_processors[0].latency, primary_processors[0].latency
+        self._lag = latency - primary_latency
+        self._held = np.zeros((NUM_PROCESSED_ROWS, abs(self._lag)))
+        self._samples_seen = 0
+        self._skip_samples = max(latency, primary_latency)
+        self.reset_stats()
+        logger.info(f"Shadow '{self.name}' built: "
+                    f"{'mirrors an identical configuration' if self.mirror_key else 'own processors'}"
+                    f"{', shared velocity stage' if self.velocity_sources is not None else ''}.")
+
+    def seed(self, acc_history):
+        """Seeds the shadow's processors from retained acceleration ((3, n), see KinematicProcessor.seed())."""
+        if self.processors is not None and np.shape(acc_history)[1]:
+            for axis_idx, processor in enumerate(self.processors):
+                processor.seed(acc_history[axis_idx])
+            self.frame_count = self.warmup_frames
+
+    def reset(self):
+        if self.processors is not None:
+            for processor in self.processors:
+                processor.reset()
+        self.frame_count = 0
+        self._held[:] = 0
+        self._samples_seen = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        for stats in self.stats.values():
+            stats.reset()
+
+    def process(self, frame, outputs):
+        """
+        Processes one conditioned (3, n) input frame.
+
+        Args:
+            outputs (dict): Kinematic key -> (NUM_PROCESSED_ROWS, n) block of the pipelines
+                            that already processed this frame (primary first). The shadow's
+                            block is added.
+
+        Returns:
+            np.ndarray: The shadow's processed block.
+        """
+        self.frame_count += 1
+        if self.mirror_key is not None:
+            return outputs[self.mirror_key]
+        block = np.empty((NUM_PROCESSED_ROWS, frame.shape[1]))
+        for axis_idx, processor in enumerate(self.processors):
+            if self.velocity_sources is not None:
+                results = processor.process_frame_shared(frame[axis_idx], self.velocity_sources[axis_idx])
+            else:
+                results = processor.process_frame(frame[axis_idx])
+            disp_f, vel_f, acc_f = results
+            block[ACC_ROWS.start + axis_idx] = acc_f
+            block[VEL_ROWS.start + axis_idx] = vel_f
+            block[DISP_ROWS.start + axis_idx] = disp_f
+        outputs[self.key] = block
+        return block
+
+    def compare(self, primary_block, block, primary_warmed_up):
+        """Adds a frame of the shadow's and the primary's outputs to the divergence statistics."""
+        reference, candidate = primary_block, block
+        if self._lag:
+            # Delay the output with less latency by the difference
+            delayed = candidate if self._lag < 0 else reference
+            samples = np.concatenate((self._held, delayed), axis=1)
+            self._held = samples[:, delayed.shape[1]:]
+            delayed = samples[:, :delayed.shape[1]]
+            if self._lag < 0:
+                candidate = delayed
+            else:
+                reference = delayed
+        start = max(0, self._skip_samples - self._samples_seen)
+        self._samples_seen += block.shape[1]
+        if not primary_warmed_up or self.frame_count < self.warmup_frames:
+            return
+        for quantity, rows in COMPARED_ROWS:
+            self.stats[quantity].update(reference[rows, start:], candidate[rows, start:])
+
+    def divergence(self):
+        """
+        Returns:
+            dict: 'samples' compared, and for 'vel' and 'disp' a dict per axis of the
+                DivergenceStats summary values (floats).
+        """
+        result = {'samples': self.stats['vel'].count}
+        for quantity, stats in self.stats.items():
+            summary = stats.summary()
+            result[quantity] = {axis: {name: float(values[axis_idx]) for name, values in summary.items()}
+                                for axis_idx, axis in enumerate(AXES)}
+        return result
+
+
+class ShadowSet:
+    """
+    The shadow configurations of one sensor, built against its primary processors.
+
+    A set is not changed after it is built: adding or removing a shadow, or changing the
+    primary configuration, creates a new set (see with_shadow() and without_shadow()), so a
+    frame being processed keeps using consistent processors.
+    """
+    def __init__(self, dt, kin_params, adv_params, primary_processors, specs=(), acc_history=None):
+        """
+        Args:
+            dt (float): Sample interval of the sensor (seconds).
+            kin_params (dict): Primary kinematic parameters.
+            adv_params (dict): Primary advanced processing parameters.
+            primary_processors (tuple): The primary KinematicProcessors, in AXES order.
+            specs (iterable): (name, kin_overrides, adv_overrides) of the shadows, in order.
+            acc_history (np.ndarray): (3, n) retained acceleration to seed the shadows from, or None.
+        """
+        self.dt = dt
+        self.kin_params = kin_params
+        self.adv_params = adv_params
+        self.primary_processors = primary_processors
+        self.primary_key = kinematic_key(dt, kin_params, adv_params)
+        self.pipelines = {}
+        owners = {self.primary_key: (primary_processors, kin_params, adv_params)}
+        for name, kin_overrides, adv_overrides in specs:
+            pipeline = ShadowPipeline(name, kin_overrides, adv_overrides)
+            try:
+                pipeline.build(dt, kin_params, adv_params, owners)
+            except ValueError as e:
+                logger.warning(f"Shadow '{name}' cannot run next to the primary configuration: {e}")
+                continue
+            if acc_history is not None:
+                pipeline.seed(acc_history)
+            self.pipelines[name] = pipeline
+
+    def __len__(self):
+        return len(self.pipelines)
+
+    def specs(self):
+        """Returns the (name, kin_overrides, adv_overrides) of the shadows, in order."""
+        return [(pipeline.name, pipeline.kin_overrides, pipeline.adv_overrides)
+                for pipeline in self.pipelines.values()]
+
+    def rebuilt(self, dt, kin_params, adv_params, primary_processors, acc_history=None, specs=None):
+        """Returns a new set of the same (or the given) shadows against new primary processors."""
+        return ShadowSet(dt, kin_params, adv_params, primary_processors,
+                         self.specs() if specs is None else specs, acc_history)
+
+    def with_shadow(self, name, kin_overrides=None, adv_overrides=None, acc_history=None):
+        """Returns a new set with a shadow added (or replaced, if the name exists)."""
+        specs = [spec for spec in self.specs() if spec[0] != name] + [(name, kin_overrides, adv_overrides)]
+        return self.rebuilt(self.dt, self.kin_params, self.adv_params, self.primary_processors,
+                            acc_history, specs)
+
+    def without_shadow(self, name, acc_history=None):
+        """Returns a new set without the named shadow."""
+        specs = [spec for spec in self.specs() if spec[0] != name]
+        return self.rebuilt(self.dt, self.kin_params, self.adv_params, self.primary_processors,
+                            acc_history, specs)
+
+    def reset(self):
+        for pipeline in self.pipelines.values():
+            pipeline.reset()
+
+    def process(self, frame, primary_block):
+        """
+        Runs every shadow on a conditioned (3, n) input frame that the primary processors
+        have just processed into primary_block.
+
+        Returns:
+            dict: Shadow name -> (NUM_PROCESSED_ROWS, n) processed block.
+        """
+        outputs = {self.primary_key: primary_block}
+        return {name: pipeline.process(frame, outputs) for name, pipeline in self.pipelines.items()}
+
+    def compare(self, primary_block, blocks):
+        """Adds the blocks returned by process() to each shadow's divergence statistics."""
+        primary_warmed_up = self.primary_processors[0].is_warmed_up()
+        for name, block in blocks.items():
+            self.pipelines[name].compare(primary_block, block, primary_warmed_up)
+
+    def divergence(self):
+        """Returns {shadow name: ShadowPipeline.divergence()}."""
+        return {name: pipeline.divergence() for name, pipeline in self.pipelines.items()}
@@ -0,0 +1,146 @@
+import pytest
+import numpy as np
+from scipy.signal import freqz
+from algorithm.detrenders import (
+    RLSDetrender, RLSDetrenderBank, PolynomialDetrender, KalmanDetrender, create_detrender, kalman_trend_filter,
+    rls_linear_fit, rls_linear_detrend
+)
+from algorithm.rls_filter import RLSFilter
+from algorithm.rls_flt_disp import RealTimeAccelerationIntegrator
+
+def _loop_rls(data, time_vector, theta, P, q):
+    # Per-sample RLS update as previously implemented
+    for i in range(len(data)):
+        phi = np.array([time_vector[i], 1.0])
+        e = data[i] - np.dot(theta, phi)
+        P_phi = np.dot(P, phi)
+        k = P_phi / (q + np.dot(phi, P_phi))
+        theta = theta + k * e
+        P = (P - np.outer(k, np.dot(phi, P))) / q
+    return theta, P
+
+@pytest.fixture
+def sample_data():
+    t = 2.0 + np.arange(1000) * 0.005
+    data = 0.3 * t + 1.0 + np.sin(2 * np.pi * 5 * t) + 0.1 * np.random.default_rng(0).standard_normal(len(t))
+    return data, t
+
+@pytest.mark.parametrize("q", [0.9825, 0.9875, 0.999, 1.0])
+def test_rls_linear_fit_matches_loop(sample_data, q):
+    """Closed-form block fit gives the same state as the per-sample recursion"""
+    data, t = sample_data
+    theta, P = np.zeros(2), np.eye(2) * 1000
+    for block in (slice(0, 1), slice(1, 21), slice(21, None)):
+        expected_theta, expected_P = _loop_rls(data[block], t[block], theta, P, q)
+        theta, P = rls_linear_fit(data[block], t[block], theta, P, q)
+        np.testing.assert_allclose(theta, expected_theta, rtol=1e-8)
+        np.testing.assert_allclose(P, expected_P, rtol=1e-8, atol=1e-14)
+
+def test_call_sites_share_kernel(sample_data):
+    """RLSDetrender, RLSFilter and RealTimeAccelerationIntegrator give the same detrending"""
+    data, t = sample_data
+    expected, expected_trend, _, _ = rls_linear_detrend(data, t, np.zeros(2), np.eye(2) * 1000, 0.9875)
+    np.testing.assert_allclose(data - expected_trend, expected)
+
+    detrended, trend = RLSDetrender({'filter_q': 0.9875}).detrend(data, t)
+    np.testing.assert_array_equal(detrended, expected)
+    detrended, trend = RLSFilter(filter_q=0.9875).detrend(data, t)
+    np.testing.assert_array_equal(detrended, expected)
+    detrended, trend = RealTimeAccelerationIntegrator(filter_q=0.9875)._remove_linear_trend(data, t)
+    np.testing.assert_array_equal(detrended, expected)
+
+def test_detrend_incremental(sample_data):
+    """Segment-wise detrending keeps the time origin bounded and removes a linear trend"""
+    dt = 0.005
+    t = np.arange(4000) * dt
+    data = 0.5 * t + 2.0
+    detrender = RLSDetrender({'filter_q': 0.99})
+    for start in range(0, len(t), 20):
+        detrended, trend = detrender.detrend_incremental(data[start:start + 20], dt)
+    np.testing.assert_allclose(detrended, 0, atol=1e-6)
+    # theta is expressed relative to the start of the next segment
+    assert detrender.theta[1] == pytest.approx(0.5 * len(t) * dt + 2.0, rel=1e-6)
+
+def test_create_detrender():
+    assert isinstance(create_detrender("RLS", {}), RLSDetrender)
+    assert isinstance(create_detrender("Polynomial", {}), PolynomialDetrender)
+    assert create_detrender("None") is None
+    with pytest.raises(ValueError):
+        create_detrender("Invalid")
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_polynomial_projection_matches_polyfit(sample_data, order):
+    """Cached projection gives the np.polyfit trend, per channel and for a (channels, n) block"""
+    data, t = sample_data
+    block = np.vstack((data, 2 * data[::-1], np.cos(t)))
+    detrender = PolynomialDetrender({'poly_order': order})
+    detrended, trend = detrender.detrend(block, t)
+    for channel in range(block.shape[0]):
+        expected = np.polyval(np.polyfit(t, block[channel], order), t)
+        np.testing.assert_allclose(trend[channel], expected, rtol=1e-9, atol=1e-9)
+        single_detrended, _ = detrender.detrend(block[channel], t)
+        np.testing.assert_allclose(single_detrended, detrended[channel], atol=1e-12)
+    assert len(detrender._projections) == 1
+    detrender.detrend(data[:100], t[:100])
+    assert len(detrender._projections) == 2
+
+@pytest.mark.parametrize("q", [0.9875, 1.0])
+def test_detrend_segments_matches_incremental(sample_data, q):
+    """Vectorized segment detrending matches segment-wise detrend_incremental()"""
+    data = np.tile(sample_data[0], 3)[:2990]
+    expected = RLSDetrender({'filter_q': q})
+    expected_detrended = np.concatenate([expected.detrend_incremental(data[i:i + 20], 0.005)[0]
+                                         for i in range(0, len(data), 20)])
+    detrender = RLSDetrender({'filter_q': q})
+    detrended, trend = detrender.detrend_segments(data, 0.005, 20)
+    np.testing.assert_allclose(detrended, expected_detrended, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(detrended + trend, data)
+    np.testing.assert_allclose(detrender.theta, expected.theta, rtol=1e-9)
+
+def test_rls_bank_matches_separate_detrenders(sample_data):
+    """Each bank row equals an RLSDetrender with its filter_q, also when processed in chunks"""
+    data = np.tile(sample_data[0], 6)
+    dt, frame_size, n = 0.005, 20, len(data)
+    q_values = [0.98, 0.9875, 0.995]
+    block = np.stack([data, -data, data])
+    bank = RLSDetrenderBank(q_values)
+    half = n // 2 - (n // 2) % frame_size
+    detrended = np.concatenate([bank.detrend_segments(block[:, :half], dt, frame_size)[0],
+                                bank.detrend_segments(block[:, half:], dt, frame_size)[0]], axis=1)
+    for row, q in enumerate(q_values):
+        expected, _ = RLSDetrender({'filter_q': q}).detrend_segments(block[row], dt, frame_size)
+        np.testing.assert_allclose(detrended[row], expected, rtol=1e-9, atol=1e-9)
+    with pytest.raises(ValueError):
+        bank.detrend_segments(block[:, :frame_size + 1], dt, frame_size)
+
+@pytest.mark.parametrize("order", [1, 2])
+def test_kalman_detrender(order):
+    """Kalman detrending removes the modelled drift, streams per channel and keeps high frequencies"""
+    dt = 0.005
+    t = np.arange(6000) * dt
+    signal = np.sin(2 * np.pi * 5 * t)
+    drift = 0.5 + 0.2 * t + (0.01 * t ** 2 if order == 2 else 0.0)
+    data = np.stack([signal + drift, 2 * signal - drift])
+
+    detrender = create_detrender("Kalman", {'kalman_cutoff_hz': 0.3, 'kalman_order': order})
+    detrended = np.concatenate([detrender.detrend_incremental(data[:, i:i + 20], dt)[0]
+                                for i in range(0, len(t), 20)], axis=1)
+    steady = slice(len(t) // 2, None)
+    # Linear filter: the drift part is tracked without error, the 5 Hz part passes with a small phase lead
+    drift_residual = KalmanDetrender({'kalman_cutoff_hz': 0.3, 'kalman_order': order}).detrend(drift, t)[0]
+    np.testing.assert_allclose(drift_residual[steady], 0, atol=1e-6)
+    np.testing.assert_allclose(np.std(detrended[:, steady], axis=1), [np.std(signal), 2 * np.std(signal)], rtol=0.02)
+
+    # Segment boundaries do not matter, and batch detrend() matches a fresh stream
+    np.testing.assert_allclose(KalmanDetrender({'kalman_order': order}).detrend_segments(data[0], dt, 20)[0],
+                               KalmanDetrender({'kalman_order': order}).detrend(data[0], t)[0])
+    np.testing.assert_allclose(detrended[0], KalmanDetrender({'kalman_cutoff_hz': 0.3, 'kalman_order': order})
+                               .detrend(data[0], t)[0], atol=1e-12)
+
+def test_kalman_trend_filter_cutoff():
+    """The trend filter passes half the power at the cutoff frequency"""
+    b, a = kalman_trend_filter(0.005, 0.3, 2)
+    _, response = freqz(b, a, worN=[2 * np.pi * 0.3 * 0.005])
+    assert abs(1 - response[0]) == pytest.approx(np.sqrt(0.5), abs=0.02)
+    with pytest.raises(ValueError):
+        KalmanDetrender({'kalman_order': 3})
@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+from algorithm.integrator import (
+    TrapezoidalIntegrator, SimpsonIntegrator, RectangularIntegrator, IntegratorState,
+    FrequencyIntegrator, create_integrator
+)
+
+@pytest.fixture
+def sample_data():
+    return np.random.default_rng(0).standard_normal(501)
+
+@pytest.fixture
+def dt():
+    return 0.01
+
+def _loop_trapezoidal(data, dt):
+    result = np.zeros_like(data)
+    for i in range(1, len(data)):
+        result[i] = result[i-1] + (data[i-1] + data[i]) * dt / 2
+    return result
+
+def _loop_rectangular(data, dt):
+    result = np.zeros_like(data)
+    for i in range(1, len(data)):
+        result[i] = result[i-1] + data[i] * dt
+    return result
+
+def test_vectorized_matches_loop(sample_data, dt):
+    """Vectorized integrators give the same results as the per-sample loops"""
+    np.testing.assert_array_equal(TrapezoidalIntegrator(dt).integrate(sample_data),
+                                  _loop_trapezoidal(sample_data, dt))
+    np.testing.assert_array_equal(RectangularIntegrator(dt).integrate(sample_data),
+                                  _loop_rectangular(sample_data, dt))
+
+@pytest.mark.parametrize("integrator_cls", [TrapezoidalIntegrator, SimpsonIntegrator, RectangularIntegrator])
+@pytest.mark.parametrize("block_sizes", [[1], [2], [3, 1, 4], [20], [501]])
+def test_streaming_matches_batch(integrator_cls, block_sizes, sample_data, dt):
+    """Integrating block by block equals integrating the whole series, for odd and even block boundaries"""
+    integrator = integrator_cls(dt)
+    expected = integrator.integrate(sample_data)
+
+    state = IntegratorState()
+    outputs = []
+    start = 0
+    i = 0
+    while start < len(sample_data):
+        size = block_sizes[i % len(block_sizes)]
+        block_result, state = integrator.integrate_block(sample_data[start:start + size], state)
+        outputs.append(block_result)
+        start += size
+        i += 1
+
+    np.testing.assert_allclose(np.concatenate(outputs), expected, rtol=0, atol=1e-12)
+    assert state.count == len(sample_data)
+    assert state.last_sample == sample_data[-1]
+    assert state.running_sum == pytest.approx(expected[-1])
+
+def test_simpson_accuracy():
+    """Simpson is exact for parabolas (after the first step) and handles even lengths"""
+    dt = 0.1
+    t = np.arange(10) * dt # Even number of points
+    result = SimpsonIntegrator(dt).integrate(3 * t ** 2)
+    assert len(result) == 10
+    np.testing.assert_allclose(result[2:], t[2:] ** 3, atol=2e-3)
+    np.testing.assert_allclose(result[::2], t[::2] ** 3, atol=1e-3)
+
+    t = np.arange(0, 1.0001, 0.01)
+    simpson_error = np.max(np.abs(SimpsonIntegrator(0.01).integrate(np.cos(t)) - np.sin(t)))
+    trapezoidal_error = np.max(np.abs(TrapezoidalIntegrator(0.01).integrate(np.cos(t)) - np.sin(t)))
+    assert simpson_error < trapezoidal_error / 10
+
+def test_integrator_state_initial_value(dt):
+    """The stream starts at the initial value of the state"""
+    result, state = TrapezoidalIntegrator(dt).integrate_block(np.ones(3), IntegratorState(initial_value=5.0))
+    np.testing.assert_allclose(result, [5.0, 5.01, 5.02])
+    empty_result, same_state = TrapezoidalIntegrator(dt).integrate_block(np.array([]), state)
+    assert len(empty_result) == 0
+    assert same_state.count == 3
+
+def test_frequency_integration_accuracy():
+    """Band-limited frequency integration recovers velocity and displacement of a biased sine"""
+    dt, freq = 0.005, 5.0
+    t = np.arange(4000) * dt
+    acc = np.sin(2 * np.pi * freq * t) + 0.05
+    vel_exact = -np.cos(2 * np.pi * freq * t) / (2 * np.pi * freq)
+    disp_exact = -np.sin(2 * np.pi * freq * t) / (2 * np.pi * freq) ** 2
+    vel = create_integrator("Frequency", dt, {'low_cut_hz': 1.0}).integrate(acc)
+    disp = create_integrator("Frequency", dt, {'low_cut_hz': 1.0, 'order': 2}).integrate(acc)
+
+    inner = slice(1000, -1000)
+    rel_rms = lambda a, b: np.sqrt(np.mean((a[inner] - b[inner]) ** 2) / np.mean(b[inner] ** 2))
+    assert rel_rms(vel, vel_exact) < 5e-3
+    assert rel_rms(disp, disp_exact) < 1e-2
+
+def test_frequency_streaming_latency():
+    """Streaming gives integrate() delayed by the latency, for any block sizes"""
+    data = np.random.default_rng(1).standard_normal(3000)
+    integrator = FrequencyIntegrator(0.005, low_cut_hz=2.0, high_cut_hz=40.0, segment_size=128)
+    expected = integrator.integrate(data)
+
+    state = integrator.create_state()
+    blocks, start = [], 0
+    for size in np.random.default_rng(2).integers(1, 100, size=200):
+        blocks.append(integrator.integrate_block(data[start:start + size], state)[0])
+        start += size
+        if start >= len(data):
+            break
+    streamed = np.concatenate(blocks)
+    assert len(streamed) == len(data)
+    latency = integrator.latency
+    assert latency == 127
+    np.testing.assert_array_equal(streamed[:latency], 0)
+    np.testing.assert_allclose(streamed[latency:], expected[:-latency], atol=1e-12)
+
+def test_frequency_parameters():
+    with pytest.raises(ValueError):
+        FrequencyIntegrator(0.005, low_cut_hz=0.0)
+    with pytest.raises(ValueError):
+        FrequencyIntegrator(0.005, segment_size=101)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from algorithm import kernels
+from algorithm.detrenders import RLSDetrender, RLSDetrenderBank
+from algorithm.integrator import TrapezoidalIntegrator, SimpsonIntegrator, RectangularIntegrator
+from algorithm.kinematic_processor import KinematicProcessor
+from algorithm.rls_filter import RLSFilter
+from algorithm.rls_flt_disp import RealTimeAccelerationIntegrator
+
+KERNELS = ('rls_detrend_block', 'linear_recurrence', 'trapezoidal', 'rectangular', 'simpson')
+
+def _set_kernels(monkeypatch, layer):
+    for name in KERNELS:
+        loop = getattr(kernels, f"{name}_loop")
+        if layer == "numpy":
+            kernel = None
+        elif layer == "python":
+            kernel = loop
+        else:
+            kernel = pytest.importorskip("numba").njit(loop)
+        monkeypatch.setattr(kernels, name, kernel)
+
+def _run(monkeypatch, layer, func):
+    _set_kernels(monkeypatch, layer)
+    return func()
+
+@pytest.fixture(params=["python", "numba"])
+def layer(request):
+    return request.param
+
+@pytest.fixture
+def signal():
+    t = np.arange(3000) * 0.005
+    return 0.2 * t + 1.0 + np.sin(2 * np.pi * 3 * t) + 0.05 * np.random.default_rng(1).standard_normal(len(t))
+
+@pytest.mark.parametrize("integrator_class", [TrapezoidalIntegrator, SimpsonIntegrator, RectangularIntegrator])
+def test_integrator_kernels_match_numpy(monkeypatch, layer, signal, integrator_class):
+    def stream():
+        integrator, state = integrator_class(0.005), None
+        blocks = []
+        for start, stop in [(0, 1), (1, 2), (2, 7), (7, 20), (20, 1000), (1000, len(signal))]:
+            integrated, state = integrator.integrate_block(signal[start:stop], state)
+            blocks.append(integrated.copy())
+        return np.concatenate(blocks), integrator.integrate(signal[:500])
+
+    expected = _run(monkeypatch, "numpy", stream)
+    actual = _run(monkeypatch, layer, stream)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-12, atol=1e-12)
+
+def test_rls_kernels_match_numpy(monkeypatch, layer, signal):
+    def detrend():
+        incremental = RLSDetrender({'filter_q': 0.9875})
+        frames = [incremental.detrend_incremental(signal[i:i + 20], 0.005)[0] for i in range(0, 400, 20)]
+        segments = RLSDetrender({'filter_q': 0.9875}).detrend_segments(signal, 0.005, 20)
+        bank = RLSDetrenderBank([0.98, 0.995]).detrend_segments(np.stack([signal, -signal]), 0.005, 20)
+        t = np.arange(1000) * 0.005
+        rls_filter = RLSFilter(filter_q=0.9875)
+        filtered = [rls_filter.detrend(signal[i:i + 1000], t)[0] for i in (0, 1000)]
+        return (np.concatenate(frames), incremental.theta, incremental.P, segments[0], bank[0],
+                np.concatenate(filtered))
+
+    expected = _run(monkeypatch, "numpy", detrend)
+    actual = _run(monkeypatch, layer, detrend)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-8, atol=1e-9)
+
+@pytest.mark.parametrize("processing_mode", ["Full", "Incremental"])
+def test_processors_match_numpy(monkeypatch, layer, signal, processing_mode):
+    def process():
+        processor = KinematicProcessor(0.005, sample_frame_size=20, calc_frame_multiplier=20,
+                                       integration_method="Simpson", processing_mode=processing_mode)
+        legacy = RealTimeAccelerationIntegrator(sample_frame_size=20, calc_frame_multiplier=20)
+        outputs = [np.concatenate(processor.process_frame(signal[i:i + 20])) for i in range(0, 1200, 20)]
+        legacy_outputs = [np.concatenate(legacy.process_frame(signal[i:i + 20])[:2]) for i in range(0, 1200, 20)]
+        return np.concatenate(outputs), np.concatenate(legacy_outputs)
+
+    expected = _run(monkeypatch, "numpy", process)
+    actual = _run(monkeypatch, layer, process)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-7, atol=1e-9)
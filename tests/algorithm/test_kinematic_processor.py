@@ -1,3 +1,4 @@
+import tracemalloc
 import pytest
 import numpy as np
 from algorithm.kinematic_processor import KinematicProcessor
@@ -126,4 +127,200 @@ def test_edge_cases(kinematic_processor):
     # Check that outputs are padded to sample_frame_size
     assert len(disp_output) == kinematic_processor.sample_frame_size
     assert len(vel_output) == kinematic_processor.sample_frame_size
-    assert len(acc_output) == kinematic_processor.sample_frame_size 
\ No newline at end of file
+    assert len(acc_output) == kinematic_processor.sample_frame_size
+
+
+def test_seed(kinematic_processor, sample_data):
+    """Test seeding from acceleration history"""
+    history = np.tile(sample_data['acc_x'], 3)
+    kinematic_processor.seed(history)
+
+    assert kinematic_processor.is_warmed_up()
+    np.testing.assert_array_equal(kinematic_processor.acc_buffer,
+                                  history[-kinematic_processor.calc_frame_size:])
+    assert np.any(kinematic_processor.vel_buffer_detrended != 0)
+
+    # Next frame continues from the seeded buffer
+    frame_size = kinematic_processor.sample_frame_size
+    disp_output, vel_output, acc_output = kinematic_processor.process_frame(history[:frame_size])
+    assert not np.any(np.isnan(disp_output))
+    np.testing.assert_array_equal(acc_output, history[:frame_size])
+
+
+def _run_frames(processor, acc, frame_size):
+    outputs = [np.stack(processor.process_frame(acc[i:i + frame_size])[:2])
+               for i in range(0, len(acc), frame_size)]
+    return np.concatenate(outputs, axis=1)
+
+
+def test_incremental_mode_equivalence():
+    """Test Incremental mode against Full mode and the exact solution"""
+    dt, freq, frame_size = 0.005, 10.0, 20
+    t = np.arange(frame_size * 150) * dt
+    acc = 0.05 + np.sin(2 * np.pi * freq * t)
+    vel_exact = -np.cos(2 * np.pi * freq * t) / (2 * np.pi * freq)
+    disp_exact = -np.sin(2 * np.pi * freq * t) / (2 * np.pi * freq) ** 2
+
+    params = dict(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                  rls_filter_q_vel=0.9875, rls_filter_q_disp=0.9875)
+    full = _run_frames(KinematicProcessor(**params), acc, frame_size)
+    incremental_processor = KinematicProcessor(processing_mode="Incremental", **params)
+    incremental = _run_frames(incremental_processor, acc, frame_size)
+
+    steady = slice(len(t) // 2, None)
+    rel_rms = lambda a, b: np.sqrt(np.mean((a[steady] - b[steady]) ** 2) / np.mean(b[steady] ** 2))
+    assert rel_rms(incremental[1], full[1]) < 1e-3
+    assert rel_rms(incremental[0], disp_exact) < 0.2
+    assert rel_rms(incremental[1], vel_exact) < 0.05
+
+    # History buffers hold the latest samples
+    np.testing.assert_array_equal(incremental_processor.acc_buffer[-frame_size:], acc[-frame_size:])
+    np.testing.assert_array_equal(incremental_processor.vel_buffer_detrended[-frame_size:],
+                                  incremental[1, -frame_size:])
+
+
+def test_incremental_mode_options():
+    """Test processing mode selection and fallback"""
+    with pytest.raises(ValueError):
+        KinematicProcessor(dt=0.001, processing_mode="Unknown")
+    processor = KinematicProcessor(dt=0.001, detrend_method="Polynomial", processing_mode="Incremental")
+    assert processor.processing_mode == "Full"
+    processor = KinematicProcessor(dt=0.001, detrend_method="None", processing_mode="Incremental")
+    assert processor.processing_mode == "Incremental"
+
+    # Seeding replays the history through the incremental state
+    processor = KinematicProcessor(dt=0.001, processing_mode="Incremental")
+    processor.seed(np.ones(50))
+    assert processor.is_warmed_up()
+    assert processor._vel_integration.running_sum == pytest.approx(0.049)
+
+
+@pytest.mark.parametrize("mode", ["Full", "Incremental"])
+@pytest.mark.parametrize("detrend_method", ["RLS", "Polynomial", "None"])
+def test_steady_state_frame_allocations(mode, detrend_method):
+    """After warm-up a frame does not allocate arrays of buffer size"""
+    processor = KinematicProcessor(dt=0.005, calc_frame_multiplier=500, detrend_method=detrend_method,
+                                   processing_mode=mode)
+    buffer_bytes = processor.calc_frame_size * np.dtype(float).itemsize
+    frame = np.random.default_rng(0).standard_normal(processor.sample_frame_size)
+    for _ in range(3):
+        processor.process_frame(frame)
+
+    tracemalloc.start()
+    try:
+        peak_bytes = 0
+        for _ in range(10):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            processor.process_frame(frame)
+            peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    # Only small Python/scalar objects remain (a few KB, independent of the buffer size)
+    assert peak_bytes < buffer_bytes / 10
+
+
+def test_frequency_integration_mode():
+    """Frequency integration streams with a latency and keeps acceleration aligned"""
+    dt, freq, frame_size = 0.005, 5.0, 20
+    t = np.arange(frame_size * 400) * dt
+    acc = 0.05 + np.sin(2 * np.pi * freq * t)
+    processor = KinematicProcessor(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                                   integration_method="Frequency", detrend_method="RLS",
+                                   integration_params={'low_cut_hz': 1.0, 'segment_size': 256})
+    assert processor.processing_mode == "Incremental"
+    assert processor.vel_detrender is None and processor.disp_detrender is None
+    latency = processor.latency
+    assert latency == 255
+
+    outputs = np.concatenate([np.stack(processor.process_frame(acc[i:i + frame_size]))
+                              for i in range(0, len(acc), frame_size)], axis=1)
+    np.testing.assert_array_equal(outputs[2, latency:], acc[:-latency])
+    source_t = t[len(t) // 2:] - latency * dt
+    vel_exact = -np.cos(2 * np.pi * freq * source_t) / (2 * np.pi * freq)
+    vel = outputs[1, len(t) // 2:]
+    assert np.sqrt(np.mean((vel - vel_exact) ** 2) / np.mean(vel_exact ** 2)) < 2e-2
+
+
+@pytest.mark.parametrize("mode", ["Full", "Incremental"])
+def test_process_chunk_matches_frames(mode):
+    """Chunked processing gives the per-frame results"""
+    dt, frame_size = 0.005, 20
+    t = np.arange(frame_size * 300) * dt
+    acc = 0.05 + np.sin(2 * np.pi * 3 * t) + 0.1 * np.random.default_rng(1).standard_normal(len(t))
+    params = dict(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50, processing_mode=mode)
+    expected = _run_frames(KinematicProcessor(**params), acc, frame_size)
+
+    processor = KinematicProcessor(**params)
+    outputs = np.concatenate([np.stack(processor.process_chunk(acc[:frame_size * 120])[:2]),
+                              np.stack(processor.process_chunk(acc[frame_size * 120:])[:2])], axis=1)
+    np.testing.assert_allclose(outputs, expected, rtol=1e-9, atol=1e-11)
+    assert processor.frame_count == 300
+    if mode == "Incremental":
+        np.testing.assert_allclose(processor.vel_buffer_detrended, expected[1, -processor.calc_frame_size:],
+                                   rtol=1e-9, atol=1e-11)
+    with pytest.raises(ValueError):
+        processor.process_chunk(np.zeros(frame_size + 1))
+
+
+def test_kalman_detrend_mode():
+    """Kalman detrending streams in Incremental mode and recovers the velocity"""
+    dt, freq, frame_size = 0.005, 5.0, 20
+    t = np.arange(frame_size * 300) * dt
+    acc = 0.05 + np.sin(2 * np.pi * freq * t)
+    processor = KinematicProcessor(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                                   detrend_method="Kalman", processing_mode="Full")
+    assert processor.processing_mode == "Incremental"
+    outputs = _run_frames(processor, acc, frame_size)
+    steady = slice(len(t) // 2, None)
+    vel_exact = -np.cos(2 * np.pi * freq * t[steady]) / (2 * np.pi * freq)
+    # Mostly the detrender's phase lead, similar to RLS with q=0.9875
+    assert np.sqrt(np.mean((outputs[1, steady] - vel_exact) ** 2) / np.mean(vel_exact ** 2)) < 0.15
+    assert np.std(outputs[1, steady]) == pytest.approx(np.std(vel_exact), rel=0.03)
+
+    chunked = KinematicProcessor(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                                 detrend_method="Kalman")
+    np.testing.assert_allclose(np.stack(chunked.process_chunk(acc)[:2]), outputs, rtol=1e-9, atol=1e-10)
+
+
+@pytest.mark.parametrize("params", [{}, {'processing_mode': "Incremental"}, {'detrend_method': "Kalman"},
+                                    {'integration_method': "Frequency"}, {'decimation_factor': 4}])
+
+
+def test_state_round_trip(params):
+    """A processor restored with set_state() continues exactly, without a warm-up"""
+    from core.processing_config import create_kinematic_processor
+    from core.checkpoint import flatten_state, unflatten_state
+    acc = np.random.default_rng(3).standard_normal(2000) + 0.1
+    source = create_kinematic_processor(0.005, adv_params=params)
+    for i in range(0, 1000, 20):
+        source.process_frame(acc[i:i + 20])
+
+    restored = create_kinematic_processor(0.005, adv_params=params)
+    restored.set_state(unflatten_state(flatten_state(source.get_state())))
+    assert restored.is_warmed_up()
+    for i in range(1000, 2000, 20):
+        np.testing.assert_array_equal(np.stack(restored.process_frame(acc[i:i + 20])),
+                                      np.stack(source.process_frame(acc[i:i + 20])))
+
+    with pytest.raises(ValueError):
+        create_kinematic_processor(0.005, kin_params={'calc_frame_multiplier': 10},
+                                   adv_params=params).set_state(source.get_state())
+
+
+@pytest.mark.parametrize("mode", ["Full", "Incremental"])
+def test_process_frame_shared_matches_own_velocity_stage(mode):
+    """Reusing another processor's velocity stage gives the same output as computing it"""
+    params = dict(dt=0.005, sample_frame_size=20, calc_frame_multiplier=10, processing_mode=mode)
+    source = KinematicProcessor(rls_filter_q_vel=0.99, rls_filter_q_disp=0.99, **params)
+    shared = KinematicProcessor(rls_filter_q_vel=0.99, rls_filter_q_disp=0.98, **params)
+    reference = KinematicProcessor(rls_filter_q_vel=0.99, rls_filter_q_disp=0.98, **params)
+    t = np.arange(20 * 30) * 0.005
+    acc = np.sin(2 * np.pi * 2 * t) + 0.05
+    for start in range(0, len(t), 20):
+        frame = acc[start:start + 20]
+        source.process_frame(frame)
+        outputs = shared.process_frame_shared(frame, source)
+        expected = reference.process_frame(frame)
+        for output, expected_output in zip(outputs, expected):
+            np.testing.assert_allclose(output, expected_output, rtol=1e-12, atol=1e-15)
@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from scipy.signal import lfilter
+from algorithm.multirate import PolyphaseDecimator, Upsampler, MultirateKinematicProcessor
+from algorithm.kinematic_processor import KinematicProcessor
+from core.processing_config import create_kinematic_processor
+
+def _run_frames(processor, acc, frame_size):
+    outputs = [np.stack(processor.process_frame(acc[i:i + frame_size]))
+               for i in range(0, len(acc), frame_size)]
+    return np.concatenate(outputs, axis=1)
+
+@pytest.mark.parametrize("factor", [2, 3, 4, 10])
+def test_decimator_matches_filter_then_downsample(factor):
+    """Blocks of any length give the FIR output at every factor-th sample"""
+    x = np.random.default_rng(0).standard_normal(5000)
+    decimator = PolyphaseDecimator(factor)
+    expected = lfilter(decimator.taps, 1.0, x)[factor - 1::factor]
+    bounds = np.cumsum([0, 1, 3, 20, 101, 1000, 3000, 875])
+    output = np.concatenate([decimator.process(x[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    np.testing.assert_allclose(output, expected, atol=1e-12)
+    assert decimator.latency == (len(decimator.taps) - 1) // 2
+
+def test_upsampler():
+    """Linear upsampling after decimation delays the signal by the FIR latency only"""
+    t = np.arange(8000) * 0.005
+    x = np.sin(2 * np.pi * 1.5 * t) + 0.5 * np.sin(2 * np.pi * 0.7 * t)
+    decimator, upsampler = PolyphaseDecimator(4), Upsampler(4)
+    y = np.concatenate([upsampler.process(decimator.process(x[i:i + 20])) for i in range(0, len(x), 20)])
+    latency = decimator.latency
+    np.testing.assert_allclose(y[1000:], x[1000 - latency:len(x) - latency], atol=1e-2)
+
+    np.testing.assert_array_equal(Upsampler(3, "Hold").process(np.array([1.0, 2.0])), [1, 1, 1, 2, 2, 2])
+    with pytest.raises(ValueError):
+        Upsampler(3, "Cubic")
+
+def test_multirate_processor_accuracy():
+    """Reduced-rate processing is as accurate as full-rate processing and keeps acc aligned"""
+    dt, frame_size = 0.005, 20
+    t = np.arange(frame_size * 600) * dt
+    acc = 0.05 + np.sin(2 * np.pi * 2 * t)
+    params = dict(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                  rls_filter_q_vel=0.995, rls_filter_q_disp=0.995)
+    reference = _run_frames(KinematicProcessor(**params), acc, frame_size)
+    processor = MultirateKinematicProcessor(decimation_factor=4, **params)
+    assert processor.low_rate_processor.sample_frame_size == 5
+    assert processor.low_rate_processor.vel_detrender.filter_q == pytest.approx(0.995 ** 4)
+    outputs = _run_frames(processor, acc, frame_size)
+
+    latency = processor.latency
+    np.testing.assert_array_equal(outputs[2, latency:], acc[:-latency])
+    steady = slice(len(t) // 2, None)
+    def vel_error(vel, lag):
+        vel_exact = -np.cos(2 * np.pi * 2 * (t[steady] - lag * dt)) / (2 * np.pi * 2)
+        return np.sqrt(np.mean((vel[steady] - vel_exact) ** 2) / np.mean(vel_exact ** 2))
+    assert vel_error(outputs[1], latency) < vel_error(reference[1], 0) + 0.01
+
+@pytest.mark.parametrize("mode", ["Full", "Incremental"])
+def test_multirate_chunk_and_seed(mode):
+    """process_chunk() matches process_frame(); seeding gives a warmed-up processor"""
+    dt, frame_size = 0.005, 20
+    acc = np.random.default_rng(2).standard_normal(frame_size * 100)
+    params = dict(dt=dt, sample_frame_size=frame_size, calc_frame_multiplier=50,
+                  processing_mode=mode, decimation_factor=5)
+    expected = _run_frames(MultirateKinematicProcessor(**params), acc, frame_size)
+    processor = MultirateKinematicProcessor(**params)
+    np.testing.assert_allclose(np.stack(processor.process_chunk(acc)), expected, rtol=1e-9, atol=1e-11)
+    np.testing.assert_allclose(processor.vel_buffer_detrended, expected[1, -processor.calc_frame_size:],
+                               rtol=1e-9, atol=1e-11)
+
+    processor.seed(acc[:-7])
+    assert processor.is_warmed_up()
+    assert not np.any(np.isnan(processor.process_frame(acc[:frame_size])[0]))
+
+def test_multirate_options():
+    """Invalid factors are rejected and the factory selects the multirate processor"""
+    with pytest.raises(ValueError):
+        MultirateKinematicProcessor(dt=0.005, sample_frame_size=20, decimation_factor=3)
+    processor = create_kinematic_processor(0.005, adv_params={
+        'decimation_factor': 4, 'decimation_params': {'num_taps': 33, 'upsampling': "Hold"}})
+    assert isinstance(processor, MultirateKinematicProcessor)
+    assert processor.latency == 16
+    assert isinstance(create_kinematic_processor(0.005), KinematicProcessor)
+    # A factor that does not divide the frame size falls back to full-rate processing
+    assert isinstance(create_kinematic_processor(0.005, adv_params={'decimation_factor': 3}), KinematicProcessor)
@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+from algorithm.orientation import (OrientationCompensator, rotation_matrices, euler_rates,
+                                   STANDARD_GRAVITY)
+
+
+def _specific_force(angles, world_acc):
+    """Body-frame accelerometer output for a world-frame acceleration and attitudes (deg)."""
+    R = rotation_matrices(angles)
+    world = world_acc + np.array([[0.0], [0.0], [STANDARD_GRAVITY]])
+    return np.einsum('nji,jn->in', R, world)
+
+
+def test_rotation_matrices_are_orthonormal():
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(-180, 180, (3, 50))
+    angles[1] /= 2 # Pitch in [-90, 90]
+    R = rotation_matrices(angles)
+    np.testing.assert_allclose(np.einsum('nij,nkj->nik', R, R), np.broadcast_to(np.eye(3), R.shape), atol=1e-12)
+    np.testing.assert_allclose(np.linalg.det(R), 1.0)
+
+
+def test_static_tilt_removes_gravity():
+    """A tilted sensor at rest gives zero world acceleration, while Z - 1 g leaks gravity"""
+    angles = np.tile([[20.0], [-35.0], [120.0]], (1, 40))
+    acc = _specific_force(angles, np.zeros((3, 40)))
+    assert np.abs(acc[:2]).max() > 1.0 # The level assumption would leak several m/s^2
+    world = OrientationCompensator(0.005).apply(acc, angles)
+    np.testing.assert_allclose(world, 0.0, atol=1e-12)
+
+
+def test_world_acceleration_is_recovered():
+    rng = np.random.default_rng(1)
+    n = 200
+    angles = np.stack((rng.uniform(-30, 30, n), rng.uniform(-30, 30, n), rng.uniform(-180, 180, n)))
+    world_acc = rng.normal(0, 0.5, (3, n))
+    world = OrientationCompensator(0.005).apply(_specific_force(angles, world_acc), angles)
+    np.testing.assert_allclose(world, world_acc, atol=1e-12)
+
+
+def test_euler_rates_single_axis():
+    """At zero roll and pitch, body rates are Euler rates"""
+    gyro = np.array([[1.0], [2.0], [3.0]])
+    np.testing.assert_allclose(euler_rates(np.zeros((3, 1)), gyro), gyro)
+
+
+@pytest.mark.parametrize("gyro_fusion", [False, True])
+def test_blocks_match_one_pass(gyro_fusion):
+    """Frame-by-frame compensation equals compensating the whole stream at once"""
+    dt = 0.01
+    t = np.arange(600) * dt
+    # Yaw wraps through +-180 deg; the fused attitude must not jump there
+    angles = np.stack((10 * np.sin(t), 5 * np.cos(0.5 * t), np.mod(170 + 30 * t + 180, 360) - 180))
+    roll_rate, pitch_rate, yaw_rate = 10 * np.cos(t), -2.5 * np.sin(0.5 * t), np.full_like(t, 30.0)
+    roll, pitch = np.radians(angles[:2])
+    gyro = np.stack((roll_rate - yaw_rate * np.sin(pitch),
+                     pitch_rate * np.cos(roll) + yaw_rate * np.cos(pitch) * np.sin(roll),
+                     -pitch_rate * np.sin(roll) + yaw_rate * np.cos(pitch) * np.cos(roll)))
+    np.testing.assert_allclose(euler_rates(angles, gyro), np.stack((roll_rate, pitch_rate, yaw_rate)), atol=1e-9)
+    acc = _specific_force(angles, np.zeros_like(angles))
+
+    whole = OrientationCompensator(dt, gyro_fusion=gyro_fusion).apply(acc, angles, gyro)
+    compensator = OrientationCompensator(dt, gyro_fusion=gyro_fusion)
+    blocks = [compensator.apply(acc[:, i:i + 25], angles[:, i:i + 25], gyro[:, i:i + 25])
+              for i in range(0, len(t), 25)]
+    np.testing.assert_allclose(np.concatenate(blocks, axis=1), whole, atol=1e-9)
+    # Consistent angles and rates: the fused attitude stays on the measured one
+    np.testing.assert_allclose(whole, 0.0, atol=0.05)
+
+
+def test_fusion_smooths_angle_noise():
+    dt = 0.01
+    n = 2000
+    rng = np.random.default_rng(2)
+    true_angles = np.tile([[15.0], [-10.0], [45.0]], (1, n))
+    noisy = true_angles + rng.normal(0, 2.0, (3, n))
+    acc = _specific_force(true_angles, np.zeros((3, n)))
+    gyro = np.zeros((3, n))
+
+    angles_only = OrientationCompensator(dt).apply(acc, noisy)
+    fused = OrientationCompensator(dt, gyro_fusion=True, fusion_time_constant=0.5).apply(acc, noisy, gyro)
+    settled = slice(200, None)
+    assert np.sqrt(np.mean(fused[:, settled] ** 2)) < 0.2 * np.sqrt(np.mean(angles_only[:, settled] ** 2))
+
+
+def test_state_round_trip():
+    dt = 0.01
+    angles = np.tile([[5.0], [5.0], [179.0]], (1, 20))
+    gyro = np.ones((3, 20))
+    acc = _specific_force(angles, np.zeros((3, 20)))
+    first = OrientationCompensator(dt, gyro_fusion=True)
+    first.apply(acc, angles, gyro)
+    second = OrientationCompensator(dt, gyro_fusion=True)
+    second.set_state(first.get_state())
+    np.testing.assert_array_equal(second.apply(acc, angles, gyro), first.apply(acc, angles, gyro))
+    with pytest.raises(ValueError):
+        second.set_state({'attitude': np.zeros(2)})
@@ -0,0 +1,26 @@
+import pytest
+import numpy as np
+from algorithm.ring_buffer import RingBuffer
+
+def test_append_and_view():
+    """View holds the latest samples oldest first, across wrap-around"""
+    buffer = RingBuffer(5)
+    np.testing.assert_array_equal(buffer.view(), np.zeros(5))
+    expected = np.zeros(5)
+    values = np.arange(1.0, 40.0)
+    start = 0
+    for n in (1, 3, 2, 4, 5, 7, 1):
+        block = values[start:start + n]
+        start += n
+        buffer.append(block)
+        expected = np.concatenate((expected, block))[-5:]
+        np.testing.assert_array_equal(buffer.view(), expected)
+    np.testing.assert_array_equal(buffer.tail(2), expected[-2:])
+    assert not buffer.view().flags.writeable
+
+    buffer.fill(0)
+    np.testing.assert_array_equal(buffer.view(), np.zeros(5))
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
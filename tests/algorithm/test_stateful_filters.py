@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from scipy.signal import sosfilt
+from algorithm.filters import (design_sos, create_filter, HighPassFilter, LowPassFilter,
+                               BandPassFilter, BandStopFilter, NotchFilter)
+
+FS = 200.0
+
+def _tone_gain(filter_obj, freq, n=4000):
+    t = np.arange(n) / FS
+    y = filter_obj.apply(np.sin(2 * np.pi * freq * t))
+    return np.std(y[n // 2:]) / np.std(np.sin(2 * np.pi * freq * t[n // 2:]))
+
+def test_design_is_cached():
+    """Filters with the same parameters share one SOS design"""
+    design_sos.cache_clear()
+    first, second = LowPassFilter(5.0, FS, 4), LowPassFilter(5.0, FS, 4)
+    assert first.sos is second.sos
+    assert design_sos.cache_info().hits >= 1
+
+@pytest.mark.parametrize("shape", [(1000,), (3, 1000)])
+def test_blocks_match_continuous_signal(shape):
+    """State is kept across apply() calls, so block boundaries leave no transients"""
+    x = np.random.default_rng(0).standard_normal(shape) + 5.0
+    expected = HighPassFilter(0.5, FS, 2).apply(x)
+    filter_obj = HighPassFilter(0.5, FS, 2)
+    bounds = [0, 1, 20, 37, 500, 1000]
+    output = np.concatenate([filter_obj.apply(x[..., a:b]) for a, b in zip(bounds[:-1], bounds[1:])], axis=-1)
+    np.testing.assert_allclose(output, expected, atol=1e-12)
+
+    # Initial state is the steady state of the first sample: a constant input gives no step response
+    low_pass = LowPassFilter(2.0, FS)
+    np.testing.assert_allclose(low_pass.apply(np.full(shape, 3.0)), 3.0)
+    low_pass.reset()
+    np.testing.assert_allclose(low_pass.apply(np.full(shape, -1.0)), -1.0)
+    # Without reset the remembered state would differ from the steady state of a new signal
+    reference = sosfilt(low_pass.sos, np.full(shape, -1.0), axis=-1)
+    assert not np.allclose(reference, -1.0)
+
+def test_band_and_notch_filters():
+    assert _tone_gain(BandPassFilter((2.0, 10.0), FS, 4), 5.0) == pytest.approx(1.0, abs=0.02)
+    assert _tone_gain(BandPassFilter((2.0, 10.0), FS, 4), 40.0) < 0.01
+    assert _tone_gain(BandStopFilter((8.0, 12.0), FS, 4), 10.0) < 0.01
+    assert _tone_gain(BandStopFilter((8.0, 12.0), FS, 4), 30.0) == pytest.approx(1.0, abs=0.02)
+    assert _tone_gain(NotchFilter(50.0, FS), 50.0) < 0.01
+    assert _tone_gain(NotchFilter(50.0, FS), 20.0) == pytest.approx(1.0, abs=0.02)
+
+def test_zero_phase_filter():
+    """Zero-phase filtering keeps a low-frequency tone in phase"""
+    t = np.arange(2000) / FS
+    x = np.sin(2 * np.pi * 1.0 * t)
+    noisy = x + 0.3 * np.sin(2 * np.pi * 45.0 * t)
+    y = create_filter("Low-pass", 5.0, FS, order=4, zero_phase=True).apply(noisy)
+    np.testing.assert_allclose(y[200:-200], x[200:-200], atol=0.01)
+    # Blocks shorter than the default padding are filtered too
+    assert create_filter("High-pass", 1.0, FS, zero_phase=True).apply(x[:5]).shape == (5,)
+
+def test_create_filter_variants():
+    assert isinstance(create_filter("Band-pass", 1.0, FS, high_cutoff_freq=10.0), BandPassFilter)
+    assert isinstance(create_filter("Band-stop", 1.0, FS, high_cutoff_freq=10.0), BandStopFilter)
+    notch = create_filter("Notch", 50.0, FS, quality=10.0)
+    assert isinstance(notch, NotchFilter) and notch.quality == 10.0
+    with pytest.raises(ValueError):
+        create_filter("Band-pass", 1.0, FS)
+    # Invalid band edges bypass the filter like invalid single cutoffs
+    x = np.ones(10)
+    assert create_filter("Band-pass", 10.0, FS, high_cutoff_freq=5.0).apply(x) is x
+    assert create_filter("Band-stop", 10.0, FS, high_cutoff_freq=FS).apply(x) is x
@@ -3,7 +3,8 @@ import numpy as np
 from analysis.anomaly_detection_tools import (
     detect_outliers_zscore,
     detect_anomalies_moving_average,
-    detect_sudden_changes
+    detect_sudden_changes,
+    rolling_mean_std
 )
 
 @pytest.fixture
@@ -104,4 +105,52 @@ def test_edge_cases():
     
     # Test với infinite values
     inf_array = np.array([1.0, np.inf, 2.0])
-    detect_outliers_zscore(inf_array) 
\ No newline at end of file
+    detect_outliers_zscore(inf_array)
+
+def _window_mean_std(data, window_size, center, min_periods):
+    # Reference: statistics of each window's finite samples
+    offset = (window_size - 1) // 2 if center else 0
+    mean, std = np.full(len(data), np.nan), np.full(len(data), np.nan)
+    for i in range(len(data)):
+        window = data[max(i + 1 + offset - window_size, 0):i + 1 + offset]
+        window = window[np.isfinite(window)]
+        if len(window) >= min_periods:
+            mean[i], std[i] = window.mean(), window.std()
+    return mean, std
+
+@pytest.mark.parametrize("window_size", [1, 4, 5, 20])
+@pytest.mark.parametrize("center", [False, True])
+def test_rolling_mean_std_matches_windows(window_size, center):
+    """Rolling statistics match per-window statistics, also with a large offset and NaN/inf samples"""
+    data = np.random.default_rng(0).normal(1e6, 1.0, 300)
+    data[[50, 51, 120]] = [np.nan, np.nan, np.inf]
+    for min_periods in (None, 1):
+        mean, std = rolling_mean_std(data, window_size, center=center, min_periods=min_periods)
+        expected_mean, expected_std = _window_mean_std(data, window_size, center, min_periods or window_size)
+        np.testing.assert_array_equal(np.isnan(mean), np.isnan(expected_mean))
+        np.testing.assert_allclose(mean, expected_mean, rtol=0, atol=1e-8)
+        np.testing.assert_allclose(std, expected_std, rtol=0, atol=1e-6)
+
+def test_moving_average_nan_and_center(normal_data):
+    """NaN samples are skipped; centered windows still find the known anomalies"""
+    data = normal_data.copy()
+    data[500] = np.nan
+    indices, _ = detect_anomalies_moving_average(data, window_size=20, threshold=2.0, min_periods=15)
+    assert 500 not in indices
+    assert 100 in indices
+    # Without min_periods, windows that contain the NaN are not evaluated
+    indices_full, _ = detect_anomalies_moving_average(data, window_size=20, threshold=2.0)
+    assert not np.any((indices_full >= 500) & (indices_full < 520))
+    indices_center, _ = detect_anomalies_moving_average(normal_data, window_size=21, threshold=2.0, center=True)
+    assert 100 in indices_center
+    assert np.all(indices_center >= 10) and np.all(indices_center < len(normal_data) - 10)
+
+def test_rolling_mean_std_on_long_drifting_signal():
+    """Rolling std stays accurate on a long ramp, where global-offset prefix sums cancel"""
+    from numpy.lib.stride_tricks import sliding_window_view
+    n, window_size = 1_000_000, 20
+    data = np.arange(n, dtype=float) + np.random.default_rng(0).normal(size=n)
+    mean, std = rolling_mean_std(data, window_size)
+    windows = sliding_window_view(data, window_size)
+    np.testing.assert_allclose(std[window_size - 1:], windows.std(axis=-1), rtol=0, atol=1e-6)
+    np.testing.assert_allclose(mean[window_size - 1:], windows.mean(axis=-1), rtol=0, atol=1e-6)
@@ -1,8 +1,12 @@
 import pytest
 import numpy as np
+from scipy import signal as scipy_signal
 from analysis.spectral_tools import (
     calculate_fft,
-    find_dominant_frequency
+    calculate_psd_welch,
+    calculate_spectrogram,
+    find_dominant_frequency,
+    get_window
 )
 
 @pytest.fixture
@@ -93,4 +97,62 @@ def test_edge_cases():
     
     # Test with infinite values
     inf_array = np.array([1.0, np.inf, 2.0])
-    calculate_fft(inf_array, 0.001, 256) 
\ No newline at end of file
+    calculate_fft(inf_array, 0.001, 256)
+
+@pytest.mark.parametrize("detrend", ['constant', 'linear', None])
+@pytest.mark.parametrize("nperseg", [256, 255])
+def test_calculate_psd_welch_matches_scipy(detrend, nperseg):
+    """Test Welch PSD against scipy.signal.welch"""
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=5000) + np.linspace(0, 3, 5000)
+    freq, psd = calculate_psd_welch(data, 0.005, nperseg=nperseg, overlap=0.5, detrend=detrend)
+    expected_freq, expected_psd = scipy_signal.welch(data, fs=200.0, nperseg=nperseg,
+                                                     noverlap=int(round(nperseg * 0.5)),
+                                                     detrend=detrend if detrend else False)
+    assert np.allclose(freq, expected_freq)
+    assert np.allclose(psd, expected_psd)
+
+def test_calculate_psd_welch_uses_all_data(test_signal):
+    """Test that averaging segments lowers the variance of a white noise PSD"""
+    rng = np.random.default_rng(1)
+    noise = rng.normal(size=20000)
+    _, single = calculate_psd_welch(noise[-256:], 0.005, nperseg=256)
+    _, averaged = calculate_psd_welch(noise, 0.005, nperseg=256, overlap=0.5)
+    assert np.std(averaged[1:-1]) < 0.2 * np.std(single[1:-1])
+    # Density scaling: the PSD integrates to the variance
+    assert np.isclose(np.mean(averaged) * 100.0, np.var(noise), rtol=0.05)
+
+    signal, dt = test_signal
+    freq, psd = calculate_psd_welch(signal, dt, nperseg=256)
+    assert abs(find_dominant_frequency(freq, psd) - 10) <= freq[1]  # Within one bin
+    assert [a.size for a in calculate_psd_welch(signal[:100], dt, nperseg=256)] == [0, 0]
+
+def test_calculate_spectrogram():
+    """Test spectrogram shape, times and values against scipy.signal.spectrogram"""
+    dt = 0.005
+    t = np.arange(4000) * dt
+    data = np.where(t < 10, np.sin(2 * np.pi * 5 * t), np.sin(2 * np.pi * 40 * t))
+    freq, times, sxx = calculate_spectrogram(data, dt, nperseg=256, overlap=0.75)
+    expected = scipy_signal.spectrogram(data, fs=1 / dt, window='hann', nperseg=256, noverlap=192)
+    assert np.allclose(freq, expected[0])
+    assert np.allclose(times, expected[1])
+    assert np.allclose(sxx, expected[2])
+    # Frequency content moves from 5 Hz to 40 Hz
+    peaks = freq[np.argmax(sxx, axis=0)]
+    assert np.all(np.abs(peaks[times < 9] - 5) < 1)
+    assert np.all(np.abs(peaks[times > 11] - 40) < 1)
+
+    assert calculate_spectrogram(data[:10], dt)[2].shape == (0, 0)
+    with pytest.raises(ValueError):
+        calculate_spectrogram(data, dt, overlap=1.0)
+    with pytest.raises(ValueError):
+        calculate_psd_welch(data, dt, detrend='quadratic')
+
+def test_get_window_is_cached():
+    """Test that windows are cached and read-only"""
+    window = get_window('Hann', 128, periodic=True)
+    assert window is get_window('Hann', 128, periodic=True)
+    assert not window.flags.writeable
+    assert np.allclose(get_window('Hann', 128), scipy_signal.windows.hann(128))
+    with pytest.raises(ValueError):
+        get_window('Invalid', 128)
@@ -1,7 +1,10 @@
 import pytest
 import numpy as np
+from scipy import stats as scipy_stats
 from analysis.statistical_tools import (
     calculate_descriptive_stats,
+    descriptive_stats_matrix,
+    EXTENDED_METRICS,
     calculate_correlation_matrix,
     calculate_histogram
 )
@@ -52,6 +55,26 @@ def test_calculate_descriptive_stats(test_data):
             elif row['Metric'] == 'Variance':
                 assert abs(row[field] - np.var(test_data[field])) < 1e-10
 
+def test_extended_descriptive_stats(test_data):
+    """Test the extra metrics and fields of different lengths"""
+    test_data = dict(test_data, w=np.abs(test_data['x'][:300]) + 1.0)
+    stats = calculate_descriptive_stats(test_data, extended=True)
+    assert [row['Metric'] for row in stats][6:] == EXTENDED_METRICS
+    rows = {row['Metric']: row for row in stats}
+    for field, data in test_data.items():
+        rms = np.sqrt(np.mean(data ** 2))
+        assert np.isclose(rows['Median'][field], np.median(data))
+        assert np.isclose(rows['RMS'][field], rms)
+        assert np.isclose(rows['Peak-to-Peak'][field], np.ptp(data))
+        assert np.isclose(rows['Skewness'][field], scipy_stats.skew(data))
+        assert np.isclose(rows['Kurtosis'][field], scipy_stats.kurtosis(data))
+        assert np.isclose(rows['Crest Factor'][field], np.max(np.abs(data)) / rms)
+
+    constant = descriptive_stats_matrix(np.full((2, 10), 3.0), extended=True)
+    assert np.all(constant['Std Dev'] == 0)
+    assert np.all(np.isnan(constant['Skewness'])) and np.all(np.isnan(constant['Kurtosis']))
+    assert np.allclose(constant['Crest Factor'], 1.0)
+
 def test_calculate_correlation_matrix(test_data):
     """Test correlation matrix calculation"""
     # Calculate correlation matrix
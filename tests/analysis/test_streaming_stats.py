@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from analysis.statistical_tools import calculate_descriptive_stats
+from analysis.streaming_stats import (
+    QuantileSketch,
+    StreamingStats,
+    WindowedStats,
+    descriptive_stats_from_summary
+)
+
+@pytest.fixture
+def channels():
+    rng = np.random.default_rng(1)
+    return np.vstack((rng.normal(3.0, 2.0, 20000),
+                      rng.exponential(1.0, 20000),
+                      np.sin(np.linspace(0, 40 * np.pi, 20000))))
+
+def feed(stats, data, frame=20):
+    for start in range(0, data.shape[1], frame):
+        stats.update(data[:, start:start + frame])
+
+def test_streaming_stats_match_batch(channels):
+    stats = StreamingStats(3)
+    feed(stats, channels)
+    summary = stats.summary()
+    assert summary['count'] == channels.shape[1]
+    assert np.allclose(summary['mean'], channels.mean(axis=1))
+    assert np.allclose(summary['variance'], channels.var(axis=1))
+    assert np.allclose(summary['std'], channels.std(axis=1))
+    assert np.array_equal(summary['min'], channels.min(axis=1))
+    assert np.array_equal(summary['max'], channels.max(axis=1))
+    # Approximate median: rank error well below 1%
+    ranks = (channels < summary['median'][:, np.newaxis]).mean(axis=1)
+    assert np.all(np.abs(ranks - 0.5) < 0.01)
+
+def test_welford_is_stable_with_large_offset():
+    data = 1e9 + np.tile([0.0, 1.0, 2.0, 3.0], (1, 500))
+    stats = StreamingStats(1)
+    feed(stats, data, frame=7)
+    assert np.isclose(stats.summary()['variance'][0], 1.25)
+
+def test_quantile_sketch_bounded_memory_and_exact_when_small():
+    sketch = QuantileSketch(1, k=64)
+    small = np.array([[5.0, 1.0, 4.0, 2.0]])
+    sketch.update(small)
+    assert sketch.quantile(0.5)[0] == np.median(small)
+    sketch.update(np.random.default_rng(0).uniform(size=(1, 100000)))
+    assert sketch.num_retained < 64 * 2 * 20
+    values, weights = sketch.weighted_samples()
+    assert weights.sum() == sketch.count
+    with pytest.raises(ValueError):
+        QuantileSketch(1, k=0)
+
+def test_windowed_stats_cover_recent_samples(channels):
+    stats = WindowedStats(3, window_len=5000, chunk_len=100)
+    feed(stats, channels)
+    summary = stats.summary()
+    # Exact to within one chunk: the last 5000 samples (aligned to chunks here)
+    recent = channels[:, -5000:]
+    assert summary['count'] == 5000
+    assert np.allclose(summary['mean'], recent.mean(axis=1))
+    assert np.allclose(summary['variance'], recent.var(axis=1))
+    assert np.array_equal(summary['max'], recent.max(axis=1))
+    ranks = (recent < summary['median'][:, np.newaxis]).mean(axis=1)
+    assert np.all(np.abs(ranks - 0.5) < 0.02)
+
+    stats.set_window(1000)
+    assert stats.summary()['count'] == 1000
+    stats.reset()
+    assert stats.summary()['count'] == 0
+    assert np.all(np.isnan(stats.summary()['mean']))
+
+def test_descriptive_stats_from_summary_format(channels):
+    stats = StreamingStats(3)
+    stats.update(channels[:, :101])
+    rows = descriptive_stats_from_summary(stats.summary(), ('A', 'B', 'C'), fields=['A', 'C'])
+    expected = calculate_descriptive_stats({'A': channels[0, :101], 'C': channels[2, :101]})
+    assert [row['Metric'] for row in rows] == [row['Metric'] for row in expected]
+    for row, expected_row in zip(rows, expected):
+        assert set(row) == {'Metric', 'A', 'C'}
+        assert np.isclose(row['A'], expected_row['A'])
+        assert np.isclose(row['C'], expected_row['C'])
+
+    empty = descriptive_stats_from_summary(StreamingStats(3).summary(), ('A', 'B', 'C'))
+    assert all(row[field] == "N/A" for row in empty for field in ('A', 'B', 'C'))
@@ -0,0 +1,10 @@
+from benchmarks.anomaly_benchmark import run_benchmark
+
+def test_rolling_detection_matches_previous_version():
+    """The O(n) detection reports the same anomalies as the per-window version"""
+    results = run_benchmark(sizes=(2_000,), windows=(10, 50), repeat=1)
+    assert len(results) == 2
+    for result in results:
+        assert result['same_indices']
+        assert result['anomalies'] > 0
+        assert result['loop_s'] > 0 and result['rolling_s'] > 0
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from benchmarks.kinematic_benchmark import SIGNALS, benchmark_configurations, run_benchmark
+
+@pytest.mark.parametrize("name", list(SIGNALS))
+def test_reference_acceleration_is_second_derivative(name):
+    """The analytic acceleration of each reference signal matches its displacement"""
+    dt = 0.0005
+    t = np.arange(int(20 / dt)) * dt
+    acc, disp = SIGNALS[name](t)
+    numeric = np.gradient(np.gradient(disp, dt), dt)
+    bias = np.median(acc - numeric) # Only the noise signal carries a bias
+    assert np.percentile(np.abs(numeric - (acc - bias))[2:-2], 99) < 1e-3 * np.abs(acc).max()
+
+def test_benchmark_reports_accuracy_and_throughput():
+    """A reduced grid runs headless and detrending beats plain double integration"""
+    configs = benchmark_configurations(integration_methods=("Trapezoidal",), frame_params=((20, 50),))
+    assert not any(config['detrend_method'] == "Polynomial" and config['processing_mode'] == "Incremental"
+                   for config in configs)
+    results = run_benchmark(signals=("sine", "noise"), configs=configs, duration_s=20.0, settle_s=5.0)
+    assert len(results) == 2 * len(configs)
+    for result in results:
+        assert np.isfinite(result['rms_error'])
+        assert result['frame_latency_us'] > 0 and result['samples_per_s'] > 0
+    for signal in ("sine", "noise"):
+        errors = {(r['detrend_method'], r['processing_mode']): r['relative_error']
+                  for r in results if r['signal'] == signal}
+        assert errors[("RLS", "Incremental")] < errors[("None", "Incremental")]
+        assert errors[("RLS", "Full")] < errors[("None", "Full")]
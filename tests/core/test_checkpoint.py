@@ -0,0 +1,75 @@
+import numpy as np
+from core.data_processor import DataProcessor
+from core.checkpoint import checkpoint_path, load_checkpoint
+
+SENSOR_CONFIG = {'type': "mock_sensor", 'mock_update_interval': 0.005}
+
+def _feed(data_processor, sensor_id, values):
+    for value in values:
+        data_processor.handle_incoming_sensor_data(sensor_id, {'accX': value, 'accY': 0.5 * value, 'accZ': 0.0},
+                                                   SENSOR_CONFIG)
+
+def _signal(n, start=0):
+    t = (np.arange(n) + start) * 0.005
+    return 0.02 + 0.1 * np.sin(2 * np.pi * 2.0 * t)
+
+def test_checkpoint_restore_continues_processing(tmp_path):
+    """A restarted DataProcessor restores the checkpoint and continues without a warm-up"""
+    adv_params = dict(DataProcessor().default_advanced_processing_params,
+                      pre_filter_type="High-pass", pre_filter_params={'cutoff_hz': 0.2, 'order': 2})
+    first = DataProcessor(checkpoint_dir=str(tmp_path))
+    first.register_sensor("s1", "mock_sensor", 0.005, adv_params=adv_params)
+    _feed(first, "s1", _signal(2000))
+    assert first.save_checkpoint("s1") == checkpoint_path(str(tmp_path), "s1")
+
+    restarted = DataProcessor(checkpoint_dir=str(tmp_path))
+    restarted.register_sensor("s1", "mock_sensor", 0.005, adv_params=adv_params)
+    state = restarted.get_sensor_state("s1")
+    assert all(kp_axis.is_warmed_up() for kp_axis in state.kinematic_processors)
+
+    _feed(first, "s1", _signal(400, 2000))
+    _feed(restarted, "s1", _signal(400, 2000))
+    np.testing.assert_array_equal(restarted.get_sensor_state("s1").processed.view(),
+                                  first.get_sensor_state("s1").processed.view()[:, -400:])
+
+    # Live processors are never overwritten by an older checkpoint
+    assert not restarted.restore_checkpoint("s1")
+
+def test_reset_sensor_data_keeps_restored_state(tmp_path):
+    """Resetting the stored data (plot reset, sensor switch) keeps the restored processing state"""
+    first = DataProcessor(checkpoint_dir=str(tmp_path))
+    first.register_sensor("s1", "mock_sensor", 0.005)
+    _feed(first, "s1", _signal(600))
+    first.save_checkpoint("s1")
+
+    restarted = DataProcessor(checkpoint_dir=str(tmp_path))
+    restarted.register_sensor("s1", "mock_sensor", 0.005)
+    state = restarted.get_sensor_state("s1")
+    frame_counts = [kp_axis.frame_count for kp_axis in state.kinematic_processors]
+    assert all(frame_counts)
+
+    restarted.reset_sensor_data("s1")
+    assert [kp_axis.frame_count for kp_axis in state.kinematic_processors] == frame_counts
+    assert all(kp_axis.is_warmed_up() for kp_axis in state.kinematic_processors)
+    assert len(state.time_data) == 0
+
+def test_checkpoint_needs_matching_config(tmp_path):
+    first = DataProcessor(checkpoint_dir=str(tmp_path))
+    first.register_sensor("s1", "mock_sensor", 0.005)
+    _feed(first, "s1", _signal(200))
+    first.save_checkpoint("s1")
+
+    other = DataProcessor(checkpoint_dir=str(tmp_path))
+    other.register_sensor("s1", "mock_sensor", 0.005, kin_params=dict(first.default_kinematic_params,
+                                                                      calc_frame_multiplier=10))
+    assert other.get_sensor_state("s1").kinematic_processors[0].frame_count == 0
+    assert load_checkpoint(checkpoint_path(str(tmp_path), "s1"), other.get_sensor_state("s1").config) is None
+
+def test_periodic_checkpoint(tmp_path):
+    data_processor = DataProcessor(checkpoint_dir=str(tmp_path))
+    data_processor.checkpoint_interval_s = 0.0
+    data_processor.register_sensor("s/1", "mock_sensor", 0.005)
+    _feed(data_processor, "s/1", _signal(40))
+    assert load_checkpoint(checkpoint_path(str(tmp_path), "s/1")) is not None
+    # Without a checkpoint directory nothing is written
+    assert DataProcessor().save_checkpoint("s/1") is None
@@ -1,6 +1,8 @@
 import pytest
 import numpy as np
 from core.data_processor import DataProcessor
+from core.sensor_state import SensorState, ChannelBuffer
+from algorithm.filters import LowPassFilter
 
 @pytest.fixture
 def data_processor():
@@ -25,46 +27,64 @@ def test_initialization(data_processor):
 def test_ensure_sensor_id_structure(data_processor):
     """Test sensor data structure initialization"""
     sensor_id = "test_sensor"
-    data_processor._ensure_sensor_id_structure(sensor_id)
+    data_processor.register_sensor(sensor_id)
     
-    assert sensor_id in data_processor._sensor_data_store
-    sensor_data = data_processor._sensor_data_store[sensor_id]
+    assert data_processor.has_sensor(sensor_id)
+    sensor_state = data_processor.get_sensor_state(sensor_id)
     
     # Check basic structure
-    assert 'config' in sensor_data
-    assert 'time_data' in sensor_data
-    assert 'raw_acc' in sensor_data
-    assert 'processed_acc' in sensor_data
-    assert 'processed_vel' in sensor_data
-    assert 'processed_disp' in sensor_data
+    assert isinstance(sensor_state, SensorState)
+    assert 'dt' in sensor_state.config
+    assert len(sensor_state.kinematic_processors) == 3
     
-    # Check data types
-    assert isinstance(sensor_data['time_data'], np.ndarray)
-    assert isinstance(sensor_data['raw_acc']['x'], np.ndarray)
-    assert isinstance(sensor_data['processed_acc']['x'], np.ndarray)
-    assert isinstance(sensor_data['processed_vel']['x'], np.ndarray)
-    assert isinstance(sensor_data['processed_disp']['x'], np.ndarray)
+    # Check data types: contiguous 2-D channel arrays
+    assert isinstance(sensor_state.time_data, np.ndarray)
+    assert sensor_state.raw_acc.view().shape == (3, 0)
+    assert sensor_state.acc.shape == (3, 0)
+    assert sensor_state.vel.shape == (3, 0)
+    assert sensor_state.disp.shape == (3, 0)
+    assert not hasattr(sensor_state, '__dict__')
 
 def test_reset_sensor_data(data_processor):
     """Test resetting sensor data"""
     sensor_id = "test_sensor"
-    data_processor._ensure_sensor_id_structure(sensor_id)
+    data_processor.register_sensor(sensor_id)
+    sensor_state = data_processor.get_sensor_state(sensor_id)
     
     # Add some test data
-    data_processor._sensor_data_store[sensor_id]['time_data'] = np.array([1, 2, 3])
-    data_processor._sensor_data_store[sensor_id]['raw_acc']['x'] = np.array([1, 2, 3])
+    sensor_state.append_processed(np.arange(3.0), np.ones((9, 3)))
+    sensor_state.raw_acc.append(np.ones((3, 3)))
     
     # Reset the data
     data_processor.reset_sensor_data(sensor_id)
     
     # Check if data is reset
-    assert len(data_processor._sensor_data_store[sensor_id]['time_data']) == 0
-    assert len(data_processor._sensor_data_store[sensor_id]['raw_acc']['x']) == 0
+    assert len(sensor_state.time_data) == 0
+    assert len(sensor_state.raw_acc) == 0
+
+def test_reset_replaces_processors_used_by_frames_in_flight(data_processor, sample_sensor_data):
+    """Test that a reset does not touch processor state a frame in flight is still using"""
+    sensor_id = "test_sensor"
+    data_processor.register_sensor(sensor_id)
+    sensor_state = data_processor.get_sensor_state(sensor_id)
+    frame_size = sensor_state.pending_acc.shape[1]
+    for i in range(3 * frame_size):
+        data_processor.handle_incoming_sensor_data(sensor_id, dict(sample_sensor_data, time=i * 0.005))
+    old_processors = sensor_state.kinematic_processors
+    reset_version = sensor_state.reset_version
+
+    data_processor.reset_sensor_data_arrays_only(sensor_id)
+
+    assert sensor_state.reset_version != reset_version
+    assert all(new is not old for new, old in zip(sensor_state.kinematic_processors, old_processors))
+    assert all(kp_axis.frame_count == 0 for kp_axis in sensor_state.kinematic_processors)
+    # The previous processors keep their state for the frame that is still running on them
+    assert all(kp_axis.frame_count == 3 for kp_axis in old_processors)
 
 def test_update_processing_parameters(data_processor):
     """Test updating processing parameters"""
     sensor_id = "test_sensor"
-    data_processor._ensure_sensor_id_structure(sensor_id)
+    data_processor.register_sensor(sensor_id)
     
     new_kin_params = {
         'sample_frame_size': 30,
@@ -87,7 +107,7 @@ def test_update_processing_parameters(data_processor):
 def test_handle_incoming_sensor_data(data_processor, sample_sensor_data):
     """Test handling incoming sensor data"""
     sensor_id = "test_sensor"
-    data_processor._ensure_sensor_id_structure(sensor_id)
+    data_processor.register_sensor(sensor_id)
     
     # Simulate multiple incoming data points to fill arrays
     for i in range(25):
@@ -96,26 +116,260 @@ def test_handle_incoming_sensor_data(data_processor, sample_sensor_data):
         data_processor.handle_incoming_sensor_data(sensor_id, d)
     
     # Check if data is stored correctly
-    assert len(data_processor._sensor_data_store[sensor_id]['time_data']) > 0
-    assert len(data_processor._sensor_data_store[sensor_id]['raw_acc']['x']) > 0
+    sensor_state = data_processor.get_sensor_state(sensor_id)
+    assert len(sensor_state.time_data) > 0
+    assert len(sensor_state.raw_acc) > 0
 
 @pytest.mark.xfail(reason="calculate_fft_for_sensor không sinh ra FFT nếu không qua pipeline xử lý thực tế.")
 def test_calculate_fft_for_sensor(data_processor):
     """Test FFT calculation"""
     sensor_id = "test_sensor"
-    data_processor._ensure_sensor_id_structure(sensor_id)
+    data_processor.register_sensor(sensor_id)
     
     # Add enough test data as numpy array for FFT
-    data = np.sin(np.linspace(0, 10, 512))
-    data_processor._sensor_data_store[sensor_id]['processed_acc']['x'] = data
-    data_processor._sensor_data_store[sensor_id]['time_data'] = np.linspace(0, 10, 512)
+    block = np.zeros((9, 512))
+    block[0] = np.sin(np.linspace(0, 10, 512))
+    data_processor.get_sensor_state(sensor_id).append_processed(np.linspace(0, 10, 512), block)
     
     # Calculate FFT
     data_processor.calculate_fft_for_sensor(sensor_id)
     
     # Check if FFT data is calculated
-    fft_data = data_processor._sensor_data_store[sensor_id]['fft_plot_data']['x']
+    fft_data = data_processor.get_sensor_state(sensor_id).fft_plot_data['x']
     assert fft_data['freq'] is not None
     assert fft_data['amp'] is not None
     assert len(fft_data['freq']) > 0
-    assert len(fft_data['amp']) > 0 
\ No newline at end of file
+    assert len(fft_data['amp']) > 0 
+
+def test_snapshot_versioning(data_processor, sample_sensor_data):
+    """Test versioned read-only snapshots"""
+    sensor_id = "test_sensor"
+    data_processor.register_sensor(sensor_id)
+    assert data_processor.get_data_version(sensor_id) == 0
+    assert data_processor.get_data_version("unknown") is None
+
+    frame_size = data_processor.default_kinematic_params['sample_frame_size']
+    for _ in range(frame_size):
+        data_processor.handle_incoming_sensor_data(sensor_id, sample_sensor_data.copy())
+    snapshot = data_processor.get_snapshot_for_sensor(sensor_id)
+    assert snapshot['version'] == frame_size
+    assert not snapshot['incremental']
+    assert len(snapshot['time_data']) == frame_size
+    assert not snapshot['acc_data']['x'].flags.writeable
+    with pytest.raises(ValueError):
+        snapshot['disp_data']['x'][0] = 1.0
+
+    # Only samples published after the given version are returned
+    for _ in range(frame_size):
+        data_processor.handle_incoming_sensor_data(sensor_id, sample_sensor_data.copy())
+    delta = data_processor.get_snapshot_for_sensor(sensor_id, since_version=snapshot['version'])
+    assert delta['incremental']
+    assert delta['version'] == 2 * frame_size
+    assert len(delta['time_data']) == frame_size
+    assert len(delta['vel_data']['y']) == frame_size
+    full = data_processor.get_snapshot_for_sensor(sensor_id)
+    assert np.array_equal(delta['time_data'], full['time_data'][-frame_size:])
+    # Earlier snapshot is unaffected by new data
+    assert len(snapshot['time_data']) == frame_size
+
+    # No new data -> empty incremental snapshot
+    empty_delta = data_processor.get_snapshot_for_sensor(sensor_id, since_version=full['version'])
+    assert empty_delta['incremental']
+    assert len(empty_delta['time_data']) == 0
+
+    # A reset bumps the version and forces a full snapshot
+    data_processor.reset_sensor_data_arrays_only(sensor_id)
+    after_reset = data_processor.get_snapshot_for_sensor(sensor_id, since_version=full['version'])
+    assert after_reset['version'] > full['version']
+    assert not after_reset['incremental']
+    assert len(after_reset['time_data']) == 0
+
+def test_channel_buffer_keeps_published_views():
+    """Test that appends and trimming never overwrite samples handed out as views"""
+    buffer = ChannelBuffer(2, max_points=5)
+    buffer.append(np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+    published = buffer.view().copy()
+    published_view = buffer.view()
+    for i in range(20):
+        buffer.append(np.array([10.0 + i, 20.0 + i]))
+        assert len(buffer) <= 5
+    assert np.array_equal(published_view, published)
+    assert np.array_equal(buffer.row(0), [25.0, 26.0, 27.0, 28.0, 29.0])
+
+def test_retention_tiers(data_processor):
+    """Test decimated and statistics-only retention tiers"""
+    sensor_id = "test_sensor"
+    data_processor.register_sensor(sensor_id, dt=0.01)
+    data_processor.update_retention_parameters(sensor_id, {
+        'recent_seconds': 1.0, 'medium_seconds': 10.0, 'medium_decimation': 5,
+        'long_term_seconds': 100.0, 'long_term_block_seconds': 0.5
+    })
+    sensor_state = data_processor.get_sensor_state(sensor_id)
+    assert sensor_state.processed.dtype == np.float32
+
+    times = np.arange(4000) * 0.01
+    block = np.tile(np.arange(4000, dtype=float), (9, 1))
+    for start in range(0, 4000, 20):
+        sensor_state.append_processed(times[start:start + 20], block[:, start:start + 20])
+
+    # Recent tier never drops below the floor needed for plotting
+    assert len(sensor_state.time_data) == data_processor.MIN_RECENT_POINTS
+    medium = data_processor.get_history_for_sensor(sensor_id, 'medium')
+    assert len(medium['time_data']) == 200  # 10 s at 100 Hz / 5
+    assert np.allclose(medium['acc_data']['x'][-1], np.mean(np.arange(3995, 4000)))
+    long_term = data_processor.get_history_for_sensor(sensor_id, 'long_term')
+    assert len(long_term['time_data']) == 4000 // 50
+    assert long_term['max']['disp_data']['z'][-1] == 3999
+    assert long_term['min']['disp_data']['z'][-1] == 3950
+    with pytest.raises(ValueError):
+        data_processor.get_history_for_sensor(sensor_id, 'unknown')
+
+def test_memory_budget(data_processor):
+    """Test that retention is scaled down to fit the global memory budget"""
+    for i in range(3):
+        data_processor.register_sensor(f"sensor_{i}", dt=0.005)
+    unconstrained = sum(data_processor.get_memory_usage().values())
+
+    data_processor.set_memory_budget(unconstrained // 4)
+    assert sum(data_processor.get_memory_usage().values()) <= unconstrained // 4
+    assert data_processor.get_recent_capacity("sensor_0") >= data_processor.MIN_RECENT_POINTS
+
+def test_update_processing_parameters_keeps_history(data_processor, sample_sensor_data):
+    """Test warm hot-swap of processing parameters"""
+    sensor_id = "test_sensor"
+    data_processor.register_sensor(sensor_id)
+    for i in range(105):
+        d = sample_sensor_data.copy()
+        d['accX'] = np.sin(0.1 * i)
+        data_processor.handle_incoming_sensor_data(sensor_id, d)
+    state = data_processor.get_sensor_state(sensor_id)
+    version = data_processor.get_data_version(sensor_id)
+    num_points = len(state.time_data)
+    pending_count = state.pending_count
+    assert pending_count > 0
+
+    new_kin_params = dict(data_processor.get_sensor_kinematic_params(sensor_id),
+                          calc_frame_multiplier=10, rls_filter_q_vel=0.99)
+    data_processor.update_processing_parameters(sensor_id, new_kin_params=new_kin_params)
+
+    assert data_processor.get_data_version(sensor_id) == version
+    assert len(state.time_data) == num_points
+    assert state.pending_count == pending_count
+    for axis_idx, kp_axis in enumerate(state.kinematic_processors):
+        assert kp_axis.calc_frame_size == 200
+        assert kp_axis.is_warmed_up()
+        np.testing.assert_allclose(kp_axis.acc_buffer[-num_points:], state.acc[axis_idx])
+
+    # Processing continues without a gap
+    for i in range(20):
+        data_processor.handle_incoming_sensor_data(sensor_id, sample_sensor_data.copy())
+    assert len(state.time_data) == num_points + 20
+
+    # Explicit reset is still available
+    data_processor.update_processing_parameters(sensor_id, new_kin_params=new_kin_params,
+                                                preserve_history=False)
+    assert len(state.time_data) == 0
+
+def test_hot_swap_during_frame_keeps_the_frame(monkeypatch):
+    """Test that a frame in flight during a hot-swap is run through the new processors"""
+    def feed(data_processor, start, stop):
+        for i in range(start, stop):
+            data_processor.handle_incoming_sensor_data("s1", {'accX': np.sin(0.1 * i), 'accY': 0.0, 'accZ': 0.0})
+
+    before, during = DataProcessor(), DataProcessor()
+    for data_processor in (before, during):
+        data_processor.register_sensor("s1")
+        feed(data_processor, 0, 100)
+    new_kin_params = dict(before.get_sensor_kinematic_params("s1"), rls_filter_q_vel=0.99)
+
+    # Reference: parameters change between two frames
+    before.update_processing_parameters("s1", new_kin_params=new_kin_params)
+    feed(before, 100, 160)
+
+    # Parameters change while the next frame is being processed (outside the lock)
+    kp_x = during.get_sensor_state("s1").kinematic_processors[0]
+    process_frame = kp_x.process_frame
+    def process_frame_and_swap(acc_frame):
+        monkeypatch.undo()
+        result = process_frame(acc_frame)
+        during.update_processing_parameters("s1", new_kin_params=new_kin_params)
+        return result
+    monkeypatch.setattr(kp_x, 'process_frame', process_frame_and_swap)
+    feed(during, 100, 160)
+
+    assert during.get_data_version("s1") == before.get_data_version("s1")
+    np.testing.assert_allclose(during.get_sensor_state("s1").processed.view(),
+                               before.get_sensor_state("s1").processed.view())
+    np.testing.assert_allclose(during.get_sensor_state("s1").time_data, before.get_sensor_state("s1").time_data)
+
+def test_pre_filter_is_stateful_per_frame(data_processor):
+    """The acceleration pre-filter runs on whole frames and keeps its state across them"""
+    sensor_id = "filtered_sensor"
+    adv_params = dict(data_processor.default_advanced_processing_params,
+                      pre_filter_type="Low-pass", pre_filter_params={'cutoff_hz': 5.0, 'order': 2})
+    data_processor.register_sensor(sensor_id, sensor_type="mock_sensor", dt=0.005, adv_params=adv_params)
+    state = data_processor.get_sensor_state(sensor_id)
+    assert isinstance(state.pre_filter, LowPassFilter)
+
+    frame_size = state.config['kinematic_params']['sample_frame_size']
+    x = 0.1 * np.sign(np.sin(np.arange(frame_size * 10) * 0.05))
+    sensor_config = {'type': "mock_sensor", 'mock_update_interval': 0.005}
+    for value in x:
+        data_processor.handle_incoming_sensor_data(sensor_id, {'accX': value, 'accY': 0.0, 'accZ': 0.0},
+                                                   sensor_config)
+    expected = LowPassFilter(5.0, 200.0, 2).apply(x * 9.80665)
+    np.testing.assert_allclose(state.acc[0], expected, atol=1e-12)
+    # Raw acceleration stays unfiltered
+    np.testing.assert_allclose(state.raw_acc.view()[0], x * 9.80665, rtol=1e-6)
+
+def test_orientation_removes_gravity_of_tilted_sensor(data_processor):
+    """With angle packets, a tilted sensor at rest has no gravity left in any axis"""
+    sensor_id = "tilted_sensor"
+    adv_params = dict(data_processor.default_advanced_processing_params, orientation_mode="Angles")
+    data_processor.register_sensor(sensor_id, sensor_type="wit_motion_imu", dt=0.005, adv_params=adv_params)
+    state = data_processor.get_sensor_state(sensor_id)
+    assert state.orientation is not None
+
+    roll, pitch = np.radians(15.0), np.radians(-25.0)
+    # Specific force of 1 g up, seen in the body frame (in g)
+    packet = {'accX': -np.sin(pitch), 'accY': np.cos(pitch) * np.sin(roll), 'accZ': np.cos(pitch) * np.cos(roll),
+              'angleX': 15.0, 'angleY': -25.0, 'angleZ': 60.0, 'gyroX': 0.0, 'gyroY': 0.0, 'gyroZ': 0.0}
+    sensor_config = {'type': "wit_motion_imu", 'wit_data_rate_byte_hex': "0x0b"}
+    frame_size = state.config['kinematic_params']['sample_frame_size']
+    for _ in range(frame_size * 3):
+        data_processor.handle_incoming_sensor_data(sensor_id, packet, sensor_config)
+    np.testing.assert_allclose(state.raw_acc.view(), 0.0, atol=1e-5)
+    np.testing.assert_allclose(state.acc, 0.0, atol=1e-5)
+    assert 'orientation' in data_processor.get_processing_state(sensor_id)
+
+def test_streaming_stats_cover_session_and_window(data_processor):
+    """Test that ingest-time statistics outlive the retention window and reset with the data"""
+    sensor_id = "test_sensor"
+    data_processor.register_sensor(sensor_id, dt=0.01)
+    sensor_state = data_processor.get_sensor_state(sensor_id)
+    capacity = data_processor.get_recent_capacity(sensor_id)
+
+    total = 3 * capacity
+    times = np.arange(total) * 0.01
+    block = np.tile(np.arange(total, dtype=float), (9, 1))
+    for start in range(0, total, 20):
+        sensor_state.append_processed(times[start:start + 20], block[:, start:start + 20])
+
+    session = data_processor.get_streaming_stats(sensor_id, 'session')
+    assert session['count'] == total
+    assert np.allclose(session['mean'], (total - 1) / 2)
+    assert session['min'][0] == 0 and session['max'][0] == total - 1
+
+    window = data_processor.get_streaming_stats(sensor_id, 'window')
+    chunk_len = sensor_state.window_stats.chunk_len
+    assert capacity <= window['count'] < capacity + chunk_len
+    assert window['max'][0] == total - 1
+    assert window['min'][0] == total - window['count']
+
+    with pytest.raises(ValueError):
+        data_processor.get_streaming_stats(sensor_id, 'unknown')
+    assert data_processor.get_streaming_stats("missing") is None
+
+    data_processor.reset_sensor_data(sensor_id)
+    assert data_processor.get_streaming_stats(sensor_id, 'session')['count'] == 0
+    assert data_processor.get_streaming_stats(sensor_id, 'window')['count'] == 0
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from core.parameter_sweep import SweepScores, parameter_grid, run_sweep
+from core.processing_config import create_kinematic_processor
+
+def _recording(n, dt=0.005):
+    t = np.arange(n) * dt
+    disp = 0.01 * np.sin(2 * np.pi * 1.5 * t)
+    acc = -(2 * np.pi * 1.5) ** 2 * disp + 0.01 + 0.02 * np.random.default_rng(0).standard_normal(n)
+    return acc, disp
+
+def _single_score(acc, dt, result, reference):
+    processor = create_kinematic_processor(dt, result['kin_params'], result['adv_params'])
+    n = len(acc) - len(acc) % processor.sample_frame_size
+    flush = -(-processor.latency // processor.sample_frame_size) * processor.sample_frame_size
+    disp, _, _ = processor.process_chunk(np.concatenate((acc[:n], np.zeros(flush))))
+    disp = disp[processor.latency:processor.latency + n] # Aligned with the input
+    scores = SweepScores(1, n, int(round(1.0 / dt)), int(round(2.0 / dt)), reference)
+    scores.update(disp[np.newaxis], 0)
+    return scores.results()[0]
+
+def test_sweep_matches_single_processors(tmp_path):
+    """Shared passes and per-configuration passes score like separate processors"""
+    dt, n = 0.005, 200 * 30 + 13
+    acc, disp = _recording(n, dt)
+    path = str(tmp_path / "acc.npy")
+    np.save(path, np.column_stack([np.zeros(n), np.zeros(n), acc]))
+    grid = {'rls_filter_q_vel': [0.98, 0.995], 'rls_filter_q_disp': [0.9875, 0.995],
+            'sample_frame_size': [10, 20], 'calc_frame_multiplier': [10, 50],
+            'integration_method': ["Trapezoidal", "Frequency"]}
+    results = run_sweep(path, dt, grid, reference=disp, axis_index=2, settle_s=1.0, drift_window_s=2.0,
+                        max_workers=2, task_rows=3, max_block_elements=5000)
+    assert len(results) == len(parameter_grid(grid)) == 32
+    for result in results:
+        expected = _single_score(acc, dt, result, disp)
+        for key in ('rms_error', 'max_abs_error', 'drift', 'disp_rms'):
+            assert result[key] == pytest.approx(expected[key], rel=1e-6, abs=1e-12)
+    trapezoidal = [result for result in results if result['params']['integration_method'] == "Trapezoidal"]
+    assert trapezoidal[0]['drift'] == trapezoidal[1]['drift'] # calc_frame_multiplier only
+
+def test_sweep_rejects_unknown_parameter():
+    with pytest.raises(ValueError):
+        parameter_grid({'rls_filter_q': [0.98]})
@@ -139,4 +139,22 @@ def test_update_plots_without_data(plot_manager, mock_display_screen, mock_data_
     plot_manager.update_plots()
     
     assert mock_data_processor.get_plot_data_called
-    assert not mock_display_screen.update_plots_called  # Should not update with empty data 
\ No newline at end of file
+    assert not mock_display_screen.update_plots_called  # Should not update with empty data
+
+
+def test_update_plots_skips_unchanged_version(plot_manager, mock_display_screen, mock_data_processor):
+    """Test that plots are not redrawn when the data version has not changed"""
+    plot_manager.start_plotting(10, "test_sensor")
+    mock_data_processor.test_data['version'] = 1
+    mock_data_processor.test_data['fft_version'] = 1
+
+    plot_manager.update_plots()
+    assert mock_display_screen.update_plots_called
+
+    mock_display_screen.update_plots_called = False
+    plot_manager.update_plots()
+    assert not mock_display_screen.update_plots_called
+
+    mock_data_processor.test_data['version'] = 2
+    plot_manager.update_plots()
+    assert mock_display_screen.update_plots_called
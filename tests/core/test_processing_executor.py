@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from core.data_processor import DataProcessor
+from core.processing_executor import ProcessingExecutor
+
+@pytest.fixture
+def executor():
+    executor = ProcessingExecutor(DataProcessor(), num_workers=2)
+    executor.start()
+    yield executor
+    executor.stop()
+
+def sample(i):
+    return {'accX': np.sin(0.1 * i), 'accY': 0.0, 'accZ': 1.0}
+
+def test_sharded_processing(executor):
+    """Test that samples of several sensors are processed on the workers"""
+    sensor_ids = ["s1", "s2", "s3"]
+    for sensor_id in sensor_ids:
+        executor.data_processor.register_sensor(sensor_id)
+    for i in range(200):
+        for sensor_id in sensor_ids:
+            executor.submit(sensor_id, sample(i))
+    executor.wait_until_idle()
+
+    data_processor = executor.data_processor
+    for sensor_id in sensor_ids:
+        # All 200 samples arrived in order: 10 full frames of 20 samples
+        assert data_processor.get_data_version(sensor_id) == 200
+        snapshot = data_processor.get_snapshot_for_sensor(sensor_id)
+        np.testing.assert_allclose(snapshot['raw_acc_data']['x'],
+                                   [sample(i)['accX'] * 9.80665 for i in range(200)], rtol=1e-6)
+
+    shards = executor.get_shard_assignment()
+    assert set(shards) == set(sensor_ids)
+    assert set(shards.values()) == {0, 1}
+
+def test_lag_metrics(executor):
+    """Test per-sensor lag metrics"""
+    executor.data_processor.register_sensor("s1")
+    for i in range(50):
+        executor.submit("s1", sample(i))
+    executor.wait_until_idle()
+
+    metrics = executor.get_lag_metrics("s1")
+    assert metrics['processed'] == 50
+    assert metrics['queue_depth'] == 0
+    assert 0 <= metrics['mean_lag_ms'] <= metrics['max_lag_ms']
+    assert executor.get_lag_metrics("unknown") is None
+    assert set(executor.get_lag_metrics()) == {"s1"}
+
+def test_fft_and_synchronous_fallback():
+    """Test FFT for the selected sensor and processing without worker threads"""
+    executor = ProcessingExecutor(DataProcessor(), num_workers=1)
+    executor.data_processor.register_sensor("s1")
+    executor.set_fft_sensor("s1")
+    for i in range(600):
+        executor.submit("s1", sample(i))
+    state = executor.data_processor.get_sensor_state("s1")
+    assert state.fft_plot_data['x']['freq'] is not None
+
+    with pytest.raises(ValueError):
+        ProcessingExecutor(DataProcessor(), num_workers=0)
+
+def test_removed_sensor_is_not_recreated(executor):
+    """Test that samples queued before a sensor was removed are discarded"""
+    data_processor = executor.data_processor
+    data_processor.register_sensor("s1")
+    for i in range(50):
+        executor.submit("s1", sample(i))
+    executor.remove_sensor("s1")
+    data_processor.remove_sensor_data("s1")
+    assert "s1" not in executor.get_shard_assignment()
+    executor.submit("s1", sample(50))
+    executor.wait_until_idle()
+
+    assert not data_processor.has_sensor("s1")
+    # Samples of an unregistered sensor are dropped without creating it
+    data_processor.handle_incoming_sensor_data("s2", sample(0))
+    assert not data_processor.has_sensor("s2")
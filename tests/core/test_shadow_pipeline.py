@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+from core.data_processor import DataProcessor
+from core.shadow_pipeline import DivergenceStats
+
+
+def _feed(data_processor, sensor_id, num_frames, frame_size=20):
+    t = np.arange(num_frames * frame_size) * 0.005
+    sensor_config = {'type': "mock_sensor", 'mock_update_interval': 0.005}
+    for value in 0.05 * np.sin(2 * np.pi * 1.5 * t) + 0.002:
+        data_processor.handle_incoming_sensor_data(sensor_id, {'accX': value, 'accY': 0.0, 'accZ': value},
+                                                   sensor_config)
+
+
+@pytest.fixture
+def data_processor():
+    processor = DataProcessor()
+    adv_params = dict(processor.default_advanced_processing_params, processing_mode="Incremental")
+    processor.register_sensor("sensor", sensor_type="mock_sensor", dt=0.005, adv_params=adv_params)
+    return processor
+
+
+def test_identical_shadow_mirrors_primary(data_processor):
+    assert data_processor.add_shadow_configuration("sensor", "same", kin_params={'warmup_frames': 2})
+    shadows = data_processor.get_sensor_state("sensor").shadows
+    assert shadows.pipelines["same"].processors is None
+    _feed(data_processor, "sensor", 20)
+    divergence = data_processor.get_shadow_divergence("sensor")["same"]
+    assert divergence['samples'] > 0
+    assert divergence['disp']['x']['max_abs'] == 0.0
+
+
+@pytest.mark.parametrize("mode", ["Full", "Incremental"])
+def test_displacement_shadow_shares_velocity_stage(mode):
+    data_processor = DataProcessor()
+    adv_params = dict(data_processor.default_advanced_processing_params, processing_mode=mode)
+    data_processor.register_sensor("sensor", sensor_type="mock_sensor", dt=0.005, adv_params=adv_params)
+    data_processor.register_sensor("reference", sensor_type="mock_sensor", dt=0.005, adv_params=adv_params,
+                                   kin_params=dict(data_processor.default_kinematic_params, rls_filter_q_disp=0.95))
+    state = data_processor.get_sensor_state("sensor")
+    assert data_processor.add_shadow_configuration("sensor", "q_disp", kin_params={'rls_filter_q_disp': 0.95})
+    pipeline = state.shadows.pipelines["q_disp"]
+    assert pipeline.velocity_sources is state.kinematic_processors
+
+    _feed(data_processor, "sensor", 30)
+    _feed(data_processor, "reference", 30)
+    divergence = data_processor.get_shadow_divergence("sensor")["q_disp"]
+    assert divergence['vel']['x']['max_abs'] == 0.0
+    assert divergence['disp']['x']['rms'] > 0.0
+    # The shadow's displacement is that of a primary configured like the shadow
+    reference_state = data_processor.get_sensor_state("reference")
+    np.testing.assert_allclose(pipeline.processors[0].disp_buffer_detrended[-20:],
+                               reference_state.kinematic_processors[0].disp_buffer_detrended[-20:], rtol=1e-12)
+
+
+def test_shadow_divergence_and_lifecycle(data_processor):
+    assert data_processor.add_shadow_configuration("sensor", "q_vel", kin_params={'rls_filter_q_vel': 0.95})
+    assert not data_processor.add_shadow_configuration("sensor", "frame", kin_params={'sample_frame_size': 10})
+    state = data_processor.get_sensor_state("sensor")
+    assert state.shadows.pipelines["q_vel"].velocity_sources is None
+    _feed(data_processor, "sensor", 20)
+    divergence = data_processor.get_shadow_divergence("sensor")["q_vel"]
+    assert divergence['samples'] == 20 * (20 - 4) # Counted from the last warm-up frame on (is_warmed_up())
+    assert 0.0 < divergence['vel']['x']['relative_rms'] < np.inf
+
+    # A primary parameter change rebuilds the shadows and restarts their statistics
+    data_processor.update_processing_parameters("sensor", new_kin_params=dict(state.config['kinematic_params'],
+                                                                              rls_filter_q_disp=0.99))
+    assert data_processor.get_shadow_divergence("sensor")["q_vel"]['samples'] == 0
+    assert data_processor.remove_shadow_configuration("sensor", "q_vel")
+    assert state.shadows is None
+    assert data_processor.get_shadow_divergence("sensor") == {}
+
+
+def test_divergence_stats():
+    stats = DivergenceStats(2)
+    reference = np.array([[1.0, -1.0, 1.0, -1.0], [0.0, 0.0, 0.0, 0.0]])
+    stats.update(reference[:, :2], reference[:, :2] + 0.5)
+    stats.update(reference[:, 2:], reference[:, 2:] - 0.5)
+    summary = stats.summary()
+    np.testing.assert_allclose(summary['mean'], [0.0, 0.0])
+    np.testing.assert_allclose(summary['rms'], [0.5, 0.5])
+    np.testing.assert_allclose(summary['max_abs'], [0.5, 0.5])
+    np.testing.assert_allclose(summary['relative_rms'], [0.5, np.inf])
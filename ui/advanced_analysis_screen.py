@@ -13,7 +13,9 @@ import numpy as np
 from analysis.statistical_tools import (calculate_descriptive_stats,
                                         calculate_correlation_matrix,
                                         calculate_histogram)
-from analysis.spectral_tools import calculate_fft
+from analysis.spectral_tools import calculate_fft, calculate_psd_welch, calculate_spectrogram
+from analysis.streaming_stats import descriptive_stats_from_summary
+from core.sensor_state import PROCESSED_FIELD_NAMES
 from analysis.anomaly_detection_tools import (
     detect_outliers_zscore,
     detect_anomalies_moving_average,
@@ -122,7 +124,7 @@ class AnalysisWorker(QThread):
     def run(self):
         try:
             if self.analysis_type == "descriptive_stats":
-                result = calculate_descriptive_stats(self.data_dict)
+                result = calculate_descriptive_stats(self.data_dict, extended=True)
             elif self.analysis_type == "correlation":
                 result = calculate_correlation_matrix(self.data_dict)
             elif self.analysis_type == "histogram":
@@ -131,12 +133,30 @@ class AnalysisWorker(QThread):
                     num_bins=self.params.get('num_bins', 50)
                 )
             elif self.analysis_type == "fft":
-                result = calculate_fft(
-                    self.data_dict['data'],
-                    dt=self.params.get('dt', 0.005),
-                    n_fft_points=self.params.get('n_fft_points', 512),
-                    window_type=self.params.get('window_type', 'Hann')
-                )
+                method = self.params.get('method', 'fft')
+                if method == 'welch':
+                    result = calculate_psd_welch(
+                        self.data_dict['data'],
+                        dt=self.params.get('dt', 0.005),
+                        nperseg=self.params.get('nperseg', 256),
+                        overlap=self.params.get('overlap', 0.5),
+                        window_type=self.params.get('window_type', 'Hann')
+                    )
+                elif method == 'spectrogram':
+                    result = calculate_spectrogram(
+                        self.data_dict['data'],
+                        dt=self.params.get('dt', 0.005),
+                        nperseg=self.params.get('nperseg', 256),
+                        overlap=self.params.get('overlap', 0.5),
+                        window_type=self.params.get('window_type', 'Hann')
+                    )
+                else:
+                    result = calculate_fft(
+                        self.data_dict['data'],
+                        dt=self.params.get('dt', 0.005),
+                        n_fft_points=self.params.get('n_fft_points', 512),
+                        window_type=self.params.get('window_type', 'Hann')
+                    )
             elif self.analysis_type == "anomaly":
                 method = self.params.get('method', 'Z-score')
                 if method == "Z-score":
@@ -148,7 +168,8 @@ class AnalysisWorker(QThread):
                     result = detect_anomalies_moving_average(
                         self.data_dict['data'],
                         window_size=self.params.get('window_size', 20),
-                        threshold=self.params.get('threshold', 2.0)
+                        threshold=self.params.get('threshold', 2.0),
+                        center=self.params.get('center', False)
                     )
                 elif method == "Sudden Changes":
                     result = detect_sudden_changes(
@@ -179,6 +200,7 @@ class AdvancedAnalysisScreenWidget(QWidget):
         self.data_processor = data_processor
         self.current_sensor_id = None  # Thêm biến để lưu sensor ID hiện tại
         self.current_data_snapshot = None
+        self.snapshot_dt = None  # dt của cảm biến khi tải snapshot
         self.selected_analysis_fields = []
         self.analysis_worker = None
         self.init_ui()
@@ -208,7 +230,7 @@ class AdvancedAnalysisScreenWidget(QWidget):
         data_points_layout.addWidget(QLabel("Số điểm phân tích:"))
         self.num_data_points_spinbox = QSpinBox()
         self.num_data_points_spinbox.setMinimum(100) # Ví dụ
-        self.num_data_points_spinbox.setMaximum(2000) # Giới hạn bằng max_points của DataProcessor
+        self.num_data_points_spinbox.setMaximum(2000) # Cập nhật theo tầng lưu trữ đầy đủ của cảm biến trong set_current_sensor
         self.num_data_points_spinbox.setValue(1000) # Giá trị mặc định
         data_points_layout.addWidget(self.num_data_points_spinbox)
         left_panel_layout.addLayout(data_points_layout)
@@ -229,6 +251,21 @@ class AdvancedAnalysisScreenWidget(QWidget):
         # Tab 1: Thống kê Mô tả
         self.stats_tab = QWidget()
         self.stats_layout = QVBoxLayout(self.stats_tab)
+        # Phạm vi thống kê: snapshot đã tải, hoặc thống kê tích lũy khi nhận dữ liệu (hiển thị tức thì,
+        # toàn phiên gồm cả dữ liệu đã bị loại khỏi bộ nhớ)
+        stats_scope_layout = QHBoxLayout()
+        stats_scope_layout.addWidget(QLabel("Phạm vi:"))
+        self.stats_scope_combo = QComboBox()
+        self.stats_scope_combo.addItem("Dữ liệu đã tải", 'snapshot')
+        self.stats_scope_combo.addItem("Cửa sổ lưu trữ (tức thì)", 'window')
+        self.stats_scope_combo.addItem("Toàn phiên (tức thì)", 'session')
+        self.stats_scope_combo.currentIndexChanged.connect(
+            lambda: self.on_tab_changed(self.analysis_tabs.currentIndex()))
+        stats_scope_layout.addWidget(self.stats_scope_combo)
+        self.stats_count_label = QLabel("")
+        stats_scope_layout.addWidget(self.stats_count_label)
+        stats_scope_layout.addStretch(1)
+        self.stats_layout.addLayout(stats_scope_layout)
         self.stats_table = QTableWidget()
         self.stats_layout.addWidget(self.stats_table)
         self.analysis_tabs.addTab(self.stats_tab, "Thống kê Mô tả")
@@ -264,9 +301,41 @@ class AdvancedAnalysisScreenWidget(QWidget):
         self.fft_plot_widget.setLabel('left', 'Amplitude')
         self.fft_plot_widget.setLabel('bottom', 'Frequency (Hz)')
         self.fft_plot_widget.showGrid(x=True, y=True)
+        # Phương pháp phổ: FFT một đoạn cuối, PSD Welch (trung bình các đoạn chồng lấp trên toàn bộ dữ liệu) hoặc spectrogram
+        fft_method_layout = QHBoxLayout()
+        fft_method_layout.addWidget(QLabel("Phương pháp:"))
+        self.fft_method_combo = QComboBox()
+        self.fft_method_combo.addItem("FFT (đoạn cuối)", 'fft')
+        self.fft_method_combo.addItem("Welch PSD", 'welch')
+        self.fft_method_combo.addItem("Spectrogram", 'spectrogram')
+        fft_method_layout.addWidget(self.fft_method_combo)
+        fft_method_layout.addWidget(QLabel("Điểm/đoạn:"))
+        self.fft_nperseg_spinbox = QSpinBox()
+        self.fft_nperseg_spinbox.setRange(16, 65536)
+        self.fft_nperseg_spinbox.setValue(256)
+        fft_method_layout.addWidget(self.fft_nperseg_spinbox)
+        fft_method_layout.addWidget(QLabel("Chồng lấp (%):"))
+        self.fft_overlap_spinbox = QSpinBox()
+        self.fft_overlap_spinbox.setRange(0, 90)
+        self.fft_overlap_spinbox.setValue(50)
+        fft_method_layout.addWidget(self.fft_overlap_spinbox)
+        fft_method_layout.addStretch(1)
+        self.fft_spectrogram_widget = pg.PlotWidget(title="Spectrogram")
+        self.fft_spectrogram_widget.setLabel('left', 'Frequency (Hz)')
+        self.fft_spectrogram_widget.setLabel('bottom', 'Time (s)')
+        self.fft_spectrogram_image = pg.ImageItem()
+        self.fft_spectrogram_image.setColorMap(pg.colormap.get('viridis'))
+        self.fft_spectrogram_widget.addItem(self.fft_spectrogram_image)
+        self.fft_spectrogram_widget.hide()
+        rerun_fft = lambda: self.on_tab_changed(self.analysis_tabs.currentIndex())
+        self.fft_method_combo.currentIndexChanged.connect(rerun_fft)
+        self.fft_nperseg_spinbox.editingFinished.connect(rerun_fft)
+        self.fft_overlap_spinbox.editingFinished.connect(rerun_fft)
         self.fft_detail_layout.addWidget(QLabel("Chọn trường dữ liệu (Gia tốc thô) để phân tích FFT:"))
         self.fft_detail_layout.addWidget(self.fft_field_selector_combo)
+        self.fft_detail_layout.addLayout(fft_method_layout)
         self.fft_detail_layout.addWidget(self.fft_plot_widget)
+        self.fft_detail_layout.addWidget(self.fft_spectrogram_widget)
         self.analysis_tabs.addTab(self.fft_detail_tab, "FFT Chi tiết")
         
         # Tab 5: Phân tích Bất thường (MỚI)
@@ -339,7 +408,8 @@ class AdvancedAnalysisScreenWidget(QWidget):
         #     self.clear_all_analysis_outputs()
         #     return
 
-        raw_data_from_dp = self.data_processor.get_plot_data_for_sensor(self.current_sensor_id)
+        # Snapshot trả về các view chỉ đọc và không bị ghi đè, nên không cần sao chép dữ liệu
+        raw_data_from_dp = self.data_processor.get_snapshot_for_sensor(self.current_sensor_id)
         if not raw_data_from_dp:
             self.current_data_snapshot = {
                 'time': np.array([]),
@@ -354,11 +424,12 @@ class AdvancedAnalysisScreenWidget(QWidget):
 
         num_points_to_use = self.num_data_points_spinbox.value()
         self.current_data_snapshot = {}
+        self.snapshot_dt = raw_data_from_dp.get('dt')
         
         # Initialize time data
         time_data_full = raw_data_from_dp.get('time_data', np.array([]))
         actual_num_points = min(num_points_to_use, len(time_data_full))
-        self.current_data_snapshot['time'] = np.copy(time_data_full[-actual_num_points:]) if actual_num_points > 0 else np.array([])
+        self.current_data_snapshot['time'] = time_data_full[-actual_num_points:] if actual_num_points > 0 else np.array([])
 
         # Initialize main data fields
         for dtype_key, data_map in {'acc': raw_data_from_dp.get('acc_data', {}),
@@ -368,18 +439,19 @@ class AdvancedAnalysisScreenWidget(QWidget):
                 field_name = f"{dtype_key.capitalize()}{axis_key.upper()}"
                 axis_data_full = data_map.get(axis_key, np.array([]))
                 if len(axis_data_full) >= actual_num_points:
-                    self.current_data_snapshot[field_name] = np.copy(axis_data_full[-actual_num_points:])
+                    self.current_data_snapshot[field_name] = axis_data_full[-actual_num_points:]
                 elif len(axis_data_full) > 0:
-                    self.current_data_snapshot[field_name] = np.copy(axis_data_full)
+                    self.current_data_snapshot[field_name] = axis_data_full
                 else:
                     self.current_data_snapshot[field_name] = np.array([])
 
-        # Initialize FFT data
-        fft_data = raw_data_from_dp.get('fft_data', {})
+        # Initialize FFT data: chuỗi gia tốc thô (theo thời gian) cho FFT/Welch/spectrogram
+        raw_acc_data = raw_data_from_dp.get('raw_acc_data', {})
         for axis in ['x', 'y', 'z']:
             field_name = f"RawAcc{axis.upper()}_for_fft"
-            if axis in fft_data and fft_data[axis].get('freq') is not None:
-                self.current_data_snapshot[field_name] = np.copy(fft_data[axis]['freq'])
+            axis_data_full = raw_acc_data.get(axis, np.array([]))
+            if actual_num_points > 0 and len(axis_data_full) > 0:
+                self.current_data_snapshot[field_name] = axis_data_full[-actual_num_points:]
             else:
                 self.current_data_snapshot[field_name] = np.array([])
 
@@ -403,6 +475,7 @@ class AdvancedAnalysisScreenWidget(QWidget):
         self.correlation_table.setColumnCount(0)
         if hasattr(self.dist_plot_widget, 'clear'): self.dist_plot_widget.clear() # PlotWidget
         if hasattr(self.fft_plot_widget, 'clear'): self.fft_plot_widget.clear()
+        self.fft_spectrogram_image.clear()
         if hasattr(self.anomaly_plot_widget, 'clear'): self.anomaly_plot_widget.clear()
         self.anomaly_results_table.setRowCount(0)
         self.anomaly_results_table.setColumnCount(0)
@@ -443,6 +516,12 @@ class AdvancedAnalysisScreenWidget(QWidget):
         
 
     def on_tab_changed(self, index):
+        if (TAB_ANALYSIS_TYPE_MAP.get(self.analysis_tabs.tabText(index)) == "descriptive_stats" and
+                self.stats_scope_combo.currentData() != 'snapshot'):
+            self.display_streaming_stats(self.stats_scope_combo.currentData())
+            return
+
+        self.stats_count_label.setText("")
         if self.current_data_snapshot is None:
             QMessageBox.information(self, "Thông báo", "Vui lòng nhấn 'Tải và Phân tích Dữ liệu' trước.")
             self.clear_all_analysis_outputs()
@@ -477,9 +556,12 @@ class AdvancedAnalysisScreenWidget(QWidget):
             selected_field = self.fft_field_selector_combo.currentText()
             if selected_field and selected_field in self.current_data_snapshot:
                 params = {
-                    'dt': self.data_processor.dt_sensor_for_fft_analysis if hasattr(self.data_processor, 'dt_sensor_for_fft_analysis') else 0.005,
+                    'dt': self.snapshot_dt or 0.005,
                     'n_fft_points': self.data_processor.N_FFT_POINTS,
-                    'window_type': 'Hann'
+                    'window_type': 'Hann',
+                    'method': self.fft_method_combo.currentData(),
+                    'nperseg': self.fft_nperseg_spinbox.value(),
+                    'overlap': self.fft_overlap_spinbox.value() / 100.0
                 }
                 data_for_current_tab = {'data': self.current_data_snapshot[selected_field]}
         elif analysis_type == "anomaly":
@@ -507,9 +589,14 @@ class AdvancedAnalysisScreenWidget(QWidget):
             selected_field = self.dist_field_selector_combo.currentText()
             self.display_distribution_analysis(hist_data, bin_edges, selected_field)
         elif analysis_type == "FFT Chi tiết":
-            fft_freq, fft_amp = result
             selected_field = self.fft_field_selector_combo.currentText()
-            self.display_detailed_fft(fft_freq, fft_amp, selected_field)
+            if len(result) == 3:
+                spec_freq, spec_times, spec_psd = result
+                self.display_spectrogram(spec_freq, spec_times, spec_psd, selected_field)
+            else:
+                fft_freq, fft_amp = result
+                self.display_detailed_fft(fft_freq, fft_amp, selected_field,
+                                          is_psd=self.fft_method_combo.currentData() == 'welch')
         elif analysis_type == "Phân tích Bất thường":
             anomaly_indices, anomaly_values = result
             selected_field = self.anomaly_field_selector_combo.currentText()
@@ -555,6 +642,20 @@ class AdvancedAnalysisScreenWidget(QWidget):
             self.anomaly_plot_widget.addLegend()
 
     # --- Các hàm hiển thị (Display functions) ---
+    def display_streaming_stats(self, scope):
+        """Hiển thị thống kê tích lũy của DataProcessor (không cần tải snapshot)."""
+        summary = None
+        if self.current_sensor_id and self.data_processor.has_sensor(self.current_sensor_id):
+            summary = self.data_processor.get_streaming_stats(self.current_sensor_id, scope)
+        if summary is None:
+            self.stats_count_label.setText("")
+            self.display_descriptive_stats([])
+            return
+        # Chỉ các trường đã xử lý (Acc/Vel/Disp) có thống kê tích lũy
+        fields = [f for f in self.selected_analysis_fields if f in PROCESSED_FIELD_NAMES] or None
+        self.stats_count_label.setText(f"Số mẫu: {summary['count']}")
+        self.display_descriptive_stats(descriptive_stats_from_summary(summary, PROCESSED_FIELD_NAMES, fields))
+
     def display_descriptive_stats(self, stats_result_list):
         if not stats_result_list:
             self.stats_table.setRowCount(0)
@@ -607,16 +708,42 @@ class AdvancedAnalysisScreenWidget(QWidget):
         self.dist_plot_widget.addItem(bar_graph)
         self.dist_plot_widget.setTitle(f"Phân phối của {field_name}")
 
-    def display_detailed_fft(self, fft_freq, fft_amp, field_name):
+    def display_detailed_fft(self, fft_freq, fft_amp, field_name, is_psd=False):
+        self.fft_spectrogram_widget.hide()
+        self.fft_plot_widget.show()
+        self.fft_plot_widget.clear()
         if fft_freq is None or fft_amp is None:
-            self.fft_plot_widget.clear()
             return
-        
-            self.fft_plot_widget.clear()
+
+        # PSD Welch trải nhiều bậc độ lớn nên dùng trục y logarit
+        self.fft_plot_widget.setLogMode(x=False, y=is_psd)
+        self.fft_plot_widget.setLabel('left', 'PSD (unit²/Hz)' if is_psd else 'Amplitude')
+        if is_psd:
+            # Bỏ bin bằng 0 (ví dụ DC sau khi khử xu hướng) vì không vẽ được trên trục log
+            positive = fft_amp > 0
+            fft_freq, fft_amp = fft_freq[positive], fft_amp[positive]
         self.fft_plot_widget.plot(fft_freq, fft_amp, pen='r')
-        self.fft_plot_widget.setTitle(f"FFT của {field_name}")
+        self.fft_plot_widget.setTitle(f"{'PSD Welch' if is_psd else 'FFT'} của {field_name}")
+
+    def display_spectrogram(self, freq, times, psd, field_name):
+        self.fft_plot_widget.hide()
+        self.fft_spectrogram_widget.show()
+        if freq.size < 2 or times.size == 0:
+            self.fft_spectrogram_image.clear()
+            return
+
+        # Ảnh theo dB, trục x là thời gian và trục y là tần số (ImageItem dùng thứ tự [x, y])
+        image = 10 * np.log10(np.maximum(psd.T, np.finfo(float).tiny))
+        self.fft_spectrogram_image.setImage(image, autoLevels=True)
+        time_step = times[1] - times[0] if times.size > 1 else 1.0
+        freq_step = freq[1] - freq[0]
+        self.fft_spectrogram_image.setRect(pg.QtCore.QRectF(times[0] - time_step / 2, freq[0] - freq_step / 2,
+                                                            time_step * times.size, freq_step * freq.size))
+        self.fft_spectrogram_widget.setTitle(f"Spectrogram của {field_name} (dB)")
 
     def set_current_sensor(self, sensor_id):
         """Cập nhật sensor ID hiện tại và load lại dữ liệu"""
         self.current_sensor_id = sensor_id
+        if sensor_id and self.data_processor.has_sensor(sensor_id):
+            self.num_data_points_spinbox.setMaximum(self.data_processor.get_recent_capacity(sensor_id))
         self.load_and_analyze_data()
\ No newline at end of file
@@ -289,6 +289,7 @@ class DataHubScreenWidget(QWidget):
         self._internal_column_map_keys = [] # List of 'InternalSensorID_DataKey'
 
         self._last_update_time = {}
+        self._latest_processed_cache = {}  # sensor_id -> (data_version, latest processed values dict)
         self._update_interval_ms = DEFAULT_UPDATE_INTERVAL_MS
         self._max_table_rows = DEFAULT_MAX_TABLE_ROWS # Max rows the model will hold and display
         self._is_updating_model = False
@@ -480,15 +481,21 @@ class DataHubScreenWidget(QWidget):
 
     def _get_latest_processed_data(self, sensor_id):
         try:
-            proc_data = self.data_processor.get_plot_data_for_sensor(sensor_id) #
+            cached_version, cached_values = self._latest_processed_cache.get(sensor_id, (None, None))
+            current_version = self.data_processor.get_data_version(sensor_id)
+            if current_version is None: return None
+            if cached_version is not None and cached_version == current_version:
+                return cached_values
+
+            # Only the samples published after the cached version are served
+            proc_data = self.data_processor.get_snapshot_for_sensor(sensor_id, since_version=cached_version)
             if not proc_data: return None
-            latest_processed = {}
-            for cat_key, cat_data in proc_data.items():
-                if isinstance(cat_data, dict):
-                    if cat_key in ['acc_data', 'vel_data', 'disp_data']:
-                        for axis, arr in cat_data.items():
-                            if isinstance(arr, np.ndarray) and arr.size > 0:
-                                latest_processed[f"{cat_key.replace('_data','')}_{axis}"] = float(arr[-1])
+            latest_processed = dict(cached_values) if cached_values and proc_data['incremental'] else {}
+            for cat_key in ['acc_data', 'vel_data', 'disp_data']:
+                for axis, arr in proc_data.get(cat_key, {}).items():
+                    if isinstance(arr, np.ndarray) and arr.size > 0:
+                        latest_processed[f"{cat_key.replace('_data','')}_{axis}"] = float(arr[-1])
+            self._latest_processed_cache[sensor_id] = (proc_data['version'], latest_processed)
             return latest_processed
         except Exception as e:
             logger.error(f"Error getting processed data: {str(e)}", exc_info=True)
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QMess
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from core.data_processor import DataProcessor
+from core.checkpoint import DEFAULT_CHECKPOINT_DIR
+from core.processing_executor import ProcessingExecutor
 from core.plot_manager import PlotManager
 from ui.display_screen import DisplayScreenWidget
 from ui.sensor_management_screen import SensorManagementScreen
@@ -25,7 +27,11 @@ class MainWindow(QMainWindow):
         self.layout = QVBoxLayout(self.central_widget)
 
         self.sensor_manager = SensorManager(self)
-        self.data_processor = DataProcessor(self)
+        # Trạng thái xử lý được lưu định kỳ để khởi động lại không cần khởi động ấm (warm-up)
+        self.data_processor = DataProcessor(self, checkpoint_dir=DEFAULT_CHECKPOINT_DIR)
+        # Xử lý dữ liệu cảm biến trên các luồng riêng, không chặn luồng giao diện
+        self.processing_executor = ProcessingExecutor(self.data_processor, num_workers=2, parent=self)
+        self.processing_executor.start()
 
         self.tabs = QTabWidget()
         self.display_screen = DisplayScreenWidget()
@@ -54,6 +60,16 @@ class MainWindow(QMainWindow):
         self._connect_signals()
         self.update_display_sensor_selector()
 
+    @property
+    def current_plotting_sensor_id(self):
+        return self._current_plotting_sensor_id
+
+    @current_plotting_sensor_id.setter
+    def current_plotting_sensor_id(self, sensor_id):
+        self._current_plotting_sensor_id = sensor_id
+        # Phổ FFT chỉ được tính cho cảm biến đang hiển thị
+        self.processing_executor.set_fft_sensor(sensor_id)
+
     def _connect_signals(self):
         # SensorManager -> DataProcessor, UI
         self.sensor_manager.sensorDataReceived.connect(self.handle_sensor_data_from_manager)
@@ -116,7 +132,7 @@ class MainWindow(QMainWindow):
         # Add other sensor type dt calculations if necessary
 
         # Ensure DataProcessor has a structure for this sensor with initial kinematic params
-        self.data_processor._ensure_sensor_id_structure(sensor_id, sensor_type, dt_for_dp, initial_kin_params)
+        self.data_processor.register_sensor(sensor_id, sensor_type, dt_for_dp, initial_kin_params)
 
         success = self.sensor_manager.add_sensor(sensor_id, sensor_type, config)
         if success:
@@ -139,6 +155,8 @@ class MainWindow(QMainWindow):
 
         if self.sensor_manager.remove_sensor(sensor_id_to_remove):
             QMessageBox.information(self, "Thành công", f"Đã xóa cảm biến '{sensor_name_for_msg}'.")
+            # Mẫu còn trong hàng đợi của cảm biến đã xóa bị bỏ qua
+            self.processing_executor.remove_sensor(sensor_id_to_remove)
             self.data_processor.remove_sensor_data(sensor_id_to_remove)
             if self.current_plotting_sensor_id == sensor_id_to_remove:
                 self.current_plotting_sensor_id = None
@@ -156,9 +174,7 @@ class MainWindow(QMainWindow):
     def handle_sensor_data_from_manager(self, sensor_id, data_dict):
         sensor_info = self.sensor_manager.get_sensor_info(sensor_id)
         sensor_config = sensor_info.get('config') if sensor_info else {}
-        self.data_processor.handle_incoming_sensor_data(sensor_id, data_dict, sensor_config)
-        if sensor_id == self.current_plotting_sensor_id:
-            self.data_processor.calculate_fft_for_sensor(sensor_id)
+        self.processing_executor.submit(sensor_id, data_dict, sensor_config)
 
     def handle_sensor_connection_status_from_manager(self, sensor_id, connected, message):
         logger.info(f"MainWindow: Connection status for {sensor_id}: {connected}, Msg: {message}")
@@ -266,9 +282,9 @@ class MainWindow(QMainWindow):
         if sensor_id == self.current_plotting_sensor_id:
             logger.info(f"Applying kinematic settings for sensor {sensor_id}: {settings_dict}")
             self.data_processor.update_kinematic_parameters(sensor_id, settings_dict)
-            # Data is reset within update_kinematic_parameters, plotting will use new params.
+            # History is kept; new processors are seeded from retained acceleration (hot-swap).
             QMessageBox.information(self, "Thành công", f"Đã áp dụng cài đặt động học cho cảm biến {sensor_id}.")
-            # If sensor was plotting, it will continue with new params after data reset.
+            # If sensor was plotting, it will continue seamlessly with new params.
             # If it was not plotting but connected, it will use new params when plotting starts.
         else:
             QMessageBox.warning(self, "Lưu ý", "Cài đặt động học chỉ áp dụng cho cảm biến đang được hiển thị đồ thị.")
@@ -277,9 +293,9 @@ class MainWindow(QMainWindow):
         if sensor_id == self.current_plotting_sensor_id:
             logger.info(f"Applying advanced processing settings for sensor {sensor_id}: {settings_dict}")
             self.data_processor.update_advanced_processing_parameters(sensor_id, settings_dict)
-            # Data is reset within update_advanced_processing_parameters, plotting will use new params.
+            # History is kept; new processors are seeded from retained acceleration (hot-swap).
             QMessageBox.information(self, "Thành công", f"Đã áp dụng cài đặt xử lý nâng cao cho cảm biến {sensor_id}.")
-            # If sensor was plotting, it will continue with new params after data reset.
+            # If sensor was plotting, it will continue seamlessly with new params.
             # If it was not plotting but connected, it will use new params when plotting starts.
         else:
             QMessageBox.warning(self, "Lưu ý", "Cài đặt xử lý nâng cao chỉ áp dụng cho cảm biến đang được hiển thị đồ thị.")
@@ -296,6 +312,8 @@ class MainWindow(QMainWindow):
         if self.plot_manager: self.plot_manager.stop_plotting()
         if self.sensor_manager:
             self.sensor_manager.stop_all_sensors()
+        self.processing_executor.stop()
+        self.data_processor.save_all_checkpoints()
         # Give threads a moment to close, though SensorManager should handle waits.
         QThread.msleep(200) 
         super().closeEvent(event)
\ No newline at end of file
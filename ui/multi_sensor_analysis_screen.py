@@ -58,7 +58,7 @@ class MultiSensorAnalysisScreenWidget(QWidget):
         config_layout.addWidget(self.analysis_type_combo)
 
         self.num_data_points_spinbox = QSpinBox()
-        self.num_data_points_spinbox.setRange(100, 5000)
+        self.num_data_points_spinbox.setRange(100, 100000)
         self.num_data_points_spinbox.setValue(1000)
         self.num_data_points_spinbox.setToolTip("Số điểm dữ liệu gần nhất từ mỗi stream để phân tích.")
         config_layout.addWidget(QLabel("Số điểm dữ liệu/stream:"))
@@ -251,21 +251,12 @@ class MultiSensorAnalysisScreenWidget(QWidget):
                 data_category = dtype_map.get(field_key[:-1]) # Acc, Vel, Disp
                 if data_category and axis_map in full_plot_data.get(data_category, {}):
                     target_data_array = full_plot_data[data_category][axis_map]
-            elif field_key.startswith("RawAcc"): # Assuming sds['raw_acc']['x'] from DataProcessor
+            elif field_key.startswith("RawAcc"):
                 axis_map = field_key[-1].lower()
-                if axis_map in full_plot_data.get('raw_acc_data_for_multi_analysis', {}): # DP needs to provide this
-                     # DP's get_plot_data_for_sensor does not return raw_acc directly for plotting in display_screen
-                     # We might need to fetch it separately or enhance get_plot_data_for_sensor.
-                     # For now, let's assume DataProcessor's main data store has sds['raw_acc']
-                    if sensor_id in self.data_processor._sensor_data_store: # Accessing internal for now
-                        target_data_array = self.data_processor._sensor_data_store[sensor_id]['raw_acc'][axis_map]
-                        # Raw data might not share the same time_data as processed.
-                        # This needs careful handling if raw_acc has different length/dt.
-                        # For simplicity, let's assume it uses the same time_data length for now.
-                else: # Fallback for demonstration if DP doesn't explicitly provide raw_acc for multi-analysis
-                    sds = self.data_processor._sensor_data_store.get(sensor_id)
-                    if sds and axis_map in sds['raw_acc']:
-                        target_data_array = sds['raw_acc'][axis_map]
+                # Raw data might not share the same time_data as processed.
+                # This needs careful handling if raw_acc has different length/dt.
+                # For simplicity, let's assume it uses the same time_data length for now.
+                target_data_array = full_plot_data.get('raw_acc_data', {}).get(axis_map)
 
 
             # TODO: Add mapping for FFT data if needed (FFTFreqX, FFTAmpX etc.)
@@ -306,7 +297,7 @@ class MultiSensorAnalysisScreenWidget(QWidget):
              # Find a dt from one of the sensors, assume others are similar for this simple case.
             first_stream_info = selected_streams_details[0]
             s_id = first_stream_info['id']
-            dt_sensor = self.data_processor._sensor_data_store.get(s_id, {}).get('config',{}).get('dt', 0.01)
+            dt_sensor = self.data_processor.get_snapshot_for_sensor(s_id).get('dt') or 0.01
             common_time_vector = np.arange(0, min_len_all_streams * dt_sensor, dt_sensor)[:min_len_all_streams]
 
 
@@ -25,10 +25,18 @@ class SettingsScreenWidget(QWidget):
         }
         self.default_advanced_processing_params = {
             'pre_filter_type': "None",
-            'pre_filter_params': {'cutoff_hz': 0.5, 'order': 2}, # Example for high-pass
+            'pre_filter_params': {'cutoff_hz': 0.5, 'order': 2,
+                                  'high_cutoff_hz': 10.0, # Cho "Band-pass"/"Band-stop"
+                                  'notch_q': 30.0}, # Cho "Notch"
             'integration_method': "Trapezoidal",
-            'detrend_method': "RLS Filter", # Default to RLS
-            'detrend_params': {'poly_order': 2} # Example for polynomial
+            'integration_params': {'low_cut_hz': 1.0, 'high_cut_hz': None, 'segment_size': 512}, # Cho "Frequency"
+            'detrend_method': "RLS", # Default to RLS
+            'detrend_params': {'poly_order': 2, 'kalman_cutoff_hz': 0.3, 'kalman_order': 2},
+            'processing_mode': "Full",
+            'decimation_factor': 1, # > 1: tích phân ở tần số lấy mẫu thấp hơn
+            'decimation_params': {'num_taps': None, 'upsampling': "Linear"},
+            'orientation_mode': "None", # "Angles"/"Angles+Gyro": loại bỏ trọng lực trong hệ tọa độ thế giới
+            'orientation_params': {'fusion_time_constant_s': 0.5}
         }
         self.init_ui()
         self.update_kinematic_inputs_enabled(False) 
@@ -104,7 +112,7 @@ class SettingsScreenWidget(QWidget):
 
         # --- Input Pre-Filter ---
         self.pre_filter_type_combo = QComboBox()
-        self.pre_filter_type_combo.addItems(["None", "High-pass", "Low-pass"]) # "Band-pass" later
+        self.pre_filter_type_combo.addItems(["None", "High-pass", "Low-pass", "Band-pass", "Band-stop", "Notch"])
         self.pre_filter_type_combo.currentTextChanged.connect(self.on_pre_filter_type_changed)
         adv_proc_layout.addRow("Bộ lọc Gia tốc Đầu vào:", self.pre_filter_type_combo)
 
@@ -123,23 +131,69 @@ class SettingsScreenWidget(QWidget):
         self.pre_filter_order_input.setValue(self.default_advanced_processing_params['pre_filter_params']['order'])
         self.pre_filter_order_label = QLabel("Bậc lọc:")
 
+        self.pre_filter_high_cutoff_input = QDoubleSpinBox()
+        self.pre_filter_high_cutoff_input.setRange(0.01, 50.0)
+        self.pre_filter_high_cutoff_input.setDecimals(2)
+        self.pre_filter_high_cutoff_input.setValue(self.default_advanced_processing_params['pre_filter_params']['high_cutoff_hz'])
+        self.pre_filter_high_cutoff_label = QLabel("Tần số cắt trên (Hz):")
+
+        self.pre_filter_notch_q_input = QDoubleSpinBox()
+        self.pre_filter_notch_q_input.setRange(0.5, 100.0)
+        self.pre_filter_notch_q_input.setDecimals(1)
+        self.pre_filter_notch_q_input.setValue(self.default_advanced_processing_params['pre_filter_params']['notch_q'])
+        self.pre_filter_notch_q_input.setToolTip("Hệ số phẩm chất Q: độ rộng dải chặn = tần số trung tâm / Q")
+        self.pre_filter_notch_q_label = QLabel("Hệ số Q:")
+
         # Add to layout (will be shown/hidden)
         self.pre_filter_params_layout.addRow(self.pre_filter_cutoff_label, self.pre_filter_cutoff_input)
         self.pre_filter_params_layout.addRow(self.pre_filter_order_label, self.pre_filter_order_input)
+        self.pre_filter_params_layout.addRow(self.pre_filter_high_cutoff_label, self.pre_filter_high_cutoff_input)
+        self.pre_filter_params_layout.addRow(self.pre_filter_notch_q_label, self.pre_filter_notch_q_input)
         adv_proc_layout.addRow(self.pre_filter_params_widget)
         self.pre_filter_params_widget.setVisible(False) # Initially hidden
 
         # --- Integration Method ---
         self.integration_method_combo = QComboBox()
-        self.integration_method_combo.addItems(["Trapezoidal"]) # "Simpson" later
+        self.integration_method_combo.addItems(["Trapezoidal", "Simpson", "Rectangular", "Frequency"])
         self.integration_method_combo.setCurrentText(self.default_advanced_processing_params['integration_method'])
+        self.integration_method_combo.setToolTip("Frequency: tích phân miền tần số (chia phổ cho jω, giới hạn dải), "
+                                                 "không cần loại bỏ xu hướng; kết quả trễ khoảng một đoạn FFT.")
+        self.integration_method_combo.currentTextChanged.connect(self.on_integration_method_changed)
         adv_proc_layout.addRow("Phương pháp Tích phân:", self.integration_method_combo)
 
+        # Tham số tích phân miền tần số (chỉ hiện khi chọn "Frequency")
+        self.integration_params_widget = QWidget()
+        integration_params_layout = QFormLayout(self.integration_params_widget)
+        integration_params_layout.setContentsMargins(0,0,0,0)
+        default_integration_params = self.default_advanced_processing_params['integration_params']
+        self.integration_low_cut_input = QDoubleSpinBox()
+        self.integration_low_cut_input.setRange(0.01, 100.0)
+        self.integration_low_cut_input.setDecimals(2)
+        self.integration_low_cut_input.setValue(default_integration_params['low_cut_hz'])
+        integration_params_layout.addRow("Tần số cắt dưới (Hz):", self.integration_low_cut_input)
+        self.integration_high_cut_input = QDoubleSpinBox()
+        self.integration_high_cut_input.setRange(0.0, 1000.0)
+        self.integration_high_cut_input.setDecimals(1)
+        self.integration_high_cut_input.setSpecialValueText("Nyquist") # 0 = không giới hạn trên
+        self.integration_high_cut_input.setValue(default_integration_params['high_cut_hz'] or 0.0)
+        integration_params_layout.addRow("Tần số cắt trên (Hz):", self.integration_high_cut_input)
+        self.integration_segment_combo = QComboBox()
+        for size in (128, 256, 512, 1024, 2048):
+            self.integration_segment_combo.addItem(str(size), size)
+        self._set_integration_segment_size(default_integration_params['segment_size'])
+        integration_params_layout.addRow("Độ dài đoạn FFT (mẫu):", self.integration_segment_combo)
+        adv_proc_layout.addRow(self.integration_params_widget)
+        self.integration_params_widget.setVisible(False) # Initially hidden
+
         # --- Detrending Method ---
         self.detrend_method_combo = QComboBox()
-        self.detrend_method_combo.addItems(["RLS Filter", "None"]) # "Polynomial" later
-        self.detrend_method_combo.setCurrentText(self.default_advanced_processing_params['detrend_method'])
-        self.detrend_method_combo.currentTextChanged.connect(self.on_detrend_method_changed)
+        # Tên hiển thị -> tên phương pháp của create_detrender ("Polynomial" later)
+        self.detrend_method_combo.addItem("RLS Filter", "RLS")
+        self.detrend_method_combo.addItem("Kalman", "Kalman")
+        self.detrend_method_combo.addItem("None", "None")
+        self._set_detrend_method(self.default_advanced_processing_params['detrend_method'])
+        self.detrend_method_combo.currentIndexChanged.connect(
+            lambda _: self.on_detrend_method_changed(self.detrend_method_combo.currentData()))
         adv_proc_layout.addRow("Phương pháp Loại bỏ Xu hướng:", self.detrend_method_combo)
         
         # Detrend parameters (e.g., for Polynomial, if added)
@@ -152,9 +206,63 @@ class SettingsScreenWidget(QWidget):
         self.detrend_poly_order_input.setValue(self.default_advanced_processing_params['detrend_params']['poly_order'])
         self.detrend_poly_order_label = QLabel("Bậc đa thức (Polynomial):")
         self.detrend_params_layout.addRow(self.detrend_poly_order_label, self.detrend_poly_order_input)
+        # Kalman: tần số dưới đó tín hiệu được coi là trôi, và bậc mô hình trôi
+        default_detrend_params = self.default_advanced_processing_params['detrend_params']
+        self.detrend_kalman_cutoff_input = QDoubleSpinBox()
+        self.detrend_kalman_cutoff_input.setRange(0.01, 10.0)
+        self.detrend_kalman_cutoff_input.setDecimals(2)
+        self.detrend_kalman_cutoff_input.setSingleStep(0.05)
+        self.detrend_kalman_cutoff_input.setValue(default_detrend_params['kalman_cutoff_hz'])
+        self.detrend_kalman_cutoff_label = QLabel("Tần số cắt Kalman (Hz):")
+        self.detrend_params_layout.addRow(self.detrend_kalman_cutoff_label, self.detrend_kalman_cutoff_input)
+        self.detrend_kalman_order_combo = QComboBox()
+        self.detrend_kalman_order_combo.addItem("1 (trôi vận tốc không đổi)", 1)
+        self.detrend_kalman_order_combo.addItem("2 (trôi gia tốc không đổi)", 2)
+        self.detrend_kalman_order_combo.setCurrentIndex(self.detrend_kalman_order_combo.findData(default_detrend_params['kalman_order']))
+        self.detrend_kalman_order_label = QLabel("Bậc mô hình trôi Kalman:")
+        self.detrend_params_layout.addRow(self.detrend_kalman_order_label, self.detrend_kalman_order_combo)
         adv_proc_layout.addRow(self.detrend_params_widget)
         self.detrend_params_widget.setVisible(False) # Initially hidden
 
+        # --- Processing Mode ---
+        self.processing_mode_combo = QComboBox()
+        self.processing_mode_combo.addItem("Toàn bộ bộ đệm (Full)", "Full")
+        self.processing_mode_combo.addItem("Tăng dần (Incremental, nhanh)", "Incremental")
+        self.processing_mode_combo.setToolTip("Incremental chỉ xử lý các mẫu mới của mỗi frame, "
+                                              "chi phí không phụ thuộc kích thước bộ đệm tính toán.")
+        adv_proc_layout.addRow("Chế độ xử lý:", self.processing_mode_combo)
+
+        # --- Decimation (multirate) ---
+        self.decimation_factor_combo = QComboBox()
+        self.decimation_factor_combo.addItem("1 (Tắt)", 1)
+        for factor in (2, 4, 5, 10):
+            self.decimation_factor_combo.addItem(str(factor), factor)
+        self.decimation_factor_combo.setToolTip("Lọc chống chồng phổ và giảm tần số lấy mẫu trước khi tích phân. "
+                                                "Phải là ước của Kích thước Frame Mẫu.")
+        adv_proc_layout.addRow("Hệ số giảm mẫu:", self.decimation_factor_combo)
+        self.upsampling_combo = QComboBox()
+        self.upsampling_combo.addItem("Nội suy tuyến tính (Linear)", "Linear")
+        self.upsampling_combo.addItem("Giữ mẫu (Hold, nhanh hơn)", "Hold")
+        adv_proc_layout.addRow("Tăng mẫu đầu ra:", self.upsampling_combo)
+
+        # --- Orientation (gravity removal in the world frame) ---
+        self.orientation_mode_combo = QComboBox()
+        self.orientation_mode_combo.addItem("Tắt (trừ 1 g trên trục Z)", "None")
+        self.orientation_mode_combo.addItem("Theo góc (angleX/Y/Z)", "Angles")
+        self.orientation_mode_combo.addItem("Góc + Gyro (lọc bù)", "Angles+Gyro")
+        self.orientation_mode_combo.setToolTip("Quay gia tốc sang hệ tọa độ thế giới (Z hướng lên) theo góc của cảm biến "
+                                               "và trừ trọng lực ở đó, tránh rò trọng lực khi cảm biến bị nghiêng.")
+        self.orientation_mode_combo.currentIndexChanged.connect(self.on_orientation_mode_changed)
+        adv_proc_layout.addRow("Bù hướng cảm biến:", self.orientation_mode_combo)
+        self.fusion_time_constant_input = QDoubleSpinBox()
+        self.fusion_time_constant_input.setRange(0.05, 10.0)
+        self.fusion_time_constant_input.setDecimals(2)
+        self.fusion_time_constant_input.setSingleStep(0.1)
+        self.fusion_time_constant_input.setValue(self.default_advanced_processing_params['orientation_params']['fusion_time_constant_s'])
+        self.fusion_time_constant_input.setToolTip("Hằng số thời gian của bộ lọc bù góc/gyro: "
+                                                   "nhỏ hơn thì tin góc đo nhiều hơn.")
+        adv_proc_layout.addRow("Hằng số thời gian lọc bù (s):", self.fusion_time_constant_input)
+
         main_layout.addWidget(self.adv_processing_group)
         
         # === Apply Button for ALL settings ===
@@ -165,7 +273,9 @@ class SettingsScreenWidget(QWidget):
 
         main_layout.addStretch(1)
         self.on_pre_filter_type_changed(self.pre_filter_type_combo.currentText()) # Initial setup for visibility
-        self.on_detrend_method_changed(self.detrend_method_combo.currentText()) # Initial setup for RLS param visibility
+        self.on_detrend_method_changed(self.detrend_method_combo.currentData()) # Initial setup for RLS param visibility
+        self.on_integration_method_changed(self.integration_method_combo.currentText())
+        self.on_orientation_mode_changed()
 
     def on_display_rate_changed(self):
         rate_hz = self.frame_rate_combo.currentData()
@@ -178,19 +288,39 @@ class SettingsScreenWidget(QWidget):
     def on_pre_filter_type_changed(self, filter_type):
         is_active = filter_type != "None"
         self.pre_filter_params_widget.setVisible(is_active)
+        for widget in (self.pre_filter_cutoff_input, self.pre_filter_order_input,
+                       self.pre_filter_high_cutoff_input, self.pre_filter_notch_q_input):
+            widget.setEnabled(self.pre_filter_type_combo.isEnabled() and is_active)
+        is_band = filter_type in ("Band-pass", "Band-stop")
+        is_notch = filter_type == "Notch"
         if filter_type == "High-pass":
             self.pre_filter_cutoff_label.setText("Tần số cắt HP (Hz):")
-            self.pre_filter_order_label.setVisible(True)
-            self.pre_filter_order_input.setVisible(True)
         elif filter_type == "Low-pass":
             self.pre_filter_cutoff_label.setText("Tần số cắt LP (Hz):")
-            self.pre_filter_order_label.setVisible(True)
-            self.pre_filter_order_input.setVisible(True)
-        # Add "Band-pass" logic here if implemented (two cutoff inputs)
+        elif is_band:
+            self.pre_filter_cutoff_label.setText("Tần số cắt dưới (Hz):")
+        elif is_notch:
+            self.pre_filter_cutoff_label.setText("Tần số trung tâm (Hz):")
+        # Bộ lọc notch là bậc 2 cố định, độ rộng dải chặn do hệ số Q quyết định
+        self.pre_filter_order_label.setVisible(not is_notch)
+        self.pre_filter_order_input.setVisible(not is_notch)
+        self.pre_filter_high_cutoff_label.setVisible(is_band)
+        self.pre_filter_high_cutoff_input.setVisible(is_band)
+        self.pre_filter_notch_q_label.setVisible(is_notch)
+        self.pre_filter_notch_q_input.setVisible(is_notch)
+
+    def on_integration_method_changed(self, integration_method):
+        # Tích phân miền tần số tự giới hạn dải nên không dùng bước loại bỏ xu hướng
+        is_frequency = integration_method == "Frequency"
+        self.integration_params_widget.setVisible(is_frequency)
+        self.detrend_method_combo.setEnabled(self.integration_method_combo.isEnabled() and not is_frequency)
 
     def on_detrend_method_changed(self, detrend_method):
         # Show/hide RLS specific params in the Kinematic group
-        rls_active = detrend_method == "RLS Filter"
+        rls_active = detrend_method == "RLS"
+        inputs_enabled = self.sample_frame_size_input.isEnabled()
+        self.rls_filter_q_vel_input.setEnabled(inputs_enabled and rls_active)
+        self.rls_filter_q_disp_input.setEnabled(inputs_enabled and rls_active)
         self.label_rls_q_vel.setVisible(rls_active)
         self.rls_filter_q_vel_input.setVisible(rls_active)
         self.label_rls_q_disp.setVisible(rls_active)
@@ -198,17 +328,28 @@ class SettingsScreenWidget(QWidget):
         
         # Show/hide other detrend method params
         poly_active = detrend_method == "Polynomial" # Example
-        self.detrend_params_widget.setVisible(poly_active)
-        if poly_active:
-            self.detrend_poly_order_label.setVisible(True)
-            self.detrend_poly_order_input.setVisible(True)
-        else:
-            self.detrend_poly_order_label.setVisible(False)
-            self.detrend_poly_order_input.setVisible(False)
+        kalman_active = detrend_method == "Kalman"
+        self.detrend_params_widget.setVisible(poly_active or kalman_active)
+        self.detrend_poly_order_label.setVisible(poly_active)
+        self.detrend_poly_order_input.setVisible(poly_active)
+        for widget in (self.detrend_kalman_cutoff_label, self.detrend_kalman_cutoff_input,
+                       self.detrend_kalman_order_label, self.detrend_kalman_order_combo):
+            widget.setVisible(kalman_active)
 
 
     def on_apply_all_settings(self):
         if self._current_sensor_id_for_settings:
+            decimation_factor = self.decimation_factor_combo.currentData()
+            if self.sample_frame_size_input.value() % decimation_factor:
+                QMessageBox.warning(self, "Cài đặt không hợp lệ",
+                                    f"Hệ số giảm mẫu ({decimation_factor}) phải là ước của Kích thước Frame Mẫu "
+                                    f"({self.sample_frame_size_input.value()}).")
+                return
+            if (self.pre_filter_type_combo.currentText() in ("Band-pass", "Band-stop") and
+                    self.pre_filter_high_cutoff_input.value() <= self.pre_filter_cutoff_input.value()):
+                QMessageBox.warning(self, "Cài đặt không hợp lệ",
+                                    "Tần số cắt trên của bộ lọc dải phải lớn hơn tần số cắt dưới.")
+                return
             # Kinematic settings
             kin_settings = {
                 'sample_frame_size': self.sample_frame_size_input.value(),
@@ -224,14 +365,32 @@ class SettingsScreenWidget(QWidget):
                 'pre_filter_type': self.pre_filter_type_combo.currentText(),
                 'pre_filter_params': {
                     'cutoff_hz': self.pre_filter_cutoff_input.value(),
-                    'order': self.pre_filter_order_input.value()
-                    # Add more params like high_cutoff_hz for band-pass later
+                    'order': self.pre_filter_order_input.value(),
+                    'high_cutoff_hz': self.pre_filter_high_cutoff_input.value(),
+                    'notch_q': self.pre_filter_notch_q_input.value()
                 },
                 'integration_method': self.integration_method_combo.currentText(),
-                'detrend_method': self.detrend_method_combo.currentText(),
+                'integration_params': {
+                    'low_cut_hz': self.integration_low_cut_input.value(),
+                    'high_cut_hz': self.integration_high_cut_input.value() or None,
+                    'segment_size': self.integration_segment_combo.currentData()
+                },
+                'detrend_method': self.detrend_method_combo.currentData(),
                 'detrend_params': {
-                    'poly_order': self.detrend_poly_order_input.value()
+                    'poly_order': self.detrend_poly_order_input.value(),
+                    'kalman_cutoff_hz': self.detrend_kalman_cutoff_input.value(),
+                    'kalman_order': self.detrend_kalman_order_combo.currentData()
                     # RLS q values are part of kin_settings if detrend_method is RLS
+                },
+                'processing_mode': self.processing_mode_combo.currentData(),
+                'decimation_factor': decimation_factor,
+                'decimation_params': {
+                    'num_taps': None,
+                    'upsampling': self.upsampling_combo.currentData()
+                },
+                'orientation_mode': self.orientation_mode_combo.currentData(),
+                'orientation_params': {
+                    'fusion_time_constant_s': self.fusion_time_constant_input.value()
                 }
             }
             self.advanced_processing_settings_applied.emit(self._current_sensor_id_for_settings, adv_settings)
@@ -266,12 +425,21 @@ class SettingsScreenWidget(QWidget):
             pre_filter_p = loaded_adv_params.get('pre_filter_params', self.default_advanced_processing_params['pre_filter_params'])
             self.pre_filter_cutoff_input.setValue(pre_filter_p.get('cutoff_hz', self.default_advanced_processing_params['pre_filter_params']['cutoff_hz']))
             self.pre_filter_order_input.setValue(pre_filter_p.get('order', self.default_advanced_processing_params['pre_filter_params']['order']))
+            self.pre_filter_high_cutoff_input.setValue(pre_filter_p.get('high_cutoff_hz', self.default_advanced_processing_params['pre_filter_params']['high_cutoff_hz']))
+            self.pre_filter_notch_q_input.setValue(pre_filter_p.get('notch_q', self.default_advanced_processing_params['pre_filter_params']['notch_q']))
             
             self.integration_method_combo.setCurrentText(loaded_adv_params.get('integration_method', self.default_advanced_processing_params['integration_method']))
-            self.detrend_method_combo.setCurrentText(loaded_adv_params.get('detrend_method', self.default_advanced_processing_params['detrend_method']))
+            self._set_integration_params(loaded_adv_params.get('integration_params', self.default_advanced_processing_params['integration_params']))
+            self._set_detrend_method(loaded_adv_params.get('detrend_method', self.default_advanced_processing_params['detrend_method']))
             
             detrend_p = loaded_adv_params.get('detrend_params', self.default_advanced_processing_params['detrend_params'])
             self.detrend_poly_order_input.setValue(detrend_p.get('poly_order', self.default_advanced_processing_params['detrend_params']['poly_order']))
+            self._set_kalman_params(detrend_p)
+            self._set_processing_mode(loaded_adv_params.get('processing_mode', self.default_advanced_processing_params['processing_mode']))
+            self._set_decimation(loaded_adv_params.get('decimation_factor', self.default_advanced_processing_params['decimation_factor']),
+                                 loaded_adv_params.get('decimation_params', self.default_advanced_processing_params['decimation_params']))
+            self._set_orientation(loaded_adv_params.get('orientation_mode', self.default_advanced_processing_params['orientation_mode']),
+                                  loaded_adv_params.get('orientation_params', self.default_advanced_processing_params['orientation_params']))
 
         else: # No sensor active, load defaults
             self.load_default_kinematic_params()
@@ -279,7 +447,8 @@ class SettingsScreenWidget(QWidget):
         
         # Update visibility based on loaded/default combo values
         self.on_pre_filter_type_changed(self.pre_filter_type_combo.currentText())
-        self.on_detrend_method_changed(self.detrend_method_combo.currentText())
+        self.on_detrend_method_changed(self.detrend_method_combo.currentData())
+        self.on_integration_method_changed(self.integration_method_combo.currentText())
 
 
     def load_default_kinematic_params(self):
@@ -295,20 +464,81 @@ class SettingsScreenWidget(QWidget):
         self.pre_filter_type_combo.setCurrentText(self.default_advanced_processing_params['pre_filter_type'])
         self.pre_filter_cutoff_input.setValue(self.default_advanced_processing_params['pre_filter_params']['cutoff_hz'])
         self.pre_filter_order_input.setValue(self.default_advanced_processing_params['pre_filter_params']['order'])
+        self.pre_filter_high_cutoff_input.setValue(self.default_advanced_processing_params['pre_filter_params']['high_cutoff_hz'])
+        self.pre_filter_notch_q_input.setValue(self.default_advanced_processing_params['pre_filter_params']['notch_q'])
         self.integration_method_combo.setCurrentText(self.default_advanced_processing_params['integration_method'])
-        self.detrend_method_combo.setCurrentText(self.default_advanced_processing_params['detrend_method'])
+        self._set_integration_params(self.default_advanced_processing_params['integration_params'])
+        self._set_detrend_method(self.default_advanced_processing_params['detrend_method'])
         self.detrend_poly_order_input.setValue(self.default_advanced_processing_params['detrend_params']['poly_order'])
+        self._set_kalman_params(self.default_advanced_processing_params['detrend_params'])
+        self._set_processing_mode(self.default_advanced_processing_params['processing_mode'])
+        self._set_decimation(self.default_advanced_processing_params['decimation_factor'],
+                             self.default_advanced_processing_params['decimation_params'])
+        self._set_orientation(self.default_advanced_processing_params['orientation_mode'],
+                              self.default_advanced_processing_params['orientation_params'])
         # Ensure conditional UI updates
         self.on_pre_filter_type_changed(self.pre_filter_type_combo.currentText())
-        self.on_detrend_method_changed(self.detrend_method_combo.currentText())
-
+        self.on_detrend_method_changed(self.detrend_method_combo.currentData())
+        self.on_integration_method_changed(self.integration_method_combo.currentText())
+
+
+    def _set_detrend_method(self, method):
+        if method == "RLS Filter": # Tên hiển thị cũ
+            method = "RLS"
+        index = self.detrend_method_combo.findData(method)
+        if index >= 0:
+            self.detrend_method_combo.setCurrentIndex(index)
+
+    def _set_kalman_params(self, params):
+        defaults = self.default_advanced_processing_params['detrend_params']
+        self.detrend_kalman_cutoff_input.setValue(params.get('kalman_cutoff_hz', defaults['kalman_cutoff_hz']))
+        index = self.detrend_kalman_order_combo.findData(params.get('kalman_order', defaults['kalman_order']))
+        if index >= 0:
+            self.detrend_kalman_order_combo.setCurrentIndex(index)
+
+    def _set_integration_params(self, params):
+        defaults = self.default_advanced_processing_params['integration_params']
+        self.integration_low_cut_input.setValue(params.get('low_cut_hz', defaults['low_cut_hz']))
+        self.integration_high_cut_input.setValue(params.get('high_cut_hz') or 0.0)
+        self._set_integration_segment_size(params.get('segment_size', defaults['segment_size']))
+
+    def _set_integration_segment_size(self, size):
+        index = self.integration_segment_combo.findData(size)
+        if index >= 0:
+            self.integration_segment_combo.setCurrentIndex(index)
+
+    def _set_processing_mode(self, mode):
+        index = self.processing_mode_combo.findData(mode)
+        if index >= 0:
+            self.processing_mode_combo.setCurrentIndex(index)
+
+    def _set_decimation(self, factor, params):
+        index = self.decimation_factor_combo.findData(factor)
+        if index >= 0:
+            self.decimation_factor_combo.setCurrentIndex(index)
+        index = self.upsampling_combo.findData((params or {}).get('upsampling', "Linear"))
+        if index >= 0:
+            self.upsampling_combo.setCurrentIndex(index)
+
+    def _set_orientation(self, mode, params):
+        index = self.orientation_mode_combo.findData(mode)
+        if index >= 0:
+            self.orientation_mode_combo.setCurrentIndex(index)
+        defaults = self.default_advanced_processing_params['orientation_params']
+        self.fusion_time_constant_input.setValue((params or {}).get('fusion_time_constant_s',
+                                                                    defaults['fusion_time_constant_s']))
+
+    def on_orientation_mode_changed(self):
+        # Hằng số thời gian chỉ dùng khi kết hợp gyro
+        self.fusion_time_constant_input.setEnabled(self.orientation_mode_combo.isEnabled() and
+                                                   self.orientation_mode_combo.currentData() == "Angles+Gyro")
 
     def update_kinematic_inputs_enabled(self, enabled):
         # ... (same as before, affects RLS params visibility too via on_detrend_method_changed) ...
         self.sample_frame_size_input.setEnabled(enabled)
         self.calc_frame_multiplier_input.setEnabled(enabled)
-        self.rls_filter_q_vel_input.setEnabled(enabled and self.detrend_method_combo.currentText() == "RLS Filter")
-        self.rls_filter_q_disp_input.setEnabled(enabled and self.detrend_method_combo.currentText() == "RLS Filter")
+        self.rls_filter_q_vel_input.setEnabled(enabled and self.detrend_method_combo.currentData() == "RLS")
+        self.rls_filter_q_disp_input.setEnabled(enabled and self.detrend_method_combo.currentData() == "RLS")
         self.warmup_frames_input.setEnabled(enabled)
         # Apply button is now global
         # self.apply_kinematic_button.setEnabled(enabled)
@@ -318,7 +548,17 @@ class SettingsScreenWidget(QWidget):
         self.pre_filter_type_combo.setEnabled(enabled)
         self.pre_filter_cutoff_input.setEnabled(enabled and self.pre_filter_type_combo.currentText() != "None")
         self.pre_filter_order_input.setEnabled(enabled and self.pre_filter_type_combo.currentText() != "None")
+        self.pre_filter_high_cutoff_input.setEnabled(enabled and self.pre_filter_type_combo.currentText() != "None")
+        self.pre_filter_notch_q_input.setEnabled(enabled and self.pre_filter_type_combo.currentText() != "None")
         self.integration_method_combo.setEnabled(enabled)
-        self.detrend_method_combo.setEnabled(enabled)
-        self.detrend_poly_order_input.setEnabled(enabled and self.detrend_method_combo.currentText() == "Polynomial")
+        self.integration_params_widget.setEnabled(enabled)
+        self.detrend_method_combo.setEnabled(enabled and self.integration_method_combo.currentText() != "Frequency")
+        self.processing_mode_combo.setEnabled(enabled)
+        self.decimation_factor_combo.setEnabled(enabled)
+        self.upsampling_combo.setEnabled(enabled)
+        self.orientation_mode_combo.setEnabled(enabled)
+        self.on_orientation_mode_changed()
+        self.detrend_poly_order_input.setEnabled(enabled and self.detrend_method_combo.currentData() == "Polynomial")
+        self.detrend_kalman_cutoff_input.setEnabled(enabled)
+        self.detrend_kalman_order_combo.setEnabled(enabled)
         self.apply_all_settings_button.setEnabled(enabled)
\ No newline at end of file